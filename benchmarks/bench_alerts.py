@@ -0,0 +1,39 @@
+"""
+Benchmark: update_stock throughput for a product hovering around its safety stock threshold.
+
+"warning per update" is the default manager, which formats and logs an alert on every update at or below the
+threshold; "alert engine" raises only threshold crossings and dispatches them from a background worker.
+Log output goes to a NullHandler so only the cost on the write path is measured.
+
+Run with: python -m benchmarks.bench_alerts [UPDATES]
+"""
+import logging
+import sys
+import time
+
+from oes_core.alerts import AlertEngine
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+
+def run(manager: InventoryManager, updates: int) -> float:
+    product = Product(sku="HOVER1", name="Hovering Item", price=1.0, current_stock=10, safety_stock_threshold=10)
+    manager.add_product(product)
+    up = Transaction(product_id=product.product_id, quantity_change=1, transaction_type=Transaction.TYPE_ADJUSTMENT)
+    down = Transaction(product_id=product.product_id, quantity_change=-1, transaction_type=Transaction.TYPE_ADJUSTMENT)
+    start = time.perf_counter()
+    for i in range(updates):
+        manager.update_stock(up if i % 2 else down)
+    return updates / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    inventory_logger = logging.getLogger("oes_core.inventory")
+    inventory_logger.addHandler(logging.NullHandler())
+    inventory_logger.propagate = False
+
+    print(f"warning per update: {run(InventoryManager(), updates):12,.0f} updates/s")
+    with AlertEngine(hysteresis=2) as engine:
+        print(f"alert engine:       {run(InventoryManager(alert_engine=engine), updates):12,.0f} updates/s")
+    print(f"alerts raised by the engine: {engine.stats()['raised']}")
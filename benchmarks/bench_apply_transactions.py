@@ -0,0 +1,49 @@
+"""
+Benchmark: InventoryManager.apply_transactions vs. one update_stock call per transaction.
+
+Run with: python -m benchmarks.bench_apply_transactions [BURST ...]
+"""
+import random
+import sys
+import time
+from typing import List, Tuple
+
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+
+def build(burst: int, catalog: int = 5_000, seed: int = 99) -> Tuple[InventoryManager, List[Transaction]]:
+    rng = random.Random(seed)
+    manager = InventoryManager()
+    product_ids = []
+    for i in range(catalog):
+        product = Product(sku=f"SKU{i}", name=f"Item {i}", price=1.0, current_stock=1_000, safety_stock_threshold=0)
+        manager.add_product(product)
+        product_ids.append(product.product_id)
+    transactions = [
+        Transaction(product_id=rng.choice(product_ids), quantity_change=rng.randrange(1, 10),
+                    transaction_type=Transaction.TYPE_INBOUND)
+        for _ in range(burst)
+    ]
+    return manager, transactions
+
+
+def run(burst: int) -> None:
+    manager, transactions = build(burst)
+    start = time.perf_counter()
+    for transaction in transactions:
+        manager.update_stock(transaction)
+    sequential = time.perf_counter() - start
+
+    manager, transactions = build(burst)
+    start = time.perf_counter()
+    manager.apply_transactions(transactions)
+    batched = time.perf_counter() - start
+
+    print(f"burst={burst:>7,}: update_stock loop {sequential * 1e3:8.1f} ms | apply_transactions "
+          f"{batched * 1e3:8.1f} ms | speedup x{sequential / batched:.1f}")
+
+
+if __name__ == "__main__":
+    for burst in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]:
+        run(burst)
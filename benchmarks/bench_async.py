@@ -0,0 +1,69 @@
+"""
+Benchmark: stock updates from many concurrent coroutines through AsyncInventoryManager.
+
+Compares calling InventoryManager.update_stock inline from each coroutine with awaiting
+AsyncInventoryManager.update_stock, whose calls are coalesced into apply_transactions micro-batches.
+Run with: python -m benchmarks.bench_async [COROUTINES] [UPDATES_PER_COROUTINE]
+"""
+import asyncio
+import logging
+import sys
+import time
+
+from oes_core.async_inventory import AsyncInventoryManager
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+
+def _catalog(count: int = 100):
+    return [Product(sku=f"ASYNC{i}", name=f"Async {i}", price=1.0, current_stock=1, safety_stock_threshold=0)
+            for i in range(count)]
+
+
+def _transactions(products, coroutines: int, updates: int):
+    return [[Transaction(product_id=products[(c + u) % len(products)].product_id, quantity_change=1,
+                         transaction_type=Transaction.TYPE_INBOUND) for u in range(updates)]
+            for c in range(coroutines)]
+
+
+async def inline(coroutines: int, updates: int) -> float:
+    manager = InventoryManager()
+    products = _catalog()
+    manager.add_products(products)
+    work = _transactions(products, coroutines, updates)
+
+    async def client(transactions):
+        for transaction in transactions:
+            manager.update_stock(transaction)
+            await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(transactions) for transactions in work))
+    return time.perf_counter() - start
+
+
+async def micro_batched(coroutines: int, updates: int) -> float:
+    async with AsyncInventoryManager() as inventory:
+        products = _catalog()
+        await inventory.add_products(products)
+        work = _transactions(products, coroutines, updates)
+
+        async def client(transactions):
+            for transaction in transactions:
+                await inventory.update_stock(transaction)
+        start = time.perf_counter()
+        await asyncio.gather(*(client(transactions) for transactions in work))
+        elapsed = time.perf_counter() - start
+        print(f"  {inventory.stats()}")
+        return elapsed
+
+
+if __name__ == "__main__":
+    package_logger = logging.getLogger("oes_core")
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+    coroutines = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    total = coroutines * updates
+    for name, scenario in (("inline update_stock", inline), ("micro-batched", micro_batched)):
+        elapsed = asyncio.run(scenario(coroutines, updates))
+        print(f"{name:<20} {total / elapsed:>12,.0f} updates/s")
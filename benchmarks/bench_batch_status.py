@@ -0,0 +1,39 @@
+"""
+Benchmark: perform_batch_status_check latency with a simulated 10-50 ms upstream.
+
+Run with: python -m benchmarks.bench_batch_status [ITEMS]
+"""
+import asyncio
+import random
+import sys
+import time
+from unittest import mock
+
+from oes_core.inventory import InventoryManager
+
+
+def main(size: int) -> None:
+    rng = random.Random(5)
+    latencies = {f"ITEM{i}": rng.uniform(0.01, 0.05) for i in range(size)}
+    items = list(latencies)
+
+    def fake_status(item):
+        time.sleep(latencies[item])
+        return 200
+
+    manager = InventoryManager()
+    print(f"{size} items, sum of latencies {sum(latencies.values()):.2f} s, slowest {max(latencies.values()) * 1e3:.0f} ms")
+    with mock.patch('oes_core.utils.get_external_status', side_effect=fake_status):
+        for workers in (8, 32, 128):
+            start = time.perf_counter()
+            manager.perform_batch_status_check(items, max_workers=workers)
+            threaded = time.perf_counter() - start
+            start = time.perf_counter()
+            asyncio.run(manager.perform_batch_status_check_async(items, concurrency=workers))
+            async_time = time.perf_counter() - start
+            print(f"  concurrency {workers:>3}: thread pool {threaded:6.2f} s | asyncio {async_time:6.2f} s "
+                  f"| rounds {-(-size // workers)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000)
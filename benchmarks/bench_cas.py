@@ -0,0 +1,85 @@
+"""
+Benchmark: contended reservations (read stock, decide, take one unit) from many threads.
+
+Compares one coarse lock held around every read-decide-write cycle with optimistic cycles: a lock-free
+get_versioned_stock read and a compare_and_update that is retried on VersionConflictError. Reports reservations
+per second and how many optimistic attempts conflicted.
+Run with: python -m benchmarks.bench_cas [THREADS] [RESERVATIONS_PER_THREAD] [PRODUCTS]
+"""
+import logging
+import random
+import sys
+import threading
+import time
+
+from oes_core.inventory import InventoryManager, VersionConflictError
+from oes_core.models import Product, Transaction
+
+
+def _manager(products: int):
+    manager = InventoryManager(thread_safe=True)
+    catalog = [Product(sku=f"CAS{i}", name=f"Cas {i}", price=1.0, current_stock=10_000_000, safety_stock_threshold=0)
+               for i in range(products)]
+    manager.add_products(catalog)
+    return manager, [product.product_id for product in catalog]
+
+
+def _run(threads: int, work) -> float:
+    workers = [threading.Thread(target=work, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def coarse_lock(threads: int, reservations: int, products: int) -> float:
+    manager, product_ids = _manager(products)
+    lock = threading.Lock()
+
+    def work(seed):
+        rng = random.Random(seed)
+        for _ in range(reservations):
+            product_id = rng.choice(product_ids)
+            with lock:
+                if manager.get_product(product_id).current_stock >= 1:
+                    manager.update_stock(Transaction(product_id=product_id, quantity_change=-1,
+                                                     transaction_type=Transaction.TYPE_OUTBOUND))
+    return _run(threads, work)
+
+
+def optimistic(threads: int, reservations: int, products: int) -> float:
+    manager, product_ids = _manager(products)
+    conflicts = [0] * threads
+
+    def work(seed):
+        rng = random.Random(seed)
+        for _ in range(reservations):
+            product_id = rng.choice(product_ids)
+            while True:
+                stock, version = manager.get_versioned_stock(product_id)
+                if stock < 1:
+                    break
+                try:
+                    manager.compare_and_update(product_id, version, Transaction(
+                        product_id=product_id, quantity_change=-1, transaction_type=Transaction.TYPE_OUTBOUND))
+                    break
+                except VersionConflictError:
+                    conflicts[seed] += 1
+    elapsed = _run(threads, work)
+    print(f"  {sum(conflicts):,} conflicts retried")
+    return elapsed
+
+
+if __name__ == "__main__":
+    package_logger = logging.getLogger("oes_core")
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    reservations = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    products = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    total = threads * reservations
+    for name, scenario in (("coarse lock", coarse_lock), ("compare-and-update", optimistic)):
+        elapsed = scenario(threads, reservations, products)
+        print(f"{name:<20} {total / elapsed:>12,.0f} reservations/s")
@@ -0,0 +1,87 @@
+"""
+Benchmark: noticing stock changes by polling list_all_products() vs consuming the ChangeFeed.
+
+Each round applies UPDATES update_stock calls spread over a hot subset of the catalog, then a consumer catches
+up: either by copying the whole catalog and diffing stock against its previous copy, or by polling a coalesced
+subscription. Also reports the write-path cost of publishing (update_stock with and without a feed).
+Run with: python -m benchmarks.bench_changes [CATALOG_SIZE] [UPDATES_PER_ROUND] [ROUNDS]
+"""
+import logging
+import random
+import sys
+import time
+
+from oes_core.changes import ChangeFeed
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+
+def _setup(size: int, feed):
+    manager = InventoryManager(change_feed=feed)
+    products = [Product(sku=f"CDC{i}", name=f"Item {i}", price=1.0, current_stock=100, safety_stock_threshold=0)
+                for i in range(size)]
+    manager.add_products(products)
+    return manager, [product.product_id for product in products]
+
+
+def _updates(product_ids, count: int, rng: random.Random):
+    hot = product_ids[:max(1, len(product_ids) // 100)]
+    return [Transaction(product_id=rng.choice(hot), quantity_change=1, transaction_type=Transaction.TYPE_INBOUND)
+            for _ in range(count)]
+
+
+def write_cost(size: int, updates: int) -> None:
+    rng = random.Random(7)
+    for name, feed in (("no feed", None), ("with feed", ChangeFeed())):
+        manager, product_ids = _setup(size, feed)
+        transactions = _updates(product_ids, updates, rng)
+        start = time.perf_counter()
+        for transaction in transactions:
+            manager.update_stock(transaction)
+        elapsed = time.perf_counter() - start
+        print(f"update_stock {name:<10} {elapsed / updates * 1e9:>8,.0f} ns/call")
+
+
+def consume(size: int, updates: int, rounds: int) -> None:
+    rng = random.Random(7)
+    manager, product_ids = _setup(size, None)
+    last_seen = {product.product_id: product.current_stock for product in manager.list_all_products()}
+    polling = 0.0
+    changed = 0
+    for _ in range(rounds):
+        for transaction in _updates(product_ids, updates, rng):
+            manager.update_stock(transaction)
+        start = time.perf_counter()
+        current = {product.product_id: product.current_stock for product in manager.list_all_products()}
+        changed += sum(1 for product_id, stock in current.items() if last_seen.get(product_id) != stock)
+        last_seen = current
+        polling += time.perf_counter() - start
+    print(f"poll list_all_products  {polling / rounds * 1e3:>8.2f} ms/round  ({changed / rounds:,.0f} changed)")
+
+    feed = ChangeFeed()
+    manager, product_ids = _setup(size, feed)
+    subscription = feed.subscribe(coalesced=True)
+    feed_time = 0.0
+    changed = 0
+    for _ in range(rounds):
+        for transaction in _updates(product_ids, updates, rng):
+            manager.update_stock(transaction)
+        start = time.perf_counter()
+        while True:
+            events = subscription.poll(max_events=updates + size)
+            if not events:
+                break
+            changed += len(events)
+        feed_time += time.perf_counter() - start
+    print(f"coalesced change feed   {feed_time / rounds * 1e3:>8.2f} ms/round  ({changed / rounds:,.0f} events)")
+
+
+if __name__ == "__main__":
+    package_logger = logging.getLogger("oes_core")
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    write_cost(size, updates * rounds)
+    consume(size, updates, rounds)
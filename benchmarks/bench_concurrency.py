@@ -0,0 +1,57 @@
+"""
+Benchmark: update_stock throughput vs. number of threads for the thread-safe (striped lock) manager.
+
+On CPython with the GIL, pure-Python updates do not run in parallel, so the interesting numbers are the
+overhead of thread-safe mode over the default mode and that throughput does not collapse under contention.
+Run with: python -m benchmarks.bench_concurrency [UPDATES_PER_THREAD]
+"""
+import random
+import sys
+import threading
+import time
+
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+
+def build(thread_safe: bool, catalog: int = 10_000):
+    manager = InventoryManager(thread_safe=thread_safe)
+    product_ids = []
+    for i in range(catalog):
+        product = Product(sku=f"SKU{i}", name=f"Item {i}", price=1.0, current_stock=100, safety_stock_threshold=0)
+        manager.add_product(product)
+        product_ids.append(product.product_id)
+    return manager, product_ids
+
+
+def run(threads: int, updates: int, thread_safe: bool = True) -> float:
+    manager, product_ids = build(thread_safe)
+    work = [
+        [Transaction(product_id=rng.choice(product_ids), quantity_change=1, transaction_type=Transaction.TYPE_INBOUND)
+         for _ in range(updates)]
+        for rng in (random.Random(seed) for seed in range(threads))
+    ]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(transactions):
+        barrier.wait()
+        for transaction in transactions:
+            manager.update_stock(transaction)
+
+    pool = [threading.Thread(target=worker, args=(transactions,)) for transactions in work]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    assert sum(p.current_stock for p in manager.list_all_products()) == 100 * len(product_ids) + threads * updates
+    return threads * updates / elapsed
+
+
+if __name__ == "__main__":
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"default mode, 1 thread: {run(1, updates, thread_safe=False):12,.0f} updates/s")
+    for threads in (1, 2, 4, 8, 16):
+        print(f"thread-safe, {threads:>2} threads: {run(threads, updates):12,.0f} updates/s")
@@ -0,0 +1,72 @@
+"""
+Benchmark: Product / Transaction construction, dataclass constructors vs the high-throughput path.
+
+- "uuid4 baseline": the dataclass constructor plus the str(uuid.uuid4()) call its id factory used to make;
+- "dataclass": the current constructors (batched UUIDv7 ids, validation);
+- "prevalidated": Product.prevalidated / Transaction.prevalidated with ids from one new_ids() call and one
+  timestamp per batch, as the importer does.
+Run with: python -m benchmarks.bench_construction [COUNT]
+"""
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from oes_core.ids import new_ids
+from oes_core.models import Product, Transaction
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def product_cases(count: int) -> dict:
+    prices = [1.0 + i % 100 for i in range(count)]
+
+    def uuid4_baseline():
+        for price in prices:
+            str(uuid.uuid4())
+            Product(sku="SKU1", name="Item", price=price)
+
+    def dataclass_constructor():
+        for price in prices:
+            Product(sku="SKU1", name="Item", price=price)
+
+    def prevalidated():
+        create_at = datetime.now()
+        prevalidated_product = Product.prevalidated
+        for price, product_id in zip(prices, new_ids(count)):
+            prevalidated_product("SKU1", "Item", price, product_id=product_id, create_at=create_at)
+    return {"uuid4 baseline": uuid4_baseline, "dataclass": dataclass_constructor, "prevalidated": prevalidated}
+
+
+def transaction_cases(count: int) -> dict:
+    quantities = [1 + i % 50 for i in range(count)]
+
+    def uuid4_baseline():
+        for quantity in quantities:
+            str(uuid.uuid4())
+            Transaction(product_id="product", quantity_change=quantity, transaction_type=Transaction.TYPE_INBOUND)
+
+    def dataclass_constructor():
+        for quantity in quantities:
+            Transaction(product_id="product", quantity_change=quantity, transaction_type=Transaction.TYPE_INBOUND)
+
+    def prevalidated():
+        timestamp = datetime.now()
+        prevalidated_transaction = Transaction.prevalidated
+        for quantity, transaction_id in zip(quantities, new_ids(count)):
+            prevalidated_transaction("product", quantity, Transaction.TYPE_INBOUND, transaction_id, timestamp)
+    return {"uuid4 baseline": uuid4_baseline, "dataclass": dataclass_constructor, "prevalidated": prevalidated}
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for model, cases in (("Product", product_cases(count)), ("Transaction", transaction_cases(count))):
+        for name, func in cases.items():
+            print(f"{model:<12} {name:<15} {best_of(func) / count * 1e9:8.0f} ns/object")
@@ -0,0 +1,97 @@
+"""
+Benchmark: demand forecasting over a large catalog.
+
+Reports a full vectorised DemandForecaster.rebuild() over the history, a forecast() of reorder points and days of
+cover for every product, the same velocities computed with a per-product Python loop over history_for(), and the
+cost the forecaster adds to update_stock (incremental EWMA update, O(1) per transaction).
+Run with: python -m benchmarks.bench_forecasting [PRODUCTS] [ROWS]
+"""
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from oes_core.forecasting import DemandForecaster
+from oes_core.history import TransactionHistory
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+BATCH = 100_000
+DAYS = 90
+
+
+def build(products: int, rows: int) -> TransactionHistory:
+    rng = random.Random(7)
+    base = datetime.now() - timedelta(days=DAYS)
+    step = timedelta(days=DAYS) / rows
+    history = TransactionHistory()
+    for start in range(0, rows, BATCH):
+        history.extend([Transaction.prevalidated(f"product-{rng.randrange(products)}", -rng.randint(1, 5),
+                                                 Transaction.TYPE_OUTBOUND, timestamp=base + step * row)
+                        for row in range(start, min(start + BATCH, rows))])
+    return history
+
+
+def loop_velocity(history: TransactionHistory, product_ids, forecaster: DemandForecaster, now: datetime):
+    """The per-product baseline: the same decayed sums, one history_for() scan and Python loop per product."""
+    tau_seconds = forecaster.half_life_days * 86_400 / 0.6931471805599453
+    velocities = []
+    for product_id in product_ids:
+        level = 0.0
+        for transaction in history.history_for(product_id):
+            if transaction.transaction_type == Transaction.TYPE_OUTBOUND:
+                age = (now - transaction.timestamp).total_seconds()
+                level -= transaction.quantity_change * 2.718281828459045 ** (-age / tau_seconds)
+        velocities.append(level / (tau_seconds / 86_400))
+    return velocities
+
+
+def catalog(products: int, rows: int) -> None:
+    history = build(products, rows)
+    product_ids = [f"product-{i}" for i in range(products)]
+    rng = random.Random(11)
+    stock = [rng.randint(0, 20) for _ in range(products)]
+    forecaster = DemandForecaster()
+
+    start = time.perf_counter()
+    forecaster.rebuild(history)
+    rebuild = time.perf_counter() - start
+    start = time.perf_counter()
+    forecast = forecaster.forecast(history, product_ids, stock)
+    elapsed = time.perf_counter() - start
+    print(f"rebuild   {rows:>10,} rows       {rebuild:>7.2f}s")
+    print(f"forecast  {products:>10,} products   {elapsed:>7.2f}s  "
+          f"({len(forecast.below_reorder_point()):,} at or below their reorder point)")
+
+    sample = product_ids[:max(1, products // 100)]
+    start = time.perf_counter()
+    loop_velocity(history, sample, forecaster, forecast.taken_at)
+    elapsed = (time.perf_counter() - start) * products / len(sample)
+    print(f"per-product loop (extrapolated from {len(sample):,})  {elapsed:>7.2f}s")
+
+
+def incremental(updates: int) -> None:
+    for name, forecaster in (("no forecaster", None), ("with forecaster", DemandForecaster())):
+        manager = InventoryManager(forecaster=forecaster)
+        products = [Product(sku=f"FC{i}", name=f"Item {i}", price=1.0, current_stock=10 ** 9,
+                            safety_stock_threshold=0) for i in range(1_000)]
+        manager.add_products(products)
+        rng = random.Random(7)
+        transactions = [Transaction(product_id=rng.choice(products).product_id, quantity_change=-1,
+                                    transaction_type=Transaction.TYPE_OUTBOUND) for _ in range(updates)]
+        start = time.perf_counter()
+        for transaction in transactions:
+            manager.update_stock(transaction)
+        elapsed = time.perf_counter() - start
+        print(f"update_stock {name:<16} {elapsed / updates * 1e9:>8,.0f} ns/call")
+
+
+if __name__ == "__main__":
+    package_logger = logging.getLogger("oes_core")
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000
+    catalog(products, rows)
+    incremental(100_000)
@@ -0,0 +1,58 @@
+"""
+Benchmark: per-product and time-range history queries on a large TransactionHistory.
+
+Compares history_for / history_between (posting lists + block time index) with a full scan of the history.
+Run with: python -m benchmarks.bench_history [ROWS] [PRODUCTS]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from oes_core.history import TransactionHistory
+from oes_core.models import Transaction
+
+BATCH = 100_000
+
+
+def build(rows: int, products: int) -> TransactionHistory:
+    rng = random.Random(7)
+    product_ids = [f"product-{i}" for i in range(products)]
+    base = datetime(2024, 1, 1)
+    history = TransactionHistory()
+    for start in range(0, rows, BATCH):
+        batch = []
+        for row in range(start, min(start + BATCH, rows)):
+            transaction = Transaction(product_id=rng.choice(product_ids), quantity_change=1,
+                                      transaction_type=Transaction.TYPE_INBOUND)
+            transaction.timestamp = base + timedelta(milliseconds=row)
+            batch.append(transaction)
+        history.extend(batch)
+    return history
+
+
+def timed(query) -> tuple:
+    start = time.perf_counter()
+    found = sum(1 for _ in query())
+    return (time.perf_counter() - start) * 1000, found
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    products = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    start = time.perf_counter()
+    history = build(rows, products)
+    print(f"built {rows:,} rows in {time.perf_counter() - start:.1f}s ({history.nbytes() / rows:.1f} bytes/row)")
+
+    base = datetime(2024, 1, 1)
+    middle = base + timedelta(milliseconds=rows // 2)
+    window = (middle, middle + timedelta(seconds=1))
+    queries = {
+        "history_for(product)": lambda: history.history_for("product-42"),
+        "history_for(product, 1 s window)": lambda: history.history_for("product-42", *window),
+        "history_between(1 s window)": lambda: history.history_between(*window),
+        "full scan (1 s window)": lambda: (t for t in history if window[0] <= t.timestamp <= window[1]),
+    }
+    for name, query in queries.items():
+        elapsed_ms, found = timed(query)
+        print(f"{name:<36} {elapsed_ms:10.2f} ms  ({found} rows)")
@@ -0,0 +1,103 @@
+"""
+Load test: concurrent clients against a local InventoryHTTPServer, reporting requests per second and latency
+percentiles per request kind.
+
+Each client thread loops over a fixed mix (get, update-stock, top-N, and every `--batch-every` requests one
+pipelined batch of `--batch-size` binary transactions) for `--duration` seconds over a shared connection pool.
+By default a server is started in-process on a free port; pass --port (and --host) to load an already running
+`python -m oes_core.server` instead (the catalog is added to it first).
+Run with: python -m benchmarks.bench_http [--clients 8] [--duration 5] [--products 1000] [--port PORT]
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from oes_core.client import InventoryClient
+from oes_core.metrics import MetricsRegistry
+from oes_core.models import Product, Transaction
+from oes_core.server import InventoryHTTPServer
+
+
+def _worker(client: InventoryClient, product_ids: List[str], registry: MetricsRegistry, deadline: float,
+            batch_every: int, batch_size: int, seed: int, counts: Dict[str, int]) -> None:
+    rng = random.Random(seed)
+    get = registry.timed("get", client.get_product)
+    update = registry.timed("update_stock", client.update_stock)
+    top = registry.timed("top_n", client.top_n)
+    batch = registry.timed("batch_pipelined", client.apply_transactions_pipelined)
+    requests = 0
+    while time.perf_counter() < deadline:
+        requests += 1
+        if batch_every and requests % batch_every == 0:
+            transactions = [Transaction(product_id=rng.choice(product_ids), quantity_change=1,
+                                        transaction_type=Transaction.TYPE_INBOUND) for _ in range(batch_size)]
+            batch(transactions, chunk_size=max(1, batch_size // 4))
+            continue
+        choice = rng.random()
+        if choice < 0.6:
+            get(rng.choice(product_ids))
+        elif choice < 0.95:
+            update(rng.choice(product_ids), 1, Transaction.TYPE_INBOUND)
+        else:
+            top(10)
+    counts[threading.current_thread().name] = requests
+
+
+def run(host: str, port: int, clients: int, duration: float, products: int, batch_every: int,
+        batch_size: int) -> None:
+    registry = MetricsRegistry()
+    with InventoryClient(host, port, pool_size=clients) as client:
+        catalog = [Product(sku=f"LOAD{i}", name=f"Load {i}", price=1.0, current_stock=1_000,
+                           safety_stock_threshold=0) for i in range(products)]
+        product_ids = client.add_products(catalog)
+        counts: Dict[str, int] = {}
+        deadline = time.perf_counter() + duration
+        threads = [threading.Thread(target=_worker, name=f"load-{i}",
+                                    args=(client, product_ids, registry, deadline, batch_every, batch_size, i, counts))
+                   for i in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        opened = client.connections_opened
+
+    total = sum(counts.values())
+    print(f"{clients} clients, {elapsed:.1f}s, {opened} connections opened")
+    print(f"{'request':<16} {'count':>9} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    for name, snapshot in registry.snapshot().items():
+        print(f"{name:<16} {snapshot['count']:>9,} {snapshot['count'] / elapsed:>10,.0f} "
+              f"{snapshot['p50_ns'] / 1e6:>9.3f} {snapshot['p99_ns'] / 1e6:>9.3f} {snapshot['max_ns'] / 1e6:>9.3f} "
+              f"{snapshot['errors']:>7}")
+    print(f"{'total':<16} {total:>9,} {total / elapsed:>10,.0f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="load a running server instead of a local one")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--batch-every", type=int, default=50, help="0 disables pipelined batches")
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    args = parser.parse_args(argv)
+
+    options = dict(clients=args.clients, duration=args.duration, products=args.products,
+                   batch_every=args.batch_every, batch_size=args.batch_size)
+    if args.port is not None:
+        run(args.host, args.port, **options)
+        return
+    with InventoryHTTPServer(args.host, 0) as server:
+        run(*server.address, **options)
+
+
+if __name__ == "__main__":
+    package_logger = logging.getLogger("oes_core")
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+    main()
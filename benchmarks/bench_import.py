@@ -0,0 +1,61 @@
+"""
+Benchmark: loading a CSV catalog row by row with add_product(Product(...)) vs. the streaming importer.
+
+Also reports the importer's peak traced memory, which should depend on the chunk size rather than the file size.
+Run with: python -m benchmarks.bench_import [ROWS] [CHUNK_SIZE]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from oes_core.importer import import_catalog
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product
+
+
+def write_catalog(path: str, rows: int) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["sku", "name", "price", "description", "current_stock", "safety_stock_threshold"])
+        for i in range(rows):
+            writer.writerow([f"SKU{i}", f"Item {i}", 1.0 + i % 100, "", i % 50, 0])
+
+
+def load_row_by_row(path: str) -> float:
+    manager = InventoryManager()
+    start = time.perf_counter()
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            manager.add_product(Product(sku=row["sku"], name=row["name"], price=float(row["price"]),
+                                        description=row["description"] or None,
+                                        current_stock=int(row["current_stock"]),
+                                        safety_stock_threshold=int(row["safety_stock_threshold"])))
+    return time.perf_counter() - start
+
+
+def load_streaming(path: str, chunk_size: int) -> float:
+    manager = InventoryManager()
+    start = time.perf_counter()
+    report = import_catalog(manager, path, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    assert report.rejected_count == 0
+    return elapsed
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.csv")
+        write_catalog(path, rows)
+        print(f"add_product per row: {rows / load_row_by_row(path):12,.0f} rows/s")
+        print(f"streaming importer:  {rows / load_streaming(path, chunk_size):12,.0f} rows/s")
+
+        tracemalloc.start()
+        import_catalog(InventoryManager(), path, chunk_size=chunk_size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"importer peak traced memory (chunk_size={chunk_size}, incl. the inventory): {peak / 2**20:.1f} MiB")
@@ -0,0 +1,47 @@
+"""
+Micro-benchmark: get_product throughput with inventory logging off (WARNING, the default) and on (INFO).
+
+"eager" replays the previous implementation, which built an f-string on every call even when INFO was disabled.
+
+Run with: python -m benchmarks.bench_logging
+"""
+import logging
+import timeit
+
+from oes_core import inventory
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product
+
+CALLS = 200_000
+
+
+def main() -> None:
+    manager = InventoryManager()
+    product = Product(sku="BENCH1", name="Bench Item", price=1.0)
+    manager.add_product(product)
+    product_id = product.product_id
+    logger = inventory.logger
+
+    def eager_get_product():
+        logger.info(f"Fetching product #{product_id}...")
+        return manager._products.get(product_id)
+
+    # A NullHandler on the logger itself keeps "on" measurements free of terminal I/O.
+    null_handler = logging.NullHandler()
+    logger.addHandler(null_handler)
+    logger.propagate = False
+    try:
+        for label, level in (("off (WARNING)", logging.WARNING), ("on  (INFO)", logging.INFO)):
+            logger.setLevel(level)
+            lazy = min(timeit.repeat(lambda: manager.get_product(product_id), number=CALLS, repeat=5))
+            eager = min(timeit.repeat(eager_get_product, number=CALLS, repeat=5))
+            print(f"logging {label}: get_product {CALLS / lazy:12,.0f} calls/s | eager f-string "
+                  f"{CALLS / eager:12,.0f} calls/s")
+    finally:
+        logger.setLevel(logging.WARNING)
+        logger.removeHandler(null_handler)
+        logger.propagate = True
+
+
+if __name__ == "__main__":
+    main()
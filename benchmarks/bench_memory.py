@@ -0,0 +1,82 @@
+"""
+Memory benchmark: bytes per record for Product / Transaction storage layouts.
+
+Compares the previous dict-backed dataclasses, the slotted models and the columnar TransactionHistory,
+measured with tracemalloc so every allocation (strings, datetimes, list slots) is counted.
+
+Run with: python -m benchmarks.bench_memory [N]
+"""
+import sys
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+from oes_core.history import TransactionHistory
+from oes_core.models import Product, Transaction
+
+
+@dataclass
+class DictProduct:
+    """Product as it was before slots=True (same fields, per-instance __dict__)."""
+    product_id: str = field(default_factory=lambda: str(uuid.uuid4()), init=False)
+    sku: str = ""
+    name: str = ""
+    price: float = 0.0
+    description: Optional[str] = None
+    current_stock: int = 0
+    safety_stock_threshold: int = 10
+    create_at: datetime = field(default_factory=datetime.now, init=False)
+
+
+@dataclass
+class DictTransaction:
+    """Transaction as it was before slots=True."""
+    transaction_id: str = field(default_factory=lambda: str(uuid.uuid4()), init=False)
+    product_id: str = ""
+    quantity_change: int = 0
+    transaction_type: str = Transaction.TYPE_INBOUND
+    timestamp: datetime = field(default_factory=datetime.now, init=False)
+
+
+def bytes_per_record(build: Callable[[int], object], count: int) -> float:
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    kept = build(count)
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del kept
+    return used / count
+
+
+def main(count: int) -> None:
+    product_ids = [str(uuid.uuid4()) for _ in range(1_000)]
+
+    def transactions(cls):
+        return [cls(product_id=product_ids[i % 1_000], quantity_change=i % 97 + 1,
+                    transaction_type=Transaction.TYPE_INBOUND) for i in range(count)]
+
+    def columnar(n):
+        history = TransactionHistory()
+        for i in range(n):
+            # Construct and drop each Transaction, as update_stock does once it is recorded.
+            history.append(Transaction(product_id=product_ids[i % 1_000], quantity_change=i % 97 + 1,
+                                       transaction_type=Transaction.TYPE_INBOUND))
+        return history
+
+    rows = [
+        ("Product (dict dataclass)", lambda n: [DictProduct(sku=f"S{i}", name=f"Item {i}", price=1.0)
+                                                for i in range(n)]),
+        ("Product (slots=True)", lambda n: [Product(sku=f"S{i}", name=f"Item {i}", price=1.0) for i in range(n)]),
+        ("Transaction list (dict dataclass)", lambda n: transactions(DictTransaction)),
+        ("Transaction list (slots=True)", lambda n: transactions(Transaction)),
+        ("TransactionHistory (columnar)", columnar),
+    ]
+    print(f"{count:,} records each")
+    for label, build in rows:
+        print(f"  {label:<36} {bytes_per_record(build, count):8.1f} bytes/record")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
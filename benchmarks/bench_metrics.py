@@ -0,0 +1,34 @@
+"""
+Benchmark: cost of the metrics instrumentation on get_product and update_stock.
+
+"disabled" is a manager without metrics (the plain class methods), "enabled" times every call into
+a latency histogram.
+Run with: python -m benchmarks.bench_metrics [CALLS]
+"""
+import sys
+import timeit
+
+from oes_core.inventory import InventoryManager
+from oes_core.metrics import MetricsRegistry
+from oes_core.models import Product, Transaction
+
+
+def measure(manager: InventoryManager, calls: int) -> dict:
+    product = Product(sku="METRIC1", name="Metric Item", price=1.0, current_stock=10, safety_stock_threshold=0)
+    manager.add_product(product)
+    transaction = Transaction(product_id=product.product_id, quantity_change=1,
+                              transaction_type=Transaction.TYPE_INBOUND)
+    return {
+        "get_product": min(timeit.repeat(lambda: manager.get_product(product.product_id), number=calls, repeat=5)),
+        "update_stock": min(timeit.repeat(lambda: manager.update_stock(transaction), number=calls // 10, repeat=5))
+        * 10,
+    }
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    disabled = measure(InventoryManager(), calls)
+    enabled = measure(InventoryManager(metrics=MetricsRegistry()), calls)
+    for name in disabled:
+        print(f"{name:<14} disabled {disabled[name] / calls * 1e9:8.0f} ns/call   "
+              f"enabled {enabled[name] / calls * 1e9:8.0f} ns/call")
@@ -0,0 +1,75 @@
+"""
+Benchmark: InventoryManager on the in-memory product dict vs a MappedProductTable.
+
+Reports the Python heap the manager keeps per product (tracemalloc, after the source Products are released;
+the mapped files are not on the heap), how much of it each product added after the first N costs (the mapped
+backend keeps no per-product index, so this should stay near 0), and the cost of get_product / update_stock /
+get_top_n_products_by_stock on each backend.
+Run with: python -m benchmarks.bench_product_table [N]
+"""
+import gc
+import logging
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from typing import Optional
+
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+from oes_core.product_table import MappedProductTable
+
+CHUNK = 10_000
+
+
+def populate(manager: InventoryManager, first: int, count: int) -> str:
+    """Adds `count` products chunk by chunk, so only one chunk of source Products is alive at a time."""
+    last_id = ""
+    for start in range(first, first + count, CHUNK):
+        chunk = [Product(sku=f"SKU{i}", name=f"Item {i}", price=1.0, current_stock=i % 1000 + 1,
+                         safety_stock_threshold=0, description="A product description of typical length.")
+                 for i in range(start, min(start + CHUNK, first + count))]
+        manager.add_products(chunk)
+        last_id = chunk[-1].product_id
+    return last_id
+
+
+def measure(count: int, table: Optional[MappedProductTable]) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    manager = InventoryManager(product_table=table)
+    populate(manager, 0, count)
+    gc.collect()
+    heap = tracemalloc.get_traced_memory()[0]
+    product_id = populate(manager, count, count)
+    gc.collect()
+    grown = tracemalloc.get_traced_memory()[0] - heap
+    tracemalloc.stop()
+
+    transaction = Transaction(product_id=product_id, quantity_change=1, transaction_type=Transaction.TYPE_INBOUND)
+    calls = 20_000
+    return {
+        "heap bytes/product": heap / count,
+        "growth bytes/product": grown / count,
+        "get_product ns": min(timeit.repeat(lambda: manager.get_product(product_id), number=calls, repeat=5))
+        / calls * 1e9,
+        "update_stock ns": min(timeit.repeat(lambda: manager.update_stock(transaction), number=calls, repeat=5))
+        / calls * 1e9,
+        "top 10 us": min(timeit.repeat(lambda: manager.get_top_n_products_by_stock(10), number=10, repeat=3))
+        / 10 * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    package_logger = logging.getLogger("oes_core")
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    results = {"dict": measure(count, None)}
+    with tempfile.TemporaryDirectory() as directory:
+        with MappedProductTable(os.path.join(directory, "products.tbl")) as table:
+            results["mapped table"] = measure(count, table)
+            results["mapped table"]["file bytes/product"] = table.nbytes / (2 * count)
+    for backend, metrics in results.items():
+        print(f"{backend:<13}" + "   ".join(f"{name} {value:8.0f}" for name, value in metrics.items()))
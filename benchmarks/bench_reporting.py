@@ -0,0 +1,60 @@
+"""
+Benchmark: inventory reports as Python loops over list_all_products() vs oes_core.reporting.
+
+Times a hand-written loop (total value, stock per threshold bucket, stock per 3-character SKU prefix) against
+take_snapshot() + build_report() in one process and across a process pool.
+Run with: python -m benchmarks.bench_reporting [N] [PROCESSES]
+"""
+import logging
+import multiprocessing
+import random
+import sys
+import time
+from collections import defaultdict
+
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product
+from oes_core.reporting import build_report, take_snapshot
+
+
+def python_loop_report(manager: InventoryManager) -> dict:
+    total_value = 0.0
+    by_threshold = defaultdict(int)
+    by_prefix = defaultdict(int)
+    for product in manager.list_all_products():
+        total_value += product.price * product.current_stock
+        bucket = 0 if product.safety_stock_threshold < 10 else 1 if product.safety_stock_threshold < 50 else 2
+        by_threshold[bucket] += product.current_stock
+        by_prefix[product.sku[:3]] += product.current_stock
+    return {"total_value": total_value, "by_threshold": by_threshold, "by_prefix": by_prefix}
+
+
+def timed(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    package_logger = logging.getLogger("oes_core")
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+
+    rng = random.Random(42)
+    manager = InventoryManager()
+    manager.add_products([Product(sku=f"{rng.choice('ABCDEFGH')}{rng.randrange(100)}X{i}", name=f"Item {i}",
+                                  price=1.0 + rng.random() * 100, current_stock=rng.randrange(1000),
+                                  safety_stock_threshold=rng.randrange(100)) for i in range(count)])
+
+    snapshot = take_snapshot(manager)
+    print(f"{count:,} products, {processes} process(es)")
+    print(f"python loop                 {timed(lambda: python_loop_report(manager)):8.3f} s")
+    print(f"take_snapshot               {timed(lambda: take_snapshot(manager)):8.3f} s")
+    print(f"build_report (1 process)    {timed(lambda: build_report(snapshot, processes=1)):8.3f} s")
+    print(f"build_report (pool)         "
+          f"{timed(lambda: build_report(snapshot, processes=processes, min_rows_per_process=1)):8.3f} s")
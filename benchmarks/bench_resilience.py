@@ -0,0 +1,69 @@
+"""
+Benchmark: perform_batch_status_check against a degraded upstream, with and without oes_core.resilience.
+
+The fake upstream answers in 1 ms when healthy; while "degraded" every call takes 50 ms and fails. Each scenario
+runs rounds of batch checks (first healthy, then degraded) and reports wall time, upstream calls made and
+the outcome counts. With a circuit breaker and an AIMD limiter the degraded rounds fail fast instead of
+waiting on the upstream.
+Run with: python -m benchmarks.bench_resilience [ITEMS_PER_BATCH] [ROUNDS]
+"""
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+
+import oes_core.utils
+from oes_core.inventory import InventoryManager
+from oes_core.resilience import AdaptiveConcurrencyLimiter, CircuitBreaker, ResilientCaller, RetryPolicy
+
+
+class FakeUpstream:
+    def __init__(self):
+        self.degraded = False
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, item: str) -> int:
+        with self._lock:
+            self.calls += 1
+        if self.degraded:
+            time.sleep(0.05)
+            raise RuntimeError("Upstream overloaded.")
+        time.sleep(0.001)
+        return 200
+
+
+def run(name: str, resilience, items: int, rounds: int) -> None:
+    upstream = FakeUpstream()
+    original = oes_core.utils.get_external_status
+    oes_core.utils.get_external_status = upstream
+    try:
+        manager = InventoryManager(resilience=resilience)
+        batch = [f"ITEM{i}" for i in range(items)]
+        outcomes = Counter()
+        start = time.perf_counter()
+        for round_number in range(rounds):
+            upstream.degraded = round_number >= rounds // 2
+            for result in manager.perform_batch_status_check(batch):
+                outcomes[type(result).__name__] += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        oes_core.utils.get_external_status = original
+        if resilience is not None:
+            resilience.close()
+    print(f"{name:<12} {elapsed:>7.2f}s  {upstream.calls:>6,} upstream calls  {dict(outcomes)}")
+    if resilience is not None:
+        print(f"  {resilience.stats()}")
+
+
+if __name__ == "__main__":
+    package_logger = logging.getLogger("oes_core")
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    run("plain", None, items, rounds)
+    run("resilient", ResilientCaller(breaker=CircuitBreaker(failure_threshold=20, recovery_timeout=0.5),
+                                     limiter=AdaptiveConcurrencyLimiter(initial_limit=16, latency_target=0.02),
+                                     retry=RetryPolicy(max_attempts=2, backoff=0.01)), items, rounds)
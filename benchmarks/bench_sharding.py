@@ -0,0 +1,51 @@
+"""
+Benchmark: apply_transactions throughput of ShardedInventoryManager vs. number of shards (worker processes).
+
+Each shard applies its part of a batch in its own process, so throughput should grow with the number of shards
+up to the number of cores (the parent still routes and encodes batches on one core, which bounds the speed-up).
+Run with: python -m benchmarks.bench_sharding [TRANSACTIONS] [BATCH_SIZE]
+"""
+import multiprocessing
+import random
+import sys
+import time
+
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+from oes_core.sharding import ShardedInventoryManager
+
+
+def build(manager, catalog: int = 20_000):
+    product_ids = []
+    for i in range(catalog):
+        product = Product(sku=f"SKU{i}", name=f"Item {i}", price=1.0, current_stock=100, safety_stock_threshold=0)
+        manager.add_product(product)
+        product_ids.append(product.product_id)
+    return product_ids
+
+
+def run(manager, transactions: int, batch_size: int) -> float:
+    product_ids = build(manager)
+    rng = random.Random(1)
+    batches = [
+        [Transaction(product_id=rng.choice(product_ids), quantity_change=1, transaction_type=Transaction.TYPE_INBOUND)
+         for _ in range(batch_size)]
+        for _ in range(transactions // batch_size)
+    ]
+    start = time.perf_counter()
+    for batch in batches:
+        manager.apply_transactions(batch)
+    elapsed = time.perf_counter() - start
+    return len(batches) * batch_size / elapsed
+
+
+if __name__ == "__main__":
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    print(f"InventoryManager (1 process): {run(InventoryManager(), transactions, batch_size):12,.0f} transactions/s")
+    cores = multiprocessing.cpu_count()
+    for shards in sorted({1, 2, 4, 8, cores}):
+        if shards > cores:
+            continue
+        with ShardedInventoryManager(shards=shards) as manager:
+            print(f"sharded, {shards:>2} shard(s):     {run(manager, transactions, batch_size):12,.0f} transactions/s")
@@ -0,0 +1,66 @@
+"""
+Benchmark: order-statistics stock index vs. the heap scan it replaced in get_top_n_products_by_stock.
+
+Run with: python -m benchmarks.bench_stock_index [N ...]
+"""
+import heapq
+import random
+import sys
+import timeit
+from typing import List, Tuple
+
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+
+def heap_scan_top_n(manager: InventoryManager, n: int) -> List[Product]:
+    """The previous implementation: rescan every product into a size-n min-heap."""
+    min_heap: List[Tuple[int, Product]] = []
+    for product in manager._products.values():
+        stock = product.current_stock
+        if len(min_heap) < n:
+            heapq.heappush(min_heap, (stock, product))
+        elif stock > min_heap[0][0]:
+            heapq.heapreplace(min_heap, (stock, product))
+    result_products = [item[1] for item in min_heap]
+    result_products.sort(key=lambda p: p.current_stock, reverse=True)
+    return result_products
+
+
+def build_manager(size: int, seed: int = 1234) -> InventoryManager:
+    rng = random.Random(seed)
+    manager = InventoryManager()
+    for i in range(size):
+        manager.add_product(Product(sku=f"SKU{i}", name=f"Item {i}", price=1.0, current_stock=rng.randrange(100000)))
+    return manager
+
+
+def run(size: int, n: int = 10, repeat: int = 5) -> None:
+    manager = build_manager(size)
+    product_ids = list(manager._products)
+    rng = random.Random(size)
+
+    def refresh_cycle():
+        # One stock movement followed by a dashboard refresh, the pattern we see in production.
+        manager.update_stock(Transaction(product_id=rng.choice(product_ids), quantity_change=rng.randrange(1, 50),
+                                         transaction_type=Transaction.TYPE_INBOUND))
+        return manager.get_top_n_products_by_stock(n)
+
+    # Ties may be ordered differently, so compare the stock levels rather than the product IDs.
+    assert [p.current_stock for p in heap_scan_top_n(manager, n)] == \
+        [p.current_stock for p in manager.get_top_n_products_by_stock(n)]
+
+    heap_time = min(timeit.repeat(lambda: heap_scan_top_n(manager, n), number=5, repeat=repeat)) / 5
+    index_time = min(timeit.repeat(lambda: manager.get_top_n_products_by_stock(n), number=200, repeat=repeat)) / 200
+    cycle_time = min(timeit.repeat(refresh_cycle, number=200, repeat=repeat)) / 200
+    rank_time = min(timeit.repeat(lambda: manager.get_stock_rank(product_ids[0]), number=200, repeat=repeat)) / 200
+
+    print(f"N={size:>9,} top-{n}: heap scan {heap_time * 1e3:9.3f} ms | index {index_time * 1e6:8.2f} us "
+          f"| update+refresh {cycle_time * 1e6:8.2f} us | rank {rank_time * 1e6:8.2f} us "
+          f"| speedup x{heap_time / index_time:,.0f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    for size in sizes:
+        run(size)
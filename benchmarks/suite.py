@@ -0,0 +1,226 @@
+"""
+Benchmark suite for the oes_core hot paths, with machine-readable results and a regression gate.
+
+Every case runs at each catalog size (1e3 to 1e7) with a fixed seed, `repeats` times on fresh state; the
+tracked metric is the median nanoseconds per operation.
+
+Run:     python -m benchmarks.suite run [--sizes 1000 10000 100000] [--output results.json]
+Compare: python -m benchmarks.suite compare baseline.json results.json [--threshold 0.10]
+         (or run ... --compare baseline.json). Exits with status 1 when a tracked metric regressed by more
+         than the threshold (0.10 = 10% slower).
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_SEED = 42
+DEFAULT_REPEATS = 3
+DEFAULT_THRESHOLD = 0.10
+# Lookups / updates / queries timed per repeat, independent of the catalog size.
+OPERATIONS = 100_000
+TOP_N = 10
+TOP_N_QUERIES = 10_000
+
+# A case prepares its state for one repeat and returns (timed callable, number of operations it performs).
+Case = Callable[[int, random.Random], Tuple[Callable[[], None], int]]
+
+
+def _products(size: int, rng: random.Random) -> List[Product]:
+    # Threshold 0 and positive stock keep stock alerts (and their logging) out of the measurements.
+    return [Product(sku=f"SKU{i}", name=f"Item {i}", price=1.0 + rng.random() * 100,
+                    current_stock=rng.randrange(1, 10_000), safety_stock_threshold=0) for i in range(size)]
+
+
+def _populated(size: int, rng: random.Random) -> Tuple[InventoryManager, List[str]]:
+    manager = InventoryManager()
+    products = _products(size, rng)
+    manager.add_products(products)
+    return manager, [product.product_id for product in products]
+
+
+def case_add_product(size: int, rng: random.Random):
+    products = _products(size, rng)
+    manager = InventoryManager()
+
+    def run():
+        for product in products:
+            manager.add_product(product)
+    return run, size
+
+
+def case_get_product(size: int, rng: random.Random):
+    manager, product_ids = _populated(size, rng)
+    lookups = [rng.choice(product_ids) for _ in range(OPERATIONS)]
+
+    def run():
+        get_product = manager.get_product
+        for product_id in lookups:
+            get_product(product_id)
+    return run, OPERATIONS
+
+
+def case_update_stock(size: int, rng: random.Random):
+    manager, product_ids = _populated(size, rng)
+    transactions = [Transaction(product_id=rng.choice(product_ids), quantity_change=rng.randrange(1, 50),
+                                transaction_type=Transaction.TYPE_INBOUND) for _ in range(OPERATIONS)]
+
+    def run():
+        update_stock = manager.update_stock
+        for transaction in transactions:
+            update_stock(transaction)
+    return run, OPERATIONS
+
+
+def case_top_n(size: int, rng: random.Random):
+    manager, _ = _populated(size, rng)
+
+    def run():
+        for _ in range(TOP_N_QUERIES):
+            manager.get_top_n_products_by_stock(TOP_N)
+    return run, TOP_N_QUERIES
+
+
+def case_product_construction(size: int, rng: random.Random):
+    prices = [1.0 + rng.random() * 100 for _ in range(size)]
+
+    def run():
+        for i, price in enumerate(prices):
+            Product(sku="SKU1", name="Item", price=price, current_stock=i)
+    return run, size
+
+
+def case_transaction_construction(size: int, rng: random.Random):
+    quantities = [rng.randrange(1, 50) for _ in range(size)]
+
+    def run():
+        for quantity in quantities:
+            Transaction(product_id="product", quantity_change=quantity, transaction_type=Transaction.TYPE_INBOUND)
+    return run, size
+
+
+CASES: Dict[str, Case] = {
+    "add_product": case_add_product,
+    "get_product": case_get_product,
+    "update_stock": case_update_stock,
+    "get_top_n_products_by_stock": case_top_n,
+    "product_construction": case_product_construction,
+    "transaction_construction": case_transaction_construction,
+}
+
+
+def run_suite(sizes=DEFAULT_SIZES, cases=None, repeats: int = DEFAULT_REPEATS, seed: int = DEFAULT_SEED,
+              progress: Optional[Callable[[str], None]] = None) -> dict:
+    """Runs every (case, size) pair and returns the JSON-serialisable results document."""
+    results = {}
+    for name in cases or CASES:
+        for size in sizes:
+            samples = []
+            for _ in range(repeats):
+                # Same seed for every repeat: each one times identical work on identical state.
+                timed, operations = CASES[name](size, random.Random(seed))
+                gc.collect()
+                start = time.perf_counter_ns()
+                timed()
+                samples.append((time.perf_counter_ns() - start) / operations)
+                del timed
+            key = f"{name}[{size}]"
+            results[key] = {
+                "case": name,
+                "size": size,
+                "operations": operations,
+                "ns_per_op": statistics.median(samples),
+                "ns_per_op_min": min(samples),
+                "samples": samples,
+            }
+            if progress is not None:
+                progress(f"{key:<45} {results[key]['ns_per_op']:>12,.0f} ns/op")
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "seed": seed,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Returns a line per tracked metric present in both documents whose median ns/op grew by more than `threshold`.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None or before["ns_per_op"] <= 0:
+            continue
+        change = result["ns_per_op"] / before["ns_per_op"] - 1
+        if change > threshold:
+            regressions.append(f"{key}: {before['ns_per_op']:,.0f} -> {result['ns_per_op']:,.0f} ns/op "
+                               f"(+{change:.1%}, threshold {threshold:.0%})")
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    run_parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=None)
+    run_parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    run_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run_parser.add_argument("--output", help="write the JSON results to this file")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="compare against a previous results file")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        # Keep the manager's warnings (e.g. "InventoryManager initialized.") off the console; levels stay as shipped.
+        package_logger = logging.getLogger("oes_core")
+        package_logger.addHandler(logging.NullHandler())
+        package_logger.propagate = False
+        current = run_suite(args.sizes, args.cases, args.repeats, args.seed, progress=print)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+        if not args.compare:
+            return 0
+        baseline = _load(args.compare)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    regressions = compare(baseline, current, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"No regression above {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
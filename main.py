@@ -1,20 +1,10 @@
-
 import logging
-logger = logging.getLogger(__name__)
 
-def print_hi(name):
-    # Use a breakpoint in the code line below to debug your script.
-    print(f'Hello! {name}')
+from oes_core.server import main
 
-def get_something_good():
-    print("Get lucky today! Get test tomorrow!")
-    return True
+logger = logging.getLogger(__name__)
 
-# Press the green button in the gutter to run the script.
+# Serves the inventory over HTTP/JSON: python main.py [--host HOST] [--port PORT]
 if __name__ == '__main__':
-    good_day = get_something_good()
-    good_night = get_something_good()
-    assert good_day == good_night
-
-    print_hi()
+    main()
     logger.info("Script finished execution.")
@@ -0,0 +1,273 @@
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+ALERT_LOW = "LOW"
+ALERT_RECOVERED = "RECOVERED"
+
+
+@dataclass(slots=True)
+class StockAlert:
+    """A safety stock threshold crossing of one product. `timestamp` is wall-clock time (time.time())."""
+    kind: str
+    product_id: str
+    product_name: Optional[str]
+    current_stock: int
+    safety_stock_threshold: int
+    timestamp: float
+
+    def message(self) -> str:
+        if self.kind == ALERT_LOW:
+            return (f"ALERT: Stock for {self.product_name} (ID: {self.product_id}) is at {self.current_stock}, "
+                    f"which is below the safety threshold of {self.safety_stock_threshold}.")
+        return (f"RECOVERED: Stock for {self.product_name} (ID: {self.product_id}) is back at "
+                f"{self.current_stock}, above the safety threshold of {self.safety_stock_threshold}.")
+
+
+# A sink receives one batch of alerts at a time, on the engine's worker thread.
+AlertSink = Callable[[List[StockAlert]], None]
+
+
+class LogSink:
+    """Logs every alert of a batch, with the alert fields as `extra` (for StructuredFormatter)."""
+    def __init__(self, target: Optional[logging.Logger] = None, level: int = logging.WARNING):
+        self.logger = target if target is not None else logging.getLogger("oes_core.inventory")
+        self.level = level
+
+    def __call__(self, alerts: List[StockAlert]) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        for alert in alerts:
+            self.logger.log(self.level, alert.message(), extra={
+                "product_id": alert.product_id,
+                "current_stock": alert.current_stock,
+                "safety_stock_threshold": alert.safety_stock_threshold,
+            })
+
+
+class FileSink:
+    """Appends every alert of a batch to a JSON Lines file, with one write per batch."""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, alerts: List[StockAlert]) -> None:
+        self._file.write("".join(json.dumps(asdict(alert)) + "\n" for alert in alerts))
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class AlertEngine:
+    """
+    Edge-triggered safety stock alerts, decoupled from the write path.
+
+    observe() is called with a product's stock after every change. It only reacts to threshold crossings:
+    LOW when the stock falls to or below the threshold, RECOVERED when it rises above threshold + hysteresis
+    (the hysteresis band keeps a product hovering at the threshold from flapping). A LOW crossing within
+    `debounce_seconds` of the product's previous LOW alert is suppressed, and so is the RECOVERED that ends it:
+    sinks never see a recovery from a LOW they were not sent.
+
+    Alerts wait in a bounded queue holding at most one alert per product: a newer alert for a product still
+    queued replaces it (coalesced), and alerts arriving while the queue is full are dropped. A background worker
+    hands the queue to every sink in batches of up to `batch_size`, at least every `flush_interval` seconds.
+    Usable as a context manager or through start()/stop().
+    """
+    def __init__(self, sinks: Sequence[AlertSink] = (), debounce_seconds: float = 60.0, hysteresis: int = 0,
+                 max_queue: int = 10_000, batch_size: int = 500, flush_interval: float = 0.5,
+                 notify_recovery: bool = True, clock: Callable[[], float] = time.monotonic):
+        if max_queue <= 0 or batch_size <= 0:
+            raise ValueError("Alert queue size and batch size must be positive.")
+        if hysteresis < 0 or debounce_seconds < 0:
+            raise ValueError("Hysteresis and debounce window cannot be negative.")
+        self.sinks: List[AlertSink] = list(sinks) if sinks else [LogSink()]
+        self.debounce_seconds = debounce_seconds
+        self.hysteresis = hysteresis
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.notify_recovery = notify_recovery
+        self._clock = clock
+
+        # Edge state: products currently alerted as low, and when each product's last LOW alert was raised.
+        self._low: Set[str] = set()
+        self._last_low_alert: Dict[str, float] = {}
+        # Products in `_low` whose LOW alert was debounced: their recovery is not announced either.
+        self._silent_low: Set[str] = set()
+        # Pending alerts, one per product, in arrival order.
+        self._pending: Dict[str, StockAlert] = {}
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+        self._in_flight = 0
+
+        self.raised = 0
+        self.suppressed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.dispatched = 0
+        self.sink_errors = 0
+
+    def observe(self, product_id: str, current_stock: int, safety_stock_threshold: int,
+                product_name: Optional[str] = None) -> None:
+        """
+        Records a product's new stock level. No allocation and no lock unless the threshold was crossed.
+        Calls for one product must not race each other (InventoryManager serialises them per product).
+        """
+        if product_id in self._low:
+            if current_stock > safety_stock_threshold + self.hysteresis:
+                self._low.discard(product_id)
+                if self._silent_low and product_id in self._silent_low:
+                    self._silent_low.discard(product_id)
+                elif self.notify_recovery:
+                    self._enqueue(StockAlert(ALERT_RECOVERED, product_id, product_name, current_stock,
+                                             safety_stock_threshold, time.time()))
+            return
+        if current_stock > safety_stock_threshold:
+            return
+
+        self._low.add(product_id)
+        now = self._clock()
+        last = self._last_low_alert.get(product_id)
+        if last is not None and now - last < self.debounce_seconds:
+            self._silent_low.add(product_id)
+            with self._condition:
+                self.suppressed += 1
+            return
+        self._last_low_alert[product_id] = now
+        self._enqueue(StockAlert(ALERT_LOW, product_id, product_name, current_stock, safety_stock_threshold,
+                                 time.time()))
+
+    def forget(self, product_id: str) -> None:
+        """Drops the edge and debounce state of a product."""
+        self._low.discard(product_id)
+        self._silent_low.discard(product_id)
+        self._last_low_alert.pop(product_id, None)
+
+    def _enqueue(self, alert: StockAlert) -> None:
+        with self._condition:
+            self.raised += 1
+            if alert.product_id in self._pending:
+                # Replacing keeps the product's original position in the queue.
+                self._pending[alert.product_id] = alert
+                self.coalesced += 1
+            elif len(self._pending) >= self.max_queue:
+                self.dropped += 1
+                return
+            else:
+                self._pending[alert.product_id] = alert
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    # --- Dispatch ---
+
+    def start(self) -> "AlertEngine":
+        with self._condition:
+            if self._worker is None:
+                self._stopping = False
+                self._worker = threading.Thread(target=self._run, name="oes-alert-dispatcher", daemon=True)
+                self._worker.start()
+        return self
+
+    def stop(self) -> None:
+        """Dispatches every queued alert, stops the worker and closes sinks that have a close() method."""
+        with self._condition:
+            worker = self._worker
+            if worker is None:
+                return
+            self._stopping = True
+            self._condition.notify_all()
+        worker.join()
+        self._worker = None
+        for sink in self.sinks:
+            close = getattr(sink, "close", None)
+            if close is not None:
+                close()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until every alert queued so far has been handed to the sinks; returns False on timeout.
+        Without a running worker the queue is dispatched on the calling thread.
+        """
+        if self._worker is None:
+            while True:
+                with self._condition:
+                    batch = self._take_batch()
+                if not batch:
+                    return True
+                self._dispatch(batch)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                "queued": len(self._pending),
+                "raised": self.raised,
+                "suppressed": self.suppressed,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "dispatched": self.dispatched,
+                "sink_errors": self.sink_errors,
+            }
+
+    def __enter__(self) -> "AlertEngine":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _take_batch(self) -> List[StockAlert]:
+        """Removes up to batch_size alerts from the front of the queue; the caller holds the condition."""
+        if len(self._pending) <= self.batch_size:
+            batch = list(self._pending.values())
+            self._pending = {}
+            return batch
+        keys = list(self._pending)[:self.batch_size]
+        return [self._pending.pop(key) for key in keys]
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._pending and not self._stopping:
+                    self._condition.wait(self.flush_interval)
+                batch = self._take_batch()
+                stopping = self._stopping
+                self._in_flight = len(batch)
+
+            self._dispatch(batch)
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+                if stopping and not self._pending:
+                    return
+
+    def _dispatch(self, batch: List[StockAlert]) -> None:
+        if not batch:
+            return
+        errors = 0
+        for sink in self.sinks:
+            try:
+                sink(batch)
+            except Exception:
+                errors += 1
+                logger.exception("Alert sink %r failed on a batch of %d alerts.", sink, len(batch))
+        with self._condition:
+            self.dispatched += len(batch)
+            self.sink_errors += errors
@@ -0,0 +1,220 @@
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from oes_core.inventory import DEFAULT_STATUS_WORKERS, BatchUpdateResult, InventoryManager
+from oes_core.models import Product, Transaction
+
+DEFAULT_MAX_BATCH = 1000
+DEFAULT_MAX_QUEUE = 10_000
+
+_PendingUpdate = Tuple[Transaction, "asyncio.Future[None]"]
+
+
+class AsyncInventoryManager:
+    """
+    asyncio facade over an InventoryManager.
+
+    In-memory operations run directly on the event loop (they never wait on I/O). Writes to a thread-safe manager
+    with an InventoryStore attached do wait on the write-ahead log (an fsync with wait_for_fsync), so they run on a
+    single writer thread instead, in submission order; a manager that is not thread-safe cannot be written from
+    another thread while the loop reads it, and still writes on the loop. update_stock() calls are
+    queued and coalesced into micro-batches: a single batcher task takes whatever has been queued by the time it
+    runs (at most `max_batch`, after waiting `batch_window` seconds for more if set) and applies it with one
+    apply_transactions call. The queue holds at most `max_queue` transactions; update_stock() waits for room
+    when it is full (backpressure). Each caller still gets its own outcome: transactions apply_transactions would
+    reject (unknown product, unstorable quantity) are taken out of the batch first and fail only their own caller,
+    while any other error applying the batch fails every caller in it.
+
+    External status calls (oes_core.utils) are awaited directly when they are coroutine functions (native async
+    clients) and otherwise run on a bounded thread pool of `executor_workers` threads, so they never block the loop.
+    Use as `async with AsyncInventoryManager(...)` or call aclose().
+    """
+    def __init__(self, manager: Optional[InventoryManager] = None, max_batch: int = DEFAULT_MAX_BATCH,
+                 max_queue: int = DEFAULT_MAX_QUEUE, batch_window: float = 0.0,
+                 executor_workers: int = DEFAULT_STATUS_WORKERS):
+        if max_batch <= 0 or max_queue <= 0 or executor_workers <= 0:
+            raise ValueError("Batch size, queue size and executor workers must be positive.")
+        if batch_window < 0:
+            raise ValueError("Batch window cannot be negative.")
+        self.manager = manager if manager is not None else InventoryManager()
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.batch_window = batch_window
+        self._executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="oes-async-external")
+        # Logged writes, see _write; one thread keeps them in submission order.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="oes-async-writer")
+        # Created on first use, inside the running loop.
+        self._queue: Optional["asyncio.Queue[_PendingUpdate]"] = None
+        self._batcher: Optional["asyncio.Task[None]"] = None
+        self._closed = False
+
+        self.batches = 0
+        self.batched_transactions = 0
+        self.largest_batch = 0
+        self.fallbacks = 0
+
+    # --- In-memory operations, on the loop ---
+
+    async def add_product(self, product: Product) -> None:
+        await self._write(self.manager.add_product, product)
+
+    async def add_products(self, products: Iterable[Product]) -> int:
+        return await self._write(self.manager.add_products, list(products))
+
+    async def get_product(self, product_id: str) -> Optional[Product]:
+        return self.manager.get_product(product_id)
+
+    async def get_product_by_sku(self, sku: str) -> Optional[Product]:
+        return self.manager.get_product_by_sku(sku)
+
+    async def get_top_n_products_by_stock(self, n: int) -> List[Product]:
+        return self.manager.get_top_n_products_by_stock(n)
+
+    async def get_low_stock_products(self) -> List[Product]:
+        return self.manager.get_low_stock_products()
+
+    async def apply_transactions(self, transactions: Iterable[Transaction]) -> BatchUpdateResult:
+        """Applies a caller-assembled batch at once, without going through the micro-batch queue."""
+        return await self._write(self.manager.apply_transactions, list(transactions))
+
+    async def update_stock(self, transaction: Transaction) -> None:
+        """
+        Queues the transaction for the next micro-batch and returns once it is applied; raises what
+        InventoryManager.update_stock would have raised for it. Waits for queue room when the queue is full.
+        """
+        queue = self._ensure_batcher()
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        await queue.put((transaction, future))
+        await future
+
+    async def _write(self, call: Callable[..., Any], *args: Any) -> Any:
+        """Runs a manager write on the loop, or on the writer thread when it logs to a store (see the class doc)."""
+        if self.manager.store is None or not self.manager.thread_safe:
+            return call(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._writer, call, *args)
+
+    # --- External calls, off the loop ---
+
+    async def check_and_process_item(self, product_id: str) -> Optional[str]:
+        """Async InventoryManager.check_and_process_item: same outcomes, without blocking the loop."""
+        import oes_core.utils
+
+        check_status = oes_core.utils.check_status
+        try:
+            if asyncio.iscoroutinefunction(check_status):
+                status_code = await check_status(product_id)
+            else:
+                status_code = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self.manager._external_call("check_status"), product_id)
+        except ValueError:
+            return "FAILED_VALIDATION"
+        except RuntimeError:
+            return "ERROR_RUNTIME"
+        return InventoryManager._status_outcome(status_code)
+
+    async def perform_batch_status_check(self, item_list: List[str], concurrency: int = DEFAULT_STATUS_WORKERS,
+                                         timeout: Optional[float] = None) -> List[Any]:
+        """
+        InventoryManager.perform_batch_status_check_async, on this facade's bounded executor; with a `timeout`, on a
+        pool of the call's own, so timed-out calls never hold the facade's threads.
+        """
+        return await self.manager.perform_batch_status_check_async(item_list, concurrency, timeout,
+                                                                   executor=self._executor)
+
+    # --- Lifecycle ---
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": 0 if self._queue is None else self._queue.qsize(),
+            "batches": self.batches,
+            "batched_transactions": self.batched_transactions,
+            "largest_batch": self.largest_batch,
+            "fallbacks": self.fallbacks,
+        }
+
+    async def aclose(self) -> None:
+        """Applies every queued transaction, then stops the batcher and the executor."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._queue is not None:
+            await self._queue.join()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncInventoryManager":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    # --- Micro-batching ---
+
+    def _ensure_batcher(self) -> "asyncio.Queue[_PendingUpdate]":
+        if self._closed:
+            raise ValueError("Async inventory manager is closed.")
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._batcher is None or self._batcher.done():
+            self._batcher = asyncio.get_running_loop().create_task(self._run_batcher())
+        return self._queue
+
+    async def _run_batcher(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            # Yield (or wait out the window) so requests issued together reach the queue before the batch closes.
+            await asyncio.sleep(self.batch_window)
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._apply_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _apply_batch(self, batch: List[_PendingUpdate]) -> None:
+        # Callers that gave up (cancelled) while queued do not get their transaction applied.
+        pending = [(transaction, future) for transaction, future in batch if not future.done()]
+        if not pending:
+            return
+        self.batches += 1
+        self.batched_transactions += len(pending)
+        self.largest_batch = max(self.largest_batch, len(pending))
+        # apply_transactions is all or nothing: split off what it would reject, so only the offending callers fail.
+        accepted: List[_PendingUpdate] = []
+        for transaction, future in pending:
+            try:
+                self.manager.validate_transaction(transaction)
+            except ValueError as error:
+                future.set_exception(error)
+            else:
+                accepted.append((transaction, future))
+        if len(accepted) < len(pending):
+            self.fallbacks += 1
+        if not accepted:
+            return
+        try:
+            await self._write(self.manager.apply_transactions, [transaction for transaction, _ in accepted])
+        except Exception as error:
+            # Not a per-transaction rejection (e.g. the write-ahead log failed): replaying could apply part of the
+            # batch twice, so every caller of the batch gets the error.
+            for _, future in accepted:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        # A caller may have given up while the batch was on the writer thread; its transaction is applied anyway.
+        for _, future in accepted:
+            if not future.done():
+                future.set_result(None)
@@ -0,0 +1,127 @@
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Status codes cached by default and for how long (seconds). Anything else, and every exception, is never cached.
+DEFAULT_STATUS_TTLS: Dict[Any, float] = {200: 30.0, 400: 300.0}
+
+
+class _Flight:
+    """A lookup in progress; concurrent callers for the same key wait on it instead of calling upstream again."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class StatusCache:
+    """
+    Thread-safe TTL + LRU cache in front of the external status lookups in oes_core.utils.
+
+    - TTL per result value (status code): results without a TTL are returned but not stored, exceptions are never stored.
+    - LRU eviction once more than `max_entries` results are stored (OrderedDict kept in recency order).
+    - Single-flight: while a key is being loaded, other callers for that key wait for the same result.
+    - Counters for hits, misses, expirations, evictions and coalesced (single-flight) lookups.
+    """
+    def __init__(self, max_entries: int = 10_000, ttl_by_status: Optional[Dict[Any, float]] = None,
+                 default_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if max_entries <= 0:
+            raise ValueError("Cache size must be positive.")
+        self.max_entries = max_entries
+        self.ttl_by_status = dict(DEFAULT_STATUS_TTLS if ttl_by_status is None else ttl_by_status)
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # OrderedDict: Key=lookup key, Value=(expires_at, result); least recently used first.
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached result for `key`, or calls `loader()` once (per key, across threads) and caches its result.
+        Exceptions raised by the loader propagate to every waiting caller and are not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                is_leader = False
+            else:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+                is_leader = True
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as error:
+            flight.error = error
+            raise
+        else:
+            self._store(key, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+            }
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        try:
+            ttl = self.ttl_by_status.get(value, self.default_ttl)
+        except TypeError:
+            # Unhashable results have no per-status TTL.
+            ttl = self.default_ttl
+        if ttl is None or ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
@@ -0,0 +1,279 @@
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from oes_core.models import Product, product_to_dict
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+CHANGE_ADD = "ADD"
+CHANGE_STOCK = "STOCK"
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_POLL_SIZE = 1_000
+
+
+@dataclass(slots=True)
+class ChangeEvent:
+    """
+    One mutation of one product. `sequence` numbers are consecutive from 1 in publication order; the events of a
+    product are published in the order its changes were applied. `delta` is the stock change actually applied
+    (the initial stock for ADD), `version` the product's version afterwards. `timestamp` is wall-clock time.
+    """
+    sequence: int
+    kind: str
+    product_id: str
+    delta: int
+    current_stock: int
+    version: int
+    timestamp: float
+    # ADD only: the product's fields as oes_core.models.product_to_dict gives them (as the HTTP API serves them).
+    product: Optional[Dict[str, Any]] = None
+
+
+class ChangeFeedGapError(ValueError):
+    """
+    A subscriber asked for sequence numbers the feed no longer (or never) retained: it has to resynchronise from a
+    full read (e.g. list_all_products) and subscribe again from the feed's end.
+    """
+
+
+def coalesce(events: Iterable[ChangeEvent]) -> List[ChangeEvent]:
+    """
+    Merges the events of each product into one: deltas summed, stock / version / sequence / timestamp of its
+    last event, and kind ADD if the product was added within the events. Ordered by last sequence number.
+    """
+    merged: Dict[str, ChangeEvent] = {}
+    for event in events:
+        prior = merged.get(event.product_id)
+        if prior is None:
+            merged[event.product_id] = event
+            continue
+        merged[event.product_id] = ChangeEvent(
+            event.sequence, prior.kind if prior.kind == CHANGE_ADD else event.kind, event.product_id,
+            prior.delta + event.delta, event.current_stock, event.version, event.timestamp,
+            prior.product if prior.product is not None else event.product)
+    return sorted(merged.values(), key=lambda event: event.sequence)
+
+
+class ChangeFeed:
+    """
+    Ordered, in-memory change stream of an InventoryManager (pass it as InventoryManager(change_feed=...)).
+
+    The manager publishes one event per add_product, per update_stock, and per product of an apply_transactions
+    batch or an undo. The last `capacity` events are retained in a ring buffer, so subscribers can resume from a
+    sequence number they saved; asking for an event already overwritten raises ChangeFeedGapError. Sequence numbers
+    restart at 1 with the process (WAL recovery does not republish), so a saved position beyond the feed's end
+    also raises ChangeFeedGapError.
+
+    Consume with subscribe() (an iterator with a batch poll()) or listen() (a callback on a background thread).
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("Change feed capacity must be positive.")
+        self.capacity = capacity
+        self._ring: List[Optional[ChangeEvent]] = [None] * capacity
+        self._next_sequence = 1
+        self._condition = threading.Condition()
+        self._closed = False
+
+    @property
+    def last_sequence(self) -> int:
+        """Sequence number of the latest event, 0 before the first one."""
+        return self._next_sequence - 1
+
+    @property
+    def first_sequence(self) -> int:
+        """Oldest sequence number still retained."""
+        return max(1, self._next_sequence - self.capacity)
+
+    # --- Publishing (called by InventoryManager, under the product's lock) ---
+
+    def publish_added(self, products: Iterable[Product]) -> None:
+        now = time.time()
+        self._append([(CHANGE_ADD, product.product_id, product.current_stock, product.current_stock,
+                       product.version, now, product_to_dict(product)) for product in products])
+
+    def publish_stock(self, changes: Iterable[Tuple[str, int, int, int]]) -> None:
+        """Publishes (product_id, applied delta, current_stock, version) changes."""
+        now = time.time()
+        self._append([(CHANGE_STOCK, product_id, delta, stock, version, now, None)
+                      for product_id, delta, stock, version in changes])
+
+    def _append(self, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        with self._condition:
+            ring, capacity = self._ring, self.capacity
+            sequence = self._next_sequence
+            for row in rows:
+                ring[sequence % capacity] = ChangeEvent(sequence, *row)
+                sequence += 1
+            self._next_sequence = sequence
+            self._condition.notify_all()
+
+    # --- Consuming ---
+
+    def read(self, start: int, max_events: int = DEFAULT_POLL_SIZE,
+             timeout: Optional[float] = 0.0) -> List[ChangeEvent]:
+        """
+        Events from sequence `start` on (at most `max_events`), waiting up to `timeout` seconds (None: until one is
+        published or the feed is closed) when there is none yet.
+        """
+        with self._condition:
+            if start >= self._next_sequence and timeout != 0 and not self._closed:
+                self._condition.wait_for(lambda: start < self._next_sequence or self._closed, timeout)
+            if start < self.first_sequence or start > self._next_sequence:
+                raise ChangeFeedGapError(
+                    f"Sequence {start} is outside the retained changes [{self.first_sequence}, {self._next_sequence}].")
+            end = min(self._next_sequence, start + max_events)
+            return [self._ring[sequence % self.capacity] for sequence in range(start, end)]
+
+    def subscribe(self, from_sequence: Optional[int] = None, coalesced: bool = False,
+                  timeout: Optional[float] = None) -> "ChangeSubscription":
+        """
+        A subscription starting at `from_sequence` (default: the next event published). With `coalesced`, each poll
+        merges its events per product (see coalesce()). Iterating stops after `timeout` seconds without an event
+        (None: only when the feed is closed).
+        """
+        with self._condition:
+            start = self._next_sequence if from_sequence is None else from_sequence
+        return ChangeSubscription(self, start, coalesced, timeout)
+
+    def listen(self, callback: Callable[[List[ChangeEvent]], None], from_sequence: Optional[int] = None,
+               coalesced: bool = True, batch_size: int = DEFAULT_POLL_SIZE,
+               interval: float = 0.1) -> "ChangeListener":
+        """Starts a ChangeListener calling `callback` with batches of (by default coalesced) events."""
+        return ChangeListener(self.subscribe(from_sequence, coalesced), callback, batch_size, interval).start()
+
+    def close(self) -> None:
+        """Wakes every waiting reader; iterators end once they have consumed what was published."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {"published": self._next_sequence - 1, "first_sequence": self.first_sequence,
+                    "retained": min(self._next_sequence - 1, self.capacity)}
+
+
+class ChangeSubscription:
+    """
+    A consumer's position in a ChangeFeed. `position` is the next sequence number to read: save it to resume
+    later with feed.subscribe(from_sequence=position). It only moves past events handed to the consumer (when
+    iterating over coalesced events, past a poll's whole batch once its last event was taken, since a coalesced
+    event also carries earlier changes of its product).
+    """
+    def __init__(self, feed: ChangeFeed, position: int, coalesced: bool, timeout: Optional[float]):
+        self.feed = feed
+        self.position = position
+        self.coalesced = coalesced
+        self.timeout = timeout
+        self._buffered: List[ChangeEvent] = []
+        self._next_index = 0
+        self._buffer_end = position
+
+    def poll(self, max_events: int = DEFAULT_POLL_SIZE, timeout: Optional[float] = 0.0) -> List[ChangeEvent]:
+        """
+        Up to `max_events` events past `position` (fewer once coalesced), waiting up to `timeout` seconds for the
+        first one; advances `position` past them.
+        """
+        events, self.position = self._read(max_events, timeout)
+        return events
+
+    def _read(self, max_events: int, timeout: Optional[float]) -> Tuple[List[ChangeEvent], int]:
+        events = self.feed.read(self.position, max_events, timeout)
+        if not events:
+            return [], self.position
+        end = events[-1].sequence + 1
+        return (coalesce(events) if self.coalesced else events), end
+
+    def __iter__(self) -> Iterator[ChangeEvent]:
+        return self
+
+    def __next__(self) -> ChangeEvent:
+        if self._next_index >= len(self._buffered):
+            self.position = self._buffer_end
+            self._buffered, self._next_index = [], 0
+            while not self._buffered:
+                self._buffered, self._buffer_end = self._read(DEFAULT_POLL_SIZE, self.timeout)
+                if not self._buffered and (self.timeout is not None or self.feed.closed):
+                    raise StopIteration
+        event = self._buffered[self._next_index]
+        self._next_index += 1
+        if not self.coalesced:
+            self.position = event.sequence + 1
+        elif self._next_index == len(self._buffered):
+            self.position = self._buffer_end
+        return event
+
+
+class ChangeListener:
+    """
+    Calls `callback` with each batch of events of a subscription, on a background thread, polling at least every
+    `interval` seconds. A callback that raises is logged and counted; its batch is not redelivered.
+    Usable as a context manager or through start()/stop().
+    """
+    def __init__(self, subscription: ChangeSubscription, callback: Callable[[List[ChangeEvent]], None],
+                 batch_size: int = DEFAULT_POLL_SIZE, interval: float = 0.1):
+        self.subscription = subscription
+        self.callback = callback
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.delivered = 0
+        self.callback_errors = 0
+        self.error: Optional[BaseException] = None
+
+    def start(self) -> "ChangeListener":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="oes-change-listener", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Delivers what has been published so far, then stops the thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "ChangeListener":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        subscription = self.subscription
+        while True:
+            stopping = self._stop.is_set()
+            try:
+                events = subscription.poll(self.batch_size, 0.0 if stopping else self.interval)
+            except ChangeFeedGapError as error:
+                # The feed overtook this listener: it cannot continue without a resync.
+                self.error = error
+                logger.error("Change listener fell behind the feed: %s", error)
+                return
+            if events:
+                try:
+                    self.callback(events)
+                except Exception:
+                    self.callback_errors += 1
+                    logger.exception("Change listener callback failed on %d events.", len(events))
+                self.delivered += len(events)
+            elif stopping or subscription.feed.closed:
+                return
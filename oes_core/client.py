@@ -0,0 +1,258 @@
+
+import http.client
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from oes_core.models import Product, Transaction
+from oes_core.server import (BINARY_BATCH_CONTENT_TYPE, DEFAULT_HOST, DEFAULT_PORT, JSON_CONTENT_TYPE,
+                             encode_transaction_batch)
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_BATCH_CHUNK = 1000
+# Connection errors after which requests sent on a reused keep-alive connection are retried once on a new one:
+# the server may have closed the idle connection before it saw them. Only when every request is idempotent (GET):
+# the server may also have applied a POST and reset the connection before answering it.
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+_IDEMPOTENT_METHODS = frozenset({"GET"})
+
+# (method, path, body, content type) of one request.
+_Request = Tuple[str, str, Optional[bytes], str]
+
+
+class InventoryClientError(ValueError):
+    """An error response from the inventory server; `status` is the HTTP status code."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _SharedReader:
+    """
+    Hands the same buffered reader to every HTTPResponse of a pipeline: each response would otherwise make its own
+    buffered file over the socket, and read-ahead into it would swallow the start of the next response.
+    """
+    def __init__(self, reader):
+        self._reader = reader
+
+    def makefile(self, mode, *args, **kwargs):
+        return self
+
+    def close(self) -> None:
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+
+class InventoryClient:
+    """
+    Client of oes_core.server.InventoryHTTPServer.
+
+    Keeps up to `pool_size` idle keep-alive connections and reuses them across calls and threads (a call takes a
+    connection from the pool, or opens one, and returns it afterwards). Server errors raise InventoryClientError
+    (a ValueError, like the manager's own), except that get_product returns None for an unknown product.
+    Calls that find their pooled connection dead are retried on a new one only if they are all GETs; a POST
+    raises the connection error instead, since the server may have applied it before the connection dropped.
+
+    pipeline() and apply_transactions_pipelined() use HTTP/1.1 pipelining: all requests are written on one
+    connection before the first response is read, so a batch of calls costs one round trip instead of one each.
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Optional[float] = 10.0):
+        if pool_size <= 0:
+            raise ValueError("Connection pool size must be positive.")
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    # --- Inventory calls ---
+
+    def health(self) -> Dict[str, Any]:
+        return self._call("GET", "/health")
+
+    def add_product(self, product: Product) -> str:
+        """Creates the product on the server and returns the server-assigned product ID."""
+        return self._call("POST", "/products", _product_body(product))["product_id"]
+
+    def add_products(self, products: Iterable[Product]) -> List[str]:
+        return self._call("POST", "/products", [_product_body(product) for product in products])["product_ids"]
+
+    def get_product(self, product_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._call("GET", f"/products/{quote(product_id, safe='')}")
+        except InventoryClientError as error:
+            if error.status == 404:
+                return None
+            raise
+
+    def update_stock(self, product_id: str, quantity_change: int, transaction_type: str) -> int:
+        """Applies one transaction and returns the product's new stock level."""
+        return self._call("POST", f"/products/{quote(product_id, safe='')}/stock",
+                          {"quantity_change": quantity_change, "transaction_type": transaction_type})["current_stock"]
+
+    def apply_transactions(self, transactions: Sequence[Transaction], binary: bool = True) -> Dict[str, Any]:
+        """One batch-update request; `binary` sends the compact binary body instead of JSON."""
+        return _decode(*self._exchange([_batch_request(transactions, binary)])[0])
+
+    def apply_transactions_pipelined(self, transactions: Sequence[Transaction], chunk_size: int = DEFAULT_BATCH_CHUNK,
+                                     binary: bool = True) -> Dict[str, Any]:
+        """
+        Splits a large batch into `chunk_size` requests and pipelines them on one connection. Each chunk is applied
+        atomically by the server, in order; the merged summary of every chunk is returned ("below_threshold" lists
+        products that ended any chunk at or below their threshold), and the first failing chunk raises (chunks
+        before it stay applied).
+        """
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive.")
+        requests = [_batch_request(transactions[start:start + chunk_size], binary)
+                    for start in range(0, len(transactions), chunk_size)]
+        merged: Dict[str, Any] = {"applied": 0, "alerts": {}, "capped": {}}
+        below_threshold: Dict[str, None] = {}
+        for status, body in self._exchange(requests):
+            result = _decode(status, body)
+            merged["applied"] += result["applied"]
+            for key in ("alerts", "capped"):
+                for product_id, count in result[key].items():
+                    merged[key][product_id] = merged[key].get(product_id, 0) + count
+            below_threshold.update(dict.fromkeys(result["below_threshold"]))
+        merged["below_threshold"] = list(below_threshold)
+        return merged
+
+    def top_n(self, n: int) -> List[Dict[str, Any]]:
+        return self._call("GET", f"/top?n={int(n)}")
+
+    def pipeline(self, calls: Sequence[Tuple[str, str, Any]]) -> List[Any]:
+        """
+        Sends (method, path, JSON body or None) calls pipelined on one connection and returns their decoded results
+        in order. An error response raises after every response has been read.
+        """
+        responses = self._exchange([_json_request(method, path, body) for method, path, body in calls])
+        return [_decode(status, body) for status, body in responses]
+
+    # --- Connection pool ---
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def __enter__(self) -> "InventoryClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Returns a connection and whether it was reused from the pool."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(), False
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.connections_opened += 1
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _call(self, method: str, path: str, body: Any = None) -> Any:
+        return _decode(*self._exchange([_json_request(method, path, body)])[0])
+
+    def _exchange(self, requests: List[_Request]) -> List[Tuple[int, bytes]]:
+        connection, reused = self._acquire()
+        try:
+            responses = self._send_pipelined(connection, requests)
+        except _STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused or any(method not in _IDEMPOTENT_METHODS for method, _, _, _ in requests):
+                raise
+            connection = self._new_connection()
+            try:
+                responses = self._send_pipelined(connection, requests)
+            except BaseException:
+                connection.close()
+                raise
+        except BaseException:
+            connection.close()
+            raise
+        self._release(connection)
+        return responses
+
+    def _send_pipelined(self, connection: http.client.HTTPConnection,
+                        requests: List[_Request]) -> List[Tuple[int, bytes]]:
+        # http.client allows one outstanding request per connection, so requests are written to its socket directly
+        # and the responses parsed off one shared reader; the connection object stays idle and reusable.
+        if connection.sock is None:
+            connection.connect()
+        header_host = f"{self.host}:{self.port}"
+        wire = []
+        for method, path, body, content_type in requests:
+            headers = [f"{method} {path} HTTP/1.1", f"Host: {header_host}", "Accept: application/json"]
+            if body is not None:
+                headers.append(f"Content-Type: {content_type}")
+            headers.append(f"Content-Length: {0 if body is None else len(body)}")
+            wire.append(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1"))
+            if body is not None:
+                wire.append(body)
+        connection.sock.sendall(b"".join(wire))
+
+        reader = connection.sock.makefile("rb")
+        shared = _SharedReader(reader)
+        responses = []
+        must_close = False
+        try:
+            for method, _, _, _ in requests:
+                response = http.client.HTTPResponse(shared, method=method)
+                response.begin()
+                responses.append((response.status, response.read()))
+                must_close = must_close or response.will_close
+        except _STALE_CONNECTION_ERRORS as error:
+            if responses:
+                # Some requests were answered: resending the pipeline could apply them twice.
+                raise ConnectionError(f"Connection lost after {len(responses)} of {len(requests)} pipelined "
+                                      f"responses.") from error
+            raise
+        finally:
+            reader.close()
+        if must_close:
+            connection.close()
+        return responses
+
+
+def _product_body(product: Product) -> Dict[str, Any]:
+    return {"sku": product.sku, "name": product.name, "price": product.price, "description": product.description,
+            "current_stock": product.current_stock, "safety_stock_threshold": product.safety_stock_threshold}
+
+
+def _json_request(method: str, path: str, body: Any) -> _Request:
+    payload = None if body is None else json.dumps(body, separators=(",", ":")).encode("utf-8")
+    return method, path, payload, JSON_CONTENT_TYPE
+
+
+def _batch_request(transactions: Sequence[Transaction], binary: bool) -> _Request:
+    if binary:
+        return "POST", "/transactions", encode_transaction_batch(list(transactions)), BINARY_BATCH_CONTENT_TYPE
+    return _json_request("POST", "/transactions", [
+        {"product_id": transaction.product_id, "quantity_change": transaction.quantity_change,
+         "transaction_type": transaction.transaction_type} for transaction in transactions])
+
+
+def _decode(status: int, body: bytes) -> Any:
+    payload = json.loads(body) if body else None
+    if status >= 400:
+        message = payload.get("error") if isinstance(payload, dict) else None
+        raise InventoryClientError(status, message or f"HTTP {status}")
+    return payload
@@ -0,0 +1,263 @@
+import math
+import threading
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from statistics import NormalDist
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from oes_core.history import TRANSACTION_TYPE_CODES, TransactionHistory, to_epoch_ns
+from oes_core.models import Transaction
+
+DEFAULT_HALF_LIFE_DAYS = 14.0
+DEFAULT_LEAD_TIME_DAYS = 7.0
+DEFAULT_SERVICE_LEVEL = 0.95
+
+_NS_PER_DAY = 86_400 * 10 ** 9
+_OUTBOUND_CODE = TRANSACTION_TYPE_CODES[Transaction.TYPE_OUTBOUND]
+# Below this many new rows, folding them one by one in Python beats setting up the NumPy pass.
+_VECTOR_MIN_ROWS = 64
+# Decayed sums below this are rounding residue (e.g. of an undo) and are snapped to 0.
+_NEGLIGIBLE = 1e-9
+
+
+@dataclass
+class DemandForecast:
+    """
+    Demand forecast of a set of products, one NumPy array per field, row i = product_ids[i].
+
+    `velocity` is the expected OUTBOUND demand in units per day, `demand_std` the standard deviation of the demand
+    over the lead time, `reorder_point` = ceil(velocity * lead time + z * demand_std), with z the service level's
+    normal quantile. `days_of_cover` is stock / velocity (inf without demand).
+    """
+    product_ids: List[str]
+    stock: np.ndarray           # int64
+    velocity: np.ndarray        # float64, units/day
+    demand_std: np.ndarray      # float64, units over the lead time
+    reorder_point: np.ndarray   # int64
+    days_of_cover: np.ndarray   # float64
+    taken_at: datetime = field(default_factory=datetime.now)
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    def below_reorder_point(self) -> List[str]:
+        """IDs of the products with demand whose stock is at or below their reorder point."""
+        rows = np.flatnonzero((self.stock <= self.reorder_point) & (self.velocity > 0))
+        return [self.product_ids[row] for row in rows.tolist()]
+
+
+class DemandForecaster:
+    """
+    Per-product OUTBOUND demand velocity, kept up to date as transactions are recorded (pass it as
+    InventoryManager(forecaster=...)).
+
+    Demand is an exponentially weighted moving average over time rather than over transactions, so irregularly
+    spaced orders weigh by age: each product keeps the sums of its OUTBOUND quantities and of their squares,
+    decayed with the given half-life, as of the timestamp of its latest transaction. Folding in a transaction is
+    O(1); so is taking back an undone one, since its decayed weight is known exactly. With the decay constant
+    tau = half-life / ln 2, a steady demand of r units/day decays to a sum of r * tau, so velocity = sum / tau; the
+    squares give the variance of the demand over a lead time L (compound Poisson: L * sum of squares / tau).
+
+    The state is columnar (one array slot per product code of the TransactionHistory it follows), so batches,
+    rebuild() and forecast() are vectorised over the whole catalog.
+    """
+    def __init__(self, half_life_days: float = DEFAULT_HALF_LIFE_DAYS,
+                 lead_time_days: float = DEFAULT_LEAD_TIME_DAYS, service_level: float = DEFAULT_SERVICE_LEVEL):
+        if half_life_days <= 0:
+            raise ValueError("Demand half-life must be positive.")
+        if lead_time_days < 0:
+            raise ValueError("Lead time cannot be negative.")
+        _service_factor(service_level)
+        self.half_life_days = half_life_days
+        self.lead_time_days = lead_time_days
+        self.service_level = service_level
+        self._tau_days = half_life_days / math.log(2)
+        self._tau_ns = self._tau_days * _NS_PER_DAY
+        # By product code: decayed demand sum, decayed sum of squared demand, and the epoch-ns they are taken at.
+        self._level = array('d')
+        self._square = array('d')
+        self._as_of = array('q')
+        self._lock = threading.Lock()
+
+    # --- Maintenance (called by InventoryManager under its history lock) ---
+
+    def observe(self, history: TransactionHistory, first_row: int) -> None:
+        """Folds in the history rows from `first_row` on, just appended."""
+        self._fold(history.columns_since(first_row), retract=False)
+
+    def retract(self, history: TransactionHistory, first_row: int) -> None:
+        """Takes back the history rows from `first_row` on, about to be undone."""
+        self._fold(history.columns_since(first_row), retract=True)
+
+    def rebuild(self, history: TransactionHistory) -> None:
+        """Recomputes every product from the whole history in one vectorised pass."""
+        codes, timestamps, quantities = _outbound(history.columns_since(0))
+        with self._lock:
+            self._reset()
+            if not len(codes):
+                return
+            size = self._grow(int(codes.max()) + 1)
+            as_of = int(timestamps.max())
+            weights = np.exp((timestamps - as_of) / self._tau_ns)
+            level, square, stamps = self._views()
+            level[:] = np.bincount(codes, weights=quantities * weights, minlength=size)
+            square[:] = np.bincount(codes, weights=quantities * quantities * weights, minlength=size)
+            stamps[np.bincount(codes, minlength=size) > 0] = as_of
+            del level, square, stamps
+
+    def _fold(self, columns: Tuple[array, array, array, array], retract: bool) -> None:
+        codes, timestamps, types, quantities = columns
+        if len(codes) < _VECTOR_MIN_ROWS:
+            with self._lock:
+                for code, timestamp, type_code, quantity in zip(codes, timestamps, types, quantities):
+                    if type_code == _OUTBOUND_CODE:
+                        self._fold_one(code, timestamp, -quantity, retract)
+            return
+        codes, timestamps, quantities = _outbound(columns)
+        if not len(codes):
+            return
+        with self._lock:
+            touched, inverse = _group(codes, self._grow(int(codes.max()) + 1))
+            level, square, stamps = self._views()
+            if retract:
+                # Every undone row is at or before its product's as-of time: only its weight is needed.
+                weights = np.exp((timestamps - stamps[codes]) / self._tau_ns)
+                levels = level[touched] - np.bincount(inverse, weights=quantities * weights)
+                squares = square[touched] - np.bincount(inverse, weights=quantities * quantities * weights)
+                level[touched] = np.where(levels < _NEGLIGIBLE, 0.0, levels)
+                square[touched] = np.where(squares < _NEGLIGIBLE, 0.0, squares)
+            else:
+                # Move each touched product to a common as-of time, then add the new rows decayed to it.
+                as_of = np.maximum(stamps[touched], timestamps.max())
+                decay = np.exp((stamps[touched] - as_of) / self._tau_ns)
+                weights = np.exp((timestamps - as_of[inverse]) / self._tau_ns)
+                level[touched] = level[touched] * decay + np.bincount(inverse, weights=quantities * weights)
+                square[touched] = (square[touched] * decay
+                                   + np.bincount(inverse, weights=quantities * quantities * weights))
+                stamps[touched] = as_of
+            del level, square, stamps
+
+    def _fold_one(self, code: int, timestamp: int, demand: int, retract: bool) -> None:
+        if code >= len(self._level):
+            self._grow(code + 1)
+        as_of = self._as_of[code]
+        if retract:
+            weight = math.exp((timestamp - as_of) / self._tau_ns)
+            level = self._level[code] - demand * weight
+            square = self._square[code] - demand * demand * weight
+            self._level[code] = level if level >= _NEGLIGIBLE else 0.0
+            self._square[code] = square if square >= _NEGLIGIBLE else 0.0
+        elif timestamp >= as_of:
+            decay = math.exp((as_of - timestamp) / self._tau_ns)
+            self._level[code] = self._level[code] * decay + demand
+            self._square[code] = self._square[code] * decay + demand * demand
+            self._as_of[code] = timestamp
+        else:
+            # A concurrent writer recorded it slightly out of time order: add it already decayed.
+            weight = math.exp((timestamp - as_of) / self._tau_ns)
+            self._level[code] += demand * weight
+            self._square[code] += demand * demand * weight
+
+    # --- Queries ---
+
+    def velocity(self, history: TransactionHistory, product_id: str, now: Optional[datetime] = None) -> float:
+        """Expected OUTBOUND demand of one product, in units per day (0.0 without any)."""
+        code = history.code_of(product_id)
+        now_ns = to_epoch_ns(now if now is not None else datetime.now())
+        with self._lock:
+            if code is None or code >= len(self._level):
+                return 0.0
+            level, as_of = self._level[code], self._as_of[code]
+        return level * math.exp(min(as_of - now_ns, 0) / self._tau_ns) / self._tau_days
+
+    def forecast(self, history: TransactionHistory, product_ids: Sequence[str], stock: Sequence[int],
+                 lead_time_days: Union[float, Sequence[float], None] = None, service_level: Optional[float] = None,
+                 now: Optional[datetime] = None) -> DemandForecast:
+        """
+        Velocity, reorder point and days of cover of every product in `product_ids` (with its current `stock`).
+        `lead_time_days` is one value or one per product; it and `service_level` default to the forecaster's.
+        Only the gather of the products' state holds the forecaster's lock; the arithmetic runs unlocked.
+        """
+        taken_at = now if now is not None else datetime.now()
+        z = _service_factor(self.service_level if service_level is None else service_level)
+        lead_times = np.asarray(self.lead_time_days if lead_time_days is None else lead_time_days, dtype=np.float64)
+        if np.any(lead_times < 0):
+            raise ValueError("Lead time cannot be negative.")
+        if lead_times.ndim and lead_times.shape != (len(product_ids),):
+            raise ValueError("One lead time is required per product.")
+        codes = np.frombuffer(history.codes_of(product_ids), dtype=np.int64)
+
+        with self._lock:
+            level, square, stamps = self._views()
+            known = (codes >= 0) & (codes < len(level))
+            rows = codes[known]
+            levels, squares, as_of = level[rows], square[rows], stamps[rows]
+            del level, square, stamps
+
+        decay = np.exp(np.minimum(as_of - to_epoch_ns(taken_at), 0) / self._tau_ns)
+        velocity = np.zeros(len(codes))
+        variance_rate = np.zeros(len(codes))
+        velocity[known] = levels * decay / self._tau_days
+        variance_rate[known] = squares * decay / self._tau_days
+        demand_std = np.sqrt(variance_rate * lead_times)
+        stock_column = np.asarray(stock, dtype=np.int64)
+        days_of_cover = np.full(len(codes), np.inf)
+        np.divide(stock_column, velocity, out=days_of_cover, where=velocity > 0)
+        return DemandForecast(
+            product_ids=list(product_ids),
+            stock=stock_column,
+            velocity=velocity,
+            demand_std=demand_std,
+            # Rounded before the ceiling so float noise on an exact integer does not add a unit.
+            reorder_point=np.ceil(np.round(velocity * lead_times + z * demand_std, 9)).astype(np.int64),
+            days_of_cover=days_of_cover,
+            taken_at=taken_at,
+        )
+
+    def _grow(self, size: int) -> int:
+        missing = size - len(self._level)
+        if missing > 0:
+            missing = max(missing, len(self._level))  # doubling: amortised O(1) per new product
+            self._level.extend(array('d', bytes(8 * missing)))
+            self._square.extend(array('d', bytes(8 * missing)))
+            self._as_of.extend(array('q', bytes(8 * missing)))
+        return len(self._level)
+
+    def _views(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Zero-copy views: they pin the arrays' buffers, so callers drop them before the arrays can grow.
+        return (np.frombuffer(self._level, dtype=np.float64), np.frombuffer(self._square, dtype=np.float64),
+                np.frombuffer(self._as_of, dtype=np.int64))
+
+    def _reset(self) -> None:
+        self._level = array('d')
+        self._square = array('d')
+        self._as_of = array('q')
+
+
+def _outbound(columns: Tuple[array, array, array, array]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The OUTBOUND rows of history columns: product codes, epoch-ns timestamps and demand (positive, float64)."""
+    codes, timestamps, types, quantities = (np.frombuffer(column, dtype=column.typecode) for column in columns)
+    rows = types == _OUTBOUND_CODE
+    return codes[rows].astype(np.intp), timestamps[rows], -quantities[rows].astype(np.float64)
+
+
+def _group(codes: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The distinct codes (ascending) and, per row, the position of its code among them. Large batches (e.g. WAL
+    replay) count codes over the whole code range, O(rows + products), instead of sorting them.
+    """
+    if len(codes) * 8 < size:
+        return np.unique(codes, return_inverse=True)
+    touched = np.flatnonzero(np.bincount(codes, minlength=size))
+    positions = np.empty(size, dtype=np.intp)
+    positions[touched] = np.arange(len(touched))
+    return touched, positions[codes]
+
+
+def _service_factor(service_level: float) -> float:
+    if not 0 < service_level < 1:
+        raise ValueError("Service level must be between 0 and 1 (exclusive).")
+    return NormalDist().inv_cdf(service_level)
@@ -0,0 +1,329 @@
+
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from oes_core.models import Transaction
+
+# Timestamps are stored as int64 nanoseconds since this (naive) epoch, i.e. the wall clock value of datetime.now().
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Small enum codes for the transaction type column.
+TRANSACTION_TYPES = (Transaction.TYPE_INBOUND, Transaction.TYPE_OUTBOUND, Transaction.TYPE_ADJUSTMENT)
+TRANSACTION_TYPE_CODES = {transaction_type: code for code, transaction_type in enumerate(TRANSACTION_TYPES)}
+
+_ID_WIDTH = 16
+
+# Rows per block of the time index (see TransactionHistory._row_bounds).
+_BLOCK_ROWS = 256
+
+
+def to_epoch_ns(timestamp: datetime) -> int:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - _EPOCH) // _ONE_MICROSECOND * 1000
+
+
+def _pack_id(transaction_id: str) -> Optional[bytes]:
+    """Packs a canonical (lower-case, dashed) UUID string into 16 bytes, or returns None for any other ID."""
+    if (type(transaction_id) is not str or len(transaction_id) != 36 or transaction_id[8] != '-'
+            or transaction_id[13] != '-' or transaction_id[18] != '-' or transaction_id[23] != '-'
+            or transaction_id != transaction_id.lower()):
+        return None
+    try:
+        raw_id = bytes.fromhex(transaction_id.replace('-', ''))
+    except ValueError:
+        return None
+    return raw_id if len(raw_id) == _ID_WIDTH else None
+
+
+def from_epoch_ns(epoch_ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=epoch_ns // 1000)
+
+
+def restore_transaction(transaction_id: str, product_id: str, quantity_change: int, type_code: int,
+                        timestamp_ns: int) -> Transaction:
+    """
+    Builds a Transaction from its column encoding (type code, epoch-ns timestamp), as stored by the history, the
+    WAL and the shard transport. The row was validated when first constructed, so __init__ / __post_init__ is
+    bypassed.
+    """
+    transaction = object.__new__(Transaction)
+    transaction.transaction_id = transaction_id
+    transaction.product_id = product_id
+    transaction.quantity_change = quantity_change
+    transaction.transaction_type = TRANSACTION_TYPES[type_code]
+    transaction.timestamp = from_epoch_ns(timestamp_ns)
+    return transaction
+
+
+class TransactionHistory(Sequence):
+    """
+    Append-only, array-backed (columnar) store for the transaction history.
+
+    One row per transaction, spread over parallel typed arrays instead of one Transaction object per row:
+    transaction ID as 16 raw UUID bytes, timestamp as int64 epoch-ns, type as a 1-byte enum code,
+    quantity as int32, the delta actually applied to the stock as int32 (differs from the quantity when an
+    OUTBOUND was capped at 0; needed to undo it) and the product as a uint32 code into an interned product ID table.
+    Rows are materialised back into Transaction objects lazily, only when they are accessed.
+
+    Two indexes make history queries binary searches instead of full scans:
+    - a posting list per product: the (ascending) rows of that product's transactions;
+    - a time index over the append-ordered timestamp column: the running maximum timestamp at the end of every
+      block of _BLOCK_ROWS rows, plus the largest amount any timestamp lagged behind the running maximum
+      ("disorder", 0 when transactions are appended in time order). Together they bound the rows that can fall
+      into a time range even when concurrent writers append slightly out of time order.
+    """
+    def __init__(self, transactions: Iterable[Transaction] = ()):
+        self._ids = bytearray()
+        self._timestamps = array('q')
+        self._types = array('b')
+        self._quantities = array('i')
+        self._applied = array('i')
+        self._product_codes = array('I')
+        # Interned product IDs: code -> product ID and product ID -> code.
+        self._product_ids: List[str] = []
+        self._codes_by_product: Dict[str, int] = {}
+        # Transaction IDs that are not UUIDs cannot be packed into 16 bytes; they are kept aside by row.
+        self._irregular_ids: Dict[int, str] = {}
+        # Posting lists, indexed by product code: rows of the product's transactions, ascending.
+        self._rows_by_code: List[array] = []
+        # Time index: running max timestamp at the end of each complete block, the running max so far, and disorder.
+        self._block_maxes = array('q')
+        self._running_max: Optional[int] = None
+        self._disorder = 0
+        self.extend(transactions)
+
+    def __len__(self) -> int:
+        return len(self._quantities)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self._materialise(row) for row in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("transaction history index out of range")
+        return self._materialise(index)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for row in range(len(self)):
+            yield self._materialise(row)
+
+    def append(self, transaction: Transaction, applied_delta: Optional[int] = None) -> None:
+        self.extend((transaction,), None if applied_delta is None else (applied_delta,))
+
+    def extend(self, transactions: Iterable[Transaction], applied_deltas: Optional[Iterable[int]] = None) -> None:
+        """
+        Appends rows in bulk, with the stock delta applied for each (defaults to its quantity_change).
+        Every column is encoded before any of them is written, so a bad value
+        (e.g. a quantity outside int32) raises without leaving the columns misaligned.
+        """
+        row = len(self)
+        raw_ids = bytearray()
+        timestamps: List[int] = []
+        type_codes: List[int] = []
+        quantities: List[int] = []
+        product_ids: List[str] = []
+        irregular_ids: Dict[int, str] = {}
+
+        for transaction in transactions:
+            raw_id = _pack_id(transaction.transaction_id)
+            if raw_id is None:
+                raw_id = bytes(_ID_WIDTH)
+                irregular_ids[row] = transaction.transaction_id
+            raw_ids += raw_id
+            timestamps.append(to_epoch_ns(transaction.timestamp))
+            type_codes.append(TRANSACTION_TYPE_CODES[transaction.transaction_type])
+            quantities.append(transaction.quantity_change)
+            product_ids.append(transaction.product_id)
+            row += 1
+
+        quantity_column = array('i', quantities)
+        applied_column = quantity_column if applied_deltas is None else array('i', applied_deltas)
+        if len(applied_column) != len(quantity_column):
+            raise ValueError("One applied delta is required per transaction.")
+        timestamp_column = array('q', timestamps)
+
+        self._ids += raw_ids
+        self._timestamps.extend(timestamp_column)
+        self._types.extend(array('b', type_codes))
+        self._quantities.extend(quantity_column)
+        self._applied.extend(applied_column)
+        codes = array('I', [self._product_code(product_id) for product_id in product_ids])
+        self._product_codes.extend(codes)
+        self._irregular_ids.update(irregular_ids)
+        self._index_rows(len(self) - len(codes), codes, timestamp_column)
+
+    def _index_rows(self, first_row: int, codes: array, timestamps: array) -> None:
+        rows_by_code = self._rows_by_code
+        for row, code in enumerate(codes, start=first_row):
+            rows_by_code[code].append(row)
+
+        running_max = self._running_max
+        disorder = self._disorder
+        block_maxes = self._block_maxes
+        row = first_row
+        for timestamp in timestamps:
+            if running_max is None or timestamp > running_max:
+                running_max = timestamp
+            elif running_max - timestamp > disorder:
+                disorder = running_max - timestamp
+            row += 1
+            if row % _BLOCK_ROWS == 0:
+                block_maxes.append(running_max)
+        self._running_max = running_max
+        self._disorder = disorder
+
+    def history_for(self, product_id: str, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None) -> Iterator[Transaction]:
+        """
+        Yields the product's transactions with since <= timestamp <= until (both optional, inclusive),
+        in the order they were recorded. Binary searches the product's posting list, then scans only the rows
+        of that product inside the time window.
+        """
+        code = self._codes_by_product.get(product_id)
+        if code is None:
+            return
+        since_ns = None if since is None else to_epoch_ns(since)
+        until_ns = None if until is None else to_epoch_ns(until)
+        first_row, stop_row = self._row_bounds(since_ns, until_ns)
+        rows = self._rows_by_code[code]
+        timestamps = self._timestamps
+        for i in range(bisect_left(rows, first_row), bisect_left(rows, stop_row)):
+            row = rows[i]
+            timestamp = timestamps[row]
+            if (since_ns is None or timestamp >= since_ns) and (until_ns is None or timestamp <= until_ns):
+                yield self._materialise(row)
+
+    def history_between(self, start: datetime, end: datetime) -> Iterator[Transaction]:
+        """Yields every transaction with start <= timestamp <= end, in the order they were recorded."""
+        start_ns, end_ns = to_epoch_ns(start), to_epoch_ns(end)
+        first_row, stop_row = self._row_bounds(start_ns, end_ns)
+        timestamps = self._timestamps
+        for row in range(first_row, stop_row):
+            timestamp = timestamps[row]
+            if start_ns <= timestamp <= end_ns:
+                yield self._materialise(row)
+
+    def _row_bounds(self, since_ns: Optional[int], until_ns: Optional[int]) -> Tuple[int, int]:
+        """
+        Returns rows [first, stop) holding every row with since <= timestamp <= until, from the time index.
+        Every row of a block is <= the block's running max, and >= the previous block's running max - disorder.
+        """
+        size = len(self)
+        first_row = 0 if since_ns is None else min(bisect_left(self._block_maxes, since_ns) * _BLOCK_ROWS, size)
+        if until_ns is None:
+            return first_row, size
+        stop_block = bisect_right(self._block_maxes, until_ns + self._disorder) + 1
+        return first_row, min(stop_block * _BLOCK_ROWS, size)
+
+    def row_of(self, transaction_id: str) -> Optional[int]:
+        """Returns the row of the most recent transaction with this ID, or None. A C-level search of the ID column."""
+        found = max((row for row, irregular in self._irregular_ids.items() if irregular == transaction_id),
+                    default=None)
+        raw_id = _pack_id(transaction_id)
+        if raw_id is not None:
+            offset = self._ids.rfind(raw_id)
+            # Only matches aligned on a 16-byte boundary are IDs; anything else straddles two IDs.
+            while offset > 0 and offset % _ID_WIDTH:
+                offset = self._ids.rfind(raw_id, 0, offset + _ID_WIDTH - 1)
+            if offset >= 0 and (offset // _ID_WIDTH) not in self._irregular_ids:
+                found = max(found if found is not None else -1, offset // _ID_WIDTH)
+        return found
+
+    def applied_deltas_since(self, first_row: int) -> Dict[str, int]:
+        """Returns the net applied stock delta per product over rows [first_row, len), in one pass."""
+        totals: Dict[int, int] = {}
+        get = totals.get
+        for code, delta in zip(self._product_codes[first_row:], self._applied[first_row:]):
+            totals[code] = get(code, 0) + delta
+        return {self._product_ids[code]: delta for code, delta in totals.items()}
+
+    def columns_since(self, first_row: int) -> Tuple[array, array, array, array]:
+        """
+        Copies of the product code, timestamp (epoch-ns), type code and quantity columns over rows [first_row, len),
+        for vectorised consumers (np.frombuffer(column, dtype=column.typecode)). Codes resolve through code_of.
+        """
+        return (self._product_codes[first_row:], self._timestamps[first_row:], self._types[first_row:],
+                self._quantities[first_row:])
+
+    def code_of(self, product_id: str) -> Optional[int]:
+        """The product's code in the product code column, or None if it has no recorded transaction."""
+        return self._codes_by_product.get(product_id)
+
+    def codes_of(self, product_ids: Iterable[str]) -> array:
+        """code_of for many products at once, as an int64 array with -1 for products without transactions."""
+        get = self._codes_by_product.get
+        return array('q', [get(product_id, -1) for product_id in product_ids])
+
+    def truncate(self, length: int) -> None:
+        """
+        Drops every row from `length` on, keeping the posting lists and the time index consistent incrementally
+        (only the affected products' posting lists and the tail of the block index are touched).
+        """
+        if not 0 <= length <= len(self):
+            raise ValueError(f"Cannot truncate a history of {len(self)} rows to {length}.")
+        if length == len(self):
+            return
+        for code in set(self._product_codes[length:]):
+            rows = self._rows_by_code[code]
+            del rows[bisect_left(rows, length):]
+        del self._ids[length * _ID_WIDTH:]
+        for column in (self._timestamps, self._types, self._quantities, self._applied, self._product_codes):
+            del column[length:]
+        if self._irregular_ids:
+            self._irregular_ids = {row: irregular for row, irregular in self._irregular_ids.items() if row < length}
+
+        # The disorder bound is kept as is: it can only be too large, which widens scans but stays exact.
+        del self._block_maxes[length // _BLOCK_ROWS:]
+        running_max = self._block_maxes[-1] if self._block_maxes else None
+        for timestamp in self._timestamps[len(self._block_maxes) * _BLOCK_ROWS:]:
+            if running_max is None or timestamp > running_max:
+                running_max = timestamp
+        self._running_max = running_max
+
+    def clear(self) -> None:
+        del self._ids[:]
+        for column in (self._timestamps, self._types, self._quantities, self._applied, self._product_codes):
+            del column[:]
+        self._product_ids.clear()
+        self._codes_by_product.clear()
+        self._irregular_ids.clear()
+        self._rows_by_code.clear()
+        del self._block_maxes[:]
+        self._running_max = None
+        self._disorder = 0
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the row columns and indexes (excluding the interned product ID table)."""
+        return (len(self._ids) + self._timestamps.itemsize * len(self._timestamps)
+                + self._types.itemsize * len(self._types) + self._quantities.itemsize * len(self._quantities)
+                + self._applied.itemsize * len(self._applied)
+                + self._product_codes.itemsize * len(self._product_codes)
+                + sum(rows.itemsize * len(rows) for rows in self._rows_by_code)
+                + self._block_maxes.itemsize * len(self._block_maxes))
+
+    def _product_code(self, product_id: str) -> int:
+        code = self._codes_by_product.get(product_id)
+        if code is None:
+            code = len(self._product_ids)
+            self._product_ids.append(product_id)
+            self._codes_by_product[product_id] = code
+            self._rows_by_code.append(array('I'))
+        return code
+
+    def _transaction_id(self, row: int) -> str:
+        irregular = self._irregular_ids.get(row)
+        if irregular is not None:
+            return irregular
+        offset = row * _ID_WIDTH
+        return str(uuid.UUID(bytes=bytes(self._ids[offset:offset + _ID_WIDTH])))
+
+    def _materialise(self, row: int) -> Transaction:
+        return restore_transaction(self._transaction_id(row), self._product_ids[self._product_codes[row]],
+                                   self._quantities[row], self._types[row], self._timestamps[row])
@@ -0,0 +1,101 @@
+
+import os
+import threading
+import time
+from typing import List
+
+# UUIDv7 layout (RFC 9562): 48-bit Unix time in ms | version 7 | 12-bit rand_a | variant 10 | 62-bit rand_b.
+# rand_a holds a per-millisecond counter, which makes the IDs strictly increasing (also as strings) within a
+# generator; rand_b stays random.
+_COUNTER_LIMIT = 1 << 12
+# First hex digit of the fourth group: the two variant bits (10) followed by two random bits.
+_VARIANT_DIGIT = {digit: "89ab"[int(digit, 16) & 3] for digit in "0123456789abcdef"}
+# Counter digits of the third group, with the following separator.
+_COUNTER_HEX = [f"{counter:03x}-" for counter in range(_COUNTER_LIMIT)]
+
+DEFAULT_BATCH_SIZE = 256
+
+
+class IdGenerator:
+    """
+    Monotonic, time-sortable UUIDv7 strings, generated in batches.
+
+    One refill reads the clock once and os.urandom once for `batch_size` IDs, then new_id() hands them out with a
+    list pop. IDs compare (as strings) in generation order; their embedded time is when their batch was generated.
+    More than 4096 IDs in one millisecond borrow the next millisecond rather than lose ordering.
+    """
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        if batch_size <= 0:
+            raise ValueError("ID batch size must be positive.")
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._counter = 0
+        # Pending IDs of the current batch, newest first (pop() takes the oldest).
+        self._pending: List[str] = []
+
+    def new_id(self) -> str:
+        try:
+            return self._pending.pop()
+        except IndexError:
+            with self._lock:
+                if not self._pending:
+                    pending = self._generate(self.batch_size)
+                    pending.reverse()
+                    self._pending = pending
+                return self._pending.pop()
+
+    def new_ids(self, count: int) -> List[str]:
+        """`count` IDs: what is left of the current batch, then one refill for the rest."""
+        ids: List[str] = []
+        with self._lock:
+            # pop() one by one: new_id() may pop the same list concurrently without the lock.
+            pending = self._pending
+            while pending and len(ids) < count:
+                try:
+                    ids.append(pending.pop())
+                except IndexError:
+                    break
+            if len(ids) < count:
+                ids += self._generate(count - len(ids))
+        return ids
+
+    def _generate(self, count: int) -> List[str]:
+        """Generates `count` IDs; the caller holds the lock."""
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > self._last_ms:
+            self._last_ms = now_ms
+            self._counter = 0
+        random_hex = os.urandom(8 * count).hex()
+        ids: List[str] = []
+        while len(ids) < count:
+            if self._counter == _COUNTER_LIMIT:
+                self._last_ms += 1
+                self._counter = 0
+            time_hex = f"{self._last_ms:012x}"
+            prefix = f"{time_hex[:8]}-{time_hex[8:]}-7"
+            first = self._counter
+            take = min(count - len(ids), _COUNTER_LIMIT - first)
+            offset = 16 * len(ids)
+            ids += [f"{prefix}{counter}{_VARIANT_DIGIT[random_hex[start]]}"
+                    f"{random_hex[start + 1:start + 4]}-{random_hex[start + 4:start + 16]}"
+                    for counter, start in zip(_COUNTER_HEX[first:first + take], range(offset, offset + 16 * take, 16))]
+            self._counter = first + take
+        return ids
+
+    def _after_fork(self) -> None:
+        # A forked child must not hand out the IDs still buffered in its parent.
+        self._lock = threading.Lock()
+        self._pending = []
+
+
+def timestamp_ms_of(identifier: str) -> int:
+    """Unix time in milliseconds embedded in a UUIDv7 string."""
+    return int(identifier[:8] + identifier[9:13], 16)
+
+
+_default_generator = IdGenerator()
+new_id = _default_generator.new_id
+new_ids = _default_generator.new_ids
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_default_generator._after_fork)
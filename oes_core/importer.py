@@ -0,0 +1,291 @@
+
+import csv
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from oes_core.ids import new_ids
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Defaults Product uses for optional fields that are absent or empty in a catalog row.
+_DEFAULTS = {"current_stock": 0, "safety_stock_threshold": 10}
+
+Row = Tuple[int, Optional[Dict[str, Any]]]
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+# Largest magnitude up to which every integer is exactly representable as a float64.
+_EXACT_FLOAT_INTEGER = 2 ** 53
+
+
+@dataclass(slots=True)
+class RejectedRow:
+    """A catalog row that was not imported: its line number in the source file and why."""
+    line: int
+    reason: str
+    row: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class ImportReport:
+    """
+    Outcome of a catalog import. `rejected` keeps the first `max_rejections` rejected rows,
+    `rejected_count` counts all of them.
+    """
+    imported: int = 0
+    rejected_count: int = 0
+    rejected: List[RejectedRow] = field(default_factory=list)
+
+
+# --- Readers: generators of (line number, row dict) ---
+
+def read_csv_rows(path: str) -> Iterator[Row]:
+    """Streams a CSV catalog with a header line; empty cells count as absent."""
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        # zip() into a dict directly: csv.DictReader's pure-Python __next__ costs more than the parsing itself.
+        for row in reader:
+            if row:
+                yield reader.line_num, dict(zip(header, row))
+
+
+def read_jsonl_rows(path: str) -> Iterator[Row]:
+    """Streams a JSON Lines catalog, one object per line. Lines that are not a JSON object yield a None row."""
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+
+
+def chunked(rows: Iterable[Row], chunk_size: int) -> Iterator[List[Row]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# --- Vectorised validation ---
+
+def _numeric_column(values: List[Any], default: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parses a column into float64 in one NumPy call and returns (values, unparseable mask).
+    Only a chunk holding an unparseable value (or a JSON boolean, which NumPy would take as 0 / 1) falls back to
+    parsing element by element.
+    """
+    filled = [default if value is None or value == "" else value for value in values]
+    if not any(type(value) is bool for value in filled):
+        try:
+            return np.array(filled, dtype=np.float64), np.zeros(len(filled), dtype=bool)
+        except (TypeError, ValueError):
+            pass
+    parsed = np.empty(len(filled), dtype=np.float64)
+    bad = np.zeros(len(filled), dtype=bool)
+    for i, value in enumerate(filled):
+        try:
+            if type(value) is bool:
+                raise TypeError
+            parsed[i] = float(value)
+        except (TypeError, ValueError):
+            parsed[i] = np.nan
+            bad[i] = True
+    return parsed, bad
+
+
+def _parse_integer(value: Any) -> int:
+    """int(value) for an int or an integer string or float ("12", 12.0); raises ValueError for anything else."""
+    if type(value) is int:
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            value = float(value)
+    if type(value) is float and value.is_integer() and abs(value) <= _EXACT_FLOAT_INTEGER:
+        return int(value)
+    raise ValueError(f"Not an integer: {value!r}")
+
+
+def _integer_column(values: List[Any], default: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parses a column into int64 and returns (values, unparseable mask). Integers are never routed through float64,
+    so they keep every digit; values outside int64 are unparseable. A column of ints or integer strings is
+    converted in one NumPy call, anything else (floats, booleans, bad values) element by element.
+    """
+    filled = [default if value is None or value == "" else value for value in values]
+    if {type(value) for value in filled} <= {int, str}:
+        try:
+            return np.array(filled, dtype=np.int64), np.zeros(len(filled), dtype=bool)
+        except (OverflowError, ValueError):
+            pass
+    parsed = np.zeros(len(filled), dtype=np.int64)
+    bad = np.zeros(len(filled), dtype=bool)
+    for i, value in enumerate(filled):
+        try:
+            integer = _parse_integer(value)
+        except (TypeError, ValueError, OverflowError):
+            bad[i] = True
+            continue
+        if _INT64_MIN <= integer <= _INT64_MAX:
+            parsed[i] = integer
+        else:
+            bad[i] = True
+    return parsed, bad
+
+
+def validate_chunk(chunk: List[Row], seen_skus: Optional[Set[str]] = None) -> Tuple[
+        List[Tuple[int, Dict[str, Any]]], Dict[str, np.ndarray], List[RejectedRow]]:
+    """
+    Applies the Product validation rules (price > 0, safety_stock_threshold >= 0, alphanumeric SKU) to a whole
+    chunk at once with NumPy, plus parse checks and SKU uniqueness within the chunk.
+
+    With `seen_skus` (the SKUs of earlier chunks, updated with this chunk's), SKU uniqueness spans the whole
+    catalog: a row repeating a SKU of an earlier chunk is rejected as a duplicate too.
+    Returns the accepted rows, their parsed numeric columns and the rejected rows, each with the first rule it broke.
+    """
+    rejected: List[RejectedRow] = []
+    rows: List[Tuple[int, Dict[str, Any]]] = []
+    for line, row in chunk:
+        if row is None:
+            rejected.append(RejectedRow(line, "Row is not a valid JSON object."))
+            continue
+        sku, name, price = row.get("sku"), row.get("name"), row.get("price")
+        if not sku or name is None or price is None or price == "":
+            missing = "sku" if not sku else "name" if name is None else "price"
+            rejected.append(RejectedRow(line, f"Missing required field: {missing}.", row))
+        elif not isinstance(sku, str) or not isinstance(name, str):
+            rejected.append(RejectedRow(line, "SKU and name must be strings.", row))
+        else:
+            rows.append((line, row))
+    if not rows:
+        return [], {}, rejected
+
+    price, bad_price = _numeric_column([row["price"] for _, row in rows], None)
+    stock, bad_stock = _integer_column([row.get("current_stock") for _, row in rows], _DEFAULTS["current_stock"])
+    threshold, bad_threshold = _integer_column([row.get("safety_stock_threshold") for _, row in rows],
+                                               _DEFAULTS["safety_stock_threshold"])
+    sku_list = [row["sku"] for _, row in rows]
+    skus = np.array(sku_list, dtype=str)
+
+    # First occurrence of each SKU wins; later rows with the same SKU are rejected.
+    duplicate_sku = np.ones(len(rows), dtype=bool)
+    duplicate_sku[np.unique(skus, return_index=True)[1]] = False
+    if seen_skus is not None:
+        if seen_skus:
+            duplicate_sku |= np.fromiter((sku in seen_skus for sku in sku_list), dtype=bool, count=len(sku_list))
+        seen_skus.update(sku_list)
+
+    # Checks in priority order: each row is reported with the first one it fails.
+    checks = (
+        (bad_price, "Price is not a number."),
+        (bad_stock, "Current stock is not an integer."),
+        (bad_threshold, "Safety stock threshold is not an integer."),
+        (~(price > 0), "Product price must be positive."),
+        (threshold < 0, "Safety stock threshold cannot be negative."),
+        (~np.char.isalnum(skus), "SKU must be alphanumeric."),
+        (duplicate_sku, "Duplicate SKU in catalog."),
+    )
+    reasons: List[Optional[str]] = [None] * len(rows)
+    invalid = np.zeros(len(rows), dtype=bool)
+    for mask, reason in checks:
+        for i in np.flatnonzero(mask & ~invalid):
+            reasons[i] = reason
+        invalid |= mask
+
+    for i in np.flatnonzero(invalid):
+        line, row = rows[i]
+        rejected.append(RejectedRow(line, reasons[i], row))
+
+    valid = ~invalid
+    accepted = [rows[i] for i in np.flatnonzero(valid)]
+    columns = {
+        "price": price[valid],
+        "current_stock": stock[valid],
+        "safety_stock_threshold": threshold[valid],
+    }
+    return accepted, columns, rejected
+
+
+def build_products(rows: List[Tuple[int, Dict[str, Any]]], columns: Dict[str, np.ndarray]) -> List[Product]:
+    """
+    Creates Products for validated rows through Product.prevalidated (the chunk was validated as a whole).
+    Every product in a chunk shares one create_at timestamp and the chunk's IDs come from one new_ids() call.
+    """
+    create_at = datetime.now()
+    prevalidated = Product.prevalidated
+    return [prevalidated(row["sku"], row["name"], price, row.get("description") or None, stock, threshold,
+                         product_id, create_at)
+            for (_, row), product_id, price, stock, threshold in zip(
+                rows, new_ids(len(rows)), columns["price"].tolist(), columns["current_stock"].tolist(),
+                columns["safety_stock_threshold"].tolist())]
+
+
+# --- Pipeline ---
+
+def import_catalog(manager: InventoryManager, path: str, file_format: Optional[str] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, max_rejections: int = 1000) -> ImportReport:
+    """
+    Streams a CSV or JSONL catalog into `manager`: read -> chunk -> validate -> build -> bulk insert.
+
+    Only one chunk is held in memory at a time. Rows failing validation, or whose SKU already exists in the
+    inventory, are reported in the ImportReport instead of aborting the import.
+    `file_format` is "csv" or "jsonl"; by default it is taken from the file extension.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive.")
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    if file_format == "csv":
+        rows = read_csv_rows(path)
+    elif file_format in ("jsonl", "ndjson"):
+        rows = read_jsonl_rows(path)
+    else:
+        raise ValueError(f"Unsupported catalog format: {file_format}")
+
+    report = ImportReport()
+    # SKUs of every row so far, so a SKU repeated in a later chunk is a catalog duplicate as well.
+    seen_skus: Set[str] = set()
+    for chunk in chunked(rows, chunk_size):
+        accepted, columns, rejected = validate_chunk(chunk, seen_skus)
+        if accepted:
+            # One pass against the SKU index for the whole chunk.
+            existing = np.fromiter((manager.get_product_by_sku(row["sku"]) is not None for _, row in accepted),
+                                   dtype=bool, count=len(accepted))
+            if existing.any():
+                for i in np.flatnonzero(existing):
+                    line, row = accepted[i]
+                    rejected.append(RejectedRow(line, f"Product with SKU {row['sku']} already exists.", row))
+                keep = ~existing
+                accepted = [accepted[i] for i in np.flatnonzero(keep)]
+                columns = {name: column[keep] for name, column in columns.items()}
+            if accepted:
+                report.imported += manager.add_products(build_products(accepted, columns))
+
+        report.rejected_count += len(rejected)
+        room = max_rejections - len(report.rejected)
+        if room > 0:
+            report.rejected.extend(sorted(rejected, key=lambda rejected_row: rejected_row.line)[:room])
+
+    if report.rejected_count and logger.isEnabledFor(logging.WARNING):
+        logger.warning("Imported %d products from %s, rejected %d rows.", report.imported, path,
+                       report.rejected_count)
+    return report
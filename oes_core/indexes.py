@@ -0,0 +1,327 @@
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Bucket size of the sorted list. Buckets are split at 2 * _LOAD keys and merged below _LOAD // 4.
+_LOAD = 512
+
+StockKey = Tuple[int, str]
+
+
+class StockIndex:
+    """
+    Order-statistics index of products keyed by (current_stock, product_id).
+
+    Sorted List of buckets (the layout used by "sorted containers"): every bucket is a sorted list of at most
+    2 * _LOAD keys and `_maxes` holds the last key of each bucket, so locating a key is a bisect over the maxes plus
+    a bisect inside one bucket. A Fenwick tree over the bucket sizes turns "key -> position" and
+    "position -> key" into O(log N), which makes top-n, bottom-n and rank queries O(log N + n).
+    """
+    def __init__(self):
+        self._lists: List[List[StockKey]] = []
+        self._maxes: List[StockKey] = []
+        # Fenwick (binary indexed) tree over len(bucket), 1-based.
+        self._tree: List[int] = [0]
+        # Hashmap (Dict): Key=Product ID, Value=indexed stock, needed to find the old key on every update.
+        self._stock: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._stock)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._stock
+
+    def product_ids(self) -> List[str]:
+        return list(self._stock)
+
+    def stock_of(self, product_id: str) -> Optional[int]:
+        return self._stock.get(product_id)
+
+    def stock_levels(self) -> Dict[str, int]:
+        """Copy of the indexed stock of every product (one C-level dict copy)."""
+        return dict(self._stock)
+
+    def update(self, product_id: str, stock: int) -> None:
+        """
+        Inserts the product, or moves it to its new stock level if it is already indexed.
+        """
+        old_stock = self._stock.get(product_id)
+        if old_stock is not None:
+            if old_stock == stock:
+                return
+            self._remove((old_stock, product_id))
+        self._stock[product_id] = stock
+        self._add((stock, product_id))
+
+    def update_many(self, stock_by_product: Dict[str, int]) -> None:
+        """
+        Bulk update. Products new to the index are sorted once and merged with the existing keys when the batch is
+        not tiny compared to the index (timsort merges the two sorted runs in linear time), instead of one
+        bisect/insort per product.
+        """
+        new_keys = []
+        for product_id, stock in stock_by_product.items():
+            if product_id in self._stock:
+                self.update(product_id, stock)
+            else:
+                new_keys.append((stock, product_id))
+        if len(new_keys) * 64 < len(self._stock):
+            for stock, product_id in new_keys:
+                self._stock[product_id] = stock
+                self._add((stock, product_id))
+            return
+
+        keys = [key for bucket in self._lists for key in bucket]
+        new_keys.sort()
+        keys.extend(new_keys)
+        keys.sort()
+        self._stock.update((product_id, stock) for stock, product_id in new_keys)
+        self._load_sorted(keys)
+
+    def discard(self, product_id: str) -> None:
+        old_stock = self._stock.pop(product_id, None)
+        if old_stock is not None:
+            self._remove((old_stock, product_id))
+
+    def rebuild(self, stock_by_product: Dict[str, int]) -> None:
+        """
+        Replaces the whole index in O(N log N) with one sort, much faster than N single updates (used on restore).
+        """
+        self._stock = dict(stock_by_product)
+        self._load_sorted(sorted((stock, product_id) for product_id, stock in stock_by_product.items()))
+
+    def clear(self) -> None:
+        self._lists.clear()
+        self._maxes.clear()
+        self._tree = [0]
+        self._stock.clear()
+
+    def top(self, n: int) -> Iterator[str]:
+        """Yields up to n product IDs, highest stock first."""
+        size = len(self._stock)
+        if n <= 0 or size == 0:
+            return iter(())
+        return self._iter_range(max(size - n, 0), size, reverse=True)
+
+    def bottom(self, n: int) -> Iterator[str]:
+        """Yields up to n product IDs, lowest stock first."""
+        size = len(self._stock)
+        if n <= 0 or size == 0:
+            return iter(())
+        return self._iter_range(0, min(n, size), reverse=False)
+
+    def rank(self, product_id: str) -> Optional[int]:
+        """
+        Returns the 0-based position of the product in descending stock order, or None if it is not indexed.
+        """
+        stock = self._stock.get(product_id)
+        if stock is None:
+            return None
+        key = (stock, product_id)
+        i = bisect_left(self._maxes, key)
+        position = self._prefix(i) + bisect_left(self._lists[i], key)
+        return len(self._stock) - 1 - position
+
+    # --- Sorted list internals ---
+
+    def _load_sorted(self, keys: List[StockKey]) -> None:
+        self._lists = [keys[i:i + _LOAD] for i in range(0, len(keys), _LOAD)]
+        self._maxes = [bucket[-1] for bucket in self._lists]
+        self._rebuild_tree()
+
+    def _add(self, key: StockKey) -> None:
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+            return
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            # Larger than every key: append to the last bucket.
+            i -= 1
+            self._lists[i].append(key)
+            self._maxes[i] = key
+        else:
+            insort(self._lists[i], key)
+        self._tree_add(i, 1)
+
+        if len(self._lists[i]) > 2 * _LOAD:
+            bucket = self._lists[i]
+            self._lists.insert(i + 1, bucket[_LOAD:])
+            del bucket[_LOAD:]
+            self._maxes[i] = bucket[-1]
+            self._maxes.insert(i + 1, self._lists[i + 1][-1])
+            self._rebuild_tree()
+
+    def _remove(self, key: StockKey) -> None:
+        i = bisect_left(self._maxes, key)
+        bucket = self._lists[i]
+        j = bisect_left(bucket, key)
+        del bucket[j]
+
+        if not bucket:
+            del self._lists[i]
+            del self._maxes[i]
+            self._rebuild_tree()
+            return
+
+        self._maxes[i] = bucket[-1]
+        if len(bucket) < _LOAD // 4 and len(self._lists) > 1:
+            # Merge small buckets into a neighbour so the bucket count stays proportional to N / _LOAD.
+            left = i - 1 if i > 0 else i
+            merged = self._lists[left] + self._lists[left + 1]
+            self._lists[left:left + 2] = [merged]
+            self._maxes[left:left + 2] = [merged[-1]]
+            if len(merged) > 2 * _LOAD:
+                self._lists.insert(left + 1, merged[_LOAD:])
+                del merged[_LOAD:]
+                self._maxes[left] = merged[-1]
+                self._maxes.insert(left + 1, self._lists[left + 1][-1])
+            self._rebuild_tree()
+        else:
+            self._tree_add(i, -1)
+
+    def _iter_range(self, start: int, stop: int, reverse: bool) -> Iterator[str]:
+        """Yields product IDs at sorted positions [start, stop), optionally from stop - 1 down to start."""
+        if reverse:
+            i, j = self._locate(stop - 1)
+            remaining = stop - start
+            while remaining > 0:
+                bucket = self._lists[i]
+                while j >= 0 and remaining > 0:
+                    yield bucket[j][1]
+                    j -= 1
+                    remaining -= 1
+                i -= 1
+                if i >= 0:
+                    j = len(self._lists[i]) - 1
+        else:
+            i, j = self._locate(start)
+            remaining = stop - start
+            while remaining > 0:
+                bucket = self._lists[i]
+                while j < len(bucket) and remaining > 0:
+                    yield bucket[j][1]
+                    j += 1
+                    remaining -= 1
+                i += 1
+                j = 0
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        """Maps a global position to (bucket index, offset in bucket) by descending the Fenwick tree."""
+        tree = self._tree
+        bucket = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            nxt = bucket + step
+            if nxt < len(tree) and tree[nxt] <= position:
+                bucket = nxt
+                position -= tree[nxt]
+            step >>= 1
+        return bucket, position
+
+    def _prefix(self, i: int) -> int:
+        """Number of keys stored in buckets [0, i)."""
+        total = 0
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _tree_add(self, i: int, delta: int) -> None:
+        tree = self._tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _rebuild_tree(self) -> None:
+        tree = [0] + [len(bucket) for bucket in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+
+class NamePrefixTrie:
+    """
+    Prefix tree over product names (case-insensitive) for search-as-you-type.
+
+    Each node is a [children, product IDs] pair; a lookup walks len(prefix) nodes and then collects the
+    subtree in lexicographic order, stopping as soon as `limit` IDs are found.
+    """
+    def __init__(self):
+        self._root: list = [{}, None]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, name: str, product_id: str) -> None:
+        node = self._root
+        for char in name.casefold():
+            children = node[0]
+            child = children.get(char)
+            if child is None:
+                child = children.setdefault(char, [{}, None])
+            node = child
+        if node[1] is None:
+            node[1] = set()
+        if product_id not in node[1]:
+            node[1].add(product_id)
+            self._size += 1
+
+    def remove(self, name: str, product_id: str) -> None:
+        node = self._root
+        for char in name.casefold():
+            node = node[0].get(char)
+            if node is None:
+                return
+        if node[1] and product_id in node[1]:
+            node[1].discard(product_id)
+            self._size -= 1
+
+    def search(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Returns the IDs of products whose name starts with `prefix`, in name order."""
+        node = self._root
+        for char in prefix.casefold():
+            node = node[0].get(char)
+            if node is None:
+                return []
+
+        found: List[str] = []
+        # Depth-first walk with an explicit stack; children are pushed in reverse order so they pop in order.
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node[1]:
+                found.extend(sorted(node[1]))
+                if limit is not None and len(found) >= limit:
+                    return found[:limit]
+            children = node[0]
+            for char in sorted(children, reverse=True):
+                stack.append(children[char])
+        return found
+
+    def prune(self, prefix: str, product_ids: Set[str]) -> None:
+        """Removes the given IDs wherever they occur below `prefix` (used when the names are no longer known)."""
+        node = self._root
+        for char in prefix.casefold():
+            node = node[0].get(char)
+            if node is None:
+                return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node[1]:
+                removed = node[1] & product_ids
+                node[1] -= removed
+                self._size -= len(removed)
+            stack.extend(node[0].values())
+
+    def clear(self) -> None:
+        self._root = [{}, None]
+        self._size = 0
@@ -1,110 +1,1096 @@
 
-import heapq
+import asyncio
 import logging
-from typing import Dict, List, Optional, Tuple
-from oes_core.models import Product, Transaction
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from oes_core.cache import StatusCache
+from oes_core.history import TransactionHistory
+from oes_core.indexes import NamePrefixTrie, StockIndex
+from oes_core.locking import DEFAULT_LOCK_STRIPES, StripedLock
+from oes_core.metrics import MetricsRegistry
+from oes_core.models import Product, Transaction, check_quantity
+
+if TYPE_CHECKING:
+    from oes_core.alerts import AlertEngine
+    from oes_core.changes import ChangeFeed
+    from oes_core.forecasting import DemandForecast, DemandForecaster
+    from oes_core.persistence import InventoryStore
+    from oes_core.product_table import MappedProductTable
+    from oes_core.resilience import ResilientCaller
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# Upper bound on concurrent external status calls made by perform_batch_status_check.
+DEFAULT_STATUS_WORKERS = 32
+# Public methods timed when metrics are enabled; the external status calls are timed as "external.<name>".
+INSTRUMENTED_METHODS = ("add_product", "get_product", "update_stock", "apply_transactions",
+                        "get_top_n_products_by_stock", "compare_and_update", "compare_and_apply")
+# Lock-free attempts a reader makes on the stock index before falling back to taking its lock.
+_OPTIMISTIC_READ_ATTEMPTS = 8
+
+@dataclass
+class BatchUpdateResult:
+    """
+    Summary of an InventoryManager.apply_transactions call.
+    """
+    applied: int = 0
+    # Product ID -> number of safety stock alerts the equivalent sequential update_stock calls would have raised.
+    alerts: Dict[str, int] = field(default_factory=dict)
+    # Product IDs whose stock ends the batch at or below the safety threshold.
+    below_threshold: List[str] = field(default_factory=list)
+    # Product ID -> number of OUTBOUND transactions whose stock was capped at 0.
+    capped: Dict[str, int] = field(default_factory=dict)
+
+class VersionConflictError(ValueError):
+    """
+    A compare-and-set stock update found the product at another version than the caller read; nothing was applied.
+    """
+    def __init__(self, product_id: str, expected_version: int, actual_version: int):
+        super().__init__(f"Version conflict on product {product_id}: expected version {expected_version}, "
+                         f"found {actual_version}.")
+        self.product_id = product_id
+        self.expected_version = expected_version
+        self.actual_version = actual_version
+
 class InventoryManager:
     """
     Manages the inventory of products and records all transactions.
     """
-    def __init__(self):
+    def __init__(self, status_cache: Optional[StatusCache] = None, thread_safe: bool = False,
+                 lock_stripes: int = DEFAULT_LOCK_STRIPES, alert_engine: Optional["AlertEngine"] = None,
+                 metrics: Optional[MetricsRegistry] = None, product_table: Optional["MappedProductTable"] = None,
+                 resilience: Optional["ResilientCaller"] = None, change_feed: Optional["ChangeFeed"] = None,
+                 forecaster: Optional["DemandForecaster"] = None):
         # Hashmap (Dict): Key=Product ID, Value=Product object, which allows O(1) average time complexity for CRUD.
-        self._products: Dict[str, Product] = {}
-        # Stack (List): Used to record transaction history, simulating an undo stack.
-        self._transaction_history: List[Transaction] = []
+        # With a product_table (oes_core.product_table.MappedProductTable) the products live in a memory-mapped
+        # file instead, behind the same mapping interface, and are handed out as ProductView objects.
+        self._products: Dict[str, Product] = product_table if product_table is not None else {}
+        self._product_table = product_table
+        # Stack (columnar arrays): Used to record transaction history, with the applied delta of each entry,
+        # so undo_last / rollback_to can reverse it.
+        # Rows are packed into typed arrays and materialised back into Transaction objects on access.
+        self._transaction_history = TransactionHistory()
+        # Order-statistics index (bucketed sorted list), kept up to date by add_product and update_stock.
+        # A product table keeps no per-product index on the heap: its stock queries scan the mapped records
+        # (MappedStockIndex), and `_sku_index` / `_low_stock` are unused, see _claim_table_sku and low_stock().
+        self._stock_index = StockIndex() if product_table is None else product_table.stock_index()
+        # Secondary indexes. Hashmap (Dict): Key=SKU, Value=Product ID, unique. Set: IDs of products at or below
+        # their safety stock threshold, updated on every stock change. The name-prefix trie is built on the first
+        # name search (most managers never search by name) and maintained incrementally from then on.
+        self._sku_index: Dict[str, str] = {}
+        self._low_stock: Set[str] = set()
+        self._name_index: Optional[NamePrefixTrie] = None
+        # Optional TTL/LRU cache in front of the oes_core.utils status lookups.
+        self._status_cache = status_cache
+        # Optional circuit breaker / concurrency limit / retries around those lookups (oes_core.resilience),
+        # applied behind the cache so that cache hits never count against the upstream.
+        self._resilience = resilience
+        # Optional edge-triggered alert engine (oes_core.alerts.AlertEngine). Without one, every stock change that
+        # leaves a product at or below its threshold logs a warning on the caller's thread.
+        self._alert_engine = alert_engine
+        # Optional change-data-capture stream (oes_core.changes.ChangeFeed): every add and stock change is published
+        # to it, under the product's lock, so each product's events are in the order its changes were applied.
+        self._change_feed = change_feed
+        # Optional demand forecaster (oes_core.forecasting.DemandForecaster): folds in every history row as it is
+        # recorded, and takes undone rows back, under the history lock.
+        self._forecaster = forecaster
+        # Optional write-ahead log / snapshot store (oes_core.persistence.InventoryStore), attached by its recover().
+        self._store: Optional["InventoryStore"] = None
+
+        # Concurrency-safe mode (None otherwise): striped per-product locks serialise the read-modify-write of
+        # each product's stock, while short locks guard the shared stock index and history. Index writers bump
+        # `_index_version` (odd while writing) so readers can take lock-free, seqlock-style snapshots.
+        self._locks: Optional[StripedLock] = StripedLock(lock_stripes) if thread_safe else None
+        self._index_lock: Optional[threading.Lock] = threading.Lock() if thread_safe else None
+        self._history_lock: Optional[threading.Lock] = threading.Lock() if thread_safe else None
+        self._index_version = 0
+        # Product IDs whose SKU claim is in flight (claimed, product not yet in `_products`), so a concurrent claim
+        # does not mistake it for a stale entry; stale entries are taken over under `_sku_lock`.
+        self._adding: Optional[Set[str]] = set() if thread_safe else None
+        self._sku_lock: Optional[threading.Lock] = threading.Lock() if thread_safe else None
+        # With a product table: SKUs of adds in flight (claimed, not yet in the table), guarded by `_sku_lock`.
+        self._claimed_skus: Set[str] = set()
+
+        # Optional call counts and latency histograms. Instrumented methods are wrapped per instance only while
+        # metrics are enabled, so a manager without metrics runs the plain class methods (zero overhead).
+        self._metrics: Optional[MetricsRegistry] = None
+        # External call name -> (oes_core.utils function, its wrapped callable), see _external_call.
+        self._external_calls: Dict[str, Tuple[Callable, Callable]] = {}
+        if metrics is not None:
+            self.enable_metrics(metrics)
+        # A reopened product table brings its products back with nothing to rebuild: its indexes are on disk.
         logger.warning("InventoryManager initialized.")
 
+    def enable_metrics(self, registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+        """Starts timing INSTRUMENTED_METHODS and the external status calls into `registry` (a new one by default)."""
+        self.disable_metrics()
+        registry = registry if registry is not None else MetricsRegistry()
+        for name in INSTRUMENTED_METHODS:
+            setattr(self, name, registry.timed(name, getattr(type(self), name).__get__(self)))
+        self._metrics = registry
+        self._external_calls.clear()
+        return registry
+
+    def disable_metrics(self) -> None:
+        for name in INSTRUMENTED_METHODS:
+            self.__dict__.pop(name, None)
+        self._metrics = None
+        self._external_calls.clear()
+
+    @property
+    def thread_safe(self) -> bool:
+        """Whether the manager may be called from several threads at once (constructed with thread_safe=True)."""
+        return self._locks is not None
+
+    @property
+    def store(self) -> Optional["InventoryStore"]:
+        """The InventoryStore logging every mutation (attached by its recover()), or None."""
+        return self._store
+
+    def metrics_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per instrumented call: count, errors, total/mean/min/max and p50/p90/p99/p99.9 latency in nanoseconds.
+        Empty when metrics are disabled.
+        """
+        return {} if self._metrics is None else self._metrics.snapshot()
+
     def add_product(self, product: Product) -> None:
+        if self._locks is None:
+            self._add_product(product)
+        else:
+            with self._locks.for_key(product.product_id):
+                self._add_product(product)
+        self._snapshot_if_due()
+
+    def _add_product(self, product: Product, emit_logs: bool = True) -> None:
+        # WAL replay (emit_logs False) restores a product that was already published, alerted on and logged.
         if product.product_id in self._products:
             raise ValueError(f"Product with ID {product.product_id} already exists.")
+        if self._product_table is not None:
+            self._product_table.check(product)
 
+        self._claim_sku(product)
+        if self._store is not None:
+            try:
+                self._store.log_product(product)
+            except BaseException:
+                self._settle_sku_claim(product, committed=False)
+                raise
         self._products[product.product_id] = product
-        logger.info(f"Added product: {product.name} ({product.product_id})")
+        self._settle_sku_claim(product, committed=True)
+        self._reindex(product.product_id, product.current_stock)
+        self._track_low_stock(product)
+        if self._name_index is not None:
+            self._name_index.insert(product.name, product.product_id)
+        if not emit_logs:
+            return
+        if self._change_feed is not None:
+            self._change_feed.publish_added((product,))
+        if self._alert_engine is not None:
+            self._check_threshold(product)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Added product: %s (%s)", product.name, product.product_id)
+
+    def add_products(self, products: Iterable[Product]) -> int:
+        """
+        Adds a batch of products in one call, all or nothing, and returns how many were added.
+
+        Product IDs and SKUs are checked for duplicates (within the batch and against the inventory) once for the
+        whole batch; the WAL gets one group append and the log one summary line instead of one per product.
+        """
+        batch = products if isinstance(products, list) else list(products)
+        if self._locks is None:
+            added = self._add_products(batch)
+        else:
+            with self._locks.hold(product.product_id for product in batch):
+                added = self._add_products(batch)
+        self._snapshot_if_due()
+        return added
+
+    def _add_products(self, batch: List[Product]) -> int:
+        existing = next((product for product in batch if product.product_id in self._products), None)
+        if existing is not None:
+            raise ValueError(f"Product with ID {existing.product_id} already exists.")
+        if len({product.product_id for product in batch}) != len(batch):
+            raise ValueError("Duplicate product ID in batch.")
+        if len({product.sku for product in batch}) != len(batch):
+            raise ValueError("Duplicate SKU in batch.")
+        if self._product_table is not None:
+            for product in batch:
+                self._product_table.check(product)
+
+        claimed: List[Product] = []
+        try:
+            for product in batch:
+                self._claim_sku(product)
+                claimed.append(product)
+            if self._store is not None:
+                self._store.log_products(batch)
+        except BaseException:
+            for product in claimed:
+                self._settle_sku_claim(product, committed=False)
+            raise
+
+        self._products.update((product.product_id, product) for product in batch)
+        for product in batch:
+            self._settle_sku_claim(product, committed=True)
+        if self._product_table is None:
+            self._reindex_many({product.product_id: product.current_stock for product in batch})
+            self._low_stock.update(product.product_id for product in batch
+                                   if product.current_stock <= product.safety_stock_threshold)
+        if self._change_feed is not None:
+            self._change_feed.publish_added(batch)
+        if self._name_index is not None:
+            for product in batch:
+                self._name_index.insert(product.name, product.product_id)
+        if self._alert_engine is not None:
+            for product in batch:
+                self._check_threshold(product)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Added %d products.", len(batch))
+        return len(batch)
+
+    def _restore_products(self, products: Iterable[Product]) -> None:
+        """
+        Bulk-loads products into an empty manager without logging, validation or per-product index updates.
+        """
+        if self._products:
+            raise ValueError("Products can only be restored into an empty inventory.")
+        if isinstance(self._products, dict):
+            self._products = {product.product_id: product for product in products}
+        else:
+            self._products.update((product.product_id, product) for product in products)
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuilds the in-memory indexes from `_products` in one pass (each field read once per product)."""
+        self._name_index = None
+        if self._product_table is not None:
+            return
+        stock_by_product: Dict[str, int] = {}
+        self._sku_index = {}
+        self._low_stock = set()
+        for product_id, product in self._products.items():
+            stock = product.current_stock
+            stock_by_product[product_id] = stock
+            self._sku_index[product.sku] = product_id
+            if stock <= product.safety_stock_threshold:
+                self._low_stock.add(product_id)
+        self._stock_index.rebuild(stock_by_product)
+
+    def _claim_sku(self, product: Product) -> None:
+        """
+        Registers the product's SKU in the unique SKU index, or raises if another product already owns it.
+        The caller settles the claim (_settle_sku_claim) once the product is in `_products` or the add failed.
+
+        An entry whose product is not in `_products` is stale (the product was removed from `_products` directly)
+        and is taken over, unless, in thread-safe mode, it belongs to a concurrent add still in flight.
+        """
+        if self._product_table is not None:
+            self._claim_table_sku(product)
+            return
+        adding = self._adding
+        if adding is not None:
+            adding.add(product.product_id)
+        while True:
+            # setdefault is a single atomic dict operation, so two threads cannot both claim a free SKU.
+            owner = self._sku_index.setdefault(product.sku, product.product_id)
+            if owner == product.product_id:
+                return
+            # `_adding` before `_products`: an add leaves `_adding` only after inserting its product.
+            in_flight = adding is not None and owner in adding
+            existing = self._products.get(owner)
+            if in_flight or (existing is not None and existing.sku == product.sku):
+                if adding is not None:
+                    adding.discard(product.product_id)
+                raise ValueError(f"Product with SKU {product.sku} already exists.")
+            if self._sku_lock is None:
+                self._sku_index[product.sku] = product.product_id
+                return
+            with self._sku_lock:
+                # Take the stale entry over only if no other thread replaced it meanwhile; otherwise look again.
+                if self._sku_index.get(product.sku) == owner:
+                    self._sku_index[product.sku] = product.product_id
+                    return
+
+    def _claim_table_sku(self, product: Product) -> None:
+        """_claim_sku with a product table: checks its on-disk SKU index, and the SKUs of concurrent adds."""
+        if self._sku_lock is None:
+            if self._product_table.get_by_sku(product.sku) is not None:
+                raise ValueError(f"Product with SKU {product.sku} already exists.")
+            return
+        with self._sku_lock:
+            if product.sku in self._claimed_skus or self._product_table.get_by_sku(product.sku) is not None:
+                raise ValueError(f"Product with SKU {product.sku} already exists.")
+            self._claimed_skus.add(product.sku)
+
+    def _settle_sku_claim(self, product: Product, committed: bool) -> None:
+        """Ends a _claim_sku claim: kept once the product is in `_products`, released if its add failed."""
+        if self._product_table is not None:
+            if self._sku_lock is not None:
+                with self._sku_lock:
+                    self._claimed_skus.discard(product.sku)
+            return
+        if not committed and self._sku_index.get(product.sku) == product.product_id:
+            del self._sku_index[product.sku]
+        if self._adding is not None:
+            self._adding.discard(product.product_id)
+
+    def _track_low_stock(self, product: Product) -> None:
+        if self._product_table is not None:
+            return
+        if product.current_stock <= product.safety_stock_threshold:
+            self._low_stock.add(product.product_id)
+        else:
+            self._low_stock.discard(product.product_id)
 
     def get_product(self, product_id: str) -> Optional[Product]:
-        logger.info(f"Fetching product #{product_id}...")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Fetching product #%s...", product_id)
         return self._products.get(product_id)
 
+    def get_product_by_sku(self, sku: str) -> Optional[Product]:
+        """O(1) lookup through the unique SKU index (the table's on-disk one with a product table)."""
+        if self._product_table is not None:
+            return self._product_table.get_by_sku(sku)
+        product = self._products.get(self._sku_index.get(sku))
+        if product is None or product.sku != sku:
+            return None
+        return product
+
+    def find_products_by_name_prefix(self, prefix: str, limit: Optional[int] = None) -> List[Product]:
+        """
+        Returns products whose name starts with `prefix` (case-insensitive), in name order, O(len(prefix) + k).
+        """
+        if self._name_index is None:
+            name_index = NamePrefixTrie()
+            for product in list(self._products.values()):
+                name_index.insert(product.name, product.product_id)
+            self._name_index = name_index
+
+        product_ids = self._name_index.search(prefix, limit)
+        result_products = [self._products.get(product_id) for product_id in product_ids]
+        if None in result_products:
+            # Entries of products removed from `_products` directly: drop them and search again.
+            self._name_index.prune(prefix, {product_id for product_id, product in zip(product_ids, result_products)
+                                            if product is None})
+            return self.find_products_by_name_prefix(prefix, limit)
+        return result_products
+
+    def get_low_stock_products(self) -> List[Product]:
+        """
+        Returns every product at or below its safety stock threshold from the live low-stock set, O(k).
+        With a product table, from one scan of its records instead, O(N).
+        """
+        if self._product_table is not None:
+            return self._product_table.low_stock()
+        result_products: List[Product] = []
+        for product_id in list(self._low_stock):
+            product = self._products.get(product_id)
+            if product is not None and product.current_stock <= product.safety_stock_threshold:
+                result_products.append(product)
+            elif product is None:
+                self._low_stock.discard(product_id)
+        return result_products
+
     def list_all_products(self) -> List[Product]:
+        # list(dict.values()) copies in a single C call, so it is a point-in-time view even with concurrent writers.
         return list(self._products.values())
 
+    def _capture_stock(self) -> Tuple[List[Product], List[int]]:
+        """
+        Point-in-time copy of every product and its stock level, for oes_core.reporting.
+
+        In thread-safe mode every stripe is held only while the product list and the stock index's stock levels are
+        copied, so the copy never sees part of an update or of an apply_transactions batch. Product fields other
+        than current_stock never change after insertion and are read later by the caller without any lock.
+        """
+        if self._locks is None:
+            products = list(self._products.values())
+            return products, [product.current_stock for product in products]
+        with self._locks.hold_all():
+            products = list(self._products.values())
+            stock_levels = self._stock_index.stock_levels()
+        return products, [stock_levels.get(product.product_id, product.current_stock) for product in products]
+
     def update_stock(self, transaction: Transaction) -> None:
         """
         Update product stock based on a transaction and records the history.
         Checks for safety stock threshold after update.
         """
-        product = self.get_product(transaction.product_id)
+        if self._locks is None:
+            self._update_stock(transaction)
+        else:
+            with self._locks.for_key(transaction.product_id):
+                self._update_stock(transaction)
+        self._snapshot_if_due()
 
-        if not product:
+    def validate_transaction(self, transaction: Transaction) -> None:
+        """
+        Raises the ValueError update_stock would raise for `transaction` before applying anything (unknown product,
+        unstorable quantity); apply_transactions rejects a whole batch for the same reasons.
+        """
+        self._validated_product(transaction)
+
+    def _validated_product(self, transaction: Transaction) -> Product:
+        product = self._products.get(transaction.product_id)
+        if product is None:
             raise ValueError(f"Product ID {transaction.product_id} not found for transaction.")
+        check_quantity(transaction.quantity_change)
+        return product
+
+    def _update_stock(self, transaction: Transaction) -> None:
+        product = self._validated_product(transaction)
+        # Write-ahead: the transaction is logged before it is applied.
+        if self._store is not None:
+            self._store.log_transaction(transaction)
         # Update stock
-        logger.info("Updating stock...")
-        product.current_stock += transaction.quantity_change
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Updating stock...")
+        previous_stock = product.current_stock
+        stock = previous_stock + transaction.quantity_change
 
         # ensure stock does not go negative for outbound transactions
-        if product.current_stock < 0 and transaction.transaction_type == Transaction.TYPE_OUTBOUND:
-            product.current_stock = 0
-            logger.error(f"Stock went negative for {product.name}. Stock capped at 0.")
+        if stock < 0 and transaction.transaction_type == Transaction.TYPE_OUTBOUND:
+            stock = 0
+            logger.error("Stock went negative for %s. Stock capped at 0.", product.name)
 
-        # Record transaction
-        self._transaction_history.append(transaction)
+        # Record transaction, with the delta actually applied (differs from quantity_change when capped). Encoding
+        # the history row is the last step that can fail, so it comes before the product is touched.
+        applied_delta = stock - previous_stock
+        self._record_history((transaction,), (applied_delta,))
+
+        product.current_stock = stock
+        product.version += 1
+        self._reindex(product.product_id, product.current_stock)
+        self._track_low_stock(product)
+        if self._change_feed is not None:
+            self._change_feed.publish_stock(((product.product_id, applied_delta, product.current_stock,
+                                              product.version),))
 
         # Check safety stock threshold
-        if product.current_stock <= product.safety_stock_threshold:
+        self._check_threshold(product)
+
+    def apply_transactions(self, transactions: Iterable[Transaction]) -> BatchUpdateResult:
+        """
+        Applies a burst of transactions in one call, with the same final stock and negative-stock capping
+        as calling update_stock for each of them in order.
+
+        Every product ID is validated before anything is applied, so an unknown product leaves the inventory untouched.
+        Transactions are grouped per product and folded in a tight loop; each product, the stock index and the
+        history are then written once, and alerts are logged once per product instead of once per transaction.
+        """
+        batch, grouped = self._group_by_product(transactions)
+        if self._locks is None:
+            if self._store is not None:
+                self._store.log_transactions(batch)
+            result = self._apply_grouped(batch, grouped)
+        else:
+            with self._locks.hold(grouped):
+                if self._store is not None:
+                    self._store.log_transactions(batch)
+                result = self._apply_grouped(batch, grouped)
+        self._snapshot_if_due()
+        return result
+
+    def get_versioned_stock(self, product_id: str) -> Optional[Tuple[int, int]]:
+        """
+        Returns (current_stock, version) of a product, or None if it is unknown: the read of an optimistic
+        read-decide-compare_and_update cycle. Takes no lock. Writers change the stock before bumping the version
+        and this reads the version first, so a pair caught mid-update carries the old version and the following
+        compare-and-set fails instead of succeeding on a stale decision.
+        """
+        product = self._products.get(product_id)
+        if product is None:
+            return None
+        version = product.version
+        return product.current_stock, version
+
+    def compare_and_update(self, product_id: str, expected_version: int, transaction: Transaction) -> int:
+        """
+        update_stock, only if the product is still at `expected_version` (see get_versioned_stock); returns the
+        product's new version. Raises VersionConflictError, without applying anything, when another update got
+        there first. A stale version fails before waiting for the product's lock.
+        """
+        if transaction.product_id != product_id:
+            raise ValueError(f"Transaction is for product {transaction.product_id}, not {product_id}.")
+        product = self._products.get(product_id)
+        if product is None:
+            raise ValueError(f"Product ID {product_id} not found for transaction.")
+        if product.version != expected_version:
+            raise VersionConflictError(product_id, expected_version, product.version)
+        if self._locks is None:
+            self._update_stock(transaction)
+            version = product.version
+        else:
+            with self._locks.for_key(product_id):
+                if product.version != expected_version:
+                    raise VersionConflictError(product_id, expected_version, product.version)
+                self._update_stock(transaction)
+                version = product.version
+        self._snapshot_if_due()
+        return version
+
+    def compare_and_apply(self, expected_versions: Dict[str, int],
+                          transactions: Iterable[Transaction]) -> BatchUpdateResult:
+        """
+        apply_transactions, only if every product in `expected_versions` (product ID -> version read by the
+        caller) is still at that version: a multi-product reservation commits atomically or not at all.
+
+        Every product the transactions touch must have an expected version; products that are only read (the
+        decision depended on them) may be listed too. Only the stripes of the listed products are held while the
+        versions are re-checked and the batch applied, and a stale version fails before taking any of them.
+        Raises VersionConflictError for the first conflicting product, leaving the inventory untouched.
+        """
+        batch, grouped = self._group_by_product(transactions)
+        unversioned = [product_id for product_id in grouped if product_id not in expected_versions]
+        if unversioned:
+            raise ValueError(f"No expected version given for product {unversioned[0]}.")
+        missing = [product_id for product_id in expected_versions if product_id not in self._products]
+        if missing:
+            raise ValueError(f"Product ID {missing[0]} not found.")
+        self._check_versions(expected_versions)
+        if self._locks is None:
+            if self._store is not None:
+                self._store.log_transactions(batch)
+            result = self._apply_grouped(batch, grouped)
+        else:
+            with self._locks.hold(expected_versions):
+                self._check_versions(expected_versions)
+                if self._store is not None:
+                    self._store.log_transactions(batch)
+                result = self._apply_grouped(batch, grouped)
+        self._snapshot_if_due()
+        return result
+
+    def _check_versions(self, expected_versions: Dict[str, int]) -> None:
+        products = self._products
+        for product_id, expected_version in expected_versions.items():
+            actual_version = products[product_id].version
+            if actual_version != expected_version:
+                raise VersionConflictError(product_id, expected_version, actual_version)
+
+    def _group_by_product(self, transactions: Iterable[Transaction]) -> Tuple[List[Transaction],
+                                                                               Dict[str, List[Transaction]]]:
+        """
+        Groups transactions by product, keeping their order within each product, and rejects unknown products and
+        quantities the history cannot store.
+        """
+        batch = transactions if isinstance(transactions, list) else list(transactions)
+
+        grouped: Dict[str, List[Transaction]] = {}
+        for transaction in batch:
+            check_quantity(transaction.quantity_change)
+            product_transactions = grouped.get(transaction.product_id)
+            if product_transactions is None:
+                grouped[transaction.product_id] = [transaction]
+            else:
+                product_transactions.append(transaction)
+
+        missing = [product_id for product_id in grouped if product_id not in self._products]
+        if missing:
+            raise ValueError(
+                f"Product ID {missing[0]} not found for transaction ({len(missing)} unknown product(s) in batch)."
+            )
+        return batch, grouped
+
+    def _apply_grouped(self, batch: List[Transaction], grouped: Dict[str, List[Transaction]],
+                       emit_logs: bool = True) -> BatchUpdateResult:
+        """
+        Folds validated, grouped transactions into the products, the stock index and the history.
+        """
+        result = BatchUpdateResult(applied=len(batch))
+        outbound = Transaction.TYPE_OUTBOUND
+        # Applied deltas of capped transactions, by id(transaction); every other one applied its quantity_change.
+        capped_deltas: Dict[int, int] = {}
+        # WAL replay (emit_logs False) restores state without republishing it.
+        changes: Optional[List[Tuple[str, int, int, int]]] = (
+            [] if self._change_feed is not None and emit_logs else None)
+        # Fold each product's transactions first: (product, final stock, alerts, capped) per product.
+        folded: List[Tuple[Product, int, int, int]] = []
+        for product_id, product_transactions in grouped.items():
+            product = self._products[product_id]
+            threshold = product.safety_stock_threshold
+            stock = product.current_stock
+            alerts = capped = 0
+            for transaction in product_transactions:
+                stock += transaction.quantity_change
+                if stock < 0 and transaction.transaction_type == outbound:
+                    capped_deltas[id(transaction)] = transaction.quantity_change - stock
+                    stock = 0
+                    capped += 1
+                if stock <= threshold:
+                    alerts += 1
+            folded.append((product, stock, alerts, capped))
+
+        # The history rows are encoded (the last step that can fail) before any product is touched.
+        applied_deltas = None
+        if capped_deltas:
+            applied_deltas = [capped_deltas.get(id(transaction), transaction.quantity_change) for transaction in batch]
+        self._record_history(batch, applied_deltas)
+
+        low_stock = self._low_stock if self._product_table is None else None
+        for product, stock, alerts, capped in folded:
+            product_id = product.product_id
+            threshold = product.safety_stock_threshold
+            initial_stock = product.current_stock
+            product.current_stock = stock
+            product.version += 1
+            self._reindex(product_id, stock)
+            if changes is not None:
+                changes.append((product_id, stock - initial_stock, stock, product.version))
+
+            if capped:
+                result.capped[product_id] = capped
+                if emit_logs:
+                    logger.error("Stock went negative for %s %d time(s) in batch. Stock capped at 0.",
+                                 product.name, capped)
+            if alerts:
+                result.alerts[product_id] = alerts
+            if stock <= threshold:
+                if low_stock is not None:
+                    low_stock.add(product_id)
+                result.below_threshold.append(product_id)
+            elif low_stock is not None:
+                low_stock.discard(product_id)
+            if emit_logs:
+                self._check_threshold(product)
+
+        if changes is not None:
+            self._change_feed.publish_stock(changes)
+        return result
+
+    def _record_history(self, transactions: Sequence[Transaction], applied_deltas: Optional[Sequence[int]]) -> None:
+        if self._history_lock is None:
+            self._append_history(transactions, applied_deltas)
+        else:
+            with self._history_lock:
+                self._append_history(transactions, applied_deltas)
+
+    def _append_history(self, transactions: Sequence[Transaction], applied_deltas: Optional[Sequence[int]]) -> None:
+        history = self._transaction_history
+        first_row = len(history)
+        history.extend(transactions, applied_deltas)
+        if self._forecaster is not None:
+            self._forecaster.observe(history, first_row)
+
+    def undo_last(self, n: int = 1) -> int:
+        """
+        Reverses the last n recorded transactions and removes them from the history; returns how many were undone.
+        """
+        if n < 0:
+            raise ValueError("Number of transactions to undo cannot be negative.")
+
+        def first_row(history: TransactionHistory) -> int:
+            if n > len(history):
+                raise ValueError(f"Cannot undo {n} transactions, only {len(history)} recorded.")
+            return len(history) - n
+        return self._undo(first_row)
+
+    def rollback_to(self, transaction_id: str) -> int:
+        """
+        Reverses every transaction recorded after `transaction_id` (which itself stays applied);
+        returns how many were undone.
+        """
+        def first_row(history: TransactionHistory) -> int:
+            row = history.row_of(transaction_id)
+            if row is None:
+                raise ValueError(f"Transaction {transaction_id} not found in history.")
+            return row + 1
+        return self._undo(first_row)
+
+    def _undo(self, find_first_row: Callable[[TransactionHistory], int]) -> int:
+        """
+        Reverses history rows [first_row, len) using their applied deltas, netted per product in one pass, so
+        each product, the stock index and the low-stock set are updated once however many rows are undone.
+        """
+        if self._locks is None:
+            count = self._undo_unlocked(find_first_row)
+        else:
+            # Stripes before the history lock, the same order update_stock takes them in.
+            with self._locks.hold_all(), self._history_lock:
+                count = self._undo_unlocked(find_first_row)
+        self._snapshot_if_due()
+        return count
+
+    def _snapshot_if_due(self) -> None:
+        # Called once a mutation has released its locks: the automatic snapshot holds every stripe, so it only
+        # sees fully applied mutations (see InventoryStore.snapshot).
+        if self._store is not None:
+            self._store.snapshot_if_due()
+
+    def _undo_unlocked(self, find_first_row: Callable[[TransactionHistory], int]) -> int:
+        history = self._transaction_history
+        first_row = find_first_row(history)
+        count = len(history) - first_row
+        if count == 0:
+            return 0
+        stock_deltas = {product_id: -delta for product_id, delta in history.applied_deltas_since(first_row).items()
+                        if delta}
+        if self._store is not None:
+            self._store.log_undo(count, stock_deltas)
+        self._revert(count, stock_deltas)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Undid %d transaction(s) across %d product(s).", count, len(stock_deltas))
+        return count
+
+    def _revert(self, count: int, stock_deltas: Dict[str, int], emit_logs: bool = True) -> None:
+        """
+        Applies net per-product stock deltas and drops the last `count` history rows (also used by WAL replay).
+        """
+        changes: List[Tuple[str, int, int, int]] = []
+        for product_id, delta in stock_deltas.items():
+            product = self._products.get(product_id)
+            if product is None:
+                continue
+            product.current_stock += delta
+            product.version += 1
+            self._reindex(product_id, product.current_stock)
+            self._track_low_stock(product)
+            if emit_logs:
+                self._check_threshold(product)
+                changes.append((product_id, delta, product.current_stock, product.version))
+        history = self._transaction_history
+        first_row = max(len(history) - count, 0)
+        if self._forecaster is not None:
+            self._forecaster.retract(history, first_row)
+        history.truncate(first_row)
+        if changes and self._change_feed is not None:
+            self._change_feed.publish_stock(changes)
+
+    def history_for(self, product_id: str, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None) -> Iterator[Transaction]:
+        """
+        Yields the product's recorded transactions with since <= timestamp <= until (bounds optional, inclusive).
+        In thread-safe mode they are collected under the history lock (see _read_history).
+        """
+        return self._read_history(lambda: self._transaction_history.history_for(product_id, since, until))
+
+    def history_between(self, start: datetime, end: datetime) -> Iterator[Transaction]:
+        """
+        Yields every recorded transaction with start <= timestamp <= end.
+        In thread-safe mode they are collected under the history lock (see _read_history).
+        """
+        return self._read_history(lambda: self._transaction_history.history_between(start, end))
+
+    def _read_history(self, read: Callable[[], Iterator[Transaction]]) -> Iterator[Transaction]:
+        """
+        Runs a lazy history query. In thread-safe mode the rows are materialised under the history lock: an undo
+        truncating the columns and posting lists mid-iteration would leave the query's row bounds past their end.
+        """
+        if self._history_lock is None:
+            return read()
+        with self._history_lock:
+            return iter(list(read()))
+
+    def demand_forecast(self, lead_time_days: Union[float, Sequence[float], None] = None,
+                        service_level: Optional[float] = None, now: Optional[datetime] = None) -> "DemandForecast":
+        """
+        OUTBOUND velocity, reorder point and days of cover of every product (see DemandForecaster.forecast), in
+        list_all_products order; `lead_time_days` may hold one value per product in that order.
+        """
+        if self._forecaster is None:
+            raise ValueError("No demand forecaster is attached to this InventoryManager.")
+        products, stock = self._capture_stock()
+        return self._forecaster.forecast(self._transaction_history, [product.product_id for product in products],
+                                         stock, lead_time_days, service_level, now)
+
+    def _reindex(self, product_id: str, stock: Optional[int]) -> None:
+        """
+        Moves a product to `stock` in the stock index, or removes it when `stock` is None.
+        A product table's stock index reads the records, so there is nothing to move.
+        """
+        if self._product_table is not None:
+            return
+        if self._index_lock is None:
+            if stock is None:
+                self._stock_index.discard(product_id)
+            else:
+                self._stock_index.update(product_id, stock)
+            return
+
+        with self._index_lock:
+            self._index_version += 1
+            try:
+                if stock is None:
+                    self._stock_index.discard(product_id)
+                else:
+                    self._stock_index.update(product_id, stock)
+            finally:
+                self._index_version += 1
+
+    def _reindex_many(self, stock_by_product: Dict[str, int]) -> None:
+        if self._product_table is not None:
+            return
+        if self._index_lock is None:
+            self._stock_index.update_many(stock_by_product)
+            return
+
+        with self._index_lock:
+            self._index_version += 1
+            try:
+                self._stock_index.update_many(stock_by_product)
+            finally:
+                self._index_version += 1
+
+    def _read_index(self, read: Callable[[], Any]) -> Any:
+        """
+        Runs a read-only stock index query. In thread-safe mode it first runs without any lock and is accepted
+        only if no writer touched the index meanwhile (version unchanged and even); a read torn by a concurrent
+        bucket split just raises and is retried. Writers are never blocked by readers that succeed this way.
+        A product table's scans have no index writers to race with and run without the lock.
+        """
+        if self._index_lock is None or self._product_table is not None:
+            return read()
+
+        for _ in range(_OPTIMISTIC_READ_ATTEMPTS):
+            version = self._index_version
+            if version & 1:
+                continue
+            try:
+                result = read()
+            except (IndexError, KeyError, TypeError):
+                continue
+            if self._index_version == version:
+                return result
+        with self._index_lock:
+            return read()
+
+    def _check_threshold(self, product: Product) -> None:
+        if self._alert_engine is not None:
+            self._alert_engine.observe(product.product_id, product.current_stock, product.safety_stock_threshold,
+                                       product.name)
+        elif product.current_stock <= product.safety_stock_threshold:
+            self._log_stock_alert(product)
+
+    @staticmethod
+    def _log_stock_alert(product: Product) -> None:
+        # Alert consumers (and mocks of Logger.warning) expect the complete message as the first argument,
+        # so it is formatted eagerly, but only after the isEnabledFor guard. The extra fields let a
+        # StructuredFormatter emit them as JSON keys.
+        if logger.isEnabledFor(logging.WARNING):
             logger.warning(
                 f"ALERT: Stock for {product.name} (ID: {product.product_id}) is at {product.current_stock}, "
-                f"which is below the safety threshold of {product.safety_stock_threshold}."
+                f"which is below the safety threshold of {product.safety_stock_threshold}.",
+                extra={
+                    "product_id": product.product_id,
+                    "current_stock": product.current_stock,
+                    "safety_stock_threshold": product.safety_stock_threshold,
+                },
             )
 
     def get_top_n_products_by_stock(self, n: int) -> List[Product]:
         """
-        Returns the top N products with the highest stock levels using a Min-Heap (heapq).
+        Returns the top N products with the highest stock levels from the order-statistics index, O(log N + n).
         """
-        if n <= 0:
-            return []
+        return self._query_stock_index(lambda: list(self._stock_index.top(n)))
 
-        min_heap: List[Tuple[int, Product]] = []
+    def get_bottom_n_products_by_stock(self, n: int) -> List[Product]:
+        """
+        Returns the N products with the lowest stock levels, lowest first, O(log N + n).
+        """
+        return self._query_stock_index(lambda: list(self._stock_index.bottom(n)))
 
-        for product in self._products.values():
-            stock = product.current_stock
+    def get_stock_rank(self, product_id: str) -> Optional[int]:
+        """
+        Returns the 1-based rank of a product by stock level (1 = highest stock), or None if it is unknown.
+        """
+        if product_id not in self._products:
+            return None
 
-            if len(min_heap) < n:
-                heapq.heappush(min_heap, (stock, product))
-            else:
-                if stock > min_heap[0][0]:
-                    heapq.heapreplace(min_heap, (stock, product))
+        # Read-only: add_product, update_stock, apply_transactions and undo keep the index in step with the stock.
+        # A concurrent add_product publishes the product before indexing it, so the index may not know it yet.
+        def read() -> Optional[int]:
+            rank = self._stock_index.rank(product_id)
+            return None if rank is None else rank + 1
+        return self._read_index(read)
 
-        result_products = [item[1] for item in min_heap]
-        result_products.sort(key=lambda p: p.current_stock, reverse=True)
+    def _query_stock_index(self, query: Callable[[], List[str]]) -> List[Product]:
+        """
+        Resolves the product IDs returned by an index query to products.
+        Entries whose product was removed from `_products` directly, or whose stock no longer matches,
+        are repaired and the query is re-run, so stale index entries never leak into results.
+        In thread-safe mode a stock mismatch is just a concurrent update, so only removed products are repaired.
+        """
+        verify_stock = self._locks is None
+        while True:
+            result_products: List[Product] = []
+            stale: List[str] = []
+            for product_id in self._read_index(query):
+                product = self._products.get(product_id)
+                if product is None or (
+                        verify_stock and product.current_stock != self._stock_index.stock_of(product_id)):
+                    stale.append(product_id)
+                else:
+                    result_products.append(product)
 
-        return result_products
+            if not stale:
+                return result_products
+
+            for product_id in stale:
+                product = self._products.get(product_id)
+                self._reindex(product_id, None if product is None else product.current_stock)
 
     def check_and_process_item(self, product_id: str) -> str:
         """
         Performs external status check and handles various outcomes.
         """
-        import oes_core.utils
+        check_status = self._external_call("check_status")
 
         try:
             # External call that we will mock
-            status_code = oes_core.utils.check_status(product_id)
-            if status_code == 200:
-                return "PROCESSED"
-            elif status_code == 400:
-                return "FAILED_VALIDATION"
-            elif status_code == 500:
-                return "UNEXPECTED_CODE"
+            status_code = check_status(product_id)
         except ValueError:
             return "FAILED_VALIDATION"
         except RuntimeError:
             return "ERROR_RUNTIME"
+        return self._status_outcome(status_code)
+
+    @staticmethod
+    def _status_outcome(status_code: Any) -> Optional[str]:
+        """Maps an external status code to the outcome reported by check_and_process_item (None if unknown)."""
+        if status_code == 200:
+            return "PROCESSED"
+        elif status_code == 400:
+            return "FAILED_VALIDATION"
+        elif status_code == 500:
+            return "UNEXPECTED_CODE"
+        return None
+
+    def _external_call(self, name: str) -> Callable[[str], Any]:
+        """
+        Returns the oes_core.utils function `name`, routed through the resilience layer and the status cache when
+        configured, and timed when metrics are enabled.
+        The module attribute is looked up each time, so patching oes_core.utils (e.g. with mocker) takes effect;
+        the wrapped callable is built once per function and reused until then (or until metrics are toggled).
+        """
+        import oes_core.utils
+
+        function = getattr(oes_core.utils, name)
+        cached = self._external_calls.get(name)
+        if cached is not None and cached[0] is function:
+            return cached[1]
+        call = function
+        if self._resilience is not None:
+            call = self._resilience.wrap(call)
+        cache = self._status_cache
+        if cache is not None:
+            upstream = call
+            call = lambda key: cache.get_or_load((name, key), lambda: upstream(key))
+        if self._metrics is not None:
+            call = self._metrics.timed(f"external.{name}", call)
+        self._external_calls[name] = (function, call)
+        return call
+
+    def perform_batch_status_check(self, item_list: List[str], max_workers: int = DEFAULT_STATUS_WORKERS,
+                                   timeout: Optional[float] = None) -> List[Any]:
+        """
+        Checks the external status of every item concurrently on a bounded thread pool.
+
+        Results come back in input order. A call that raises contributes its exception instance, and a call
+        that runs longer than `timeout` seconds contributes a TimeoutError, so one bad item never fails the batch.
+        Each call has its own pool, shut down on return: threads stuck in timed-out calls are abandoned with it
+        and never take worker slots from a later batch.
+        Batch latency is roughly the slowest call times ceil(len(item_list) / max_workers).
+        """
+        items = list(item_list)
+        results: List[Any] = [None] * len(items)
+        if not items:
+            return results
+
+        get_external_status = self._external_call("get_external_status")
+        started_at: Dict[int, float] = {}
+
+        def call(position: int, item: str):
+            started_at[position] = time.monotonic()
+            return get_external_status(item)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+        timed_out = False
+        try:
+            pending = {executor.submit(call, position, item): position for position, item in enumerate(items)}
+            while pending:
+                wait_for = None
+                if timeout is not None:
+                    # Wake up at the earliest deadline of a running call, and at least every `timeout` seconds
+                    # so calls picked up by threads freed from timed-out calls are also watched.
+                    now = time.monotonic()
+                    deadlines = [started_at[p] + timeout for p in pending.values() if p in started_at]
+                    wait_for = max(0.0, min(deadlines, default=now + timeout) - now)
+                done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    position = pending.pop(future)
+                    error = future.exception()
+                    results[position] = future.result() if error is None else error
 
-    def perform_batch_status_check(self, item_list: List[str]):
+                if timeout is not None:
+                    now = time.monotonic()
+                    for future, position in list(pending.items()):
+                        if position in started_at and now - started_at[position] >= timeout:
+                            del pending[future]
+                            timed_out = True
+                            results[position] = TimeoutError(
+                                f"Status check for {items[position]} timed out after {timeout}s."
+                            )
+        finally:
+            # Threads stuck in timed-out calls are abandoned instead of joined.
+            executor.shutdown(wait=not timed_out, cancel_futures=True)
+
+        return results
+
+    async def perform_batch_status_check_async(self, item_list: List[str],
+                                               concurrency: int = DEFAULT_STATUS_WORKERS,
+                                               timeout: Optional[float] = None,
+                                               executor: Optional[Executor] = None) -> List[Any]:
+        """
+        asyncio variant of perform_batch_status_check with at most `concurrency` calls in flight.
+
+        A coroutine `get_external_status` (a native async client) is awaited directly; a blocking one runs on
+        `executor` if given (left running afterwards), else on a thread pool sized to `concurrency`. With a
+        `timeout`, blocking calls always get a pool of their own, shut down afterwards like the one of
+        perform_batch_status_check: a timed-out call keeps its thread until it returns, and must not hold a slot
+        of the shared `executor` meanwhile. Results, exceptions and per-call timeouts are reported the same way.
+        Native async clients bypass the status cache.
+        """
         import oes_core.utils
 
-        for item in item_list:
-            oes_core.utils.get_external_status(item)
+        items = list(item_list)
+        if not items:
+            return []
+
+        get_external_status = oes_core.utils.get_external_status
+        is_native_async = asyncio.iscoroutinefunction(get_external_status)
+        if not is_native_async:
+            get_external_status = self._external_call("get_external_status")
+        elif self._metrics is not None:
+            get_external_status = self._metrics.timed_async("external.get_external_status", get_external_status)
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        owned_executor = None
+        if not is_native_async and (executor is None or timeout is not None):
+            executor = owned_executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(items))))
+
+        async def call(item: str):
+            async with semaphore:
+                if is_native_async:
+                    pending_call = get_external_status(item)
+                else:
+                    pending_call = loop.run_in_executor(executor, get_external_status, item)
+                try:
+                    return await asyncio.wait_for(pending_call, timeout)
+                except asyncio.TimeoutError:
+                    return TimeoutError(f"Status check for {item} timed out after {timeout}s.")
+                except Exception as error:
+                    return error
+
+        try:
+            return list(await asyncio.gather(*(call(item) for item in items)))
+        finally:
+            if owned_executor is not None:
+                owned_executor.shutdown(wait=False, cancel_futures=True)
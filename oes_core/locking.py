@@ -0,0 +1,48 @@
+
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterable, Iterator
+
+DEFAULT_LOCK_STRIPES = 64
+
+
+class StripedLock:
+    """
+    Lock striping: a fixed pool of locks, each key (product ID) mapped to one of them by hash.
+
+    Updates to keys on different stripes proceed in parallel while memory stays O(stripes) instead of one lock
+    per product. Multi-key operations take their stripes in ascending stripe order, so they cannot deadlock.
+    """
+    def __init__(self, stripes: int = DEFAULT_LOCK_STRIPES):
+        if stripes <= 0:
+            raise ValueError("Number of lock stripes must be positive.")
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def stripe_of(self, key: Hashable) -> int:
+        return hash(key) % len(self._locks)
+
+    def for_key(self, key: Hashable) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    def hold(self, keys: Iterable[Hashable]):
+        """Holds the stripes of every key for the duration of the block."""
+        return self._hold(sorted({self.stripe_of(key) for key in keys}))
+
+    def hold_all(self):
+        """Holds every stripe, excluding all keyed operations (for whole-inventory operations such as undo)."""
+        return self._hold(range(len(self._locks)))
+
+    @contextmanager
+    def _hold(self, stripes: Iterable[int]) -> Iterator[None]:
+        acquired = []
+        try:
+            for stripe in stripes:
+                self._locks[stripe].acquire()
+                acquired.append(stripe)
+            yield
+        finally:
+            for stripe in reversed(acquired):
+                self._locks[stripe].release()
@@ -0,0 +1,71 @@
+
+import json
+import logging
+import queue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+# Attributes every LogRecord has; anything else on a record was passed through `extra=` and is structured data.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line, including every field passed through `extra=`
+    (e.g. product_id, current_stock and safety_stock_threshold on stock alerts).
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class NonBlockingLogging:
+    """
+    Moves log I/O off the caller's thread: a QueueHandler on the target logger only enqueues records,
+    and a QueueListener thread hands them to the real (possibly slow) handlers.
+
+    The queue is unbounded, so emitting a record never blocks the caller, e.g. InventoryManager.update_stock
+    raising a stock alert. Usable as a context manager or through start()/stop().
+    """
+    def __init__(self, logger_name: str = "oes_core", handlers: Optional[List[logging.Handler]] = None):
+        self.logger = logging.getLogger(logger_name)
+        if handlers is None:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(StructuredFormatter())
+            handlers = [stream_handler]
+        self.handlers = handlers
+        self._queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self._queue_handler = QueueHandler(self._queue)
+        self._listener = QueueListener(self._queue, *self.handlers, respect_handler_level=True)
+        self._started = False
+
+    def start(self) -> "NonBlockingLogging":
+        if not self._started:
+            self._listener.start()
+            self.logger.addHandler(self._queue_handler)
+            self._started = True
+        return self
+
+    def stop(self) -> None:
+        """Detaches the queue handler and blocks until every queued record has been handled."""
+        if self._started:
+            self.logger.removeHandler(self._queue_handler)
+            self._listener.stop()
+            self._started = False
+
+    def __enter__(self) -> "NonBlockingLogging":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
@@ -0,0 +1,346 @@
+
+import functools
+import os
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# HDR-style log-linear buckets: every power of two is split into 2 ** _SUB_BUCKET_BITS linear sub-buckets, so a
+# recorded value is off by at most 1 / 2 ** _SUB_BUCKET_BITS (12.5%) of itself, from nanoseconds to centuries.
+_SUB_BUCKET_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+_BUCKET_COUNT = (64 - _SUB_BUCKET_BITS) * _SUB_BUCKETS + _SUB_BUCKETS
+_ERRORS_SLOT = _BUCKET_COUNT
+_TOTAL_SLOT = _BUCKET_COUNT + 1
+
+# Fixed `le` bounds (seconds) of the exported Prometheus histograms; a series must keep the same bounds across
+# scrapes, so they do not follow the internal buckets.
+PROMETHEUS_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                      1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _bucket_of(value: int) -> int:
+    if value < 2 * _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS - 1
+    return (shift + 1) * _SUB_BUCKETS + (value >> shift) - _SUB_BUCKETS
+
+
+def _bucket_bounds(bucket: int) -> Tuple[int, int]:
+    """Returns the [lowest, highest] value recorded into `bucket`."""
+    if bucket < 2 * _SUB_BUCKETS:
+        return bucket, bucket
+    shift = bucket // _SUB_BUCKETS - 1
+    low = (bucket % _SUB_BUCKETS + _SUB_BUCKETS) << shift
+    return low, low + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram in nanoseconds, with call and error counts.
+
+    Every thread records into its own bucket array (no lock on the hot path); readers merge the arrays. When a
+    thread ends its array is folded into one shared array of finished threads, so memory stays fixed (~500 counters
+    per live recording thread, plus one) however many values are recorded and however many threads come and go.
+    Percentiles and max are reported as the highest value of their bucket, min as the lowest.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        # One counts list per live recording thread: _BUCKET_COUNT buckets, then the error count and the total.
+        self._shards: List[List[int]] = []
+        # Counts of finished threads, also in _shards once the first recording thread has ended.
+        self._retired: Optional[List[int]] = None
+        self._lock = threading.Lock()
+
+    def record(self, value_ns: int, error: bool = False) -> None:
+        try:
+            counts = self._local.counts
+        except AttributeError:
+            counts = self._new_shard()
+        # _bucket_of, inlined: this runs on every instrumented call.
+        if value_ns < 2 * _SUB_BUCKETS:
+            counts[value_ns if value_ns > 0 else 0] += 1
+        else:
+            shift = value_ns.bit_length() - _SUB_BUCKET_BITS - 1
+            counts[shift * _SUB_BUCKETS + (value_ns >> shift)] += 1
+        counts[_TOTAL_SLOT] += value_ns
+        if error:
+            counts[_ERRORS_SLOT] += 1
+
+    def _new_shard(self) -> List[int]:
+        counts = [0] * (_BUCKET_COUNT + 2)
+        # The thread-local owner dies with the thread; its finaliser folds the thread's counts into _retired.
+        owner = _ShardOwner()
+        weakref.finalize(owner, _retire_shard, weakref.ref(self), counts).atexit = False
+        self._local.counts = counts
+        self._local.owner = owner
+        with self._lock:
+            self._shards.append(counts)
+        return counts
+
+    def _retire(self, counts: List[int]) -> None:
+        with self._lock:
+            if self._retired is None:
+                # Nobody records into a finished thread's array any more: it becomes the shared one.
+                self._retired = counts
+                return
+            retired = self._retired
+            for slot, slot_count in enumerate(counts):
+                if slot_count:
+                    retired[slot] += slot_count
+            for index, shard in enumerate(self._shards):
+                if shard is counts:
+                    del self._shards[index]
+                    break
+
+    def _merged(self) -> List[int]:
+        # Merged under the lock, so a shard retiring meanwhile is not counted twice (here and in _retired).
+        with self._lock:
+            shards = self._shards
+            if len(shards) == 1:
+                return list(shards[0])
+            return [sum(column) for column in zip(*shards)] if shards else [0] * (_BUCKET_COUNT + 2)
+
+    def reset(self) -> None:
+        with self._lock:
+            for counts in self._shards:
+                counts[:] = [0] * len(counts)
+
+    @property
+    def count(self) -> int:
+        return sum(self._merged()[:_BUCKET_COUNT])
+
+    def percentile(self, q: float) -> Optional[int]:
+        """Value (ns) at or below which a fraction `q` (0..1) of the recorded values lie."""
+        counts = self._merged()[:_BUCKET_COUNT]
+        return _percentile(counts, sum(counts), q)
+
+    def cumulative_counts(self, bounds_ns: List[int]) -> List[int]:
+        """Number of values whose bucket lies entirely at or below each bound (bounds ascending)."""
+        counts = self._merged()
+        result = []
+        seen = 0
+        bucket = 0
+        for bound in bounds_ns:
+            while bucket < _BUCKET_COUNT and _bucket_bounds(bucket)[1] <= bound:
+                seen += counts[bucket]
+                bucket += 1
+            result.append(seen)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        merged = self._merged()
+        counts = merged[:_BUCKET_COUNT]
+        count = sum(counts)
+        total_ns = merged[_TOTAL_SLOT]
+        occupied = [bucket for bucket, bucket_count in enumerate(counts) if bucket_count]
+        return {
+            "count": count,
+            "errors": merged[_ERRORS_SLOT],
+            "total_ns": total_ns,
+            "mean_ns": total_ns / count if count else None,
+            "min_ns": _bucket_bounds(occupied[0])[0] if occupied else None,
+            "max_ns": _bucket_bounds(occupied[-1])[1] if occupied else None,
+            "p50_ns": _percentile(counts, count, 0.50),
+            "p90_ns": _percentile(counts, count, 0.90),
+            "p99_ns": _percentile(counts, count, 0.99),
+            "p999_ns": _percentile(counts, count, 0.999),
+        }
+
+
+class _ShardOwner:
+    __slots__ = ("__weakref__",)
+
+
+def _retire_shard(histogram_ref: "weakref.ref[LatencyHistogram]", counts: List[int]) -> None:
+    histogram = histogram_ref()
+    if histogram is not None:
+        histogram._retire(counts)
+
+
+def _percentile(counts: List[int], count: int, q: float) -> Optional[int]:
+    if not count:
+        return None
+    rank = max(1, -(-q * count // 1))     # ceil(q * count), at least the first value
+    seen = 0
+    for bucket, bucket_count in enumerate(counts):
+        seen += bucket_count
+        if seen >= rank:
+            return _bucket_bounds(bucket)[1]
+    return None
+
+
+class MetricsRegistry:
+    """Named latency histograms, created on first use."""
+    def __init__(self):
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """Wraps `func` so every call records its latency (and whether it raised) in histogram `name`."""
+        histogram = self.histogram(name)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                histogram.record(clock() - start, error=True)
+                raise
+            histogram.record(clock() - start)
+            return result
+        return wrapper
+
+    def timed_async(self, name: str, func: Callable) -> Callable:
+        histogram = self.histogram(name)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                histogram.record(clock() - start, error=True)
+                raise
+            histogram.record(clock() - start)
+            return result
+        return wrapper
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: histogram.snapshot() for name, histogram in sorted(list(self._histograms.items()))}
+
+    def names(self) -> List[str]:
+        return sorted(self._histograms)
+
+    def reset(self) -> None:
+        """Zeroes every histogram in place, so wrappers made by timed() keep recording into the registry."""
+        with self._lock:
+            histograms = list(self._histograms.values())
+        for histogram in histograms:
+            histogram.reset()
+
+
+# --- Prometheus text exposition format ---
+
+def render_prometheus(registry: MetricsRegistry, prefix: str = "oes") -> str:
+    """Renders every histogram as a Prometheus histogram (seconds) plus an errors counter, labelled by name."""
+    bounds_ns = [round(bound * 1e9) for bound in PROMETHEUS_BUCKETS]
+    latency = f"{prefix}_call_latency_seconds"
+    errors = f"{prefix}_call_errors_total"
+    lines = [f"# HELP {latency} Latency of instrumented calls.", f"# TYPE {latency} histogram"]
+    error_lines = [f"# HELP {errors} Instrumented calls that raised.", f"# TYPE {errors} counter"]
+    for name in registry.names():
+        histogram = registry.histogram(name)
+        snapshot = histogram.snapshot()
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        for bound, cumulative in zip(PROMETHEUS_BUCKETS, histogram.cumulative_counts(bounds_ns)):
+            lines.append(f'{latency}_bucket{{name="{label}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'{latency}_bucket{{name="{label}",le="+Inf"}} {snapshot["count"]}')
+        lines.append(f'{latency}_sum{{name="{label}"}} {snapshot["total_ns"] / 1e9:.9f}')
+        lines.append(f'{latency}_count{{name="{label}"}} {snapshot["count"]}')
+        error_lines.append(f'{errors}{{name="{label}"}} {snapshot["errors"]}')
+    return "\n".join(lines + error_lines) + "\n"
+
+
+def write_prometheus(registry: MetricsRegistry, path: str, prefix: str = "oes") -> None:
+    """Writes the exposition atomically (temp file + rename), e.g. for node_exporter's textfile collector."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus(registry, prefix))
+    os.replace(temp_path, path)
+
+
+class PrometheusExporter:
+    """
+    Exports a registry in the Prometheus text format, off the hot path:
+    - `path`: rewrites the file every `interval` seconds from a background thread (and once more on stop());
+    - `port`: serves GET /metrics over HTTP on (host, port); port 0 picks a free port, see `address`.
+    Usable as a context manager or through start()/stop().
+    """
+    def __init__(self, registry: MetricsRegistry, path: Optional[str] = None, port: Optional[int] = None,
+                 host: str = "127.0.0.1", interval: float = 10.0, prefix: str = "oes"):
+        if path is None and port is None:
+            raise ValueError("PrometheusExporter needs a file path or a port.")
+        self.registry = registry
+        self.path = path
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self.prefix = prefix
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        return None if self._server is None else self._server.server_address[:2]
+
+    def start(self) -> "PrometheusExporter":
+        if self._threads:
+            return self
+        self._stop.clear()
+        if self.path is not None:
+            self._threads.append(threading.Thread(target=self._write_loop, name="oes-metrics-writer", daemon=True))
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+            self._server.daemon_threads = True
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="oes-metrics-http",
+                                                  daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.path is not None:
+            write_prometheus(self.registry, self.path, self.prefix)
+
+    def __enter__(self) -> "PrometheusExporter":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _write_loop(self) -> None:
+        while True:
+            write_prometheus(self.registry, self.path, self.prefix)
+            if self._stop.wait(self.interval):
+                return
+
+    def _handler(self):
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus(exporter.registry, exporter.prefix).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+        return MetricsHandler
@@ -1,15 +1,47 @@
+import operator
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Any
-import uuid
+from numbers import Integral
+from typing import Any, Dict, Optional, Union, TYPE_CHECKING
 
-@dataclass
+from oes_core.ids import new_id
+
+if TYPE_CHECKING:
+    from oes_core.product_table import ProductView
+
+# Quantities are stored in an int32 column of the transaction history (oes_core.history.TransactionHistory).
+MIN_QUANTITY = -2 ** 31
+MAX_QUANTITY = 2 ** 31 - 1
+
+def check_quantity(quantity: Any) -> None:
+    """
+    Raises ValueError unless `quantity` is an integer (any numbers.Integral, e.g. numpy.int64, but not a bool)
+    that fits the int32 history column.
+    """
+    if not isinstance(quantity, Integral) or isinstance(quantity, bool):
+        raise ValueError(f"Quantity change must be an integer, got {type(quantity).__name__}.")
+    if not MIN_QUANTITY <= quantity <= MAX_QUANTITY:
+        raise ValueError(f"Quantity change {quantity} is outside [{MIN_QUANTITY}, {MAX_QUANTITY}].")
+
+def check_transaction(quantity_change: Any, transaction_type: Any) -> None:
+    """Raises ValueError unless the quantity and type make a valid Transaction (storable, with the type's sign)."""
+    check_quantity(quantity_change)
+    if transaction_type not in (Transaction.TYPE_INBOUND, Transaction.TYPE_OUTBOUND, Transaction.TYPE_ADJUSTMENT):
+        raise ValueError(f"Invalid transaction type: {transaction_type}")
+    if transaction_type == Transaction.TYPE_INBOUND and quantity_change <= 0:
+        raise ValueError("INBOUND transaction must have a positive quantity change.")
+    if transaction_type == Transaction.TYPE_OUTBOUND and quantity_change >= 0:
+        raise ValueError("OUTBOUND transaction must have a negative quantity change.")
+
+@dataclass(slots=True)
 class Product:
     """
     Base class for all products. Initialization simplified by dataclass method.
+    slots=True stores the fields in __slots__, so instances carry no per-instance __dict__.
     """
     # unique identifier, auto-generated and not required for init
-    product_id: str = field(default_factory=lambda: str(uuid.uuid4()), init=False)
+    # time-ordered UUIDv7 string from a batched generator (see oes_core.ids)
+    product_id: str = field(default_factory=new_id, init=False)
 
     # core attributes, required for init
     sku: str
@@ -22,6 +54,8 @@ class Product:
 
     # metadata
     create_at: datetime = field(default_factory=datetime.now, init=False)
+    # optimistic concurrency: bumped by InventoryManager on every committed stock change (see compare_and_update)
+    version: int = field(default=0, init=False, compare=False)
 
     def __post_init__(self):
         if self.price <= 0:
@@ -31,6 +65,26 @@ class Product:
         if not self.sku.isalnum():
             raise ValueError("SKU must be alphanumeric.")
 
+    @classmethod
+    def prevalidated(cls, sku: str, name: str, price: float, description: Optional[str] = None,
+                     current_stock: int = 0, safety_stock_threshold: int = 10, product_id: Optional[str] = None,
+                     create_at: Optional[datetime] = None) -> "Product":
+        """
+        Trusted constructor for values that already passed validation (e.g. a validated import chunk):
+        skips __init__ / __post_init__. Batch callers pass ids from oes_core.ids.new_ids() and one shared create_at.
+        """
+        product = object.__new__(cls)
+        product.product_id = product_id if product_id is not None else new_id()
+        product.sku = sku
+        product.name = name
+        product.price = price
+        product.description = description
+        product.current_stock = current_stock
+        product.safety_stock_threshold = safety_stock_threshold
+        product.create_at = create_at if create_at is not None else datetime.now()
+        product.version = 0
+        return product
+
     def __lt__(self, other: Any) -> bool:
         if not isinstance(other, Product):
             return NotImplemented
@@ -45,17 +99,29 @@ class Product:
             'current_stock': self.current_stock
         }
 
-@dataclass
+def product_to_dict(product: Union[Product, "ProductView"]) -> Dict[str, Any]:
+    """
+    Every field of a product as JSON-ready values: get_info() plus description, safety_stock_threshold and
+    create_at (ISO 8601). The one serialisation of products, used by the HTTP API and the change feed.
+    """
+    fields = product.get_info()
+    fields["description"] = product.description
+    fields["safety_stock_threshold"] = product.safety_stock_threshold
+    fields["create_at"] = product.create_at.isoformat()
+    return fields
+
+@dataclass(slots=True)
 class Transaction:
     """
     model for recording all transaction types and quantities.
+    Slotted like Product; long histories are kept column-wise by oes_core.history.TransactionHistory.
     """
     # TYPE CONSTANTS
     TYPE_INBOUND = "INBOUND"
     TYPE_OUTBOUND = "OUTBoUND"
     TYPE_ADJUSTMENT = "ADJUSTMENT"
 
-    transaction_id: str = field(default_factory=lambda: str(uuid.uuid4()), init=False)
+    transaction_id: str = field(default_factory=new_id, init=False)
 
     # associated attribute
     product_id: str
@@ -67,9 +133,18 @@ class Transaction:
     timestamp: datetime = field(default_factory=datetime.now, init=False)
 
     def __post_init__(self):
-        if self.transaction_type not in (self.TYPE_INBOUND, self.TYPE_OUTBOUND, self.TYPE_ADJUSTMENT):
-            raise ValueError(f"Invalid transaction type: {self.transaction_type}")
-        if self.transaction_type == self.TYPE_INBOUND and self.quantity_change <= 0:
-            raise ValueError("INBOUND transaction must have a positive quantity change.")
-        if self.transaction_type == self.TYPE_OUTBOUND and self.quantity_change >= 0:
-            raise ValueError("OUTBOUND transaction must have a negative quantity change.")
+        check_transaction(self.quantity_change, self.transaction_type)
+        # Integral quantities (e.g. numpy.int64) are stored as int, so stock arithmetic stays in Python ints.
+        self.quantity_change = operator.index(self.quantity_change)
+
+    @classmethod
+    def prevalidated(cls, product_id: str, quantity_change: int, transaction_type: str,
+                     transaction_id: Optional[str] = None, timestamp: Optional[datetime] = None) -> "Transaction":
+        """Trusted constructor for already-validated values: skips __init__ / __post_init__, like Product.prevalidated."""
+        transaction = object.__new__(cls)
+        transaction.transaction_id = transaction_id if transaction_id is not None else new_id()
+        transaction.product_id = product_id
+        transaction.quantity_change = quantity_change
+        transaction.transaction_type = transaction_type
+        transaction.timestamp = timestamp if timestamp is not None else datetime.now()
+        return transaction
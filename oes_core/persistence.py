@@ -0,0 +1,548 @@
+
+import gc
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from oes_core.history import TRANSACTION_TYPE_CODES, from_epoch_ns, restore_transaction, to_epoch_ns
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+# --- Write-ahead log format ---
+# Every record is framed as <u32 payload length><u32 crc32(payload)><payload>; the payload starts with
+# <u8 record type><u64 log sequence number (LSN)>.
+_FRAME = struct.Struct("<II")
+_HEADER = struct.Struct("<BQ")
+_PRODUCT_BODY = struct.Struct("<dqqq")          # price, current_stock, safety_stock_threshold, create_at (epoch-ns)
+_TRANSACTION_BODY = struct.Struct("<qBq")       # quantity_change, type code, timestamp (epoch-ns)
+_STRING_LENGTH = struct.Struct("<i")            # -1 encodes None
+_UNDO_BODY = struct.Struct("<QI")               # transactions undone, number of (product_id, <q stock delta>) pairs
+_UNDO_DELTA = struct.Struct("<q")
+
+RECORD_PRODUCT = 1
+RECORD_TRANSACTION = 2
+RECORD_UNDO = 3
+
+# --- Snapshot format ---
+# Magic, <u64 LSN><u64 product count>, then one section per column, each prefixed by its <u64 byte length>:
+# price (float64), current_stock (int64), safety_stock_threshold (int64), create_at (int64 epoch-ns), and for
+# product_id, sku, name and description a None mask (one byte per row, empty if no value is None) followed by
+# the NUL-separated UTF-8 values, so a whole column is decoded with one decode() and one split().
+_SNAPSHOT_MAGIC = b"OESSNAP1"
+_SNAPSHOT_HEADER = struct.Struct("<QQ")
+_SECTION_LENGTH = struct.Struct("<Q")
+_STRING_SEPARATOR = "\x00"
+
+_WAL_PREFIX, _WAL_SUFFIX = "wal-", ".log"
+_SNAPSHOT_PREFIX, _SNAPSHOT_SUFFIX = "snapshot-", ".snap"
+
+
+def _pack_string(value: Optional[str]) -> bytes:
+    if value is None:
+        return _STRING_LENGTH.pack(-1)
+    encoded = value.encode("utf-8")
+    return _STRING_LENGTH.pack(len(encoded)) + encoded
+
+
+def _unpack_string(buffer, offset: int) -> Tuple[Optional[str], int]:
+    (length,) = _STRING_LENGTH.unpack_from(buffer, offset)
+    offset += _STRING_LENGTH.size
+    if length < 0:
+        return None, offset
+    return bytes(buffer[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def _restore_product(product_id: str, sku: str, name: str, price: float, description: Optional[str],
+                     current_stock: int, safety_stock_threshold: int, create_at_ns: int) -> Product:
+    # Persisted products were validated when first created, so bypass __init__ / __post_init__.
+    product = object.__new__(Product)
+    product.product_id = product_id
+    product.sku = sku
+    product.name = name
+    product.price = price
+    product.description = description
+    product.current_stock = current_stock
+    product.safety_stock_threshold = safety_stock_threshold
+    product.create_at = from_epoch_ns(create_at_ns)
+    product.version = 0
+    return product
+
+
+def encode_product(lsn: int, product: Product) -> bytes:
+    return b"".join((
+        _HEADER.pack(RECORD_PRODUCT, lsn),
+        _PRODUCT_BODY.pack(product.price, product.current_stock, product.safety_stock_threshold,
+                           to_epoch_ns(product.create_at)),
+        _pack_string(product.product_id), _pack_string(product.sku), _pack_string(product.name),
+        _pack_string(product.description),
+    ))
+
+
+def encode_transaction(lsn: int, transaction: Transaction) -> bytes:
+    return b"".join((
+        _HEADER.pack(RECORD_TRANSACTION, lsn),
+        _TRANSACTION_BODY.pack(transaction.quantity_change, TRANSACTION_TYPE_CODES[transaction.transaction_type],
+                               to_epoch_ns(transaction.timestamp)),
+        _pack_string(transaction.transaction_id), _pack_string(transaction.product_id),
+    ))
+
+
+def encode_undo(lsn: int, count: int, stock_deltas: Dict[str, int]) -> bytes:
+    parts = [_HEADER.pack(RECORD_UNDO, lsn), _UNDO_BODY.pack(count, len(stock_deltas))]
+    for product_id, delta in stock_deltas.items():
+        parts.append(_pack_string(product_id))
+        parts.append(_UNDO_DELTA.pack(delta))
+    return b"".join(parts)
+
+
+def decode_record(payload) -> Tuple[int, int, object]:
+    """
+    Decodes a WAL payload into (record type, LSN, Product or Transaction or (undone count, stock deltas)).
+    """
+    record_type, lsn = _HEADER.unpack_from(payload, 0)
+    offset = _HEADER.size
+    if record_type == RECORD_PRODUCT:
+        price, stock, threshold, create_at_ns = _PRODUCT_BODY.unpack_from(payload, offset)
+        offset += _PRODUCT_BODY.size
+        product_id, offset = _unpack_string(payload, offset)
+        sku, offset = _unpack_string(payload, offset)
+        name, offset = _unpack_string(payload, offset)
+        description, offset = _unpack_string(payload, offset)
+        return record_type, lsn, _restore_product(product_id, sku, name, price, description, stock, threshold,
+                                                  create_at_ns)
+    if record_type == RECORD_TRANSACTION:
+        quantity, type_code, timestamp_ns = _TRANSACTION_BODY.unpack_from(payload, offset)
+        offset += _TRANSACTION_BODY.size
+        transaction_id, offset = _unpack_string(payload, offset)
+        product_id, offset = _unpack_string(payload, offset)
+        return record_type, lsn, restore_transaction(transaction_id, product_id, quantity, type_code, timestamp_ns)
+    if record_type == RECORD_UNDO:
+        count, pairs = _UNDO_BODY.unpack_from(payload, offset)
+        offset += _UNDO_BODY.size
+        stock_deltas: Dict[str, int] = {}
+        for _ in range(pairs):
+            product_id, offset = _unpack_string(payload, offset)
+            (stock_deltas[product_id],) = _UNDO_DELTA.unpack_from(payload, offset)
+            offset += _UNDO_DELTA.size
+        return record_type, lsn, (count, stock_deltas)
+    raise ValueError(f"Unknown WAL record type: {record_type}")
+
+
+class WriteAheadLog:
+    """
+    Append-only, length-prefixed, CRC-checked binary log file with group commit.
+
+    append() only copies the framed record into an in-memory buffer. A background thread writes and fsyncs
+    the buffer every `group_commit_interval` seconds (or as soon as `max_batch_bytes` are pending), so one
+    fsync covers every record appended in that window. With `wait_for_fsync=True` append() blocks until the
+    batch holding its record is durable; otherwise a crash can lose at most the last commit window.
+    """
+    def __init__(self, path: str, group_commit_interval: float = 0.005, max_batch_bytes: int = 1 << 20,
+                 wait_for_fsync: bool = False):
+        self.path = path
+        self.group_commit_interval = group_commit_interval
+        self.max_batch_bytes = max_batch_bytes
+        self.wait_for_fsync = wait_for_fsync
+        self._file: BinaryIO = open(path, "ab")
+        self._buffer = bytearray()
+        # Monotonic tickets: one per append call, and the last ticket whose records are durable on disk.
+        self._appended = 0
+        self._synced = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._flusher = threading.Thread(target=self._run, name="oes-wal-flusher", daemon=True)
+        self._flusher.start()
+
+    def append(self, payload: bytes) -> None:
+        self.append_many((payload,))
+
+    def append_many(self, payloads: Iterable[bytes]) -> None:
+        """Appends records in order; with wait_for_fsync the caller waits once for the whole group."""
+        frames = b"".join(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload for payload in payloads)
+        with self._condition:
+            if self._closed:
+                raise ValueError("Write-ahead log is closed.")
+            if self._error is not None:
+                raise OSError(f"Write-ahead log {self.path} failed: {self._error}")
+            self._buffer += frames
+            self._appended += 1
+            ticket = self._appended
+            if len(self._buffer) >= self.max_batch_bytes:
+                self._condition.notify_all()
+            if self.wait_for_fsync:
+                while self._synced < ticket and self._error is None:
+                    self._condition.wait()
+
+    def sync(self) -> None:
+        """Blocks until every record appended so far is written and fsynced."""
+        with self._condition:
+            ticket = self._appended
+            self._condition.notify_all()
+            while self._synced < ticket and self._error is None and not self._closed:
+                self._condition.wait()
+        if self._closed:
+            return
+        if self._error is not None:
+            raise OSError(f"Write-ahead log {self.path} failed: {self._error}")
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._flusher.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._buffer and not self._closed:
+                    # Records appended during this window (or during the previous fsync) share one fsync.
+                    self._condition.wait(self.group_commit_interval)
+                batch, self._buffer = self._buffer, bytearray()
+                ticket = self._appended
+                closed = self._closed
+
+            if batch:
+                try:
+                    self._file.write(batch)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                except OSError as error:
+                    logger.error("Write-ahead log %s failed: %s", self.path, error)
+                    with self._condition:
+                        self._error = error
+                        self._condition.notify_all()
+                    return
+
+            with self._condition:
+                self._synced = ticket
+                self._condition.notify_all()
+            if closed:
+                return
+
+
+def read_wal(path: str) -> Iterator[Tuple[int, int, object]]:
+    """
+    Yields (record type, LSN, object) for every intact record of a WAL file. A torn or corrupt tail
+    (from a crash mid-write) ends the scan; the file is truncated to its last intact record.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            offset = 0
+            while offset + _FRAME.size <= size:
+                length, checksum = _FRAME.unpack_from(mapped, offset)
+                start = offset + _FRAME.size
+                payload = mapped[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    break
+                yield decode_record(payload)
+                offset = start + length
+        if offset < size:
+            logger.warning("Truncating corrupt tail of %s at byte %d of %d.", path, offset, size)
+            f.truncate(offset)
+
+
+def write_snapshot(path: str, lsn: int, products: List[Product]) -> None:
+    """Writes the product table column by column to `path`, atomically (temp file + rename)."""
+    def section(data: bytes) -> bytes:
+        return _SECTION_LENGTH.pack(len(data)) + data
+
+    def string_section(values: List[Optional[str]]) -> bytes:
+        none_mask = bytes(value is None for value in values) if None in values else b""
+        text = _STRING_SEPARATOR.join("" if value is None else value for value in values)
+        if values and text.count(_STRING_SEPARATOR) != len(values) - 1:
+            raise ValueError("Strings containing NUL characters cannot be written to a snapshot.")
+        return section(none_mask) + section(text.encode("utf-8"))
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_SNAPSHOT_MAGIC)
+        f.write(_SNAPSHOT_HEADER.pack(lsn, len(products)))
+        f.write(section(array("d", (p.price for p in products)).tobytes()))
+        f.write(section(array("q", (p.current_stock for p in products)).tobytes()))
+        f.write(section(array("q", (p.safety_stock_threshold for p in products)).tobytes()))
+        f.write(section(array("q", (to_epoch_ns(p.create_at) for p in products)).tobytes()))
+        for attribute in ("product_id", "sku", "name", "description"):
+            f.write(string_section([getattr(p, attribute) for p in products]))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def read_snapshot(path: str) -> Tuple[int, List[Product]]:
+    """Memory-maps a snapshot and rebuilds its products column by column. Returns (LSN, products)."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped[:len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not an inventory snapshot.")
+            offset = len(_SNAPSHOT_MAGIC)
+            lsn, count = _SNAPSHOT_HEADER.unpack_from(mapped, offset)
+            offset += _SNAPSHOT_HEADER.size
+
+            def next_section() -> bytes:
+                nonlocal offset
+                (length,) = _SECTION_LENGTH.unpack_from(mapped, offset)
+                offset += _SECTION_LENGTH.size
+                data = mapped[offset:offset + length]
+                offset += length
+                return data
+
+            def numeric_column(typecode: str) -> array:
+                column = array(typecode)
+                column.frombytes(next_section())
+                return column
+
+            def string_column() -> List[Optional[str]]:
+                none_mask = next_section()
+                values: List[Optional[str]] = next_section().decode("utf-8").split(_STRING_SEPARATOR) if count else []
+                if none_mask:
+                    values = [None if is_none else value for value, is_none in zip(values, none_mask)]
+                return values
+
+            prices = numeric_column("d")
+            stocks = numeric_column("q")
+            thresholds = numeric_column("q")
+            created = numeric_column("q")
+            product_ids, skus, names, descriptions = (string_column() for _ in range(4))
+
+    products = [
+        _restore_product(*fields)
+        for fields in zip(product_ids, skus, names, prices, descriptions, stocks, thresholds, created)
+    ]
+    if len(products) != count:
+        raise ValueError(f"Snapshot {path} is truncated: expected {count} products, found {len(products)}.")
+    return lsn, products
+
+
+class InventoryStore:
+    """
+    Durable storage for an InventoryManager: a write-ahead log of every add_product / update_stock /
+    apply_transactions call plus periodic compact snapshots of the product table.
+
+    Recovery memory-maps the latest snapshot, bulk-loads it and replays only the WAL records written after it.
+    Each snapshot starts a new WAL segment; older segments and snapshots are deleted once it is durable.
+
+        store = InventoryStore("/var/lib/oes")
+        manager = store.recover()       # empty manager on first start
+        ...
+        store.snapshot(manager)
+        store.close()
+    """
+    def __init__(self, directory: str, group_commit_interval: float = 0.005, wait_for_fsync: bool = False,
+                 snapshot_every: Optional[int] = None):
+        self.directory = directory
+        self.group_commit_interval = group_commit_interval
+        self.wait_for_fsync = wait_for_fsync
+        # Take a snapshot automatically after this many WAL records (None = only when snapshot() is called).
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        self._lsn = 0
+        self._records_since_snapshot = 0
+        self._wal: Optional[WriteAheadLog] = None
+        self._manager: Optional[InventoryManager] = None
+        self._lock = threading.Lock()
+
+    @property
+    def lsn(self) -> int:
+        """LSN of the last record written."""
+        return self._lsn
+
+    def recover(self, manager: Optional[InventoryManager] = None) -> InventoryManager:
+        """
+        Rebuilds the inventory from the latest snapshot and the WAL tail, then attaches the store to the manager
+        so every further mutation is logged.
+        """
+        if self._manager is not None:
+            raise ValueError("InventoryStore is already attached to an InventoryManager.")
+        manager = manager if manager is not None else InventoryManager()
+
+        # Millions of new objects would trigger repeated full cyclic-GC passes; none of them form cycles.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._load(manager)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        self._open_segment(self._lsn + 1)
+        manager._store = self
+        self._manager = manager
+        return manager
+
+    def _load(self, manager: InventoryManager) -> None:
+        # Recovery rebuilds state that was already published before the restart: keep it out of the change feed.
+        change_feed, manager._change_feed = manager._change_feed, None
+        try:
+            self._load_records(manager)
+        finally:
+            manager._change_feed = change_feed
+
+    def _load_records(self, manager: InventoryManager) -> None:
+        snapshot_lsn = 0
+        snapshots = self._files(_SNAPSHOT_PREFIX, _SNAPSHOT_SUFFIX)
+        if snapshots:
+            snapshot_lsn, products = read_snapshot(snapshots[-1][1])
+            manager._restore_products(products)
+        self._lsn = snapshot_lsn
+
+        replayed = 0
+        pending: List[Transaction] = []
+        for _, path in self._files(_WAL_PREFIX, _WAL_SUFFIX):
+            for record_type, lsn, item in read_wal(path):
+                if lsn <= snapshot_lsn:
+                    continue
+                if record_type == RECORD_TRANSACTION:
+                    pending.append(item)
+                elif record_type == RECORD_UNDO:
+                    self._replay(manager, pending)
+                    manager._revert(*item, emit_logs=False)
+                else:
+                    self._replay(manager, pending)
+                    manager._add_product(item, emit_logs=False)
+                self._lsn = lsn
+                replayed += 1
+        self._replay(manager, pending)
+
+        self._records_since_snapshot = replayed
+        logger.warning("Recovered %d products (snapshot LSN %d, %d WAL records replayed).",
+                       len(manager._products), snapshot_lsn, replayed)
+
+    def log_product(self, product: Product) -> None:
+        with self._lock:
+            self._lsn += 1
+            self._wal.append(encode_product(self._lsn, product))
+            self._records_since_snapshot += 1
+
+    def log_products(self, products: List[Product]) -> None:
+        with self._lock:
+            first_lsn = self._lsn + 1
+            self._wal.append_many([encode_product(lsn, product)
+                                   for lsn, product in enumerate(products, start=first_lsn)])
+            self._lsn += len(products)
+            self._records_since_snapshot += len(products)
+
+    def log_transaction(self, transaction: Transaction) -> None:
+        with self._lock:
+            self._lsn += 1
+            self._wal.append(encode_transaction(self._lsn, transaction))
+            self._records_since_snapshot += 1
+
+    def log_transactions(self, transactions: List[Transaction]) -> None:
+        with self._lock:
+            first_lsn = self._lsn + 1
+            self._wal.append_many([encode_transaction(lsn, transaction)
+                                   for lsn, transaction in enumerate(transactions, start=first_lsn)])
+            self._lsn += len(transactions)
+            self._records_since_snapshot += len(transactions)
+
+    def log_undo(self, count: int, stock_deltas: Dict[str, int]) -> None:
+        """
+        Logs an undo as the net stock delta per product rather than by history position: the history before
+        the latest snapshot is not recovered, so replay cannot rely on it.
+        """
+        with self._lock:
+            self._lsn += 1
+            self._wal.append(encode_undo(self._lsn, count, stock_deltas))
+            self._records_since_snapshot += 1
+
+    def sync(self) -> None:
+        if self._wal is not None:
+            self._wal.sync()
+
+    def snapshot(self, manager: Optional[InventoryManager] = None) -> str:
+        """
+        Writes a snapshot of the product table at the current LSN, starts a new WAL segment and deletes
+        the segments and snapshots it supersedes.
+
+        A mutation logs its records before applying them, both under its product locks. A thread-safe manager's
+        writers are therefore paused (every stripe held) while the snapshot is taken, so every record at or below
+        its LSN is applied; without thread-safe mode, mutations must not run concurrently with a snapshot.
+        """
+        manager = manager if manager is not None else self._manager
+        if self._wal is None or manager is None:
+            raise ValueError("InventoryStore is closed or not attached to an InventoryManager; call recover() first.")
+        if manager._locks is None:
+            return self._write_snapshot(manager)
+        with manager._locks.hold_all():
+            return self._write_snapshot(manager)
+
+    def snapshot_if_due(self) -> None:
+        """
+        Takes the automatic snapshot once `snapshot_every` records were logged since the last one. Called by the
+        attached manager after each mutation, once it has released its locks.
+        """
+        manager = self._manager
+        if manager is None or not self._snapshot_due():
+            return
+        if manager._locks is None:
+            self._write_snapshot(manager)
+            return
+        with manager._locks.hold_all():
+            if self._snapshot_due():  # another writer may have taken it while this one waited
+                self._write_snapshot(manager)
+
+    def _snapshot_due(self) -> bool:
+        return self.snapshot_every is not None and self._records_since_snapshot >= self.snapshot_every
+
+    def _write_snapshot(self, manager: InventoryManager) -> str:
+        with self._lock:
+            lsn = self._lsn
+            self._wal.close()
+            path = os.path.join(self.directory, f"{_SNAPSHOT_PREFIX}{lsn:020d}{_SNAPSHOT_SUFFIX}")
+            write_snapshot(path, lsn, manager.list_all_products())
+            self._open_segment(lsn + 1)
+            self._records_since_snapshot = 0
+
+            for prefix, suffix in ((_SNAPSHOT_PREFIX, _SNAPSHOT_SUFFIX), (_WAL_PREFIX, _WAL_SUFFIX)):
+                for file_lsn, old_path in self._files(prefix, suffix):
+                    if (prefix == _SNAPSHOT_PREFIX and file_lsn < lsn) or (prefix == _WAL_PREFIX and file_lsn <= lsn):
+                        os.remove(old_path)
+        return path
+
+    def close(self) -> None:
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+        if self._manager is not None:
+            self._manager._store = None
+            self._manager = None
+
+    def __enter__(self) -> "InventoryStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _open_segment(self, first_lsn: int) -> None:
+        path = os.path.join(self.directory, f"{_WAL_PREFIX}{first_lsn:020d}{_WAL_SUFFIX}")
+        self._wal = WriteAheadLog(path, self.group_commit_interval, wait_for_fsync=self.wait_for_fsync)
+
+    def _files(self, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+        """Returns (LSN, path) of the files with that prefix/suffix, in LSN order."""
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(suffix):
+                found.append((int(name[len(prefix):-len(suffix)]), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    @staticmethod
+    def _replay(manager: InventoryManager, pending: List[Transaction]) -> None:
+        if pending:
+            batch, grouped = manager._group_by_product(pending)
+            manager._apply_grouped(batch, grouped, emit_logs=False)
+            pending.clear()
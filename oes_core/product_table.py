@@ -0,0 +1,558 @@
+
+import mmap
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from oes_core.history import from_epoch_ns, to_epoch_ns
+from oes_core.models import Product
+
+# --- Record file format ---
+# A 64-byte header, then fixed-size records in insertion order. Each record is
+# <f64 price><i64 current_stock><i64 safety_stock_threshold><i64 create_at (epoch-ns)>, then product_id, sku,
+# name and description, each a <u16 byte length> (0xFFFF encodes None) followed by a zero-padded UTF-8 field of
+# the width fixed when the table was created.
+_TABLE_MAGIC = b"OESPTBL1"
+_TABLE_HEADER = struct.Struct("<8sIIIIQ")       # magic, product_id / sku / name / description widths, count
+_TABLE_HEADER_SIZE = 64
+_STOCK_OFFSET = 8
+_NUMBERS = struct.Struct("<dqqq")
+_STOCK = struct.Struct("<q")
+_LENGTH = struct.Struct("<H")
+_NONE_LENGTH = 0xFFFF
+
+# --- Index file format (<path>.index) ---
+# <magic><u64 slot count><u64 indexed records>, then two open-addressing (linear probing) hash tables of
+# <u64 record number + 1> slots, 0 = empty: by product_id, then by SKU. Keys are hashed with crc32, which is the
+# same in every process and every run. The table is kept at most half full.
+_INDEX_MAGIC = b"OESPIDX1"
+_INDEX_HEADER = struct.Struct("<8sQQ")
+_INDEX_HEADER_SIZE = 64
+_MIN_SLOTS = 1024
+_MIN_CAPACITY = 512
+# Records per numpy chunk in the stock scans (top / bottom / rank / low stock), which bounds their scratch memory.
+_SCAN_CHUNK = 1 << 16
+
+
+@dataclass(frozen=True)
+class RecordLayout:
+    """Maximum UTF-8 byte length of each string field; fixed when a table file is created."""
+    product_id_bytes: int = 64
+    sku_bytes: int = 64
+    name_bytes: int = 128
+    description_bytes: int = 512
+
+    @property
+    def widths(self) -> Tuple[int, int, int, int]:
+        return self.product_id_bytes, self.sku_bytes, self.name_bytes, self.description_bytes
+
+
+class ProductView:
+    """
+    Lightweight view of one product record in a MappedProductTable: every attribute read decodes from the mapped
+    page, and setting `current_stock` writes it there in place. `version` is kept by the table in memory (it is
+    not part of the file, and restarts at 0 when the table is reopened). The other fields are read-only.
+    Use to_product() for a detached Product copy.
+    """
+    __slots__ = ("_table", "_offset")
+
+    def __init__(self, table: "MappedProductTable", offset: int):
+        self._table = table
+        self._offset = offset
+
+    @property
+    def current_stock(self) -> int:
+        return _STOCK.unpack_from(self._table._map, self._offset + _STOCK_OFFSET)[0]
+
+    @current_stock.setter
+    def current_stock(self, value: int) -> None:
+        _STOCK.pack_into(self._table._map, self._offset + _STOCK_OFFSET, value)
+
+    @property
+    def version(self) -> int:
+        return self._table._versions.get(self._offset, 0)
+
+    @version.setter
+    def version(self, value: int) -> None:
+        self._table._versions[self._offset] = value
+
+    @property
+    def price(self) -> float:
+        return _NUMBERS.unpack_from(self._table._map, self._offset)[0]
+
+    @property
+    def safety_stock_threshold(self) -> int:
+        return _NUMBERS.unpack_from(self._table._map, self._offset)[2]
+
+    @property
+    def create_at(self) -> datetime:
+        return from_epoch_ns(_NUMBERS.unpack_from(self._table._map, self._offset)[3])
+
+    @property
+    def product_id(self) -> str:
+        return self._table._string(self._offset, 0)
+
+    @property
+    def sku(self) -> str:
+        return self._table._string(self._offset, 1)
+
+    @property
+    def name(self) -> str:
+        return self._table._string(self._offset, 2)
+
+    @property
+    def description(self) -> Optional[str]:
+        return self._table._string(self._offset, 3)
+
+    def to_product(self) -> Product:
+        price, stock, threshold, create_at_ns = _NUMBERS.unpack_from(self._table._map, self._offset)
+        product = Product.prevalidated(self.sku, self.name, price, self.description, stock, threshold,
+                                       self.product_id, from_epoch_ns(create_at_ns))
+        product.version = self.version
+        return product
+
+    def get_info(self) -> dict:
+        return {
+            'product_id': self.product_id,
+            'sku': self.sku,
+            'name': self.name,
+            'price': self.price,
+            'current_stock': self.current_stock
+        }
+
+    def __lt__(self, other: Any) -> bool:
+        if not isinstance(other, (Product, ProductView)):
+            return NotImplemented
+        return self.current_stock < other.current_stock
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ProductView):
+            return self.to_product() == other.to_product()
+        if isinstance(other, Product):
+            return self.to_product() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(self.to_product()).replace("Product(", "ProductView(", 1)
+
+
+class MappedProductTable:
+    """
+    Product storage in a memory-mapped file of fixed-size records, with an on-disk hash index from product_id and
+    SKU to record number, for catalogs too large to keep as Product objects on the Python heap.
+
+    Pass it to InventoryManager(product_table=...) to replace the in-memory product dict: the manager's
+    get_product then returns ProductView objects and update_stock rewrites current_stock in the mapped page.
+    Which records stay resident is left to the OS page cache. The manager keeps no per-product index on the heap
+    in this mode: SKU lookups go through the on-disk SKU index, and stock order and low stock are answered by
+    chunked numpy scans of the stock columns (stock_index(), low_stock()), O(N) per query instead of O(log N + n).
+
+    Behaves like the dict it replaces (get, in, [], len, keys/values/items, update). Records are never deleted.
+    Lookups take no lock; inserts and growth are serialised by an internal lock. The files are not a write-ahead
+    log: flush() (and close()) push dirty pages to disk, but a crash between flushes can lose recent writes.
+    Reopening an existing file restores its products; `layout` is then taken from the file.
+    """
+    def __init__(self, path: str, layout: Optional[RecordLayout] = None, initial_capacity: int = _MIN_CAPACITY):
+        self.path = path
+        self.index_path = path + ".index"
+        self._lock = threading.Lock()
+        # Mappings (and slot views) replaced by growth stay open until close(): views and lock-free readers may
+        # still use them, and all mappings of a file share its pages, so writes through an old one are not lost.
+        self._retired: List[Union[mmap.mmap, memoryview]] = []
+        # Record offset -> version of its product (ProductView.version); absent means 0.
+        self._versions: Dict[int, int] = {}
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= _TABLE_HEADER_SIZE
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            magic, *widths, self._count = _TABLE_HEADER.unpack(self._file.read(_TABLE_HEADER.size))
+            if magic != _TABLE_MAGIC:
+                self._file.close()
+                raise ValueError(f"{path} is not a product table file.")
+            self.layout = RecordLayout(*widths)
+        else:
+            self.layout = layout if layout is not None else RecordLayout()
+            self._count = 0
+        self._configure_layout()
+
+        if not exists:
+            self._file.truncate(_TABLE_HEADER_SIZE + max(initial_capacity, 1) * self.record_size)
+        self._capacity = (os.fstat(self._file.fileno()).st_size - _TABLE_HEADER_SIZE) // self.record_size
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if not exists:
+            self._write_header()
+
+        self._index_file = None
+        self._index_map: Optional[mmap.mmap] = None
+        # (u64 slots, slot mask), swapped as one tuple so a lock-free lookup never mixes two index generations.
+        # Both hash tables share the slots: product_id slots at [0, slot count), SKU slots after them.
+        self._index: Tuple[memoryview, int] = (memoryview(b""), 0)
+        self._open_index()
+
+    def _configure_layout(self) -> None:
+        widths = self.layout.widths
+        if any(width <= 0 or width >= _NONE_LENGTH for width in widths):
+            raise ValueError("Record field widths must be between 1 and 65534 bytes.")
+        self._record = struct.Struct("<dqqq" + "".join(f"H{width}s" for width in widths))
+        self.record_size = self._record.size
+        # Offset of each string field's length prefix within a record.
+        self._field_offsets = []
+        offset = _NUMBERS.size
+        for width in widths:
+            self._field_offsets.append(offset)
+            offset += _LENGTH.size + width
+        # The columns the stock scans read, as a strided numpy view of the records. The zero-padded product_id
+        # bytes compare like the str IDs (UTF-8 byte order is code point order), so ties break as in StockIndex.
+        self._scan_dtype = np.dtype({
+            "names": ["current_stock", "safety_stock_threshold", "product_id"],
+            "formats": ["<i8", "<i8", f"S{widths[0]}"],
+            "offsets": [_STOCK_OFFSET, 16, self._field_offsets[0] + _LENGTH.size],
+            "itemsize": self.record_size,
+        })
+
+    # --- Mapping API (what InventoryManager uses of its product dict) ---
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, product_id: object) -> bool:
+        return isinstance(product_id, str) and self._find(product_id, 0) >= 0
+
+    def get(self, product_id: Optional[str], default: Any = None) -> Union[ProductView, Any]:
+        if not isinstance(product_id, str):
+            return default
+        record = self._find(product_id, 0)
+        return default if record < 0 else ProductView(self, _TABLE_HEADER_SIZE + record * self.record_size)
+
+    def __getitem__(self, product_id: str) -> ProductView:
+        view = self.get(product_id)
+        if view is None:
+            raise KeyError(product_id)
+        return view
+
+    def get_by_sku(self, sku: str) -> Optional[ProductView]:
+        """Most recently inserted product with this SKU, through the on-disk SKU index."""
+        record = self._find(sku, 1)
+        return None if record < 0 else ProductView(self, _TABLE_HEADER_SIZE + record * self.record_size)
+
+    def __setitem__(self, product_id: str, product: Union[Product, ProductView]) -> None:
+        self.update([(product_id, product)])
+
+    def update(self, items: Union[Iterable[Tuple[str, Any]], "dict"]) -> None:
+        """Inserts products (or overwrites the record of an existing product_id), growing the files once."""
+        pairs = list(items.items() if hasattr(items, "items") else items)
+        encoded = []
+        for product_id, product in pairs:
+            if product_id != product.product_id:
+                raise ValueError(f"Key {product_id} does not match product ID {product.product_id}.")
+            encoded.append(self._encode(product))
+
+        with self._lock:
+            self._reserve(self._count + len(encoded))
+            for (product_id, product), record_bytes in zip(pairs, encoded):
+                record = self._find(product_id, 0)
+                if record >= 0:
+                    self._map[self._record_offset(record):self._record_offset(record + 1)] = record_bytes
+                    self._insert_key(product.sku, record, 1)
+                    continue
+                record = self._count
+                # Record first, then the index slots, then the count: a lock-free reader never finds a slot that
+                # points at an unwritten record.
+                self._map[self._record_offset(record):self._record_offset(record + 1)] = record_bytes
+                self._insert_key(product_id, record, 0)
+                self._insert_key(product.sku, record, 1)
+                self._count = record + 1
+            self._write_header()
+            _INDEX_HEADER.pack_into(self._index_map, 0, _INDEX_MAGIC, len(self._slots) // 2, self._count)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def keys(self) -> List[str]:
+        return [self._string(self._record_offset(record), 0) for record in range(self._count)]
+
+    def values(self) -> List[ProductView]:
+        return [ProductView(self, self._record_offset(record)) for record in range(self._count)]
+
+    def items(self) -> List[Tuple[str, ProductView]]:
+        return [(self._string(offset, 0), ProductView(self, offset))
+                for offset in map(self._record_offset, range(self._count))]
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    # --- Stock scans (the manager's stock order and low-stock queries in mapped mode) ---
+
+    def stock_index(self) -> "MappedStockIndex":
+        return MappedStockIndex(self)
+
+    def low_stock(self) -> List[ProductView]:
+        """Products at or below their safety stock threshold, in insertion order, by one scan of the records."""
+        views = []
+        for first, chunk in self._scan():
+            for record in np.flatnonzero(chunk["current_stock"] <= chunk["safety_stock_threshold"]).tolist():
+                views.append(ProductView(self, self._record_offset(first + record)))
+        return views
+
+    def _scan(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """(first record number, records) chunks of every record, as views of the mapping."""
+        count = self._count  # before the mapping: growth swaps in the larger mapping before raising the count
+        records = np.frombuffer(self._map, dtype=self._scan_dtype, count=count, offset=_TABLE_HEADER_SIZE)
+        for first in range(0, count, _SCAN_CHUNK):
+            yield first, records[first:first + _SCAN_CHUNK]
+
+    # --- Lifecycle ---
+
+    def flush(self) -> None:
+        """Writes dirty pages of both files to disk."""
+        with self._lock:
+            self._map.flush()
+            self._index_map.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map.closed:
+                return
+            self._map.flush()
+            self._index_map.flush()
+            self._index = (memoryview(b""), 0)
+            resources = [self._slots, self._map, self._index_map] + self._retired
+            # Views first: a mapping cannot close while a memoryview of it is alive.
+            for view in resources:
+                if isinstance(view, memoryview):
+                    view.release()
+            for mapping in resources:
+                if isinstance(mapping, mmap.mmap):
+                    mapping.close()
+            self._retired = []
+            self._index_file.close()
+            self._file.close()
+
+    def __enter__(self) -> "MappedProductTable":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def nbytes(self) -> int:
+        """Size of both files (mapped, not necessarily resident)."""
+        return len(self._map) + len(self._index_map)
+
+    # --- Records ---
+
+    def _record_offset(self, record: int) -> int:
+        return _TABLE_HEADER_SIZE + record * self.record_size
+
+    def check(self, product: Union[Product, ProductView]) -> None:
+        """Raises ValueError if the product does not fit the record layout (InventoryManager checks before logging)."""
+        self._encode(product)
+
+    def _encode(self, product: Union[Product, ProductView]) -> bytes:
+        fields = []
+        for value, width, name in zip((product.product_id, product.sku, product.name, product.description),
+                                      self.layout.widths, ("product_id", "sku", "name", "description")):
+            if value is None:
+                fields += (_NONE_LENGTH, b"")
+                continue
+            encoded = value.encode("utf-8")
+            if len(encoded) > width:
+                raise ValueError(f"Product {name} is {len(encoded)} bytes, the table's limit is {width}.")
+            fields += (len(encoded), encoded)
+        return self._record.pack(product.price, product.current_stock, product.safety_stock_threshold,
+                                 to_epoch_ns(product.create_at), *fields)
+
+    def _string(self, record_offset: int, field: int) -> Optional[str]:
+        start = record_offset + self._field_offsets[field]
+        (length,) = _LENGTH.unpack_from(self._map, start)
+        if length == _NONE_LENGTH:
+            return None
+        start += _LENGTH.size
+        return self._map[start:start + length].decode("utf-8")
+
+    def _key_bytes(self, record: int, field: int) -> bytes:
+        start = self._record_offset(record) + self._field_offsets[field]
+        (length,) = _LENGTH.unpack_from(self._map, start)
+        start += _LENGTH.size
+        return self._map[start:start + length]
+
+    def _write_header(self) -> None:
+        _TABLE_HEADER.pack_into(self._map, 0, _TABLE_MAGIC, *self.layout.widths, self._count)
+
+    def _reserve(self, records: int) -> None:
+        """Grows the record file (doubling) and the index so `records` records fit; the caller holds the lock."""
+        if records > self._capacity:
+            capacity = max(self._capacity, _MIN_CAPACITY)
+            while capacity < records:
+                capacity *= 2
+            self._file.truncate(_TABLE_HEADER_SIZE + capacity * self.record_size)
+            self._retired.append(self._map)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            self._capacity = capacity
+        if records * 2 > len(self._slots) // 2:
+            self._rebuild_index(records)
+
+    # --- Hash index ---
+
+    def _open_index(self) -> None:
+        if os.path.exists(self.index_path) and os.path.getsize(self.index_path) >= _INDEX_HEADER_SIZE:
+            self._index_file = open(self.index_path, "r+b")
+            index_map = mmap.mmap(self._index_file.fileno(), 0)
+            magic, slot_count, indexed = _INDEX_HEADER.unpack_from(index_map, 0)
+            if (magic == _INDEX_MAGIC and indexed == self._count and self._count * 2 <= slot_count
+                    and len(index_map) == _INDEX_HEADER_SIZE + 16 * slot_count):
+                self._index_map = index_map
+                self._set_index(index_map, slot_count)
+                return
+            # Missing, foreign or behind the records (e.g. a crash between flushes): rebuild from the records.
+            index_map.close()
+            self._index_file.close()
+        self._index_file = None
+        self._rebuild_index(self._count)
+
+    def _set_index(self, index_map: mmap.mmap, slot_count: int) -> None:
+        self._slots = memoryview(index_map)[_INDEX_HEADER_SIZE:].cast("Q")
+        self._index = (self._slots, slot_count - 1)
+
+    def _rebuild_index(self, records: int) -> None:
+        """
+        Builds a fresh index sized for `records` in a temporary file and swaps it in: lock-free readers keep using
+        the previous mapping meanwhile, which stays valid (if incomplete) until close().
+        """
+        slot_count = _MIN_SLOTS
+        while slot_count < records * 2:
+            slot_count *= 2
+        temp_path = self.index_path + ".tmp"
+        index_file = open(temp_path, "w+b")
+        index_file.truncate(_INDEX_HEADER_SIZE + 16 * slot_count)
+        index_map = mmap.mmap(index_file.fileno(), 0)
+        _INDEX_HEADER.pack_into(index_map, 0, _INDEX_MAGIC, slot_count, self._count)
+        slots = memoryview(index_map)[_INDEX_HEADER_SIZE:].cast("Q")
+        for record in range(self._count):
+            for field in (0, 1):
+                self._place(slots, slot_count - 1, self._key_bytes(record, field), record, field)
+        os.replace(temp_path, self.index_path)
+
+        if self._index_map is not None:
+            self._retired += [self._slots, self._index_map]
+            self._index_file.close()
+        self._index_file, self._index_map, self._slots = index_file, index_map, slots
+        self._index = (slots, slot_count - 1)
+
+    def _find(self, key: str, field: int) -> int:
+        """Record number holding `key` in `field` (0 = product_id, 1 = SKU), or -1."""
+        slots, mask = self._index
+        base = field * (mask + 1)
+        encoded = key.encode("utf-8")
+        # Length prefix and bytes compared with one slice of the record.
+        expected = _LENGTH.pack(len(encoded)) + encoded
+        size = len(expected)
+        first_offset = _TABLE_HEADER_SIZE + self._field_offsets[field]
+        record_size = self.record_size
+        mapping = self._map
+        position = zlib.crc32(encoded) & mask
+        while True:
+            entry = slots[base + position]
+            if entry == 0:
+                return -1
+            start = first_offset + (entry - 1) * record_size
+            if mapping[start:start + size] == expected:
+                return entry - 1
+            position = (position + 1) & mask
+
+    def _insert_key(self, key: Optional[str], record: int, field: int) -> None:
+        if key is not None:
+            slots, mask = self._index
+            self._place(slots, mask, key.encode("utf-8"), record, field)
+
+    def _place(self, slots: memoryview, mask: int, encoded: bytes, record: int, field: int) -> None:
+        """Points the slot of `encoded` (its existing one, else the first empty one) at `record`."""
+        base = field * (mask + 1)
+        position = zlib.crc32(encoded) & mask
+        while True:
+            entry = slots[base + position]
+            if entry == 0 or self._key_bytes(entry - 1, field) == encoded:
+                slots[base + position] = record + 1
+                return
+            position = (position + 1) & mask
+
+
+class MappedStockIndex:
+    """
+    The read side of StockIndex (top, bottom, rank, stock_of, stock_levels) over a MappedProductTable's records,
+    so InventoryManager can rank a mapped catalog without an in-memory order index. Nothing is stored and there is
+    nothing to update: every query scans the stock column in chunks of _SCAN_CHUNK records, keeping at most n
+    candidates between chunks. Order and tie-breaking match StockIndex: by (current_stock, product_id).
+    """
+    __slots__ = ("_table",)
+
+    def __init__(self, table: MappedProductTable):
+        self._table = table
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._table
+
+    def stock_of(self, product_id: str) -> Optional[int]:
+        view = self._table.get(product_id)
+        return None if view is None else view.current_stock
+
+    def stock_levels(self) -> Dict[str, int]:
+        stock_levels: Dict[str, int] = {}
+        for _, chunk in self._table._scan():
+            stock_levels.update(zip((product_id.decode("utf-8") for product_id in chunk["product_id"].tolist()),
+                                    chunk["current_stock"].tolist()))
+        return stock_levels
+
+    def top(self, n: int) -> Iterator[str]:
+        """IDs of the n products with the highest stock, highest first."""
+        return iter(self._first(n, largest=True))
+
+    def bottom(self, n: int) -> Iterator[str]:
+        """IDs of the n products with the lowest stock, lowest first."""
+        return iter(self._first(n, largest=False))
+
+    def rank(self, product_id: str) -> Optional[int]:
+        """0-based position of the product from the highest stock, or None if it is unknown."""
+        view = self._table.get(product_id)
+        if view is None:
+            return None
+        stock, key = view.current_stock, product_id.encode("utf-8")
+        above = 0
+        for _, chunk in self._table._scan():
+            column = chunk["current_stock"]
+            tied = chunk["product_id"][np.flatnonzero(column == stock)]
+            above += int(np.count_nonzero(column > stock)) + int(np.count_nonzero(tied > key))
+        return above
+
+    def _first(self, n: int, largest: bool) -> List[str]:
+        """IDs of the first n records in (current_stock, product_id) order, descending if `largest`."""
+        if n <= 0:
+            return []
+        stock = np.empty(0, dtype=np.int64)
+        product_ids = np.empty(0, dtype=self._table._scan_dtype["product_id"])
+        for _, chunk in self._table._scan():
+            column = chunk["current_stock"]
+            if n < len(column):
+                # The chunk's n-th value bounds its candidates; ties with it are kept for the product_id order.
+                kth = len(column) - n if largest else n - 1
+                bound = np.partition(column, kth)[kth]
+                picked = np.flatnonzero(column >= bound if largest else column <= bound)
+            else:
+                picked = np.arange(len(column))
+            stock = np.concatenate((stock, column[picked]))
+            product_ids = np.concatenate((product_ids, chunk["product_id"][picked]))
+            order = np.lexsort((product_ids, stock))
+            order = (order[::-1] if largest else order)[:n]
+            stock, product_ids = stock[order], product_ids[order]
+        return [product_id.decode("utf-8") for product_id in product_ids.tolist()]
@@ -0,0 +1,201 @@
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from oes_core.inventory import InventoryManager
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+DEFAULT_THRESHOLD_EDGES = (0, 10, 50, 100)
+DEFAULT_SKU_PREFIX_LENGTH = 3
+# Below this many rows per worker process, pickling the columns costs more than the pool saves.
+MIN_ROWS_PER_PROCESS = 250_000
+
+
+@dataclass
+class InventorySnapshot:
+    """
+    Point-in-time columnar copy of the product table: one NumPy array per field, row i = one product.
+    Take it with take_snapshot(); reports computed from it never touch the manager again.
+    """
+    product_ids: List[str]
+    skus: np.ndarray            # unicode
+    prices: np.ndarray          # float64
+    stock: np.ndarray           # int64
+    thresholds: np.ndarray      # int64
+    taken_at: datetime = field(default_factory=datetime.now)
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @property
+    def values(self) -> np.ndarray:
+        """Stock valuation of every product, price * current_stock."""
+        return self.prices * self.stock
+
+
+def take_snapshot(manager: InventoryManager) -> InventorySnapshot:
+    """
+    Copies the manager's products into columns. Writers are held off only while the product list and the stock
+    levels are copied (see InventoryManager._capture_stock); building the arrays happens afterwards, unlocked.
+    """
+    taken_at = datetime.now()
+    products, stock = manager._capture_stock()
+    count = len(products)
+    return InventorySnapshot(
+        product_ids=[product.product_id for product in products],
+        skus=np.array([product.sku for product in products], dtype=str),
+        prices=np.fromiter((product.price for product in products), dtype=np.float64, count=count),
+        stock=np.array(stock, dtype=np.int64),
+        thresholds=np.fromiter((product.safety_stock_threshold for product in products), dtype=np.int64,
+                               count=count),
+        taken_at=taken_at,
+    )
+
+
+@dataclass
+class GroupTotals:
+    products: int = 0
+    stock: int = 0
+    value: float = 0.0
+
+
+@dataclass
+class InventoryReport:
+    """
+    Aggregates of one snapshot. Percentile maps are keyed by percentile (0-100); threshold buckets are labelled
+    "low-high" (inclusive) or "low+" for the last one, and keyed in ascending order.
+    """
+    taken_at: datetime
+    products: int
+    total_stock: int
+    total_value: float
+    low_stock: int
+    stock_percentiles: Dict[float, float]
+    value_percentiles: Dict[float, float]
+    by_sku_prefix: Dict[str, GroupTotals]
+    by_threshold: Dict[str, GroupTotals]
+
+
+# Mergeable per-chunk aggregates: (products, stock, value, low stock), per-prefix and per-threshold-bucket
+# (products, stock, value) columns.
+_Partial = Tuple[Tuple[int, int, float, int], Dict[str, np.ndarray], np.ndarray]
+
+
+def _partial_totals(skus: np.ndarray, prices: np.ndarray, stock: np.ndarray, thresholds: np.ndarray,
+                    prefix_length: int, edges: np.ndarray) -> _Partial:
+    """Vectorised sums of one chunk of rows; runs in the calling process or in a pool worker."""
+    values = prices * stock
+    totals = (len(stock), int(stock.sum()), float(values.sum()), int(np.count_nonzero(stock <= thresholds)))
+
+    prefixes, groups = _prefix_groups(skus, prefix_length)
+    by_prefix = {prefix: column for prefix, column in zip(prefixes, np.stack((
+        np.bincount(groups, minlength=len(prefixes)).astype(np.float64),
+        np.bincount(groups, weights=stock, minlength=len(prefixes)),
+        np.bincount(groups, weights=values, minlength=len(prefixes)),
+    ), axis=1))}
+
+    buckets = np.searchsorted(edges, thresholds, side="right") - 1
+    by_threshold = np.stack((
+        np.bincount(buckets, minlength=len(edges)).astype(np.float64),
+        np.bincount(buckets, weights=stock, minlength=len(edges)),
+        np.bincount(buckets, weights=values, minlength=len(edges)),
+    ), axis=1)
+    return totals, by_prefix, by_threshold
+
+
+def _prefix_groups(skus: np.ndarray, prefix_length: int) -> Tuple[List[str], np.ndarray]:
+    """Distinct SKU prefixes (sorted) and the group number of every row."""
+    # astype() to a shorter unicode dtype truncates every SKU to its prefix in one call.
+    prefixes = np.ascontiguousarray(skus.astype(f"<U{prefix_length}"))
+    if prefix_length > 3 or len(prefixes) == 0:
+        distinct, groups = np.unique(prefixes, return_inverse=True)
+        return distinct.tolist(), groups
+    # Up to 3 code points (21 bits each) pack into one uint64 key: sorting integers is several times faster than
+    # sorting strings, and the packed order is the string order (shorter prefixes are zero-padded).
+    code_points = prefixes.view(np.uint32).reshape(len(prefixes), -1).astype(np.uint64)
+    keys = np.zeros(len(prefixes), dtype=np.uint64)
+    for position in range(code_points.shape[1]):
+        keys = (keys << np.uint64(21)) | code_points[:, position]
+    _, first_rows, groups = np.unique(keys, return_index=True, return_inverse=True)
+    return prefixes[first_rows].tolist(), groups
+
+
+def _bucket_labels(edges: Sequence[int]) -> List[str]:
+    return [f"{low}-{high - 1}" for low, high in zip(edges, edges[1:])] + [f"{edges[-1]}+"]
+
+
+def _group_totals(column: np.ndarray) -> GroupTotals:
+    return GroupTotals(products=int(column[0]), stock=int(column[1]), value=float(column[2]))
+
+
+def build_report(snapshot: InventorySnapshot, sku_prefix_length: int = DEFAULT_SKU_PREFIX_LENGTH,
+                 threshold_edges: Sequence[int] = DEFAULT_THRESHOLD_EDGES,
+                 percentiles: Sequence[float] = DEFAULT_PERCENTILES, processes: Optional[int] = None,
+                 min_rows_per_process: int = MIN_ROWS_PER_PROCESS, mp_context=None) -> InventoryReport:
+    """
+    Computes an InventoryReport from a snapshot with NumPy.
+
+    Sums and group-bys are computed per chunk and merged, so for large snapshots the chunks are spread over up to
+    `processes` worker processes (default: one per CPU, and only with at least `min_rows_per_process` rows each).
+    Percentiles need all rows and are computed in the calling process (np.percentile, O(N) selection).
+    """
+    if sku_prefix_length <= 0:
+        raise ValueError("SKU prefix length must be positive.")
+    edges = np.asarray(threshold_edges, dtype=np.int64)
+    if len(edges) == 0 or edges[0] != 0 or np.any(np.diff(edges) <= 0):
+        raise ValueError("Threshold edges must start at 0 and be strictly increasing.")
+
+    rows = len(snapshot)
+    processes = processes or multiprocessing.cpu_count()
+    chunks = max(1, min(processes, rows // max(min_rows_per_process, 1)))
+    columns = (snapshot.skus, snapshot.prices, snapshot.stock, snapshot.thresholds)
+    if chunks == 1:
+        partials = [_partial_totals(*columns, sku_prefix_length, edges)]
+    else:
+        bounds = np.linspace(0, rows, chunks + 1).astype(int)
+        context = mp_context if mp_context is not None else multiprocessing.get_context()
+        with ProcessPoolExecutor(max_workers=chunks, mp_context=context) as pool:
+            partials = list(pool.map(_partial_totals,
+                                     *zip(*[[column[start:stop] for column in columns]
+                                            for start, stop in zip(bounds, bounds[1:])]),
+                                     [sku_prefix_length] * chunks, [edges] * chunks))
+
+    products = total_stock = low_stock = 0
+    total_value = 0.0
+    by_prefix: Dict[str, np.ndarray] = {}
+    by_threshold = np.zeros((len(edges), 3))
+    for (chunk_products, chunk_stock, chunk_value, chunk_low), chunk_prefixes, chunk_thresholds in partials:
+        products += chunk_products
+        total_stock += chunk_stock
+        total_value += chunk_value
+        low_stock += chunk_low
+        for prefix, column in chunk_prefixes.items():
+            by_prefix[prefix] = by_prefix[prefix] + column if prefix in by_prefix else column
+        by_threshold += chunk_thresholds
+
+    values = snapshot.values
+    quantiles = np.asarray(percentiles, dtype=np.float64)
+    stock_percentiles = np.percentile(snapshot.stock, quantiles) if rows else np.full(len(quantiles), np.nan)
+    value_percentiles = np.percentile(values, quantiles) if rows else np.full(len(quantiles), np.nan)
+    return InventoryReport(
+        taken_at=snapshot.taken_at,
+        products=products,
+        total_stock=total_stock,
+        total_value=total_value,
+        low_stock=low_stock,
+        stock_percentiles=dict(zip(quantiles.tolist(), stock_percentiles.tolist())),
+        value_percentiles=dict(zip(quantiles.tolist(), value_percentiles.tolist())),
+        by_sku_prefix={prefix: _group_totals(by_prefix[prefix]) for prefix in sorted(by_prefix)},
+        by_threshold={label: _group_totals(column) for label, column in zip(_bucket_labels(edges.tolist()),
+                                                                             by_threshold)},
+    )
+
+
+def inventory_report(manager: InventoryManager, **options) -> InventoryReport:
+    """take_snapshot() then build_report(); `options` are passed to build_report."""
+    return build_report(take_snapshot(manager), **options)
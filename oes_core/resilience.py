@@ -0,0 +1,365 @@
+
+import functools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Exceptions that count as an upstream failure (breaker, limiter) and are retried. A ValueError is the upstream
+# answering "invalid input": the call worked, so it is neither a failure nor retried.
+DEFAULT_FAILURES: Tuple[Type[BaseException], ...] = (RuntimeError, OSError)
+# Threads that run hedged / deadline-bound attempts; matches the default status-check concurrency.
+DEFAULT_POOL_WORKERS = 32
+
+
+class RejectedCallError(RuntimeError):
+    """The call was refused locally, without reaching the upstream; never retried."""
+
+
+class CircuitOpenError(RejectedCallError):
+    pass
+
+
+class ConcurrencyLimitError(RejectedCallError):
+    pass
+
+
+class DeadlineExceededError(RuntimeError, TimeoutError):
+    """The call's deadline passed; a RuntimeError like the other failures and a TimeoutError like batch timeouts."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    CLOSED: calls go through; `failure_threshold` failures in a row open the circuit.
+    OPEN: calls fail fast with CircuitOpenError for `recovery_timeout` seconds.
+    HALF_OPEN: up to `half_open_max_calls` probe calls go through (the rest are rejected); a success closes the
+    circuit, a failure opens it again for another `recovery_timeout`.
+    """
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        if failure_threshold <= 0 or half_open_max_calls <= 0:
+            raise ValueError("Failure threshold and half-open calls must be positive.")
+        if recovery_timeout < 0:
+            raise ValueError("Recovery timeout cannot be negative.")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._probes = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def acquire(self) -> bool:
+        """Admits a call or raises CircuitOpenError; returns whether the call is a half-open probe."""
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError("Circuit open: upstream calls are failing.")
+                self._state = HALF_OPEN
+                self._probes = 0
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError("Circuit half-open: waiting for probe calls.")
+                self._probes += 1
+                return True
+            return False
+
+    def release(self, probe: bool, failed: Optional[bool]) -> None:
+        """Records the outcome of an admitted call; `failed` None means it never reached the upstream."""
+        with self._lock:
+            if probe and self._state == HALF_OPEN:
+                self._probes -= 1
+            if failed is None:
+                return
+            if failed:
+                self.failures += 1
+                self._consecutive_failures += 1
+                if self._state == HALF_OPEN or (self._state == CLOSED and
+                                                self._consecutive_failures >= self.failure_threshold):
+                    self._state = OPEN
+                    self._opened_at = self._clock()
+                    self._consecutive_failures = 0
+                    self.opened += 1
+            else:
+                self.successes += 1
+                self._consecutive_failures = 0
+                if self._state == HALF_OPEN:
+                    self._state = CLOSED
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "successes": self.successes, "failures": self.failures,
+                "rejected": self.rejected, "opened": self.opened}
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on concurrent upstream calls.
+
+    Each success under `latency_target` seconds (any success when there is no target) raises the limit by
+    1 / limit, i.e. about +1 per limit's worth of calls, but only while at least half the limit is in use; each
+    failure or slow call multiplies it by `backoff_ratio`. The limit stays within [min_limit, max_limit].
+    A caller over the limit waits up to `max_wait` seconds (None: until its deadline, or indefinitely), then
+    gets ConcurrencyLimitError.
+    """
+    def __init__(self, initial_limit: int = 16, min_limit: int = 1, max_limit: int = 256,
+                 latency_target: Optional[float] = None, backoff_ratio: float = 0.9,
+                 max_wait: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if not 0 < min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 0 < min_limit <= initial_limit <= max_limit.")
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("Backoff ratio must be between 0 and 1.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.max_wait = max_wait
+        self._clock = clock
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self.admitted = 0
+        self.rejected = 0
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, deadline: Optional[float] = None, wait: bool = True) -> None:
+        """Takes a slot, waiting as allowed by `max_wait`, the absolute `deadline` (clock time) and `wait`."""
+        with self._condition:
+            if self._in_flight >= int(self._limit) and wait:
+                timeout = self.max_wait
+                if deadline is not None:
+                    remaining = max(0.0, deadline - self._clock())
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                self._condition.wait_for(lambda: self._in_flight < int(self._limit), timeout)
+            if self._in_flight >= int(self._limit):
+                self.rejected += 1
+                raise ConcurrencyLimitError(f"Concurrency limit {int(self._limit)} reached.")
+            self._in_flight += 1
+            self.admitted += 1
+
+    def release(self, latency: float, failed: Optional[bool]) -> None:
+        """Frees the slot and adapts the limit; `failed` None (never reached the upstream) leaves it unchanged."""
+        with self._condition:
+            in_flight = self._in_flight
+            self._in_flight -= 1
+            if failed is None:
+                pass
+            elif failed or (self.latency_target is not None and latency > self.latency_target):
+                self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                self.decreases += 1
+            elif 2 * in_flight >= self._limit and self._limit < self.max_limit:
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+                self.increases += 1
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"limit": self.limit, "in_flight": self._in_flight, "admitted": self.admitted,
+                "rejected": self.rejected, "increases": self.increases, "decreases": self.decreases}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    - max_attempts: attempts per call, the first one included; failures are retried after `backoff` seconds,
+      growing by `backoff_multiplier` up to `max_backoff`.
+    - hedge_after: seconds after which a still-running attempt gets a parallel duplicate (at most `max_hedges`,
+      one more every `hedge_after`); the first success wins and the others are abandoned. Hedges never wait for
+      a concurrency slot.
+    - deadline: seconds for the whole call, retries and hedges included; past it the call raises
+      DeadlineExceededError (a running upstream call is abandoned, not interrupted).
+    """
+    max_attempts: int = 1
+    backoff: float = 0.05
+    backoff_multiplier: float = 2.0
+    max_backoff: float = 1.0
+    hedge_after: Optional[float] = None
+    max_hedges: int = 1
+    deadline: Optional[float] = None
+
+    def __post_init__(self):
+        if self.max_attempts <= 0:
+            raise ValueError("Retry attempts must be positive.")
+        if self.backoff < 0 or self.max_backoff < 0:
+            raise ValueError("Retry backoff cannot be negative.")
+        if self.hedge_after is not None and (self.hedge_after < 0 or self.max_hedges <= 0):
+            raise ValueError("Hedge delay cannot be negative and max hedges must be positive.")
+        if self.deadline is not None and self.deadline <= 0:
+            raise ValueError("Deadline must be positive.")
+
+
+class ResilientCaller:
+    """
+    Resilience layer for upstream calls: circuit breaker, adaptive concurrency limit, retries, hedging and a deadline,
+    each optional. Pass it to InventoryManager(resilience=...) to guard the oes_core.utils calls made by
+    check_and_process_item and perform_batch_status_check (behind the status cache, so cache hits bypass it).
+
+    Every attempt (hedges included) goes through the breaker, then the limiter, and reports its outcome to both.
+    Local rejections raise RejectedCallError subclasses (RuntimeErrors, so check_and_process_item reports them as
+    "ERROR_RUNTIME") and are never retried. Attempts run on the caller's thread unless the policy hedges or has a
+    deadline; then they run on a shared pool of `pool_workers` threads so the caller can stop waiting.
+    """
+    def __init__(self, breaker: Optional[CircuitBreaker] = None, limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 retry: Optional[RetryPolicy] = None, failures: Tuple[Type[BaseException], ...] = DEFAULT_FAILURES,
+                 pool_workers: int = DEFAULT_POOL_WORKERS, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.breaker = breaker
+        self.limiter = limiter
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.failures = failures
+        self.pool_workers = pool_workers
+        self._clock = clock
+        self._sleep = sleep
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadlines_exceeded = 0
+
+    def wrap(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args):
+            return self.call(func, *args)
+        return wrapper
+
+    def call(self, func: Callable, *args) -> Any:
+        policy = self.retry
+        self._count("calls")
+        deadline = None if policy.deadline is None else self._clock() + policy.deadline
+        pooled = deadline is not None or policy.hedge_after is not None
+        delay = policy.backoff
+        attempt = 1
+        while True:
+            try:
+                if pooled:
+                    return self._pooled_attempt(func, args, deadline)
+                return self._attempt(func, args, deadline)
+            except (RejectedCallError, DeadlineExceededError):
+                raise
+            except self.failures:
+                if attempt >= policy.max_attempts:
+                    raise
+                if deadline is not None and self._clock() + delay >= deadline:
+                    raise
+            attempt += 1
+            self._count("retries")
+            self._sleep(delay)
+            delay = min(delay * policy.backoff_multiplier, policy.max_backoff)
+
+    def _attempt(self, func: Callable, args: tuple, deadline: Optional[float], wait: bool = True) -> Any:
+        breaker, limiter = self.breaker, self.limiter
+        probe = breaker.acquire() if breaker is not None else False
+        if limiter is not None:
+            try:
+                limiter.acquire(deadline, wait)
+            except ConcurrencyLimitError:
+                if breaker is not None:
+                    breaker.release(probe, None)
+                raise
+        start = self._clock()
+        failed = True
+        try:
+            result = func(*args)
+            failed = False
+            return result
+        except BaseException as error:
+            failed = isinstance(error, self.failures)
+            raise
+        finally:
+            if limiter is not None:
+                limiter.release(self._clock() - start, failed)
+            if breaker is not None:
+                breaker.release(probe, failed)
+
+    def _pooled_attempt(self, func: Callable, args: tuple, deadline: Optional[float]) -> Any:
+        policy = self.retry
+        pool = self._ensure_pool()
+        primary = pool.submit(self._attempt, func, args, deadline)
+        running = {primary}
+        errors = []
+        hedges = 0
+        next_hedge_at = None if policy.hedge_after is None else self._clock() + policy.hedge_after
+        while running:
+            now = self._clock()
+            timeouts = [moment - now for moment in (deadline, next_hedge_at) if moment is not None]
+            done, running = wait(running, timeout=max(0.0, min(timeouts)) if timeouts else None,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    return future.result()
+                errors.append(future.exception())
+            if not running:
+                break
+            now = self._clock()
+            if deadline is not None and now >= deadline:
+                self._count("deadlines_exceeded")
+                raise DeadlineExceededError(f"Upstream call exceeded its {policy.deadline}s deadline.")
+            if next_hedge_at is not None and now >= next_hedge_at:
+                hedges += 1
+                self._count("hedges")
+                running.add(pool.submit(self._attempt, func, args, deadline, False))
+                next_hedge_at = now + policy.hedge_after if hedges < policy.max_hedges else None
+        # Every attempt failed: report an upstream error rather than a hedge's local rejection.
+        raise next((error for error in errors if not isinstance(error, RejectedCallError)), errors[0])
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.pool_workers,
+                                                    thread_name_prefix="oes-resilience")
+        return self._pool
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of the caller, plus "breaker" and "limiter" stats when configured."""
+        stats: Dict[str, Any] = {"calls": self.calls, "retries": self.retries, "hedges": self.hedges,
+                                 "hedge_wins": self.hedge_wins, "deadlines_exceeded": self.deadlines_exceeded}
+        if self.breaker is not None:
+            stats["breaker"] = self.breaker.stats()
+        if self.limiter is not None:
+            stats["limiter"] = self.limiter.stats()
+        return stats
+
+    def close(self) -> None:
+        """Stops the attempt pool; abandoned upstream calls are not waited for."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
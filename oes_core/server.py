@@ -0,0 +1,296 @@
+
+import argparse
+import json
+import logging
+import math
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from oes_core.inventory import BatchUpdateResult, InventoryManager
+from oes_core.models import Product, Transaction, check_transaction, product_to_dict
+from oes_core.persistence import RECORD_TRANSACTION, decode_record, encode_transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+# Request bodies above this size are refused (413) before being read.
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+JSON_CONTENT_TYPE = "application/json"
+# Binary batch body: concatenated <u32 length><WAL transaction payload> frames (oes_core.persistence encoding,
+# LSN ignored). Skips JSON parsing; the server still checks every decoded record like Transaction() would.
+BINARY_BATCH_CONTENT_TYPE = "application/x-oes-transactions"
+_BINARY_LENGTH = struct.Struct("<I")
+
+
+def encode_transaction_batch(transactions: List[Transaction]) -> bytes:
+    """Body of a binary POST /transactions request."""
+    parts = []
+    for transaction in transactions:
+        payload = encode_transaction(0, transaction)
+        parts.append(_BINARY_LENGTH.pack(len(payload)))
+        parts.append(payload)
+    return b"".join(parts)
+
+
+def decode_transaction_batch(body: bytes) -> List[Transaction]:
+    view = memoryview(body)
+    transactions = []
+    offset = 0
+    while offset < len(view):
+        if offset + _BINARY_LENGTH.size > len(view):
+            raise ValueError("Truncated binary transaction batch.")
+        (length,) = _BINARY_LENGTH.unpack_from(view, offset)
+        offset += _BINARY_LENGTH.size
+        if offset + length > len(view):
+            raise ValueError("Truncated binary transaction batch.")
+        try:
+            record_type, _, transaction = decode_record(view[offset:offset + length])
+        except (struct.error, IndexError, UnicodeDecodeError) as error:
+            raise ValueError(f"Malformed binary transaction record: {error}") from error
+        if record_type != RECORD_TRANSACTION:
+            raise ValueError(f"Unexpected record type {record_type} in binary transaction batch.")
+        # Decoded records bypass Transaction.__post_init__: check them here, before anything is applied.
+        check_transaction(transaction.quantity_change, transaction.transaction_type)
+        transactions.append(transaction)
+        offset += length
+    return transactions
+
+
+# The change feed publishes added products in the same shape.
+product_to_json = product_to_dict
+
+
+_MISSING = object()
+
+
+def _field(data: Dict[str, Any], kind: str, name: str, types: Tuple[type, ...], expected: str,
+           default: Any = _MISSING) -> Any:
+    """data[name] if it is one of `types` (never a bool), else ValueError; `default` when the field is absent."""
+    if name not in data:
+        if default is _MISSING:
+            raise ValueError(f"{kind} is missing field '{name}'.")
+        return default
+    value = data[name]
+    if isinstance(value, bool) or not isinstance(value, types):
+        raise ValueError(f"{kind} field '{name}' must be {expected}, got {type(value).__name__}.")
+    return value
+
+
+def product_from_json(data: Any) -> Product:
+    if not isinstance(data, dict):
+        raise ValueError("Product must be a JSON object.")
+    price = _field(data, "Product", "price", (int, float), "a number")
+    # json.loads accepts NaN and Infinity, which would pass Product's positive-price check.
+    if not math.isfinite(price):
+        raise ValueError(f"Product field 'price' must be a finite number, got {price}.")
+    return Product(sku=_field(data, "Product", "sku", (str,), "a string"),
+                   name=_field(data, "Product", "name", (str,), "a string"),
+                   price=price,
+                   description=_field(data, "Product", "description", (str, type(None)), "a string or null", None),
+                   current_stock=_field(data, "Product", "current_stock", (int,), "an integer", 0),
+                   safety_stock_threshold=_field(data, "Product", "safety_stock_threshold", (int,), "an integer", 10))
+
+
+def transaction_from_json(data: Any, product_id: Optional[str] = None) -> Transaction:
+    if not isinstance(data, dict):
+        raise ValueError("Transaction must be a JSON object.")
+    return Transaction(product_id=product_id if product_id is not None else _field(
+                           data, "Transaction", "product_id", (str,), "a string"),
+                       quantity_change=_field(data, "Transaction", "quantity_change", (int,), "an integer"),
+                       transaction_type=_field(data, "Transaction", "transaction_type", (str,), "a string"))
+
+
+def batch_result_to_json(result: BatchUpdateResult) -> Dict[str, Any]:
+    return {"applied": result.applied, "alerts": result.alerts, "below_threshold": result.below_threshold,
+            "capped": result.capped}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class InventoryRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON routes over the server's InventoryManager:
+      GET  /health                    -> {"status": "ok", "products": N}
+      POST /products                  product object -> 201 {"product_id"}; list of them -> 201 {"product_ids"}
+      GET  /products/<id>             -> product, 404 if unknown
+      POST /products/<id>/stock       {"quantity_change", "transaction_type"} -> {"product_id", "current_stock"}
+      POST /transactions              list of {"product_id", "quantity_change", "transaction_type"}, or a binary
+                                      batch (BINARY_BATCH_CONTENT_TYPE) -> apply_transactions summary, 404 if it
+                                      names an unknown product (nothing is applied)
+      GET  /top?n=10                  -> products with the highest stock
+    Invalid input (the manager's ValueError) is a 400 with {"error": message}. HTTP/1.1: connections are kept
+    alive, and pipelined requests are answered in order.
+    """
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as two writes; with Nagle on, the body waits for the client's delayed ACK (~40 ms).
+    disable_nagle_algorithm = True
+    server: "InventoryHTTPServer"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            body = self._read_body()
+            status, payload = self._route(method, parts, parse_qs(url.query), body)
+        except _HTTPError as error:
+            status, payload = error.status, {"error": str(error)}
+        except ValueError as error:
+            status, payload = 400, {"error": str(error)}
+        except Exception:
+            logger.exception("Unhandled error serving %s %s", method, self.path)
+            status, payload = 500, {"error": "Internal server error."}
+        self._send_json(status, payload)
+
+    def _read_body(self) -> bytes:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body's extent is unknown, so the stream cannot be resynchronised: answer, then drop the connection.
+            self.close_connection = True
+            raise ValueError("Content-Length must be a non-negative integer.")
+        if length > MAX_BODY_BYTES:
+            # The unread body would be parsed as the next request: drop the connection after answering.
+            self.close_connection = True
+            raise _HTTPError(413, f"Request body exceeds {MAX_BODY_BYTES} bytes.")
+        return self.rfile.read(length) if length else b""
+
+    def _json_body(self, body: bytes) -> Any:
+        try:
+            return json.loads(body)
+        except (json.JSONDecodeError, UnicodeDecodeError) as error:
+            raise ValueError(f"Invalid JSON body: {error}") from None
+
+    def _route(self, method: str, parts: List[str], query: Dict[str, List[str]],
+               body: bytes) -> Tuple[int, Any]:
+        manager = self.server.manager
+        if method == "GET" and parts == ["health"]:
+            return 200, {"status": "ok", "products": len(manager._products)}
+        if parts == ["products"] and method == "POST":
+            data = self._json_body(body)
+            if isinstance(data, list):
+                products = [product_from_json(item) for item in data]
+                manager.add_products(products)
+                return 201, {"product_ids": [product.product_id for product in products]}
+            product = product_from_json(data)
+            manager.add_product(product)
+            return 201, {"product_id": product.product_id}
+        if len(parts) == 2 and parts[0] == "products" and method == "GET":
+            product = manager.get_product(parts[1])
+            if product is None:
+                raise _HTTPError(404, f"Product ID {parts[1]} not found.")
+            return 200, product_to_json(product)
+        if len(parts) == 3 and parts[0] == "products" and parts[2] == "stock" and method == "POST":
+            if manager.get_product(parts[1]) is None:
+                raise _HTTPError(404, f"Product ID {parts[1]} not found.")
+            manager.update_stock(transaction_from_json(self._json_body(body), product_id=parts[1]))
+            return 200, {"product_id": parts[1], "current_stock": manager.get_product(parts[1]).current_stock}
+        if parts == ["transactions"] and method == "POST":
+            content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip()
+            if content_type == BINARY_BATCH_CONTENT_TYPE:
+                transactions = decode_transaction_batch(body)
+            else:
+                data = self._json_body(body)
+                if not isinstance(data, list):
+                    raise ValueError("Transaction batch must be a JSON list.")
+                transactions = [transaction_from_json(item) for item in data]
+            missing = next((transaction.product_id for transaction in transactions
+                            if manager.get_product(transaction.product_id) is None), None)
+            if missing is not None:
+                raise _HTTPError(404, f"Product ID {missing} not found.")
+            return 200, batch_result_to_json(manager.apply_transactions(transactions))
+        if parts == ["top"] and method == "GET":
+            try:
+                n = int(query.get("n", ["10"])[0])
+            except ValueError:
+                raise ValueError("Query parameter n must be an integer.") from None
+            return 200, [product_to_json(product) for product in manager.get_top_n_products_by_stock(n)]
+        raise _HTTPError(404, f"No route for {method} {self.path}.")
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class InventoryHTTPServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server (one thread per connection) over an InventoryManager, which must be thread-safe;
+    the default is a new InventoryManager(thread_safe=True). Port 0 picks a free port, see `address`.
+    """
+    daemon_threads = True
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 manager: Optional[InventoryManager] = None):
+        self.manager = manager if manager is not None else InventoryManager(thread_safe=True)
+        super().__init__((host, port), InventoryRequestHandler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server_address[:2]
+
+    def start(self) -> "InventoryHTTPServer":
+        """Serves from a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, name="oes-inventory-http", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self) -> "InventoryHTTPServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve an in-memory inventory over HTTP/JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    server = InventoryHTTPServer(args.host, args.port)
+    print(f"Serving inventory on http://{server.address[0]}:{server.address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+
+import heapq
+import multiprocessing
+import threading
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from oes_core.history import TRANSACTION_TYPE_CODES, restore_transaction, to_epoch_ns
+from oes_core.inventory import BatchUpdateResult, InventoryManager
+from oes_core.models import Product, Transaction, check_quantity
+
+# Manager methods a shard worker will run on request; anything else is rejected.
+_SHARD_METHODS = frozenset({
+    "add_product", "get_product", "update_stock", "list_all_products",
+    "get_top_n_products_by_stock", "get_bottom_n_products_by_stock",
+})
+
+# Transactions travel to the workers as columns (lists of str / int, array('q') timestamps): pickling a few
+# flat containers is several times cheaper than pickling one Transaction object per row.
+_TransactionColumns = Tuple[List[str], List[str], List[int], bytes, array]
+
+
+def shard_of(product_id: str, shards: int) -> int:
+    """Stable product -> shard routing (crc32, unlike hash(), is the same in every process and every run)."""
+    return zlib.crc32(product_id.encode("utf-8")) % shards
+
+
+def _encode_transactions(transactions: List[Transaction]) -> _TransactionColumns:
+    return (
+        [transaction.transaction_id for transaction in transactions],
+        [transaction.product_id for transaction in transactions],
+        [transaction.quantity_change for transaction in transactions],
+        bytes(TRANSACTION_TYPE_CODES[transaction.transaction_type] for transaction in transactions),
+        array('q', [to_epoch_ns(transaction.timestamp) for transaction in transactions]),
+    )
+
+
+def _decode_transactions(columns: _TransactionColumns) -> List[Transaction]:
+    return [restore_transaction(*row) for row in zip(*columns)]
+
+
+def _shard_worker(connection, thread_safe: bool) -> None:
+    """
+    Worker process loop: owns one InventoryManager and serves (command, payload) requests until it receives None.
+    Every request gets exactly one ("ok", result) or ("error", exception) reply.
+    """
+    manager = InventoryManager(thread_safe=thread_safe)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            connection.close()
+            return
+
+        command, payload = request
+        try:
+            if command == "apply_transactions":
+                result: Any = manager.apply_transactions(_decode_transactions(payload))
+            elif command == "missing_products":
+                result = [product_id for product_id in payload if manager.get_product(product_id) is None]
+            elif command in _SHARD_METHODS:
+                result = getattr(manager, command)(*payload)
+            else:
+                raise ValueError(f"Unknown shard command: {command}")
+        except Exception as error:
+            connection.send(("error", error))
+        else:
+            connection.send(("ok", result))
+
+
+class ShardedInventoryManager:
+    """
+    InventoryManager partitioned across worker processes, one shard per process, to scale past one core (GIL).
+
+    Products are routed to a shard by a stable hash of product_id. The single-product API (add_product,
+    get_product, update_stock) is one round trip to the owning shard; apply_transactions splits a batch per shard
+    and sends every sub-batch before waiting for any reply, so the shards apply them in parallel. Cross-shard
+    queries (top-n / bottom-n by stock, list_all_products) scatter to every shard and merge the per-shard results.
+
+    Products returned by queries are copies: mutating them does not change the inventory, use update_stock.
+    SKUs are unique across all shards, as in InventoryManager: the manager keeps the SKU -> product ID registry
+    and claims a product's SKU before sending it to its shard. Usable as a context manager or through close().
+    """
+    def __init__(self, shards: Optional[int] = None, thread_safe: bool = False, mp_context=None):
+        if shards is None:
+            shards = multiprocessing.cpu_count()
+        if shards < 1:
+            raise ValueError("Number of shards must be positive.")
+        context = mp_context if mp_context is not None else multiprocessing.get_context()
+        self._connections = []
+        self._processes = []
+        # One lock per shard connection, so the manager can be shared by threads; taken in shard order.
+        self._connection_locks = [threading.Lock() for _ in range(shards)]
+        # SKU -> product ID of every product added through this manager (shards only see their own SKUs).
+        self._sku_owners: Dict[str, str] = {}
+        self._sku_lock = threading.Lock()
+        for index in range(shards):
+            parent_end, child_end = context.Pipe()
+            process = context.Process(target=_shard_worker, args=(child_end, thread_safe),
+                                      name=f"oes-shard-{index}", daemon=True)
+            process.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+        self._closed = False
+
+    @property
+    def shards(self) -> int:
+        return len(self._connections)
+
+    def shard_of(self, product_id: str) -> int:
+        return shard_of(product_id, len(self._connections))
+
+    # --- InventoryManager API ---
+
+    def add_product(self, product: Product) -> None:
+        with self._sku_lock:
+            if product.sku in self._sku_owners:
+                raise ValueError(f"Product with SKU {product.sku} already exists.")
+            self._sku_owners[product.sku] = product.product_id
+        try:
+            self._call(self.shard_of(product.product_id), "add_product", (product,))
+        except BaseException:
+            with self._sku_lock:
+                del self._sku_owners[product.sku]
+            raise
+
+    def get_product(self, product_id: str) -> Optional[Product]:
+        return self._call(self.shard_of(product_id), "get_product", (product_id,))
+
+    def update_stock(self, transaction: Transaction) -> None:
+        self._call(self.shard_of(transaction.product_id), "update_stock", (transaction,))
+
+    def apply_transactions(self, transactions: Iterable[Transaction]) -> BatchUpdateResult:
+        """
+        Routes a batch to its shards in bulk. Each shard applies its part atomically (see
+        InventoryManager.apply_transactions). Quantities are checked and every product is looked up on its shard
+        before any shard applies anything, so an invalid batch leaves every shard untouched. Products are never
+        removed, so a product found in the first round is still there in the second.
+        """
+        per_shard: List[List[Transaction]] = [[] for _ in self._connections]
+        shards = len(self._connections)
+        for transaction in transactions:
+            check_quantity(transaction.quantity_change)
+            per_shard[shard_of(transaction.product_id, shards)].append(transaction)
+
+        lookups = {index: ("missing_products", list(dict.fromkeys(transaction.product_id for transaction in batch)))
+                   for index, batch in enumerate(per_shard) if batch}
+        missing = [product_id for shard_missing in self._scatter(lookups) for product_id in shard_missing]
+        if missing:
+            raise ValueError(
+                f"Product ID {missing[0]} not found for transaction ({len(missing)} unknown product(s) in batch)."
+            )
+
+        requests = {index: ("apply_transactions", _encode_transactions(batch))
+                    for index, batch in enumerate(per_shard) if batch}
+        result = BatchUpdateResult(applied=0)
+        for shard_result in self._scatter(requests):
+            result.applied += shard_result.applied
+            result.alerts.update(shard_result.alerts)
+            result.below_threshold.extend(shard_result.below_threshold)
+            result.capped.update(shard_result.capped)
+        return result
+
+    def list_all_products(self) -> List[Product]:
+        requests = {index: ("list_all_products", ()) for index in range(len(self._connections))}
+        return [product for shard_products in self._scatter(requests) for product in shard_products]
+
+    def get_top_n_products_by_stock(self, n: int) -> List[Product]:
+        """Merges each shard's top n: the global top n is always among them."""
+        if n <= 0:
+            return []
+        requests = {index: ("get_top_n_products_by_stock", (n,)) for index in range(len(self._connections))}
+        return heapq.nlargest(n, (product for shard_products in self._scatter(requests) for product in shard_products),
+                              key=lambda product: (product.current_stock, product.product_id))
+
+    def get_bottom_n_products_by_stock(self, n: int) -> List[Product]:
+        if n <= 0:
+            return []
+        requests = {index: ("get_bottom_n_products_by_stock", (n,)) for index in range(len(self._connections))}
+        return heapq.nsmallest(n, (product for shard_products in self._scatter(requests) for product in shard_products),
+                               key=lambda product: (product.current_stock, product.product_id))
+
+    # --- Lifecycle ---
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stops every worker process; the inventory held by the shards is discarded."""
+        if self._closed:
+            return
+        self._closed = True
+        for lock, connection in zip(self._connection_locks, self._connections):
+            with lock:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                connection.close()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    def __enter__(self) -> "ShardedInventoryManager":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # --- Transport ---
+
+    def _call(self, shard: int, command: str, payload: Any) -> Any:
+        return self._scatter({shard: (command, payload)})[0]
+
+    def _scatter(self, requests: dict) -> List[Any]:
+        """
+        Sends every request first and only then collects the replies (in shard order), so the shards work
+        concurrently. Raises the first shard error after every reply has been read, keeping the pipes in sync.
+        """
+        if self._closed:
+            raise ValueError("Sharded inventory manager is closed.")
+        shards = sorted(requests)
+        locks = [self._connection_locks[shard] for shard in shards]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for shard in shards:
+                self._connections[shard].send(requests[shard])
+            replies = [self._connections[shard].recv() for shard in shards]
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+        for status, value in replies:
+            if status == "error":
+                raise value
+        return [value for _, value in replies]
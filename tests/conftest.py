@@ -2,7 +2,7 @@ import pytest
 import tempfile
 import uuid
 import os
-from typing import Dict
+from typing import Any, Callable, Dict, List
 from oes_core.models import Product, Transaction
 from oes_core.inventory import InventoryManager
 
@@ -38,6 +38,50 @@ def base_product(product_data: Dict) -> Product:
     # Use the product_data fixture
     return Product(**product_data)
 
+@pytest.fixture(scope="function")
+def catalog() -> Callable[..., List[Product]]:
+    """
+    Returns a factory of product lists: catalog(count, prefix) makes products with SKU <prefix><i> and name "Item <i>".
+    Keyword arguments override the Product fields; a callable is called with i.
+    """
+    def make(count: int, prefix: str = "ITEM", **fields: Any) -> List[Product]:
+        defaults = {"price": 1.0, "current_stock": 10, "safety_stock_threshold": 0}
+        products = []
+        for i in range(count):
+            values = {"name": f"Item {i}", **defaults, **fields}
+            products.append(Product(sku=f"{prefix}{i}",
+                                    **{name: value(i) if callable(value) else value for name, value in values.items()}))
+        return products
+    return make
+
+@pytest.fixture(scope="function")
+def inbound() -> Callable[..., Transaction]:
+    """Returns a factory of INBOUND transactions: inbound(product_id, quantity=1)."""
+    def make(product_id: str, quantity: int = 1) -> Transaction:
+        return Transaction(product_id=product_id, quantity_change=quantity, transaction_type=Transaction.TYPE_INBOUND)
+    return make
+
+@pytest.fixture(scope="function")
+def outbound() -> Callable[..., Transaction]:
+    """Returns a factory of OUTBOUND transactions: outbound(product_id, quantity=1) removes `quantity` units."""
+    def make(product_id: str, quantity: int = 1) -> Transaction:
+        return Transaction(product_id=product_id, quantity_change=-quantity,
+                           transaction_type=Transaction.TYPE_OUTBOUND)
+    return make
+
+class FakeClock:
+    """Manual clock for the components that take a `clock` callable: returns `now`, which tests set."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture(scope="function")
+def fake_clock() -> FakeClock:
+    """Returns a FakeClock starting at 0.0."""
+    return FakeClock()
+
 #  --- 3. Inventory Manager Fixtures ---
 @pytest.fixture(scope="module")
 def shared_inventory_manager() -> InventoryManager:
@@ -0,0 +1,88 @@
+import json
+import threading
+from oes_core.alerts import ALERT_LOW, ALERT_RECOVERED, AlertEngine, FileSink
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+
+def _adjust(product: Product, quantity: int) -> Transaction:
+    return Transaction(product_id=product.product_id, quantity_change=quantity,
+                       transaction_type=Transaction.TYPE_ADJUSTMENT)
+
+def test_alerts_are_edge_triggered_with_hysteresis_and_debounce(mocker, fake_clock):
+    """A product hovering at its threshold raises one alert, not one per update."""
+    batches = []
+    engine = AlertEngine(sinks=[batches.append], debounce_seconds=60, hysteresis=5, clock=fake_clock)
+    manager = InventoryManager(alert_engine=engine)
+    mock_warning = mocker.patch("oes_core.inventory.logger.warning")
+    product = Product(sku="HOV1", name="Hover", price=1, current_stock=20, safety_stock_threshold=10)
+    manager.add_product(product)
+
+    for quantity in [-10, 1, -1, 2, -2, 1, -1]:   # 10, 11, 10, 12, 10, 11, 10: inside the hysteresis band
+        manager.update_stock(_adjust(product, quantity))
+    engine.flush()
+    assert [(a.kind, a.current_stock) for batch in batches for a in batch] == [(ALERT_LOW, 10)]
+    mock_warning.assert_not_called()
+
+    # 16 recovered, 8 debounced, 18 recovered silently (its LOW was never sent), 9 low again after the window.
+    for quantity, now in [(6, 1), (-8, 2), (10, 61), (-9, 62)]:
+        fake_clock.now = now
+        manager.update_stock(_adjust(product, quantity))
+        engine.flush()
+
+    kinds = [a.kind for batch in batches for a in batch]
+    assert kinds == [ALERT_LOW, ALERT_RECOVERED, ALERT_LOW]
+    assert engine.stats()["suppressed"] == 1
+
+def test_debounced_low_is_not_followed_by_a_recovery(fake_clock):
+    """low -> recover -> low (debounced) -> recover: sinks see one LOW and one RECOVERED."""
+    batches = []
+    engine = AlertEngine(sinks=[batches.append], debounce_seconds=60, clock=fake_clock)
+    for now, stock in [(0, 5), (1, 50), (2, 5), (3, 50)]:
+        fake_clock.now = now
+        engine.observe("p", stock, 10, "P")
+        engine.flush()
+
+    assert [(a.kind, a.current_stock) for batch in batches for a in batch] == [(ALERT_LOW, 5), (ALERT_RECOVERED, 50)]
+    assert engine.stats()["suppressed"] == 1
+
+def test_alert_queue_coalesces_per_product_and_drops_when_full():
+    """One pending alert per product; new products are dropped while the queue is full."""
+    engine = AlertEngine(sinks=[lambda batch: None], debounce_seconds=0, max_queue=2)
+
+    engine.observe("a", 0, 5, "A")
+    engine.observe("a", 9, 5, "A")   # recovered replaces the pending LOW alert
+    engine.observe("b", 0, 5, "B")
+    engine.observe("c", 0, 5, "C")   # queue full
+
+    stats = engine.stats()
+    assert (stats["queued"], stats["coalesced"], stats["dropped"]) == (2, 1, 1)
+    engine.flush()
+    assert engine.stats()["dispatched"] == 2
+
+def test_background_worker_dispatches_batches_to_file_sink(tmp_path):
+    """The worker delivers batches off the caller's thread, and stop() drains the queue and closes sinks."""
+    path = tmp_path / "alerts.jsonl"
+    threads = set()
+    engine = AlertEngine(sinks=[FileSink(str(path)), lambda batch: threads.add(threading.current_thread().name)],
+                         batch_size=10, flush_interval=0.01)
+    with engine:
+        for i in range(25):
+            engine.observe(f"p{i}", 0, 1, f"Product {i}")
+        assert engine.flush(timeout=5)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["product_id"] for line in lines] == [f"p{i}" for i in range(25)]
+    assert threads == {"oes-alert-dispatcher"}
+
+def test_failing_sink_does_not_stop_other_sinks():
+    received = []
+
+    def broken(batch):
+        raise RuntimeError("sink down")
+
+    engine = AlertEngine(sinks=[broken, received.extend])
+    engine.observe("x", 0, 1)
+    engine.flush()
+
+    assert len(received) == 1
+    assert engine.stats()["sink_errors"] == 1
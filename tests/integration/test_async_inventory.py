@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+import pytest
+from oes_core.async_inventory import AsyncInventoryManager
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product
+from oes_core.persistence import InventoryStore
+
+def test_concurrent_updates_are_coalesced_into_micro_batches(base_product: Product, inbound):
+    async def scenario():
+        async with AsyncInventoryManager(max_batch=50) as inventory:
+            await inventory.add_product(base_product)
+            await asyncio.gather(*(inventory.update_stock(inbound(base_product.product_id)) for _ in range(200)))
+            return inventory.stats(), await inventory.get_product(base_product.product_id)
+
+    stats, product = asyncio.run(scenario())
+    assert product.current_stock == 200
+    assert stats["batched_transactions"] == 200
+    assert stats["largest_batch"] == 50 and stats["batches"] == 4
+
+def test_failed_transaction_only_fails_its_own_caller(base_product: Product, inbound):
+    async def scenario():
+        async with AsyncInventoryManager() as inventory:
+            await inventory.add_product(base_product)
+            results = await asyncio.gather(inventory.update_stock(inbound(base_product.product_id, 5)),
+                                           inventory.update_stock(inbound("missing-product")),
+                                           return_exceptions=True)
+            return results, inventory.stats()["fallbacks"]
+
+    (ok, error), fallbacks = asyncio.run(scenario())
+    assert ok is None and isinstance(error, ValueError) and fallbacks == 1
+    assert base_product.current_stock == 5
+
+def test_batch_failure_after_validation_is_not_replayed(base_product: Product, mocker, inbound):
+    """An error applying a validated batch (here a failing write-ahead log) fails every caller, with no replay."""
+    manager = InventoryManager()
+    manager.add_product(base_product)
+    mocker.patch.object(manager, "apply_transactions", side_effect=OSError("disk full"))
+    update_stock = mocker.spy(manager, "update_stock")
+
+    async def scenario():
+        async with AsyncInventoryManager(manager) as inventory:
+            results = await asyncio.gather(*(inventory.update_stock(inbound(base_product.product_id))
+                                             for _ in range(3)),
+                                           inventory.update_stock(inbound("missing-product")),
+                                           return_exceptions=True)
+            return results, inventory.stats()["fallbacks"]
+
+    results, fallbacks = asyncio.run(scenario())
+    assert [type(result) for result in results] == [OSError, OSError, OSError, ValueError]
+    assert fallbacks == 1 and update_stock.call_count == 0
+    assert base_product.current_stock == 0
+
+def test_logged_batches_run_off_the_loop(base_product: Product, tmp_path, mocker, inbound):
+    """With a store attached, a write waiting on the WAL leaves the loop free; rejections use the manager's check."""
+    store = InventoryStore(str(tmp_path), wait_for_fsync=True)
+    manager = store.recover(InventoryManager(thread_safe=True))
+    log_transactions = store.log_transactions
+    writer_threads = []
+
+    def slow_log(transactions):
+        writer_threads.append(threading.current_thread())
+        time.sleep(0.05)
+        log_transactions(transactions)
+    mocker.patch.object(store, "log_transactions", side_effect=slow_log)
+    validate = mocker.spy(manager, "validate_transaction")
+
+    async def scenario():
+        async with AsyncInventoryManager(manager) as inventory:
+            await inventory.add_product(base_product)
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+            ticker = asyncio.get_running_loop().create_task(tick())
+            results = await asyncio.gather(inventory.update_stock(inbound(base_product.product_id, 3)),
+                                           inventory.update_stock(inbound("missing-product")),
+                                           return_exceptions=True)
+            ticker.cancel()
+            return results, ticks
+
+    (ok, error), ticks = asyncio.run(scenario())
+    store.close()
+    assert ok is None and isinstance(error, ValueError) and validate.call_count == 2
+    assert writer_threads and all(thread is not threading.main_thread() for thread in writer_threads)
+    assert ticks >= 3 and base_product.current_stock == 3
+
+def test_full_queue_applies_backpressure(base_product: Product, inbound):
+    """With room for 4 transactions, producers wait for the batcher instead of queueing without bound."""
+    async def scenario():
+        async with AsyncInventoryManager(max_batch=2, max_queue=4, batch_window=0.01) as inventory:
+            await inventory.add_product(base_product)
+            peak = 0
+
+            async def watch():
+                nonlocal peak
+                while True:
+                    peak = max(peak, inventory.stats()["queued"])
+                    await asyncio.sleep(0)
+            watcher = asyncio.ensure_future(watch())
+            await asyncio.gather(*(inventory.update_stock(inbound(base_product.product_id)) for _ in range(20)))
+            watcher.cancel()
+            return peak
+
+    assert asyncio.run(scenario()) <= 4
+    assert base_product.current_stock == 20
+
+def test_blocking_status_calls_run_off_the_loop(mocker):
+    """A slow blocking check_status does not stall other coroutines on the loop."""
+    loop_threads = set()
+    mocker.patch("oes_core.utils.check_status",
+                 side_effect=lambda product_id: loop_threads.add(threading.get_ident()) or time.sleep(0.2) or 200)
+
+    async def scenario():
+        async with AsyncInventoryManager(executor_workers=4) as inventory:
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                for _ in range(10):
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            outcomes = await asyncio.gather(*(inventory.check_and_process_item(f"P{i}") for i in range(4)), tick())
+            return outcomes[:4], ticks
+
+    outcomes, ticks = asyncio.run(scenario())
+    assert outcomes == ["PROCESSED"] * 4 and ticks == 10
+    assert threading.get_ident() not in loop_threads
+
+def test_timed_out_status_calls_do_not_hold_the_shared_executor(mocker):
+    """Threads stuck in timed-out batch calls are not the facade's: later calls still get its workers."""
+    release = threading.Event()
+    mocker.patch("oes_core.utils.get_external_status", side_effect=lambda item: release.wait(5) and 200)
+    mocker.patch("oes_core.utils.check_status", return_value=200)
+
+    async def scenario():
+        async with AsyncInventoryManager(executor_workers=2) as inventory:
+            try:
+                timed_out = await inventory.perform_batch_status_check(["A", "B"], timeout=0.05)
+                outcome = await asyncio.wait_for(inventory.check_and_process_item("P1"), 1.0)
+            finally:
+                release.set()
+            return timed_out, outcome
+
+    timed_out, outcome = asyncio.run(scenario())
+    assert all(isinstance(result, TimeoutError) for result in timed_out)
+    assert outcome == "PROCESSED"
+
+def test_native_async_status_client_is_awaited(mocker):
+    async def check_status(product_id):
+        await asyncio.sleep(0)
+        if product_id == "BAD":
+            raise RuntimeError("down")
+        return 400
+    mocker.patch("oes_core.utils.check_status", new=check_status)
+
+    async def scenario():
+        async with AsyncInventoryManager(InventoryManager()) as inventory:
+            return [await inventory.check_and_process_item(item) for item in ("OK", "BAD")]
+
+    assert asyncio.run(scenario()) == ["FAILED_VALIDATION", "ERROR_RUNTIME"]
+
+def test_closed_manager_rejects_updates(base_product: Product, inbound):
+    async def scenario():
+        inventory = AsyncInventoryManager()
+        await inventory.aclose()
+        await inventory.update_stock(inbound(base_product.product_id))
+
+    with pytest.raises(ValueError, match="closed"):
+        asyncio.run(scenario())
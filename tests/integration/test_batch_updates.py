@@ -0,0 +1,114 @@
+import random
+import uuid
+import pytest
+from typing import List
+from oes_core.models import Product, Transaction
+from oes_core.inventory import InventoryManager
+
+def _make_manager(seed: int):
+    rng = random.Random(seed)
+    manager = InventoryManager()
+    products = [
+        Product(sku=f"BATCH{i}", name=f"Batch Item {i}", price=2.5,
+                current_stock=rng.randrange(0, 30), safety_stock_threshold=rng.randrange(0, 15))
+        for i in range(20)
+    ]
+    for p in products:
+        manager.add_product(p)
+    return manager, products
+
+def _random_transactions(seed: int, product_ids: List[str], count: int) -> List[Transaction]:
+    rng = random.Random(seed)
+    transactions = []
+    for _ in range(count):
+        kind = rng.choice([Transaction.TYPE_INBOUND, Transaction.TYPE_OUTBOUND, Transaction.TYPE_ADJUSTMENT])
+        if kind == Transaction.TYPE_INBOUND:
+            quantity = rng.randrange(1, 20)
+        elif kind == Transaction.TYPE_OUTBOUND:
+            quantity = -rng.randrange(1, 25)
+        else:
+            quantity = rng.randrange(-10, 10)
+        transactions.append(Transaction(product_id=rng.choice(product_ids), quantity_change=quantity,
+                                        transaction_type=kind))
+    return transactions
+
+@pytest.mark.parametrize("seed", [3, 11, 2024])
+def test_apply_transactions_matches_sequential_update_stock(seed: int):
+    """Bulk application must produce the same stock, capping and history as sequential update_stock."""
+    sequential, seq_products = _make_manager(seed)
+    batched, batch_products = _make_manager(seed)
+    transactions = _random_transactions(seed, [p.product_id for p in seq_products], 500)
+    # Products are regenerated with fresh IDs, so remap the batch onto the second manager.
+    id_map = {a.product_id: b.product_id for a, b in zip(seq_products, batch_products)}
+
+    expected_alerts = {}
+    for tx in transactions:
+        sequential.update_stock(tx)
+        product = sequential.get_product(tx.product_id)
+        if product.current_stock <= product.safety_stock_threshold:
+            expected_alerts[id_map[tx.product_id]] = expected_alerts.get(id_map[tx.product_id], 0) + 1
+
+    remapped = [Transaction(product_id=id_map[tx.product_id], quantity_change=tx.quantity_change,
+                            transaction_type=tx.transaction_type) for tx in transactions]
+    result = batched.apply_transactions(iter(remapped))
+
+    assert [p.current_stock for p in seq_products] == [p.current_stock for p in batch_products]
+    assert result.applied == 500
+    assert result.alerts == expected_alerts
+    assert sorted(result.below_threshold) == sorted(
+        p.product_id for p in batch_products if p.current_stock <= p.safety_stock_threshold
+    )
+    assert len(batched._transaction_history) == 500
+    assert [p.sku for p in batched.get_top_n_products_by_stock(5)] == \
+        [p.sku for p in sorted(batch_products, key=lambda p: (p.current_stock, p.product_id), reverse=True)[:5]]
+
+def test_apply_transactions_caps_outbound_but_not_adjustment(empty_inventory_manager: InventoryManager):
+    """Test capping is path dependent, exactly as in sequential update_stock."""
+    manager = empty_inventory_manager
+    product = Product(sku="CAP01", name="Capped", price=1.0, current_stock=5, safety_stock_threshold=0)
+    manager.add_product(product)
+
+    result = manager.apply_transactions([
+        Transaction(product_id=product.product_id, quantity_change=-10, transaction_type=Transaction.TYPE_OUTBOUND),
+        Transaction(product_id=product.product_id, quantity_change=10, transaction_type=Transaction.TYPE_INBOUND),
+        Transaction(product_id=product.product_id, quantity_change=-15, transaction_type=Transaction.TYPE_ADJUSTMENT),
+    ])
+
+    # 5 - 10 -> capped to 0, + 10 -> 10, - 15 adjustment is not capped -> -5
+    assert product.current_stock == -5
+    assert result.capped == {product.product_id: 1}
+    assert result.alerts == {product.product_id: 2}
+
+def test_apply_transactions_is_all_or_nothing(empty_inventory_manager: InventoryManager, base_product: Product):
+    """An unknown product ID must reject the whole batch before any stock changes."""
+    manager = empty_inventory_manager
+    manager.add_product(base_product)
+
+    with pytest.raises(ValueError, match="not found for transaction"):
+        manager.apply_transactions([
+            Transaction(product_id=base_product.product_id, quantity_change=5,
+                        transaction_type=Transaction.TYPE_INBOUND),
+            Transaction(product_id=str(uuid.uuid4()), quantity_change=5, transaction_type=Transaction.TYPE_INBOUND),
+        ])
+
+    assert base_product.current_stock == 0
+    assert len(manager._transaction_history) == 0
+
+@pytest.mark.parametrize("quantity", [3_000_000_000, 2.5])
+def test_unstorable_quantity_leaves_inventory_untouched(empty_inventory_manager: InventoryManager,
+                                                       base_product: Product, quantity):
+    """A quantity the int32 history column cannot hold is rejected before the stock, version or index change."""
+    manager = empty_inventory_manager
+    manager.add_product(base_product)
+    bad = Transaction.prevalidated(product_id=base_product.product_id, quantity_change=quantity,
+                                   transaction_type=Transaction.TYPE_INBOUND)
+    good = Transaction(product_id=base_product.product_id, quantity_change=1, transaction_type=Transaction.TYPE_INBOUND)
+
+    with pytest.raises(ValueError, match="Quantity change"):
+        manager.update_stock(bad)
+    with pytest.raises(ValueError, match="Quantity change"):
+        manager.apply_transactions([good, bad])
+
+    assert (base_product.current_stock, base_product.version) == (0, 0)
+    assert len(manager._transaction_history) == 0
+    assert manager.get_top_n_products_by_stock(1)[0].current_stock == 0
@@ -0,0 +1,119 @@
+import threading
+import pytest
+from oes_core.changes import CHANGE_ADD, CHANGE_STOCK, ChangeFeed, ChangeFeedGapError, coalesce
+from oes_core.inventory import InventoryManager
+from oes_core.models import Transaction
+from oes_core.persistence import InventoryStore
+from oes_core.server import product_to_json
+
+def test_every_mutation_is_published_in_order(inbound, outbound, catalog):
+    feed = ChangeFeed()
+    manager = InventoryManager(change_feed=feed)
+    first, second = catalog(2, "CDC")
+    manager.add_product(first)
+    manager.add_products([second])
+    manager.update_stock(Transaction(product_id=first.product_id, quantity_change=-15,
+                                     transaction_type=Transaction.TYPE_OUTBOUND))
+    manager.apply_transactions([inbound(second.product_id, 2), inbound(second.product_id, 3)])
+    manager.undo_last(2)
+
+    events = feed.subscribe(from_sequence=1).poll()
+    assert [event.sequence for event in events] == [1, 2, 3, 4, 5]
+    assert [(event.kind, event.product_id, event.delta, event.current_stock) for event in events] == [
+        (CHANGE_ADD, first.product_id, 10, 10),
+        (CHANGE_ADD, second.product_id, 10, 10),
+        (CHANGE_STOCK, first.product_id, -10, 0),  # the applied delta: the outbound was capped at 0
+        (CHANGE_STOCK, second.product_id, 5, 15),  # one event per product per batch
+        (CHANGE_STOCK, second.product_id, -5, 10),
+    ]
+    assert events[0].product["sku"] == first.sku and events[3].version == second.version - 1
+
+def test_added_products_are_published_as_the_http_api_serves_them(catalog):
+    feed = ChangeFeed()
+    manager = InventoryManager(change_feed=feed)
+    product = catalog(1, "CDC", description="Described")[0]
+    manager.add_product(product)
+    assert feed.subscribe(from_sequence=1).poll()[0].product == product_to_json(product)
+
+def test_coalesced_polls_merge_deltas_per_product(inbound, catalog):
+    feed = ChangeFeed()
+    manager = InventoryManager(change_feed=feed)
+    products = catalog(2, "CDC")
+    subscription = feed.subscribe(coalesced=True)
+    manager.add_products(products)
+    for _ in range(3):
+        manager.update_stock(inbound(products[0].product_id, 2))
+    manager.update_stock(inbound(products[1].product_id))
+
+    events = subscription.poll()
+    assert [(event.kind, event.delta, event.current_stock) for event in events] == [
+        (CHANGE_ADD, 16, 16), (CHANGE_ADD, 11, 11)]
+    assert subscription.position == feed.last_sequence + 1 and subscription.poll() == []
+    assert coalesce([]) == []
+
+def test_resume_from_saved_position_and_gap_detection(inbound, catalog):
+    feed = ChangeFeed(capacity=4)
+    manager = InventoryManager(change_feed=feed)
+    product = catalog(1, "CDC")[0]
+    manager.add_product(product)
+    subscription = feed.subscribe(from_sequence=1, timeout=0)
+    assert next(iter(subscription)).kind == CHANGE_ADD
+    saved = subscription.position
+
+    manager.update_stock(inbound(product.product_id))
+    resumed = feed.subscribe(from_sequence=saved, timeout=0)
+    assert [event.sequence for event in resumed] == [2]
+
+    for _ in range(5):
+        manager.update_stock(inbound(product.product_id))
+    with pytest.raises(ChangeFeedGapError):
+        feed.subscribe(from_sequence=saved).poll()
+    with pytest.raises(ChangeFeedGapError):
+        feed.subscribe(from_sequence=feed.last_sequence + 2).poll()
+    assert feed.stats() == {"published": 7, "first_sequence": 4, "retained": 4}
+
+def test_listener_receives_changes_from_concurrent_writers(inbound, catalog):
+    feed = ChangeFeed()
+    manager = InventoryManager(thread_safe=True, change_feed=feed)
+    products = catalog(4, "CDC")
+    manager.add_products(products)
+    received = {}
+
+    def on_changes(events):
+        for event in events:
+            received[event.product_id] = received.get(event.product_id, 0) + event.delta
+
+    with feed.listen(on_changes, from_sequence=feed.last_sequence + 1, interval=0.01) as listener:
+        def writer(product):
+            for _ in range(200):
+                manager.update_stock(inbound(product.product_id))
+        threads = [threading.Thread(target=writer, args=(product,)) for product in products]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert received == {product.product_id: 200 for product in products}
+    assert listener.callback_errors == 0 and listener.delivered <= 800
+
+def test_iterator_ends_when_feed_closes(catalog):
+    feed = ChangeFeed()
+    manager = InventoryManager(change_feed=feed)
+    subscription = feed.subscribe()
+    manager.add_products(catalog(3, "CDC"))
+    feed.close()
+    assert len(list(subscription)) == 3
+
+def test_recovery_does_not_republish(tmp_path, inbound, catalog):
+    store = InventoryStore(str(tmp_path))
+    manager = store.recover()
+    product = catalog(1, "CDC")[0]
+    manager.add_product(product)
+    manager.update_stock(inbound(product.product_id))
+    store.close()
+
+    feed = ChangeFeed()
+    recovered = InventoryStore(str(tmp_path)).recover(InventoryManager(change_feed=feed))
+    assert recovered.get_product(product.product_id).current_stock == 11
+    assert feed.last_sequence == 0
+    recovered.update_stock(inbound(product.product_id))
+    assert [event.current_stock for event in feed.subscribe(from_sequence=1).poll()] == [12]
@@ -0,0 +1,86 @@
+
+import asyncio
+import threading
+import time
+from oes_core.inventory import InventoryManager
+
+def test_batch_status_check_preserves_input_order(mocker, empty_inventory_manager: InventoryManager):
+    """Later items finish first, but results must still line up with the input."""
+    def slower_for_earlier_items(item):
+        time.sleep(0.05 * (5 - int(item)))
+        return f"status-{item}"
+
+    mocker.patch('oes_core.utils.get_external_status', side_effect=slower_for_earlier_items)
+
+    results = empty_inventory_manager.perform_batch_status_check(["0", "1", "2", "3", "4"])
+
+    assert results == ["status-0", "status-1", "status-2", "status-3", "status-4"]
+
+def test_batch_status_check_latency_scales_with_rounds(mocker, empty_inventory_manager: InventoryManager):
+    """40 calls of 50 ms on 20 workers take about two rounds, not the 2 s sum."""
+    mock_checker = mocker.patch('oes_core.utils.get_external_status', side_effect=lambda item: time.sleep(0.05) or 200)
+
+    start_time = time.time()
+    results = empty_inventory_manager.perform_batch_status_check([f"Item{i}" for i in range(40)], max_workers=20)
+    elapsed_time = time.time() - start_time
+
+    assert mock_checker.call_count == 40
+    assert results == [200] * 40
+    assert elapsed_time < 0.5
+
+def test_batch_status_check_reports_errors_and_timeouts(mocker, empty_inventory_manager: InventoryManager):
+    """A failing call and a slow call are reported in place without failing the batch."""
+    def side_effect(item):
+        if item == "BAD":
+            raise RuntimeError("Upstream unavailable.")
+        if item == "SLOW":
+            time.sleep(0.5)
+        return 200
+
+    mocker.patch('oes_core.utils.get_external_status', side_effect=side_effect)
+
+    start_time = time.time()
+    results = empty_inventory_manager.perform_batch_status_check(["OK", "BAD", "SLOW"], timeout=0.1)
+    elapsed_time = time.time() - start_time
+
+    assert results[0] == 200
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], TimeoutError)
+    assert elapsed_time < 0.4
+
+def test_async_batch_status_check_respects_concurrency_limit(mocker, empty_inventory_manager: InventoryManager):
+    """The asyncio variant never runs more than `concurrency` blocking calls at once."""
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    def tracked_call(item):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.02)
+        with lock:
+            in_flight["now"] -= 1
+        return item.lower()
+
+    mocker.patch('oes_core.utils.get_external_status', side_effect=tracked_call)
+    items = [f"ITEM{i}" for i in range(30)]
+
+    results = asyncio.run(empty_inventory_manager.perform_batch_status_check_async(items, concurrency=5))
+
+    assert results == [item.lower() for item in items]
+    assert in_flight["peak"] <= 5
+
+def test_async_batch_status_check_awaits_native_async_client(mocker, empty_inventory_manager: InventoryManager):
+    """A coroutine status client is awaited directly, and slow calls time out individually."""
+    async def native_client(item):
+        await asyncio.sleep(0.3 if item == "SLOW" else 0.01)
+        return 200
+
+    mocker.patch('oes_core.utils.get_external_status', new=native_client)
+
+    results = asyncio.run(
+        empty_inventory_manager.perform_batch_status_check_async(["A", "SLOW", "B"], timeout=0.1)
+    )
+
+    assert results[0] == 200 and results[2] == 200
+    assert isinstance(results[1], TimeoutError)
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from oes_core.forecasting import DemandForecaster
+from oes_core.inventory import InventoryManager
+from oes_core.models import Transaction
+from oes_core.persistence import InventoryStore
+
+def test_manager_keeps_the_forecast_current_through_updates_batches_and_undo(inbound, outbound, catalog):
+    manager = InventoryManager(forecaster=DemandForecaster())
+    slow, fast, idle = catalog(3, "FC", current_stock=1_000)
+    manager.add_products([slow, fast, idle])
+    manager.update_stock(outbound(slow.product_id, 2))
+    manager.apply_transactions([outbound(fast.product_id, 10) for _ in range(100)])
+    manager.update_stock(Transaction(product_id=idle.product_id, quantity_change=5,
+                                     transaction_type=Transaction.TYPE_INBOUND))
+
+    forecast = manager.demand_forecast()
+    by_product = dict(zip(forecast.product_ids, forecast.velocity.tolist()))
+    assert by_product[fast.product_id] == pytest.approx(500 * by_product[slow.product_id], rel=1e-6)
+    assert by_product[idle.product_id] == 0.0
+    assert forecast.stock.tolist() == [998, 0, 1_005]
+    assert forecast.below_reorder_point() == [fast.product_id]
+
+    manager.undo_last(101)  # the batch and the inbound
+    forecast = manager.demand_forecast()
+    assert forecast.velocity[1] == 0.0 and forecast.velocity[0] > 0
+    assert forecast.below_reorder_point() == []
+
+def test_forecast_is_rebuilt_by_recovery(tmp_path, outbound, catalog):
+    store = InventoryStore(str(tmp_path))
+    manager = store.recover(InventoryManager(forecaster=DemandForecaster()))
+    products = catalog(2, "FC", current_stock=1_000)
+    manager.add_products(products)
+    manager.apply_transactions([outbound(product.product_id, 3) for product in products for _ in range(4)])
+    manager.update_stock(outbound(products[0].product_id, 1))
+    now = datetime.now() + timedelta(days=1)
+    expected = manager.demand_forecast(now=now)
+    store.close()
+
+    recovered = InventoryStore(str(tmp_path)).recover(InventoryManager(forecaster=DemandForecaster()))
+    forecast = recovered.demand_forecast(now=now)
+    assert forecast.product_ids == expected.product_ids
+    assert np.allclose(forecast.velocity, expected.velocity)
+
+def test_demand_forecast_requires_a_forecaster():
+    with pytest.raises(ValueError):
+        InventoryManager().demand_forecast()
@@ -0,0 +1,150 @@
+import http.client
+import socket
+import pytest
+from oes_core.client import InventoryClient, InventoryClientError
+from oes_core.inventory import InventoryManager
+from oes_core.models import Product, Transaction
+from oes_core.server import BINARY_BATCH_CONTENT_TYPE, InventoryHTTPServer, decode_transaction_batch, \
+    encode_transaction_batch
+
+@pytest.fixture
+def service():
+    manager = InventoryManager(thread_safe=True)
+    with InventoryHTTPServer(port=0, manager=manager) as server:
+        with InventoryClient(*server.address, pool_size=2) as client:
+            yield manager, client
+
+def test_json_routes_round_trip(service, base_product: Product):
+    manager, client = service
+    product_id = client.add_product(base_product)
+    assert manager.get_product(product_id).sku == base_product.sku
+
+    assert client.update_stock(product_id, 30, Transaction.TYPE_INBOUND) == 30
+    assert client.update_stock(product_id, -50, Transaction.TYPE_OUTBOUND) == 0
+    info = client.get_product(product_id)
+    assert info["current_stock"] == 0 and info["safety_stock_threshold"] == 10
+    assert client.get_product("missing-product") is None
+
+    other_ids = client.add_products([Product(sku=f"HTTP{i}", name="Other", price=1.0, current_stock=i)
+                                     for i in range(1, 4)])
+    assert [product["product_id"] for product in client.top_n(2)] == [other_ids[2], other_ids[1]]
+
+def test_errors_map_to_status_codes(service, base_product: Product):
+    _, client = service
+    client.add_product(base_product)
+    with pytest.raises(InventoryClientError) as duplicate:
+        client.add_product(Product(sku=base_product.sku, name="Duplicate", price=1.0))
+    assert duplicate.value.status == 400
+    with pytest.raises(InventoryClientError) as missing:
+        client.update_stock("missing-product", 1, Transaction.TYPE_INBOUND)
+    assert missing.value.status == 404
+    with pytest.raises(ValueError, match="Invalid transaction type"):
+        client.update_stock(client.top_n(1)[0]["product_id"], 1, "BOGUS")
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_batch_update_is_applied_atomically(service, base_product: Product, binary: bool, inbound):
+    manager, client = service
+    product_id = client.add_product(base_product)
+    result = client.apply_transactions([inbound(product_id, 2)] * 5, binary=binary)
+    assert result["applied"] == 5 and manager.get_product(product_id).current_stock == 10
+
+    with pytest.raises(InventoryClientError) as missing:
+        client.apply_transactions([inbound(product_id), inbound("missing-product")], binary=binary)
+    assert missing.value.status == 404  # like the single-product stock route
+    assert manager.get_product(product_id).current_stock == 10
+
+def test_pipelined_calls_share_one_connection(service, base_product: Product, inbound):
+    manager, client = service
+    product_id = client.add_product(base_product)
+    transactions = [inbound(product_id) for _ in range(2_500)]
+    result = client.apply_transactions_pipelined(transactions, chunk_size=300)
+    assert result["applied"] == 2_500 and manager.get_product(product_id).current_stock == 2_500
+
+    got, updated, top = client.pipeline([
+        ("GET", f"/products/{product_id}", None),
+        ("POST", f"/products/{product_id}/stock", {"quantity_change": 1, "transaction_type": Transaction.TYPE_INBOUND}),
+        ("GET", "/top?n=1", None),
+    ])
+    assert got["current_stock"] == 2_500 and updated["current_stock"] == 2_501
+    assert top[0]["product_id"] == product_id
+    assert client.connections_opened == 1
+
+def test_stale_pooled_connection_is_replaced(service, base_product: Product):
+    _, client = service
+    product_id = client.add_product(base_product)
+    # The pooled connection dies while idle: the next call fails to send on it and retries on a new one.
+    client._idle[0].sock.shutdown(socket.SHUT_RDWR)
+    assert client.get_product(product_id)["product_id"] == product_id
+    assert client.connections_opened == 2
+
+def test_stale_pooled_connection_is_not_retried_for_writes(service, base_product: Product):
+    """A POST may have been applied before its connection dropped, so it is never resent."""
+    manager, client = service
+    product_id = client.add_product(base_product)
+    client._idle[0].sock.shutdown(socket.SHUT_RDWR)
+    with pytest.raises(ConnectionError):
+        client.update_stock(product_id, 5, Transaction.TYPE_INBOUND)
+    assert client.connections_opened == 1 and manager.get_product(product_id).current_stock == 0
+
+def test_binary_batch_codec_and_malformed_body(service, base_product: Product, inbound):
+    _, client = service
+    transactions = [inbound(base_product.product_id, quantity) for quantity in (1, 2, 3)]
+    decoded = decode_transaction_batch(encode_transaction_batch(transactions))
+    assert [(t.transaction_id, t.quantity_change) for t in decoded] == \
+        [(t.transaction_id, t.quantity_change) for t in transactions]
+
+    connection = http.client.HTTPConnection(client.host, client.port)
+    connection.request("POST", "/transactions", body=b"\x09\x00\x00\x00abc",
+                       headers={"Content-Type": BINARY_BATCH_CONTENT_TYPE})
+    response = connection.getresponse()
+    assert response.status == 400 and b"Truncated" in response.read()
+    connection.close()
+
+def _raw_post(client: InventoryClient, path: str, body: bytes, headers: dict):
+    connection = http.client.HTTPConnection(client.host, client.port)
+    try:
+        connection.request("POST", path, body=body, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def test_invalid_binary_record_is_rejected_before_applying(service, base_product: Product, inbound):
+    manager, client = service
+    product_id = client.add_product(base_product)
+    client.update_stock(product_id, 5, Transaction.TYPE_INBOUND)
+    # prevalidated skips the sign check the server must still apply to decoded records.
+    body = encode_transaction_batch([inbound(product_id),
+                                     Transaction.prevalidated(product_id, -1000, Transaction.TYPE_INBOUND)])
+    status, payload = _raw_post(client, "/transactions", body, {"Content-Type": BINARY_BATCH_CONTENT_TYPE})
+    assert status == 400 and b"INBOUND transaction must have a positive quantity change" in payload
+    assert manager.get_product(product_id).current_stock == 5
+
+@pytest.mark.parametrize("path_suffix, body", [
+    ("/products", b'{"sku": 123, "name": "Item", "price": 1.0}'),
+    ("/products", b'{"sku": "ABC1", "name": ["Item"], "price": 1.0}'),
+    ("/products", b'{"sku": "ABC1", "name": "Item", "price": "1.0"}'),
+    ("/products", b'{"sku": "ABC1", "name": "Item", "price": 1.0, "current_stock": 1.5}'),
+    ("/stock", b'{"quantity_change": 1.5, "transaction_type": "INBOUND"}'),
+    ("/stock", b'{"quantity_change": 1, "transaction_type": ["INBOUND"]}'),
+    ("/transactions", b'[{"product_id": ["x"], "quantity_change": 1, "transaction_type": "INBOUND"}]'),
+])
+def test_mistyped_json_fields_are_rejected(service, base_product: Product, path_suffix: str, body: bytes):
+    manager, client = service
+    product_id = client.add_product(base_product)
+    path = {"/stock": f"/products/{product_id}/stock"}.get(path_suffix, path_suffix)
+    status, payload = _raw_post(client, path, body, {"Content-Type": "application/json"})
+    assert status == 400 and b"must be" in payload
+    assert len(manager._products) == 1 and manager.get_product(product_id).current_stock == 0
+
+@pytest.mark.parametrize("price", [b"NaN", b"Infinity", b"-Infinity", b"true"])
+def test_non_finite_and_boolean_prices_are_rejected(service, price: bytes):
+    manager, client = service
+    body = b'{"sku": "ABC1", "name": "Item", "price": ' + price + b'}'
+    status, payload = _raw_post(client, "/products", body, {"Content-Type": "application/json"})
+    assert status == 400 and b"price" in payload and len(manager._products) == 0
+
+def test_negative_content_length_is_rejected(service):
+    _, client = service
+    status, payload = _raw_post(client, "/products", None, {"Content-Length": "-5"})
+    assert status == 400 and b"Content-Length" in payload
@@ -0,0 +1,90 @@
+import json
+import pytest
+from oes_core.models import Product
+from oes_core.inventory import InventoryManager
+from oes_core.importer import import_catalog
+
+CSV_CATALOG = """sku,name,price,description,current_stock,safety_stock_threshold
+LAP100,Laptop,999.99,Base model,20,5
+MOU200,Mouse,19.5,,3,
+BAD-SKU,Broken,10,,1,1
+KEY300,Keyboard,-1,,1,1
+MON400,Monitor,abc,,1,1
+LAP100,Laptop again,5,,1,1
+DOC500,Dock,80,,2.5,1
+CAB600,Cable,,,1,1
+"""
+
+def test_import_csv_catalog_reports_rejected_rows(empty_inventory_manager: InventoryManager, tmp_path):
+    """Test a CSV import in small chunks: valid rows are added, every invalid row is reported with its reason."""
+    path = tmp_path / "catalog.csv"
+    path.write_text(CSV_CATALOG)
+
+    report = import_catalog(empty_inventory_manager, str(path), chunk_size=3)
+
+    assert report.imported == 2
+    assert [(rejected.line, rejected.reason) for rejected in report.rejected] == [
+        (4, "SKU must be alphanumeric."),
+        (5, "Product price must be positive."),
+        (6, "Price is not a number."),
+        (7, "Duplicate SKU in catalog."),
+        (8, "Current stock is not an integer."),
+        (9, "Missing required field: price."),
+    ]
+    mouse = empty_inventory_manager.get_product_by_sku("MOU200")
+    assert (mouse.price, mouse.current_stock, mouse.safety_stock_threshold, mouse.description) == (19.5, 3, 10, None)
+    assert [p.sku for p in empty_inventory_manager.get_low_stock_products()] == ["MOU200"]
+    assert len(mouse.product_id) == 36 and mouse.product_id[14] == "7"
+
+def test_import_jsonl_catalog_skips_existing_skus(empty_inventory_manager: InventoryManager, tmp_path):
+    """Test a JSONL import against an inventory that already holds one of the SKUs."""
+    empty_inventory_manager.add_product(Product(sku="A1", name="Existing", price=1))
+    rows = [{"sku": "A1", "name": "Dup", "price": 2}, {"sku": "B2", "name": "New", "price": 3, "current_stock": 40},
+            {"sku": "C3", "price": 4}]
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("\n".join(json.dumps(row) for row in rows) + "\nnot json\n")
+
+    report = import_catalog(empty_inventory_manager, str(path), max_rejections=2)
+
+    assert report.imported == 1
+    assert report.rejected_count == 3
+    assert [rejected.reason for rejected in report.rejected] == [
+        "Product with SKU A1 already exists.", "Missing required field: name."]
+    assert empty_inventory_manager.get_product_by_sku("B2").current_stock == 40
+    assert empty_inventory_manager.get_product_by_sku("A1").name == "Existing"
+
+def test_import_jsonl_parses_integers_exactly_and_rejects_booleans(empty_inventory_manager: InventoryManager,
+                                                                   tmp_path):
+    """Test that integer columns keep every digit past 2**53 and that JSON booleans are not numbers."""
+    rows = [{"sku": "BIG1", "name": "Big", "price": 1, "current_stock": 2 ** 60 + 1},
+            {"sku": "FLT2", "name": "Float", "price": 1, "current_stock": 12.0, "safety_stock_threshold": "3"},
+            {"sku": "HUGE3", "name": "Huge", "price": 1, "current_stock": 2 ** 70},
+            {"sku": "BOOL4", "name": "Bool", "price": True},
+            {"sku": "BOOL5", "name": "Bool", "price": 1, "safety_stock_threshold": False},
+            {"sku": "BIG1", "name": "Again", "price": 1}]
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("\n".join(json.dumps(row) for row in rows) + "\n")
+
+    report = import_catalog(empty_inventory_manager, str(path), chunk_size=2)
+
+    assert report.imported == 2
+    assert [(rejected.line, rejected.reason) for rejected in report.rejected] == [
+        (3, "Current stock is not an integer."),
+        (4, "Price is not a number."),
+        (5, "Safety stock threshold is not an integer."),
+        (6, "Duplicate SKU in catalog."),
+    ]
+    assert empty_inventory_manager.get_product_by_sku("BIG1").current_stock == 2 ** 60 + 1
+    floated = empty_inventory_manager.get_product_by_sku("FLT2")
+    assert (floated.current_stock, floated.safety_stock_threshold) == (12, 3)
+    assert type(floated.current_stock) is int
+
+def test_add_products_is_all_or_nothing(empty_inventory_manager: InventoryManager, base_product: Product):
+    """Test that a bulk insert with a duplicate SKU adds nothing."""
+    empty_inventory_manager.add_product(base_product)
+    batch = [Product(sku="NEW1", name="New", price=1), Product(sku=base_product.sku, name="Clone", price=1)]
+
+    with pytest.raises(ValueError, match="already exists"):
+        empty_inventory_manager.add_products(batch)
+    assert empty_inventory_manager.get_product_by_sku("NEW1") is None
+    assert len(empty_inventory_manager.list_all_products()) == 1
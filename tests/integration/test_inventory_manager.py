@@ -135,3 +135,33 @@ def test_get_top_n_products_by_stock_parametrized(
 
     expected_length = min(n, len(manager.list_all_products()))
     assert len(top_n_products) == expected_length
+
+def test_bottom_n_and_rank_follow_stock_updates(empty_inventory_manager: InventoryManager):
+    """Test that the stock index is kept up to date by add_product and update_stock."""
+    manager = empty_inventory_manager
+    low = Product(sku="LOW1", name="Low", price=1.0, current_stock=5)
+    mid = Product(sku="MID1", name="Mid", price=1.0, current_stock=50)
+    high = Product(sku="HIGH1", name="High", price=1.0, current_stock=500)
+    for p in (mid, high, low):
+        manager.add_product(p)
+
+    assert [p.sku for p in manager.get_bottom_n_products_by_stock(2)] == ["LOW1", "MID1"]
+    assert manager.get_stock_rank(high.product_id) == 1
+    assert manager.get_stock_rank(low.product_id) == 3
+    assert manager.get_stock_rank(str(uuid.uuid4())) is None
+
+    manager.update_stock(Transaction(product_id=low.product_id, quantity_change=1000,
+                                     transaction_type=Transaction.TYPE_INBOUND))
+
+    assert [p.sku for p in manager.get_top_n_products_by_stock(1)] == ["LOW1"]
+    assert manager.get_stock_rank(low.product_id) == 1
+    assert [p.sku for p in manager.get_bottom_n_products_by_stock(1)] == ["MID1"]
+
+def test_stock_rank_is_read_only(empty_inventory_manager: InventoryManager, mocker):
+    """get_stock_rank only reads the index; the write paths keep it current."""
+    manager = empty_inventory_manager
+    products = [Product(sku=f"RANK{i}", name=f"Rank {i}", price=1.0, current_stock=i) for i in range(3)]
+    manager.add_products(products)
+    mocker.patch.object(manager._stock_index, "update", side_effect=AssertionError("query wrote to the index"))
+    mocker.patch.object(manager._stock_index, "discard", side_effect=AssertionError("query wrote to the index"))
+    assert [manager.get_stock_rank(product.product_id) for product in products] == [3, 2, 1]
@@ -83,3 +83,41 @@ def test_stock_update_does_not_call_sender_when_safe(mocker, empty_inventory_man
     mock_email_sender.assert_not_called()
     print("Testing 123!")
     logging.info("I think i forgot to create a logger here?")
+
+def test_get_product_does_not_format_suppressed_logs(empty_inventory_manager: InventoryManager, base_product: Product):
+    """INFO is disabled on the inventory logger, so the arguments must never be converted to strings."""
+
+    class TrackedId(str):
+        conversions = 0
+
+        def __str__(self):
+            TrackedId.conversions += 1
+            return str.__str__(self)
+
+    manager = empty_inventory_manager
+    manager.add_product(base_product)
+
+    assert manager.get_product(TrackedId(base_product.product_id)) is base_product
+    assert TrackedId.conversions == 0
+
+def test_non_blocking_logging_emits_structured_alerts(stock_warning_manager_setup):
+    """Alerts go through the QueueHandler and reach the handler as JSON with the structured fields."""
+    import io
+    import json
+    from oes_core.log_handlers import NonBlockingLogging, StructuredFormatter
+
+    manager, product, transaction = stock_warning_manager_setup
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(StructuredFormatter())
+
+    with NonBlockingLogging("oes_core", handlers=[handler]):
+        manager.update_stock(transaction)
+
+    # stop() drains the queue, so the record is written once the block exits.
+    payload = json.loads(stream.getvalue().strip())
+    assert payload["level"] == "WARNING"
+    assert payload["message"].startswith("ALERT")
+    assert payload["product_id"] == product.product_id
+    assert payload["current_stock"] == 5
+    assert payload["safety_stock_threshold"] == 20
@@ -0,0 +1,66 @@
+import urllib.request
+import pytest
+from oes_core.inventory import InventoryManager
+from oes_core.metrics import MetricsRegistry, PrometheusExporter
+from oes_core.models import Product, Transaction
+
+def test_metrics_are_off_by_default(empty_inventory_manager: InventoryManager):
+    """Without metrics the manager runs the plain class methods."""
+    assert "update_stock" not in vars(empty_inventory_manager)
+    assert empty_inventory_manager.metrics_snapshot() == {}
+
+def test_metrics_count_calls_errors_and_external_status(mocker, base_product: Product):
+    manager = InventoryManager(metrics=MetricsRegistry())
+    mocker.patch("oes_core.utils.check_status", return_value=200)
+    manager.add_product(base_product)
+    for _ in range(5):
+        manager.get_product(base_product.product_id)
+    manager.update_stock(Transaction(base_product.product_id, 3, Transaction.TYPE_INBOUND))
+    with pytest.raises(ValueError):
+        manager.update_stock(Transaction("missing", 3, Transaction.TYPE_INBOUND))
+    manager.get_top_n_products_by_stock(1)
+    manager.check_and_process_item(base_product.product_id)
+
+    snapshot = manager.metrics_snapshot()
+    assert snapshot["get_product"]["count"] == 5
+    assert (snapshot["update_stock"]["count"], snapshot["update_stock"]["errors"]) == (2, 1)
+    assert snapshot["get_top_n_products_by_stock"]["count"] == 1
+    assert snapshot["external.check_status"]["count"] == 1
+    assert snapshot["get_product"]["p99_ns"] >= snapshot["get_product"]["p50_ns"] > 0
+
+    manager.disable_metrics()
+    manager.get_product(base_product.product_id)
+    assert manager.metrics_snapshot() == {}
+
+def test_external_call_wrappers_are_built_once_per_function(mocker):
+    """The timed external call is reused across calls and rebuilt when oes_core.utils is patched again."""
+    manager = InventoryManager(metrics=MetricsRegistry())
+    mocker.patch("oes_core.utils.check_status", return_value=200)
+    timed = manager._external_call("check_status")
+    assert manager._external_call("check_status") is timed
+    manager.check_and_process_item("A")
+
+    mocker.patch("oes_core.utils.check_status", return_value=400)
+    assert manager._external_call("check_status") is not timed
+    assert manager.check_and_process_item("A") == "FAILED_VALIDATION"
+    assert manager.metrics_snapshot()["external.check_status"]["count"] == 2
+
+    manager.disable_metrics()
+    assert manager._external_call("check_status") is manager._external_call("check_status")
+    manager.check_and_process_item("A")
+    assert manager.metrics_snapshot() == {}
+
+def test_prometheus_exporter_file_and_http(tmp_path, base_product: Product):
+    registry = MetricsRegistry()
+    manager = InventoryManager(metrics=registry)
+    manager.add_product(base_product)
+    manager.get_product(base_product.product_id)
+    path = tmp_path / "oes.prom"
+
+    with PrometheusExporter(registry, path=str(path), port=0, interval=60) as exporter:
+        host, port = exporter.address
+        body = urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5).read().decode()
+        manager.get_product(base_product.product_id)
+
+    assert 'oes_call_latency_seconds_count{name="get_product"} 1' in body
+    assert 'oes_call_latency_seconds_count{name="get_product"} 2' in path.read_text()
@@ -35,3 +35,23 @@ def test_check_and_process_item_handles_sequential_results(mocker, empty_invento
     assert result_3 == "ERROR_RUNTIME"
 
     assert mock_checker.call_count == 3
+
+def test_check_and_process_item_uses_status_cache(mocker):
+    """Repeated checks of the same product hit the cache; RuntimeError results are never cached."""
+    from oes_core.cache import StatusCache
+
+    manager = InventoryManager(status_cache=StatusCache())
+    mock_checker = mocker.patch('oes_core.utils.check_status')
+    mock_checker.side_effect = [
+        RuntimeError("Database connection lost."),
+        200,
+        400,
+    ]
+
+    assert manager.check_and_process_item("ITEM123") == "ERROR_RUNTIME"
+    assert manager.check_and_process_item("ITEM123") == "PROCESSED"
+    assert manager.check_and_process_item("ITEM123") == "PROCESSED"
+    assert manager.check_and_process_item("ITEM456") == "FAILED_VALIDATION"
+    assert manager.check_and_process_item("ITEM456") == "FAILED_VALIDATION"
+
+    assert mock_checker.call_count == 3
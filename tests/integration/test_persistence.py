@@ -0,0 +1,183 @@
+import os
+import threading
+import pytest
+from oes_core.alerts import AlertEngine
+from oes_core.changes import ChangeFeed
+from oes_core.inventory import InventoryManager
+from oes_core.metrics import MetricsRegistry
+from oes_core.models import Product, Transaction
+from oes_core.persistence import InventoryStore, WriteAheadLog, encode_transaction, read_wal
+
+def _state(manager: InventoryManager):
+    return sorted((p.product_id, p.sku, p.name, p.description, p.price, p.current_stock,
+                   p.safety_stock_threshold, p.create_at) for p in manager.list_all_products())
+
+def _populate(manager: InventoryManager, count: int = 5):
+    products = []
+    for i in range(count):
+        product = Product(sku=f"WAL{i}", name=f"Durable ✓ {i}", price=1.5 + i, current_stock=10 * i,
+                          description=None if i % 2 else f"desc {i}")
+        manager.add_product(product)
+        products.append(product)
+    return products
+
+def test_recover_replays_wal_without_snapshot(tmp_path):
+    """A restart rebuilds products, stock and history from the WAL alone."""
+    store = InventoryStore(str(tmp_path))
+    manager = store.recover()
+    products = _populate(manager)
+    manager.update_stock(Transaction(product_id=products[1].product_id, quantity_change=-50,
+                                     transaction_type=Transaction.TYPE_OUTBOUND))
+    manager.apply_transactions([
+        Transaction(product_id=products[2].product_id, quantity_change=7, transaction_type=Transaction.TYPE_INBOUND),
+        Transaction(product_id=products[3].product_id, quantity_change=-3,
+                    transaction_type=Transaction.TYPE_ADJUSTMENT),
+    ])
+    expected = _state(manager)
+    store.close()
+
+    recovered_store = InventoryStore(str(tmp_path))
+    recovered = recovered_store.recover()
+    try:
+        assert _state(recovered) == expected
+        assert recovered.get_product(products[1].product_id).current_stock == 0  # capping replayed
+        assert len(recovered._transaction_history) == 3
+        assert [p.sku for p in recovered.get_top_n_products_by_stock(1)] == ["WAL4"]
+    finally:
+        recovered_store.close()
+
+def test_recovery_replays_products_without_side_effects(tmp_path):
+    """Replayed product records are not re-timed, re-alerted or re-published: that happened before the restart."""
+    store = InventoryStore(str(tmp_path))
+    _populate(store.recover(), count=3)  # stock 0, 10, 20: two products at or below the threshold
+    store.close()
+
+    registry = MetricsRegistry()
+    engine = AlertEngine()
+    feed = ChangeFeed()
+    recovered_store = InventoryStore(str(tmp_path))
+    recovered = recovered_store.recover(InventoryManager(metrics=registry, alert_engine=engine, change_feed=feed))
+    try:
+        assert len(recovered.list_all_products()) == 3
+        assert len(recovered.get_low_stock_products()) == 2
+        assert registry.snapshot()["add_product"]["count"] == 0
+        assert engine.raised == 0 and feed.last_sequence == 0
+    finally:
+        recovered_store.close()
+
+def test_recover_loads_snapshot_and_replays_only_the_tail(tmp_path):
+    store = InventoryStore(str(tmp_path))
+    manager = store.recover()
+    products = _populate(manager)
+    store.snapshot(manager)
+    snapshot_lsn = store.lsn
+    manager.update_stock(Transaction(product_id=products[0].product_id, quantity_change=99,
+                                     transaction_type=Transaction.TYPE_INBOUND))
+    late = Product(sku="LATE1", name="Added after snapshot", price=3.0, current_stock=1)
+    manager.add_product(late)
+    expected = _state(manager)
+    store.close()
+
+    # The snapshot superseded the first WAL segment.
+    wal_files = sorted(name for name in os.listdir(tmp_path) if name.startswith("wal-"))
+    assert wal_files == [f"wal-{snapshot_lsn + 1:020d}.log"]
+
+    recovered_store = InventoryStore(str(tmp_path))
+    recovered = recovered_store.recover()
+    try:
+        assert _state(recovered) == expected
+        # Only the two tail records were replayed into the history.
+        assert len(recovered._transaction_history) == 1
+        assert recovered.get_stock_rank(products[0].product_id) == 1
+    finally:
+        recovered_store.close()
+
+def test_automatic_snapshots(tmp_path):
+    store = InventoryStore(str(tmp_path), snapshot_every=3)
+    manager = store.recover()
+    _populate(manager, count=7)
+    expected = _state(manager)
+    store.close()
+
+    assert any(name.startswith("snapshot-") for name in os.listdir(tmp_path))
+    recovered_store = InventoryStore(str(tmp_path))
+    try:
+        assert _state(recovered_store.recover()) == expected
+    finally:
+        recovered_store.close()
+
+def test_automatic_snapshot_waits_for_logged_but_unapplied_records(tmp_path):
+    """A snapshot must not cover (and delete the WAL of) a record another stripe logged but has not applied yet."""
+    store = InventoryStore(str(tmp_path), snapshot_every=1)
+    manager = store.recover(InventoryManager(thread_safe=True))
+    slow, fast = _populate(manager, count=2)
+    logged, resume = threading.Event(), threading.Event()
+    log_transaction = store.log_transaction
+
+    def log_then_stall(transaction):
+        log_transaction(transaction)
+        if transaction.product_id == slow.product_id:
+            logged.set()
+            resume.wait(5)
+    store.log_transaction = log_then_stall
+
+    def update(product, quantity):
+        manager.update_stock(Transaction(product_id=product.product_id, quantity_change=quantity,
+                                         transaction_type=Transaction.TYPE_INBOUND))
+    writer = threading.Thread(target=update, args=(slow, 7))
+    writer.start()
+    assert logged.wait(5)
+    snapshotter = threading.Thread(target=update, args=(fast, 1))  # its mutation triggers the snapshot
+    snapshotter.start()
+    snapshotter.join(0.2)
+    resume.set()
+    writer.join()
+    snapshotter.join()
+    expected = _state(manager)
+    store.close()
+
+    recovered_store = InventoryStore(str(tmp_path))
+    try:
+        assert _state(recovered_store.recover()) == expected
+    finally:
+        recovered_store.close()
+
+def test_torn_wal_tail_is_truncated(tmp_path):
+    """A partially written last record (crash mid-write) is dropped, earlier records survive."""
+    path = str(tmp_path / "wal-00000000000000000001.log")
+    wal = WriteAheadLog(path, wait_for_fsync=True)
+    transactions = [Transaction(product_id="p1", quantity_change=i + 1, transaction_type=Transaction.TYPE_INBOUND)
+                    for i in range(3)]
+    for lsn, transaction in enumerate(transactions, start=1):
+        wal.append(encode_transaction(lsn, transaction))
+    wal.close()
+    intact_size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00garbage")
+
+    records = list(read_wal(path))
+
+    assert [lsn for _, lsn, _ in records] == [1, 2, 3]
+    assert records[2][2] == transactions[2]
+    assert os.path.getsize(path) == intact_size
+
+def test_store_rejects_second_attach(tmp_path):
+    store = InventoryStore(str(tmp_path))
+    store.recover()
+    try:
+        with pytest.raises(ValueError, match="already attached"):
+            store.recover()
+    finally:
+        store.close()
+
+def test_snapshot_needs_an_attached_open_store(tmp_path):
+    manager = InventoryManager()
+    store = InventoryStore(str(tmp_path))
+    with pytest.raises(ValueError, match="not attached"):
+        store.snapshot(manager)
+    store.recover(manager)
+    store.close()
+    with pytest.raises(ValueError, match="closed"):
+        store.snapshot(manager)
+    with pytest.raises(ValueError, match="closed"):
+        store.snapshot()
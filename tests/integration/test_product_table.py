@@ -0,0 +1,125 @@
+import random
+import tracemalloc
+
+import pytest
+from oes_core.models import Product, Transaction
+from oes_core.inventory import InventoryManager
+from oes_core.product_table import MappedProductTable, ProductView, RecordLayout
+
+# catalog() fields: MAP<i> has price 1 + i, stock i and, for even i, a description.
+_MAPPED_FIELDS = dict(name=lambda i: f"Mapped {i}", price=lambda i: 1.0 + i, current_stock=lambda i: i,
+                      safety_stock_threshold=5, description=lambda i: None if i % 2 else f"Item number {i}")
+
+def test_manager_on_mapped_table_updates_records_in_place(tmp_path, catalog):
+    """get_product returns views, update_stock and apply_transactions write the mapped record."""
+    # Past the initial capacity, so the files grow and the index is rebuilt.
+    products = catalog(2000, "MAP", **_MAPPED_FIELDS)
+    with MappedProductTable(str(tmp_path / "products.tbl")) as table:
+        manager = InventoryManager(product_table=table)
+        manager.add_product(products[0])
+        manager.add_products(products[1:])
+
+        view = manager.get_product(products[3].product_id)
+        assert isinstance(view, ProductView) and view == products[3]
+        assert (view.sku, view.description, view.create_at) == ("MAP3", None, products[3].create_at)
+
+        manager.update_stock(Transaction(product_id=products[3].product_id, quantity_change=-10,
+                                         transaction_type=Transaction.TYPE_OUTBOUND))
+        manager.apply_transactions([Transaction(product_id=products[4].product_id, quantity_change=6,
+                                                transaction_type=Transaction.TYPE_INBOUND)])
+        assert view.current_stock == 0
+        assert manager.get_product(products[4].product_id).current_stock == 10
+        assert manager.get_product_by_sku("MAP1999").name == "Mapped 1999"
+        assert table.get_by_sku("MAP4").current_stock == 10
+        assert [p.sku for p in manager.get_top_n_products_by_stock(2)] == ["MAP1999", "MAP1998"]
+        assert {p.sku for p in manager.get_low_stock_products()} == {"MAP0", "MAP1", "MAP2", "MAP3", "MAP5"}
+        with pytest.raises(ValueError, match="already exists"):
+            manager.add_product(Product(sku="MAP7", name="Duplicate", price=1.0))
+
+def test_reopened_table_restores_products_and_indexes(tmp_path, mocker, catalog):
+    path = str(tmp_path / "products.tbl")
+    products = catalog(600, "MAP", **_MAPPED_FIELDS)
+    with MappedProductTable(path) as table:
+        manager = InventoryManager(product_table=table)
+        manager.add_products(products)
+        manager.update_stock(Transaction(product_id=products[10].product_id, quantity_change=1000,
+                                         transaction_type=Transaction.TYPE_INBOUND))
+
+    (tmp_path / "products.tbl.index").unlink()  # a missing index is rebuilt from the records
+    with MappedProductTable(path, layout=RecordLayout(name_bytes=8)) as table:
+        assert table.layout == RecordLayout()  # the layout is read from the file
+        for name in ("items", "values", "keys"):
+            mocker.patch.object(table, name, side_effect=AssertionError("reopening decoded every record"))
+        manager = InventoryManager(product_table=table)
+        mocker.stopall()
+        assert len(manager.list_all_products()) == 600
+        assert manager.get_top_n_products_by_stock(1)[0].sku == "MAP10"
+        assert manager.get_product(products[10].product_id).current_stock == 1010
+        assert manager.get_product_by_sku("MAP599").price == 600.0
+
+@pytest.mark.parametrize("thread_safe", [False, True])
+def test_mapped_stock_queries_match_the_in_memory_indexes(tmp_path, monkeypatch, thread_safe: bool):
+    """Scans of the mapped stock column order ties by product_id, like StockIndex, across chunk boundaries."""
+    monkeypatch.setattr("oes_core.product_table._SCAN_CHUNK", 64)
+    rng = random.Random(7)
+    products = [Product(sku=f"RND{i}", name=f"Random {i}", price=1.0, current_stock=rng.randrange(20),
+                        safety_stock_threshold=rng.randrange(10)) for i in range(700)]
+    in_memory = InventoryManager(thread_safe=thread_safe)
+    in_memory.add_products(products)
+    with MappedProductTable(str(tmp_path / "products.tbl")) as table:
+        mapped = InventoryManager(product_table=table, thread_safe=thread_safe)
+        mapped.add_products(products)
+
+        ids = lambda found: [product.product_id for product in found]
+        for n in (0, 1, 50, 64, 65, 700, 900):
+            assert ids(mapped.get_top_n_products_by_stock(n)) == ids(in_memory.get_top_n_products_by_stock(n))
+            assert ids(mapped.get_bottom_n_products_by_stock(n)) == ids(in_memory.get_bottom_n_products_by_stock(n))
+        for product in products[::37]:
+            assert mapped.get_stock_rank(product.product_id) == in_memory.get_stock_rank(product.product_id)
+        assert sorted(ids(mapped.get_low_stock_products())) == sorted(ids(in_memory.get_low_stock_products()))
+        assert mapped.get_stock_rank("unknown") is None
+
+def test_mapped_manager_heap_does_not_grow_with_the_catalog(tmp_path):
+    """The manager keeps nothing per product on the heap: adding products grows the files, not the heap."""
+    with MappedProductTable(str(tmp_path / "products.tbl")) as table:
+        manager = InventoryManager(product_table=table, thread_safe=True)
+
+        def add(start: int, count: int) -> None:
+            for first in range(start, start + count, 1000):
+                manager.add_products([Product(sku=f"HEAP{i}", name=f"Heap {i}", price=1.0, current_stock=i % 50,
+                                              safety_stock_threshold=5) for i in range(first, first + 1000)])
+
+        add(0, 4000)  # past the first growth steps of the files and the index
+        manager.get_top_n_products_by_stock(10)
+        manager.get_low_stock_products()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            add(4000, 8000)
+            assert len(manager.get_top_n_products_by_stock(10)) == 10
+            assert manager.get_product_by_sku("HEAP11999").name == "Heap 11999"
+            grown = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        assert grown / 8000 < 8  # bytes per added product; the in-memory indexes take ~300
+
+def test_mapped_sku_uniqueness_covers_adds_in_flight(tmp_path):
+    with MappedProductTable(str(tmp_path / "products.tbl")) as table:
+        manager = InventoryManager(product_table=table, thread_safe=True)
+        first = Product(sku="SKU1", name="First", price=1.0)
+        manager._claim_sku(first)  # an add of SKU1 that has not reached the table yet
+        with pytest.raises(ValueError, match="SKU SKU1 already exists"):
+            manager.add_product(Product(sku="SKU1", name="Second", price=1.0))
+        manager._settle_sku_claim(first, committed=False)
+        manager.add_product(first)
+        with pytest.raises(ValueError, match="SKU SKU1 already exists"):
+            manager.add_products([Product(sku="SKU2", name="Third", price=1.0),
+                                  Product(sku="SKU1", name="Fourth", price=1.0)])
+        assert manager.get_product_by_sku("SKU2") is None and len(table) == 1
+
+def test_fields_longer_than_the_layout_are_rejected(tmp_path):
+    with MappedProductTable(str(tmp_path / "products.tbl"), layout=RecordLayout(name_bytes=4)) as table:
+        manager = InventoryManager(product_table=table)
+        with pytest.raises(ValueError, match="name is 9 bytes"):
+            manager.add_product(Product(sku="LONG1", name="Long name", price=1.0))
+        assert len(table) == 0 and manager.get_product_by_sku("LONG1") is None
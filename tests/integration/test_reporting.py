@@ -0,0 +1,64 @@
+import threading
+import pytest
+from oes_core.models import Product, Transaction
+from oes_core.inventory import InventoryManager
+from oes_core.reporting import build_report, inventory_report, take_snapshot
+
+def _populated(manager: InventoryManager, count: int = 300):
+    products = [Product(sku=f"{'ABC'[i % 3]}X{i}", name=f"Report {i}", price=0.5 + i % 7, current_stock=i % 40,
+                        safety_stock_threshold=(i * 13) % 120) for i in range(count)]
+    manager.add_products(products)
+    return products
+
+def test_report_matches_python_loops(empty_inventory_manager: InventoryManager):
+    products = _populated(empty_inventory_manager)
+    report = inventory_report(empty_inventory_manager, sku_prefix_length=1, threshold_edges=(0, 10, 100))
+
+    assert report.products == len(products)
+    assert report.total_stock == sum(p.current_stock for p in products)
+    assert report.total_value == pytest.approx(sum(p.price * p.current_stock for p in products))
+    assert report.low_stock == sum(p.current_stock <= p.safety_stock_threshold for p in products)
+    assert report.by_sku_prefix["B"].products == 100
+    assert report.by_sku_prefix["B"].stock == sum(p.current_stock for p in products if p.sku[0] == "B")
+    assert list(report.by_threshold) == ["0-9", "10-99", "100+"]
+    assert report.by_threshold["100+"].value == pytest.approx(
+        sum(p.price * p.current_stock for p in products if p.safety_stock_threshold >= 100))
+    assert report.stock_percentiles[50.0] == pytest.approx(sorted(p.current_stock for p in products)[149], abs=1)
+
+def test_process_pool_report_equals_single_process_report(empty_inventory_manager: InventoryManager):
+    _populated(empty_inventory_manager, 1000)
+    snapshot = take_snapshot(empty_inventory_manager)
+    assert build_report(snapshot, processes=3, min_rows_per_process=1) == build_report(snapshot, processes=1)
+
+def test_snapshot_is_isolated_from_later_writes(empty_inventory_manager: InventoryManager):
+    products = _populated(empty_inventory_manager, 10)
+    snapshot = take_snapshot(empty_inventory_manager)
+    empty_inventory_manager.update_stock(Transaction(product_id=products[1].product_id, quantity_change=1000,
+                                                     transaction_type=Transaction.TYPE_INBOUND))
+    assert build_report(snapshot).total_stock == sum(range(10))
+    assert inventory_report(InventoryManager()).products == 0
+
+def test_snapshots_never_see_half_of_a_batch():
+    """Concurrent batches move stock between two products; every snapshot sees the same total."""
+    manager = InventoryManager(thread_safe=True)
+    first, second = _populated(manager, 2)
+    manager.update_stock(Transaction(product_id=second.product_id, quantity_change=100_000,
+                                     transaction_type=Transaction.TYPE_INBOUND))
+    total = take_snapshot(manager).stock.sum()
+    stop = threading.Event()
+
+    def move_stock():
+        while not stop.is_set():
+            manager.apply_transactions([
+                Transaction(product_id=first.product_id, quantity_change=5, transaction_type=Transaction.TYPE_INBOUND),
+                Transaction(product_id=second.product_id, quantity_change=-5,
+                            transaction_type=Transaction.TYPE_ADJUSTMENT),
+            ])
+    writer = threading.Thread(target=move_stock)
+    writer.start()
+    try:
+        totals = {int(take_snapshot(manager).stock.sum()) for _ in range(200)}
+    finally:
+        stop.set()
+        writer.join()
+    assert totals == {total}
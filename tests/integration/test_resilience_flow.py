@@ -0,0 +1,43 @@
+import time
+from oes_core.inventory import InventoryManager
+from oes_core.resilience import CLOSED, OPEN, CircuitBreaker, DeadlineExceededError, ResilientCaller, RetryPolicy
+
+def test_breaker_stops_calling_a_failing_upstream(mocker, fake_clock):
+    resilience = ResilientCaller(breaker=CircuitBreaker(failure_threshold=3, recovery_timeout=30.0, clock=fake_clock))
+    manager = InventoryManager(resilience=resilience)
+    mock_checker = mocker.patch('oes_core.utils.check_status', side_effect=RuntimeError("Upstream overloaded."))
+
+    results = [manager.check_and_process_item("ITEM123") for _ in range(10)]
+    assert results == ["ERROR_RUNTIME"] * 10
+    assert mock_checker.call_count == 3
+    assert resilience.stats()["breaker"]["state"] == OPEN and resilience.stats()["breaker"]["rejected"] == 7
+
+    # After the recovery timeout one probe goes through; the upstream is back, so the circuit closes.
+    fake_clock.now = 30.0
+    mock_checker.side_effect = [200, ValueError("Invalid format detected."), 200]
+    assert [manager.check_and_process_item("ITEM123") for _ in range(3)] == \
+        ["PROCESSED", "FAILED_VALIDATION", "PROCESSED"]
+    assert resilience.stats()["breaker"]["state"] == CLOSED and mock_checker.call_count == 6
+
+def test_transient_failures_are_retried(mocker):
+    manager = InventoryManager(resilience=ResilientCaller(retry=RetryPolicy(max_attempts=3, backoff=0)))
+    mock_checker = mocker.patch('oes_core.utils.check_status')
+    mock_checker.side_effect = [RuntimeError("Database connection lost."), 200]
+
+    assert manager.check_and_process_item("ITEM123") == "PROCESSED"
+    assert mock_checker.call_count == 2
+
+def test_batch_status_check_times_out_slow_items_per_call(mocker):
+    def slow_for_b(item):
+        time.sleep(0.5 if item == "ItemB" else 0.01)
+        return 200
+
+    resilience = ResilientCaller(retry=RetryPolicy(deadline=0.1))
+    manager = InventoryManager(resilience=resilience)
+    mocker.patch('oes_core.utils.get_external_status', side_effect=slow_for_b)
+    try:
+        results = manager.perform_batch_status_check(["ItemA", "ItemB", "ItemC"])
+    finally:
+        resilience.close()
+    assert results[0] == 200 and results[2] == 200
+    assert isinstance(results[1], DeadlineExceededError) and isinstance(results[1], TimeoutError)
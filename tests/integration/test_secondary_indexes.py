@@ -0,0 +1,80 @@
+import pytest
+from oes_core.models import Product, Transaction
+from oes_core.inventory import InventoryManager
+
+def _populate(manager: InventoryManager):
+    products = [
+        Product(sku="LAP1", name="Laptop Pro", price=1500, current_stock=40, safety_stock_threshold=10),
+        Product(sku="LAP2", name="Laptop Air", price=1100, current_stock=5, safety_stock_threshold=10),
+        Product(sku="MOU1", name="Mouse", price=25, current_stock=200, safety_stock_threshold=20),
+    ]
+    for product in products:
+        manager.add_product(product)
+    return products
+
+def test_get_product_by_sku(empty_inventory_manager: InventoryManager):
+    """Test the unique SKU index lookup."""
+    laptop, _, _ = _populate(empty_inventory_manager)
+
+    assert empty_inventory_manager.get_product_by_sku("LAP1") is laptop
+    assert empty_inventory_manager.get_product_by_sku("NOPE") is None
+
+def test_add_product_with_duplicate_sku_raises_error(empty_inventory_manager: InventoryManager):
+    """Test that SKUs stay unique across products."""
+    _populate(empty_inventory_manager)
+
+    with pytest.raises(ValueError, match="SKU LAP1 already exists"):
+        empty_inventory_manager.add_product(Product(sku="LAP1", name="Clone", price=1))
+    assert len(empty_inventory_manager.list_all_products()) == 3
+
+def test_find_products_by_name_prefix(empty_inventory_manager: InventoryManager):
+    """Test search-as-you-type over product names, including products added after the first search."""
+    _populate(empty_inventory_manager)
+
+    assert [p.sku for p in empty_inventory_manager.find_products_by_name_prefix("lap")] == ["LAP2", "LAP1"]
+    assert [p.sku for p in empty_inventory_manager.find_products_by_name_prefix("LAPTOP", limit=1)] == ["LAP2"]
+
+    empty_inventory_manager.add_product(Product(sku="LAP3", name="Laptop Mini", price=700))
+    assert [p.sku for p in empty_inventory_manager.find_products_by_name_prefix("laptop m")] == ["LAP3"]
+
+def test_low_stock_set_follows_stock_changes(empty_inventory_manager: InventoryManager):
+    """Test the live low-stock set through single updates and batches."""
+    laptop, laptop_air, mouse = _populate(empty_inventory_manager)
+    low = lambda: {p.sku for p in empty_inventory_manager.get_low_stock_products()}
+
+    assert low() == {"LAP2"}
+
+    empty_inventory_manager.update_stock(Transaction(laptop.product_id, -35, Transaction.TYPE_OUTBOUND))
+    assert low() == {"LAP1", "LAP2"}
+
+    empty_inventory_manager.apply_transactions([
+        Transaction(laptop_air.product_id, 50, Transaction.TYPE_INBOUND),
+        Transaction(mouse.product_id, -190, Transaction.TYPE_OUTBOUND),
+    ])
+    assert low() == {"LAP1", "MOU1"}
+
+@pytest.mark.parametrize("thread_safe", [False, True])
+def test_stale_sku_entry_is_reclaimed(thread_safe: bool):
+    """A SKU left behind by a product removed from _products directly can be claimed again, in both modes."""
+    manager = InventoryManager(thread_safe=thread_safe)
+    removed = Product(sku="GONE1", name="Removed", price=1.0)
+    manager.add_product(removed)
+    del manager._products[removed.product_id]
+
+    replacement = Product(sku="GONE1", name="Replacement", price=1.0)
+    manager.add_product(replacement)
+    assert manager.get_product_by_sku("GONE1") is replacement
+    with pytest.raises(ValueError, match="already exists"):
+        manager.add_product(Product(sku="GONE1", name="Duplicate", price=1.0))
+
+def test_sku_claimed_by_an_add_in_flight_is_not_stale():
+    """In thread-safe mode, a SKU whose product is claimed but not yet inserted belongs to that concurrent add."""
+    manager = InventoryManager(thread_safe=True)
+    in_flight = Product(sku="BUSY1", name="In flight", price=1.0)
+    manager._claim_sku(in_flight)  # the window between claim and insertion inside a concurrent add_product
+
+    with pytest.raises(ValueError, match="already exists"):
+        manager.add_product(Product(sku="BUSY1", name="Second", price=1.0))
+    manager._settle_sku_claim(in_flight, committed=False)
+    manager.add_product(Product(sku="BUSY1", name="Third", price=1.0))
+    assert manager.get_product_by_sku("BUSY1").name == "Third"
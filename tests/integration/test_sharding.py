@@ -0,0 +1,97 @@
+import random
+import pytest
+from oes_core.models import Product, Transaction
+from oes_core.inventory import InventoryManager
+from oes_core.sharding import ShardedInventoryManager
+
+@pytest.fixture(scope="module")
+def sharded_manager():
+    manager = ShardedInventoryManager(shards=3)
+    yield manager
+    manager.close()
+
+def _products(prefix: str, count: int):
+    return [Product(sku=f"{prefix}{i}", name=f"Item {i}", price=1.0, current_stock=i * 3 % 17,
+                    safety_stock_threshold=2) for i in range(count)]
+
+def test_sharded_manager_matches_single_manager(sharded_manager: ShardedInventoryManager):
+    """Test that routing, bulk batches and merged top/bottom queries agree with a plain InventoryManager."""
+    reference = InventoryManager()
+    products = _products("SHD", 60)
+    for product in products:
+        sharded_manager.add_product(product)
+        reference.add_product(Product(**{name: getattr(product, name) for name in (
+            "sku", "name", "price", "current_stock", "safety_stock_threshold")}))
+    reference_ids = {product.sku: product.product_id for product in reference.list_all_products()}
+
+    rng = random.Random(10)
+    batch, reference_batch = [], []
+    for _ in range(500):
+        product = rng.choice(products)
+        quantity = rng.randint(1, 9)
+        batch.append(Transaction(product.product_id, quantity, Transaction.TYPE_INBOUND))
+        reference_batch.append(Transaction(reference_ids[product.sku], quantity, Transaction.TYPE_INBOUND))
+
+    result = sharded_manager.apply_transactions(batch)
+    reference.apply_transactions(reference_batch)
+    sharded_manager.update_stock(Transaction(products[0].product_id, -1000, Transaction.TYPE_OUTBOUND))
+    reference.update_stock(Transaction(reference_ids[products[0].sku], -1000, Transaction.TYPE_OUTBOUND))
+
+    assert result.applied == 500
+    stock_by_sku = lambda items: {product.sku: product.current_stock for product in items}
+    assert stock_by_sku(sharded_manager.list_all_products()) == stock_by_sku(reference.list_all_products())
+    assert sharded_manager.get_product(products[0].product_id).current_stock == 0
+    assert ([p.current_stock for p in sharded_manager.get_top_n_products_by_stock(10)]
+            == [p.current_stock for p in reference.get_top_n_products_by_stock(10)])
+    assert ([p.current_stock for p in sharded_manager.get_bottom_n_products_by_stock(5)]
+            == [p.current_stock for p in reference.get_bottom_n_products_by_stock(5)])
+
+def test_sharded_manager_propagates_shard_errors(sharded_manager: ShardedInventoryManager):
+    """Test that worker-side errors are raised in the caller and leave the shard usable."""
+    product = _products("ERR", 1)[0]
+    sharded_manager.add_product(product)
+
+    with pytest.raises(ValueError, match="already exists"):
+        sharded_manager.add_product(product)
+    with pytest.raises(ValueError, match="not found"):
+        sharded_manager.update_stock(Transaction("missing-id", 1, Transaction.TYPE_INBOUND))
+    assert sharded_manager.get_product("missing-id") is None
+    assert sharded_manager.get_product(product.product_id).sku == "ERR0"
+
+def test_sharded_batch_with_unknown_product_changes_no_shard(sharded_manager: ShardedInventoryManager):
+    """Test that a cross-shard batch is checked on every shard before any shard applies its part."""
+    products = _products("TWO", 12)
+    for product in products:
+        sharded_manager.add_product(product)
+    assert len({sharded_manager.shard_of(product.product_id) for product in products}) > 1
+    before = {product.product_id: sharded_manager.get_product(product.product_id).current_stock
+              for product in products}
+
+    batch = [Transaction(product.product_id, 5, Transaction.TYPE_INBOUND) for product in products]
+    batch.append(Transaction("missing-id", 1, Transaction.TYPE_INBOUND))
+    with pytest.raises(ValueError, match="missing-id not found"):
+        sharded_manager.apply_transactions(batch)
+    assert {product_id: sharded_manager.get_product(product_id).current_stock for product_id in before} == before
+
+@pytest.mark.parametrize("shards", [0, -1])
+def test_sharded_manager_rejects_fewer_than_one_shard(shards):
+    with pytest.raises(ValueError, match="positive"):
+        ShardedInventoryManager(shards=shards)
+
+def test_sku_is_unique_across_shards(sharded_manager: ShardedInventoryManager):
+    """Test that a SKU taken on one shard is refused on every other one, and that a failed add frees its SKU."""
+    first = Product(sku="UNIQ1", name="First", price=1.0)
+    sharded_manager.add_product(first)
+    for _ in range(20):
+        duplicate = Product(sku="UNIQ1", name="Duplicate", price=1.0)
+        if sharded_manager.shard_of(duplicate.product_id) != sharded_manager.shard_of(first.product_id):
+            break
+    with pytest.raises(ValueError, match="SKU UNIQ1 already exists"):
+        sharded_manager.add_product(duplicate)
+    assert sharded_manager.get_product(duplicate.product_id) is None
+
+    same_id = Product(sku="UNIQ2", name="Same ID", price=1.0)
+    same_id.product_id = first.product_id
+    with pytest.raises(ValueError, match="already exists"):
+        sharded_manager.add_product(same_id)
+    sharded_manager.add_product(Product(sku="UNIQ2", name="Second", price=1.0))
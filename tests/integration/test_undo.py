@@ -0,0 +1,89 @@
+import pytest
+from oes_core.models import Product
+from oes_core.inventory import InventoryManager
+from oes_core.persistence import InventoryStore
+
+def _two_products(manager: InventoryManager):
+    first = Product(sku="UND1", name="Undo A", price=1, current_stock=5, safety_stock_threshold=2)
+    second = Product(sku="UND2", name="Undo B", price=1, current_stock=50, safety_stock_threshold=2)
+    manager.add_product(first)
+    manager.add_product(second)
+    return first, second
+
+def test_undo_last_restores_capped_outbound(empty_inventory_manager: InventoryManager, outbound):
+    """Undoing a capped OUTBOUND restores the stock it actually removed, not its quantity."""
+    first, _ = _two_products(empty_inventory_manager)
+    empty_inventory_manager.update_stock(outbound(first.product_id, 8))
+    assert first.current_stock == 0
+    assert [p.sku for p in empty_inventory_manager.get_low_stock_products()] == ["UND1"]
+
+    assert empty_inventory_manager.undo_last() == 1
+    assert first.current_stock == 5
+    assert empty_inventory_manager.get_low_stock_products() == []
+    assert len(empty_inventory_manager._transaction_history) == 0
+
+def test_rollback_to_reverses_net_deltas_of_singles_and_batches(empty_inventory_manager: InventoryManager,
+                                                                 inbound, outbound):
+    """A rollback over single updates and a batch (with capping) restores stock, ranking and history."""
+    first, second = _two_products(empty_inventory_manager)
+    keep = inbound(first.product_id, 10)
+    empty_inventory_manager.update_stock(keep)
+    empty_inventory_manager.update_stock(outbound(second.product_id, 20))
+    empty_inventory_manager.apply_transactions([outbound(first.product_id, 40), inbound(first.product_id, 3),
+                                                inbound(second.product_id, 100)])
+    assert (first.current_stock, second.current_stock) == (3, 130)
+
+    assert empty_inventory_manager.rollback_to(keep.transaction_id) == 4
+    assert (first.current_stock, second.current_stock) == (15, 50)
+    assert [p.sku for p in empty_inventory_manager.get_top_n_products_by_stock(2)] == ["UND2", "UND1"]
+    assert list(empty_inventory_manager.history_for(first.product_id)) == [keep]
+    assert list(empty_inventory_manager.history_for(second.product_id)) == []
+
+    assert empty_inventory_manager.rollback_to(keep.transaction_id) == 0
+    with pytest.raises(ValueError, match="not found"):
+        empty_inventory_manager.rollback_to("unknown")
+    with pytest.raises(ValueError, match="only 1 recorded"):
+        empty_inventory_manager.undo_last(2)
+
+def test_undo_is_replayed_on_recovery(tmp_path, inbound, outbound):
+    """Undo is logged to the WAL as net stock deltas and replayed after a restart."""
+    store = InventoryStore(str(tmp_path))
+    manager = store.recover()
+    first, second = _two_products(manager)
+    manager.update_stock(outbound(first.product_id, 9))
+    manager.update_stock(inbound(second.product_id, 4))
+    manager.undo_last(2)
+    manager.update_stock(inbound(second.product_id, 1))
+    store.close()
+
+    recovered_store = InventoryStore(str(tmp_path))
+    recovered = recovered_store.recover()
+    try:
+        assert recovered.get_product(first.product_id).current_stock == 5
+        assert recovered.get_product(second.product_id).current_stock == 51
+        assert len(recovered._transaction_history) == 1
+    finally:
+        recovered_store.close()
+
+def test_undo_in_thread_safe_mode(inbound):
+    """Undo holds every stripe and the history lock."""
+    manager = InventoryManager(thread_safe=True)
+    first, _ = _two_products(manager)
+    manager.apply_transactions([inbound(first.product_id, 1) for _ in range(10)])
+
+    assert manager.undo_last(4) == 4
+    assert first.current_stock == 11
+
+def test_history_read_survives_a_concurrent_undo(inbound):
+    """In thread-safe mode a history query's rows are taken under the history lock, before an undo truncates them."""
+    manager = InventoryManager(thread_safe=True)
+    first, _ = _two_products(manager)
+    recorded = [inbound(first.product_id, quantity) for quantity in range(1, 601)]
+    manager.apply_transactions(recorded)
+
+    by_product = manager.history_for(first.product_id)
+    by_time = manager.history_between(recorded[0].timestamp, recorded[-1].timestamp)
+    assert next(by_product) == recorded[0] and next(by_time) == recorded[0]
+    manager.undo_last(550)
+    assert list(by_product) == recorded[1:] and list(by_time) == recorded[1:]
+    assert list(manager.history_for(first.product_id)) == recorded[:50]
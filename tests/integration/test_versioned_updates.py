@@ -0,0 +1,86 @@
+import threading
+import pytest
+from oes_core.inventory import InventoryManager, VersionConflictError
+from oes_core.models import Product
+from oes_core.product_table import MappedProductTable
+
+def test_every_stock_change_bumps_the_version(base_product: Product, inbound):
+    manager = InventoryManager()
+    manager.add_product(base_product)
+    assert manager.get_versioned_stock(base_product.product_id) == (0, 0)
+    manager.update_stock(inbound(base_product.product_id, 5))
+    manager.apply_transactions([inbound(base_product.product_id)] * 3)
+    assert manager.get_versioned_stock(base_product.product_id) == (8, 2)
+    manager.undo_last(1)
+    assert base_product.version == 3
+    assert manager.get_versioned_stock("missing-product") is None
+
+def test_compare_and_update_fails_fast_on_stale_version(base_product: Product, inbound):
+    manager = InventoryManager(thread_safe=True)
+    manager.add_product(base_product)
+    stock, version = manager.get_versioned_stock(base_product.product_id)
+    assert manager.compare_and_update(base_product.product_id, version, inbound(base_product.product_id, 4)) == 1
+
+    with pytest.raises(VersionConflictError) as conflict:
+        manager.compare_and_update(base_product.product_id, version, inbound(base_product.product_id, 4))
+    assert (conflict.value.expected_version, conflict.value.actual_version) == (0, 1)
+    assert base_product.current_stock == 4 and len(list(manager.history_for(base_product.product_id))) == 1
+    with pytest.raises(ValueError, match="not"):
+        manager.compare_and_update("missing-product", 0, inbound("missing-product"))
+
+def test_only_one_reservation_wins_the_last_unit(base_product: Product, outbound):
+    manager = InventoryManager(thread_safe=True)
+    base_product.current_stock = 1
+    manager.add_product(base_product)
+    barrier = threading.Barrier(8)
+    winners = []
+
+    def reserve():
+        stock, version = manager.get_versioned_stock(base_product.product_id)
+        barrier.wait()
+        if stock >= 1:
+            try:
+                manager.compare_and_update(base_product.product_id, version, outbound(base_product.product_id))
+                winners.append(threading.get_ident())
+            except VersionConflictError:
+                pass
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(winners) == 1 and base_product.current_stock == 0
+
+@pytest.mark.parametrize("thread_safe", [False, True])
+def test_multi_product_reservation_is_all_or_nothing(thread_safe: bool, inbound, outbound):
+    manager = InventoryManager(thread_safe=thread_safe)
+    products = [Product(sku=f"CAS{i}", name=f"Part {i}", price=1.0, current_stock=5, safety_stock_threshold=0)
+                for i in range(3)]
+    manager.add_products(products)
+    versions = {product.product_id: manager.get_versioned_stock(product.product_id)[1] for product in products}
+
+    manager.update_stock(inbound(products[2].product_id))
+    with pytest.raises(VersionConflictError) as conflict:
+        manager.compare_and_apply(versions, [outbound(product.product_id, 2) for product in products[:2]])
+    assert conflict.value.product_id == products[2].product_id
+    assert [product.current_stock for product in products] == [5, 5, 6]
+
+    versions[products[2].product_id] = products[2].version
+    result = manager.compare_and_apply(versions, [outbound(product.product_id, 2) for product in products[:2]])
+    assert result.applied == 2 and [product.current_stock for product in products] == [3, 3, 6]
+    assert [product.version for product in products] == [1, 1, 1]
+
+    with pytest.raises(ValueError, match="No expected version"):
+        manager.compare_and_apply({}, [outbound(products[0].product_id)])
+
+def test_product_table_views_carry_versions(tmp_path, outbound):
+    with MappedProductTable(str(tmp_path / "products.tbl")) as table:
+        manager = InventoryManager(product_table=table)
+        product = Product(sku="MAP1", name="Mapped", price=1.0, current_stock=3, safety_stock_threshold=0)
+        manager.add_product(product)
+        manager.compare_and_update(product.product_id, 0, outbound(product.product_id))
+        assert manager.get_versioned_stock(product.product_id) == (2, 1)
+        assert manager.get_product(product.product_id).to_product().version == 1
+        with pytest.raises(VersionConflictError):
+            manager.compare_and_update(product.product_id, 0, outbound(product.product_id))
@@ -0,0 +1,20 @@
+from benchmarks.suite import compare, run_suite
+
+def _results(**ns_per_op):
+    return {"results": {key: {"ns_per_op": value} for key, value in ns_per_op.items()}}
+
+def test_compare_flags_only_regressions_above_threshold():
+    baseline = _results(a=100.0, b=100.0, c=100.0)
+    current = _results(a=109.0, b=111.0, c=50.0, d=1000.0)
+
+    regressions = compare(baseline, current, threshold=0.10)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b: 100 -> 111 ns/op")
+
+def test_run_suite_writes_one_result_per_case_and_size():
+    document = run_suite(sizes=[50], cases=["get_product", "product_construction"], repeats=1, seed=1)
+
+    assert sorted(document["results"]) == ["get_product[50]", "product_construction[50]"]
+    assert document["meta"]["seed"] == 1
+    assert all(result["ns_per_op"] > 0 for result in document["results"].values())
@@ -0,0 +1,96 @@
+import math
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from oes_core.forecasting import DemandForecaster
+from oes_core.history import TransactionHistory
+from oes_core.models import Transaction
+
+BASE = datetime(2024, 1, 1)
+
+def _outbound(product_id: str, quantity: int, day: float) -> Transaction:
+    transaction = Transaction(product_id=product_id, quantity_change=-quantity,
+                              transaction_type=Transaction.TYPE_OUTBOUND)
+    transaction.timestamp = BASE + timedelta(days=day)
+    return transaction
+
+def _record(history: TransactionHistory, forecaster: DemandForecaster, transactions) -> None:
+    first_row = len(history)
+    history.extend(transactions)
+    forecaster.observe(history, first_row)
+
+def test_steady_demand_converges_to_its_rate():
+    history, forecaster = TransactionHistory(), DemandForecaster(half_life_days=7.0)
+    for hour in range(24 * 120):
+        _record(history, forecaster, [_outbound("A", 2, hour / 24)])
+    inbound = Transaction(product_id="A", quantity_change=500, transaction_type=Transaction.TYPE_INBOUND)
+    inbound.timestamp = BASE + timedelta(days=120)
+    _record(history, forecaster, [inbound])  # not demand
+
+    now = BASE + timedelta(days=120)
+    assert forecaster.velocity(history, "A", now) == pytest.approx(48.0, rel=0.01)
+    assert forecaster.velocity(history, "B", now) == 0.0
+    # One half-life without orders halves the velocity.
+    assert forecaster.velocity(history, "A", now + timedelta(days=7)) == pytest.approx(24.0, rel=0.01)
+
+def test_batched_rebuilt_and_one_by_one_states_agree():
+    rng = random.Random(3)
+    transactions = [_outbound(f"P{rng.randrange(20)}", rng.randint(1, 9), rng.uniform(0, 30)) for _ in range(2_000)]
+    one_by_one, batched, rebuilt = DemandForecaster(), DemandForecaster(), DemandForecaster()
+    history = TransactionHistory()
+    for transaction in transactions:
+        _record(history, one_by_one, [transaction])  # out of time order on purpose
+    batch_history = TransactionHistory()
+    for start in range(0, len(transactions), 500):
+        _record(batch_history, batched, transactions[start:start + 500])
+    rebuilt.rebuild(history)
+
+    product_ids = [f"P{i}" for i in range(20)]
+    now = BASE + timedelta(days=31)
+    expected = rebuilt.forecast(history, product_ids, [0] * 20, now=now).velocity
+    assert np.allclose(one_by_one.forecast(history, product_ids, [0] * 20, now=now).velocity, expected)
+    assert np.allclose(batched.forecast(batch_history, product_ids, [0] * 20, now=now).velocity, expected)
+
+def test_retract_takes_back_exactly_the_undone_rows():
+    history, forecaster = TransactionHistory(), DemandForecaster()
+    _record(history, forecaster, [_outbound("A", 5, day) for day in range(10)])
+    before = forecaster.velocity(history, "A", BASE + timedelta(days=20))
+    for rows in ([_outbound("A", 7, 10.5)], [_outbound("A", 3, 11 + i / 100) for i in range(100)]):
+        first_row = len(history)
+        _record(history, forecaster, rows)
+        forecaster.retract(history, first_row)
+        history.truncate(first_row)
+    assert forecaster.velocity(history, "A", BASE + timedelta(days=20)) == pytest.approx(before)
+
+    forecaster.retract(history, 0)
+    history.truncate(0)
+    assert forecaster.velocity(history, "A", BASE + timedelta(days=20)) == 0.0
+
+def test_reorder_point_and_days_of_cover():
+    history, forecaster = TransactionHistory(), DemandForecaster(half_life_days=7.0, lead_time_days=4.0)
+    _record(history, forecaster, [_outbound("A", 10, day) for day in range(120)])
+    now = BASE + timedelta(days=120)
+    forecast = forecaster.forecast(history, ["A", "B"], [50, 5], service_level=0.5, now=now)
+    velocity = forecast.velocity[0]
+    assert velocity == pytest.approx(10.0, rel=0.05)
+    assert forecast.reorder_point.tolist() == [math.ceil(velocity * 4), 0]  # z = 0 at a 50% service level
+    assert forecast.days_of_cover.tolist() == [pytest.approx(50 / velocity), math.inf]
+    assert forecast.below_reorder_point() == []
+
+    # Daily orders of 10: the demand variance is ~100 units^2 per day, its std over 4 days ~20.
+    strict = forecaster.forecast(history, ["A"], [60], lead_time_days=[4.0], service_level=0.99, now=now)
+    assert strict.demand_std[0] == pytest.approx(20.0, rel=0.05)
+    assert strict.reorder_point[0] == math.ceil(velocity * 4 + 2.3263478740 * strict.demand_std[0])
+    assert strict.below_reorder_point() == ["A"]
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        DemandForecaster(half_life_days=0)
+    with pytest.raises(ValueError):
+        DemandForecaster(service_level=1.0)
+    forecaster = DemandForecaster()
+    with pytest.raises(ValueError):
+        forecaster.forecast(TransactionHistory(), ["A", "B"], [1, 2], lead_time_days=[1.0])
+    with pytest.raises(ValueError):
+        forecaster.forecast(TransactionHistory(), ["A"], [1], lead_time_days=-1.0)
@@ -0,0 +1,113 @@
+import pytest
+import random
+import uuid
+from datetime import datetime, timedelta
+from oes_core.history import TransactionHistory
+from oes_core.models import Product, Transaction
+
+def _transactions():
+    product_id = str(uuid.uuid4())
+    return [
+        Transaction(product_id=product_id, quantity_change=50, transaction_type=Transaction.TYPE_INBOUND),
+        Transaction(product_id=product_id, quantity_change=-7, transaction_type=Transaction.TYPE_OUTBOUND),
+        Transaction(product_id="other_id", quantity_change=-3, transaction_type=Transaction.TYPE_ADJUSTMENT),
+    ]
+
+def test_models_are_slotted():
+    """Slotted dataclasses carry no per-instance __dict__."""
+    product = Product(sku="SLOT1", name="Slotted", price=1.0)
+    assert not hasattr(product, "__dict__")
+    assert not hasattr(_transactions()[0], "__dict__")
+
+def test_history_round_trips_every_field():
+    """Rows materialised from the columns are equal to the transactions that were appended."""
+    transactions = _transactions()
+    history = TransactionHistory(transactions)
+
+    assert len(history) == 3
+    assert list(history) == transactions
+    assert history[-1] == transactions[-1]
+    assert history[0:2] == transactions[0:2]
+    assert history[1].transaction_type == Transaction.TYPE_OUTBOUND
+    assert history[1].timestamp == transactions[1].timestamp
+
+    with pytest.raises(IndexError):
+        history[3]
+
+def test_history_keeps_irregular_transaction_ids():
+    """IDs that are not UUIDs cannot be packed, but must still round-trip."""
+    transaction = _transactions()[0]
+    transaction.transaction_id = "legacy-42"
+    history = TransactionHistory([transaction])
+
+    assert history[0].transaction_id == "legacy-42"
+
+def test_history_rejects_out_of_range_quantity_without_misaligning_columns():
+    history = TransactionHistory(_transactions())
+    # Transaction() itself rejects the quantity; the columns must stay aligned for trusted constructors too.
+    too_big = Transaction.prevalidated(product_id="big", quantity_change=2 ** 31,
+                                       transaction_type=Transaction.TYPE_INBOUND)
+
+    with pytest.raises(OverflowError):
+        history.append(too_big)
+
+    assert len(history) == 3
+    assert history[-1].product_id == "other_id"
+
+def test_history_is_more_compact_than_objects():
+    """A row costs well under 64 bytes in the columns."""
+    history = TransactionHistory(_transactions() * 100)
+    assert history.nbytes() / len(history) < 64
+
+@pytest.mark.parametrize("jitter_us", [0, 300])
+def test_history_range_queries_match_full_scan(jitter_us: int):
+    """Posting lists and the block time index give the same rows as a scan, also with out-of-order timestamps."""
+    rng = random.Random(jitter_us)
+    base = datetime(2024, 1, 1)
+    transactions = []
+    for i in range(3000):
+        transaction = Transaction(product_id=f"p{rng.randrange(7)}", quantity_change=1,
+                                  transaction_type=Transaction.TYPE_INBOUND)
+        transaction.timestamp = base + timedelta(microseconds=10 * i - rng.randrange(jitter_us + 1))
+        transactions.append(transaction)
+    history = TransactionHistory()
+    for start in range(0, len(transactions), 500):
+        history.extend(transactions[start:start + 500])
+
+    for _ in range(20):
+        t1 = base + timedelta(microseconds=rng.randrange(-500, 31000))
+        t2 = t1 + timedelta(microseconds=rng.randrange(0, 8000))
+        assert list(history.history_between(t1, t2)) == [t for t in transactions if t1 <= t.timestamp <= t2]
+        assert list(history.history_for("p3", since=t1, until=t2)) == [
+            t for t in transactions if t.product_id == "p3" and t1 <= t.timestamp <= t2]
+        assert list(history.history_for("p5", since=t1)) == [
+            t for t in transactions if t.product_id == "p5" and t.timestamp >= t1]
+    assert list(history.history_for("p1")) == [t for t in transactions if t.product_id == "p1"]
+    assert list(history.history_for("missing")) == []
+
+def test_history_truncate_keeps_indexes_consistent():
+    """Truncation drops rows from the columns, the posting lists and the time index."""
+    base = datetime(2024, 1, 1)
+    transactions = []
+    for i in range(1000):
+        transaction = Transaction(product_id=f"p{i % 3}", quantity_change=-1,
+                                  transaction_type=Transaction.TYPE_OUTBOUND)
+        transaction.timestamp = base + timedelta(seconds=i)
+        transactions.append(transaction)
+    history = TransactionHistory()
+    history.extend(transactions, applied_deltas=[0 if i % 2 else -1 for i in range(1000)])
+
+    assert history.row_of(transactions[700].transaction_id) == 700
+    assert history.applied_deltas_since(994) == {"p1": -1, "p0": -1, "p2": -1}
+
+    history.truncate(600)
+    assert len(history) == 600
+    assert history.row_of(transactions[700].transaction_id) is None
+    assert list(history.history_for("p0", since=base + timedelta(seconds=590))) == [
+        transactions[591], transactions[594], transactions[597]]
+    assert list(history.history_between(base + timedelta(seconds=598), base + timedelta(seconds=900))) == [
+        transactions[598], transactions[599]]
+
+    history.extend(transactions[600:601])
+    assert history[-1] == transactions[600]
+    assert list(history.history_for("p0", since=base + timedelta(seconds=599))) == [transactions[600]]
@@ -0,0 +1,39 @@
+import threading
+import time
+import uuid
+from oes_core.ids import IdGenerator, timestamp_ms_of
+
+def test_ids_are_uuid7_strictly_increasing_and_unique():
+    generator = IdGenerator(batch_size=64)
+    before_ms = time.time_ns() // 1_000_000
+    ids = [generator.new_id() for _ in range(1000)] + generator.new_ids(5000) + [generator.new_id()]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    for identifier in ids[::250]:
+        parsed = uuid.UUID(identifier)
+        assert (parsed.version, parsed.variant, str(parsed)) == (7, uuid.RFC_4122, identifier)
+    assert before_ms <= timestamp_ms_of(ids[0]) <= timestamp_ms_of(ids[-1])
+
+def test_counter_overflow_borrows_the_next_millisecond():
+    """More than 4096 ids in one millisecond stay ordered by moving into the next millisecond."""
+    generator = IdGenerator()
+    ids = generator.new_ids(10_000)
+    assert ids == sorted(ids)
+    assert timestamp_ms_of(ids[-1]) - timestamp_ms_of(ids[0]) >= 2
+
+def test_ids_are_unique_across_threads():
+    generator = IdGenerator(batch_size=16)
+    per_thread = [[] for _ in range(4)]
+
+    def take(ids):
+        for _ in range(2000):
+            ids.append(generator.new_id())
+    threads = [threading.Thread(target=take, args=(ids,)) for ids in per_thread]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({identifier for ids in per_thread for identifier in ids}) == 8000
+    assert all(ids == sorted(ids) for ids in per_thread)
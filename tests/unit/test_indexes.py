@@ -0,0 +1,78 @@
+import random
+import pytest
+from oes_core.indexes import NamePrefixTrie, StockIndex
+
+def _expected_desc(stock_by_id):
+    return [pid for stock, pid in sorted(((s, p) for p, s in stock_by_id.items()), reverse=True)]
+
+def test_stock_index_top_bottom_and_rank_small():
+    """Test the basic queries on a handful of products."""
+    index = StockIndex()
+    for product_id, stock in [("a", 5), ("b", 50), ("c", 1), ("d", 20)]:
+        index.update(product_id, stock)
+
+    assert list(index.top(2)) == ["b", "d"]
+    assert list(index.bottom(2)) == ["c", "a"]
+    assert list(index.top(10)) == ["b", "d", "a", "c"]
+    assert list(index.top(0)) == []
+    assert index.rank("b") == 0
+    assert index.rank("c") == 3
+    assert index.rank("missing") is None
+
+    index.update("c", 100)
+    assert list(index.top(1)) == ["c"]
+    index.discard("c")
+    assert "c" not in index
+    assert len(index) == 3
+
+@pytest.mark.parametrize("seed", [1, 7, 42])
+def test_stock_index_matches_sorted_reference_under_random_updates(seed: int):
+    """Fuzz the bucketed sorted list (splits, merges, Fenwick tree) against a plain sorted() reference."""
+    rng = random.Random(seed)
+    index = StockIndex()
+    reference = {}
+
+    for step in range(6000):
+        product_id = f"P{rng.randrange(2500)}"
+        if rng.random() < 0.15 and product_id in reference:
+            index.discard(product_id)
+            del reference[product_id]
+        else:
+            stock = rng.randrange(300)
+            index.update(product_id, stock)
+            reference[product_id] = stock
+
+    expected = _expected_desc(reference)
+    assert len(index) == len(expected)
+    assert list(index.top(len(expected))) == expected
+    assert list(index.bottom(25)) == expected[::-1][:25]
+    for position in rng.sample(range(len(expected)), 50):
+        assert index.rank(expected[position]) == position
+
+def test_name_prefix_trie_search_is_case_insensitive_and_ordered():
+    """Test prefix lookups, limits and removals on the name trie."""
+    trie = NamePrefixTrie()
+    for name, product_id in [("Laptop Pro", "p1"), ("laptop", "p2"), ("Lamp", "p3"), ("Desk", "p4")]:
+        trie.insert(name, product_id)
+
+    assert trie.search("LA") == ["p3", "p2", "p1"]
+    assert trie.search("lap", limit=1) == ["p2"]
+    assert trie.search("x") == []
+    assert len(trie) == 4
+
+    trie.remove("Laptop Pro", "p1")
+    assert trie.search("laptop") == ["p2"]
+    trie.prune("l", {"p3"})
+    assert trie.search("") == ["p4", "p2"]
+
+def test_stock_index_update_many_matches_single_updates():
+    """Test both bulk paths (merge of a large batch, per-key insert of a small one) against single updates."""
+    rng = random.Random(3)
+    bulk, single = StockIndex(), StockIndex()
+    for batch_size in (2000, 3000, 10, 1):
+        batch = {f"p{rng.randrange(6000)}": rng.randrange(100) for _ in range(batch_size)}
+        bulk.update_many(batch)
+        for product_id, stock in batch.items():
+            single.update(product_id, stock)
+        assert list(bulk.top(len(single))) == list(single.top(len(single)))
+        assert bulk.rank("p1") == single.rank("p1")
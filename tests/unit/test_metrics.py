@@ -0,0 +1,78 @@
+import random
+import threading
+import pytest
+from oes_core.metrics import LatencyHistogram, MetricsRegistry, _bucket_bounds, _bucket_of, render_prometheus
+
+def test_buckets_are_contiguous_and_within_relative_error():
+    """Every value maps to a bucket containing it, with at most 12.5% bucket width."""
+    previous_high = -1
+    for bucket in range(500):
+        low, high = _bucket_bounds(bucket)
+        assert low == previous_high + 1
+        assert (high - low) <= max(low, 1) / 8
+        previous_high = high
+    rng = random.Random(5)
+    for value in [0, 1, 15, 16, 17, 1000, 2 ** 40 + 3] + [rng.randrange(2 ** 50) for _ in range(1000)]:
+        low, high = _bucket_bounds(_bucket_of(value))
+        assert low <= value <= high
+
+def test_histogram_percentiles_and_snapshot():
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+    histogram.record(5_000_000, error=True)
+
+    snapshot = histogram.snapshot()
+    assert (snapshot["count"], snapshot["errors"]) == (1001, 1)
+    assert snapshot["min_ns"] == pytest.approx(1000, rel=0.125)
+    assert snapshot["max_ns"] == pytest.approx(5_000_000, rel=0.125)
+    assert snapshot["p50_ns"] == pytest.approx(500_000, rel=0.125)
+    assert snapshot["p99_ns"] == pytest.approx(990_000, rel=0.125)
+    assert histogram.percentile(1.0) == snapshot["max_ns"]
+    assert LatencyHistogram().snapshot()["p50_ns"] is None
+
+def test_histogram_merges_threads_and_resets_in_place():
+    registry = MetricsRegistry()
+    timed = registry.timed("call", lambda: None)
+    threads = [threading.Thread(target=lambda: [timed() for _ in range(1000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.snapshot()["call"]["count"] == 4000
+
+    registry.reset()
+    timed()
+    assert registry.snapshot()["call"]["count"] == 1
+
+def test_histogram_folds_finished_threads_into_one_shard():
+    histogram = LatencyHistogram()
+    histogram.record(5)
+    for wave in range(3):
+        threads = [threading.Thread(target=lambda: [histogram.record(1_000, error=True) for _ in range(10)])
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    # The calling thread's shard plus one shared shard of every finished thread.
+    assert len(histogram._shards) == 2
+    snapshot = histogram.snapshot()
+    assert (snapshot["count"], snapshot["errors"], snapshot["total_ns"]) == (601, 600, 600_005)
+
+    histogram.reset()
+    assert histogram.count == 0
+
+def test_render_prometheus_histogram_is_cumulative():
+    registry = MetricsRegistry()
+    timed = registry.timed("get_product", lambda: None)
+    for _ in range(3):
+        timed()
+
+    text = render_prometheus(registry)
+    assert '# TYPE oes_call_latency_seconds histogram' in text
+    assert 'oes_call_latency_seconds_bucket{name="get_product",le="+Inf"} 3' in text
+    assert 'oes_call_latency_seconds_count{name="get_product"} 3' in text
+    assert 'oes_call_errors_total{name="get_product"} 0' in text
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in text.splitlines() if "_bucket{" in line]
+    assert buckets == sorted(buckets)
@@ -1,6 +1,7 @@
 import pytest
 import uuid
 import datetime
+import numpy as np
 from oes_core.models import Product, Transaction
 
 # Helper function to create a base product for reuse
@@ -94,3 +95,28 @@ def test_transaction_quantity_value_error():
             quantity_change=10,
             transaction_type=Transaction.TYPE_OUTBOUND
         )
+
+def test_transaction_quantity_must_fit_the_history_column():
+    for quantity in (3_000_000_000, -2 ** 31 - 1, 2.5, True):
+        with pytest.raises(ValueError, match="Quantity change"):
+            Transaction(product_id="some_id", quantity_change=quantity, transaction_type=Transaction.TYPE_ADJUSTMENT)
+    for quantity in (np.int64(-5), np.int32(2 ** 31 - 1)):
+        transaction = Transaction(product_id="some_id", quantity_change=quantity,
+                                  transaction_type=Transaction.TYPE_ADJUSTMENT)
+        assert type(transaction.quantity_change) is int and transaction.quantity_change == quantity
+    with pytest.raises(ValueError, match="outside"):
+        Transaction(product_id="some_id", quantity_change=np.int64(2 ** 40), transaction_type=Transaction.TYPE_ADJUSTMENT)
+
+def test_prevalidated_constructors_match_dataclass_constructors():
+    """prevalidated() builds equal objects without re-running validation, with time-ordered UUIDv7 ids."""
+    product = Product(sku="P001", name="Macbook Pro", price=1200.50, current_stock=4)
+    trusted = Product.prevalidated("P001", "Macbook Pro", 1200.50, current_stock=4,
+                                   product_id=product.product_id, create_at=product.create_at)
+    assert trusted == product
+    assert uuid.UUID(Product.prevalidated("P002", "Mouse", 9.5).product_id).version == 7
+
+    first = Transaction(product_id="some_id", quantity_change=1, transaction_type=Transaction.TYPE_INBOUND)
+    second = Transaction.prevalidated("some_id", -2, Transaction.TYPE_OUTBOUND)
+    assert (second.quantity_change, second.transaction_type) == (-2, Transaction.TYPE_OUTBOUND)
+    assert isinstance(second.timestamp, datetime.datetime)
+    assert first.transaction_id < second.transaction_id
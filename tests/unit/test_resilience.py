@@ -0,0 +1,125 @@
+import threading
+import time
+import pytest
+from oes_core.resilience import (CLOSED, HALF_OPEN, OPEN, AdaptiveConcurrencyLimiter, CircuitBreaker,
+                                 CircuitOpenError, ConcurrencyLimitError, DeadlineExceededError, ResilientCaller,
+                                 RetryPolicy)
+
+def test_breaker_opens_fails_fast_and_probes_half_open(fake_clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10.0, clock=fake_clock)
+    for _ in range(2):
+        breaker.release(breaker.acquire(), failed=True)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    fake_clock.now = 10.0
+    assert breaker.state == HALF_OPEN
+    probe = breaker.acquire()
+    assert probe is True
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()  # only one probe at a time
+    breaker.release(probe, failed=True)
+    assert breaker.state == OPEN and breaker.opened == 2
+
+    fake_clock.now = 20.0
+    breaker.release(breaker.acquire(), failed=False)
+    assert breaker.state == CLOSED
+    assert breaker.stats() == {"state": CLOSED, "successes": 1, "failures": 3, "rejected": 2, "opened": 2}
+
+def test_breaker_counts_only_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+    for failed in (True, False, True, False):
+        breaker.release(breaker.acquire(), failed=failed)
+    assert breaker.state == CLOSED
+
+def test_limiter_grows_additively_and_backs_off_multiplicatively():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=2, max_limit=5, backoff_ratio=0.5, max_wait=0)
+    for _ in range(4):
+        limiter.acquire()
+    with pytest.raises(ConcurrencyLimitError):
+        limiter.acquire()
+    for _ in range(4):
+        limiter.release(0.001, failed=False)
+    assert limiter.limit == 4 and limiter.increases == 2  # +1/limit while at least half the limit is in use
+
+    limiter.acquire()
+    limiter.release(0.001, failed=True)
+    assert limiter.limit == 2
+    limiter.acquire()
+    limiter.release(0.001, failed=True)
+    assert limiter.limit == 2  # floored at min_limit
+
+def test_limiter_treats_slow_calls_as_overload():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, latency_target=0.05)
+    limiter.acquire()
+    limiter.release(0.2, failed=False)
+    assert limiter.limit == 9 and limiter.decreases == 1
+
+def test_retries_back_off_and_stop_at_max_attempts():
+    sleeps = []
+    caller = ResilientCaller(retry=RetryPolicy(max_attempts=3, backoff=0.1, backoff_multiplier=2.0),
+                             sleep=sleeps.append)
+    outcomes = iter([RuntimeError("down"), RuntimeError("down"), 200])
+
+    def flaky(item):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert caller.call(flaky, "A") == 200
+    assert sleeps == [0.1, 0.2] and caller.stats()["retries"] == 2
+
+    def invalid(item):
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        caller.call(invalid, "A")  # the upstream answered: not retried
+    assert caller.stats()["retries"] == 2
+
+def test_open_circuit_is_not_retried():
+    calls = []
+    caller = ResilientCaller(breaker=CircuitBreaker(failure_threshold=1),
+                             retry=RetryPolicy(max_attempts=5, backoff=0), sleep=lambda _: None)
+
+    def down(item):
+        calls.append(item)
+        raise RuntimeError("down")
+
+    with pytest.raises(CircuitOpenError):
+        caller.call(down, "A")
+    assert calls == ["A"]
+
+def test_hedge_wins_over_slow_primary():
+    release = threading.Event()
+    attempts = []
+
+    def slow_first(item):
+        attempts.append(item)
+        if len(attempts) == 1:
+            release.wait(2)
+            return "slow"
+        return "fast"
+
+    caller = ResilientCaller(retry=RetryPolicy(hedge_after=0.02))
+    try:
+        assert caller.call(slow_first, "A") == "fast"
+        assert caller.stats()["hedges"] == 1 and caller.stats()["hedge_wins"] == 1
+    finally:
+        release.set()
+        caller.close()
+
+def test_deadline_abandons_a_hung_call():
+    release = threading.Event()
+    caller = ResilientCaller(retry=RetryPolicy(deadline=0.05))
+    start = time.monotonic()
+    try:
+        with pytest.raises(DeadlineExceededError) as error:
+            caller.call(lambda item: release.wait(2), "A")
+        assert isinstance(error.value, TimeoutError) and isinstance(error.value, RuntimeError)
+        assert time.monotonic() - start < 1.0
+        assert caller.stats()["deadlines_exceeded"] == 1
+    finally:
+        release.set()
+        caller.close()
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+from oes_core.cache import StatusCache
+
+def test_cache_respects_per_status_ttl(fake_clock):
+    """200 and 400 are cached for their own TTLs, 500 is never cached."""
+    cache = StatusCache(ttl_by_status={200: 10.0, 400: 60.0}, clock=fake_clock)
+    calls = []
+
+    def loader(value):
+        def load():
+            calls.append(value)
+            return value
+        return load
+
+    assert cache.get_or_load("ok", loader(200)) == 200
+    assert cache.get_or_load("bad", loader(400)) == 400
+    assert cache.get_or_load("boom", loader(500)) == 500
+    assert cache.get_or_load("ok", loader(200)) == 200
+    assert cache.get_or_load("boom", loader(500)) == 500
+    assert calls == [200, 400, 500, 500]
+
+    fake_clock.now = 30.0
+    cache.get_or_load("ok", loader(200))
+    cache.get_or_load("bad", loader(400))
+    assert calls == [200, 400, 500, 500, 200]
+    assert cache.stats()["expirations"] == 1
+
+def test_cache_never_stores_exceptions():
+    cache = StatusCache()
+    outcomes = iter([RuntimeError("Database connection lost."), 200])
+
+    def loader():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("item", loader)
+    assert cache.get_or_load("item", loader) == 200
+    assert cache.stats()["misses"] == 2
+
+def test_cache_evicts_least_recently_used():
+    cache = StatusCache(max_entries=2)
+    cache.get_or_load("a", lambda: 200)
+    cache.get_or_load("b", lambda: 200)
+    cache.get_or_load("a", lambda: 200)  # "a" becomes most recently used
+    cache.get_or_load("c", lambda: 200)
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+    assert cache.get_or_load("b", lambda: 400) == 400  # "b" was evicted
+    assert cache.get_or_load("c", lambda: 400) == 200
+
+def test_cache_single_flight_deduplicates_concurrent_lookups():
+    """Ten threads asking for the same key at once trigger exactly one upstream call."""
+    cache = StatusCache()
+    calls = []
+    barrier = threading.Barrier(10)
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return 200
+
+    def worker(results):
+        barrier.wait()
+        results.append(cache.get_or_load("hot", slow_loader))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [200] * 10
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] + stats["hits"] + stats["coalesced"] == 10